@@ -91,6 +91,134 @@ def _createArgparser():
     return parser
 
 
+def _createWorkerArgparser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="snapred worker",
+        description="Consume reduction requests from a work queue shared between analysis nodes",
+    )
+    parser.add_argument("--queue", default=None, help="queue directory (default: Config['workQueue.root'])")
+    parser.add_argument("--max-items", type=int, default=None, help="exit after processing this many items")
+    parser.add_argument(
+        "--exit-when-empty", action="store_true", help="exit when there are no pending items, instead of polling"
+    )
+    parser.add_argument(
+        "--submit",
+        nargs="+",
+        metavar="REQUEST_JSON",
+        default=None,
+        help="add the `ReductionRequest` JSON files to the queue, then exit",
+    )
+    parser.add_argument("--status", action="store_true", help="print the number of items in each state, then exit")
+    return parser
+
+
+def worker_start(args):
+    """Run a headless reduction worker against the shared work queue."""
+    from snapred.backend.dao.request import ReductionRequest
+    from snapred.backend.queue.ReductionWorker import ReductionWorker
+    from snapred.backend.queue.WorkQueue import WorkQueue
+
+    options = _createWorkerArgparser().parse_args(args)
+    queue = WorkQueue(root=options.queue) if options.queue is not None else WorkQueue()
+
+    if options.submit:
+        for requestFile in options.submit:
+            with open(requestFile, "r") as f:
+                request = ReductionRequest.model_validate_json(f.read())
+            item = queue.submit(request)
+            print(f"submitted {requestFile} as {item.id}")
+        return 0
+    if options.status:
+        for status, count in queue.counts().items():
+            print(f"{status}: {count}")
+        return 0
+
+    count = ReductionWorker(queue).run(maxItems=options.max_items, exitWhenEmpty=options.exit_when_empty)
+    logger.info(f"worker exiting after processing {count} items")
+    return 0
+
+
+def _createReplayArgparser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="snapred replay",
+        description="Re-execute a captured replay bundle, timing each algorithm and comparing its outputs",
+    )
+    parser.add_argument("bundle", help="replay-bundle JSON file")
+    parser.add_argument("--no-compare", action="store_true", help="do not compare the output workspaces")
+    parser.add_argument(
+        "--rtol",
+        type=float,
+        default=None,
+        help="relative tolerance for the comparison (default: Config['application.workflows_data.replay.rtol'])",
+    )
+    parser.add_argument("--script", default=None, help="write the bundle as a Mantid Python script, then exit")
+    return parser
+
+
+def replay_start(args):
+    """Re-execute a replay bundle headlessly: returns non-zero if any output differs from the captured output."""
+    from snapred.backend.profiling.AlgorithmReplay import AlgorithmReplay, ReplayBundle
+
+    options = _createReplayArgparser().parse_args(args)
+    bundle = ReplayBundle.load(options.bundle)
+    if options.script:
+        with open(options.script, "w") as f:
+            f.write(bundle.script())
+        return 0
+
+    # register the SNAPRed algorithms
+    import snapred.backend.recipe.algorithm  # noqa: F401
+
+    results = AlgorithmReplay(bundle, compare=not options.no_compare, rtol=options.rtol).run()
+    print(f"{'#':>4}  {'algorithm':<32} {'captured (s)':>12} {'replay (s)':>12}  result")
+    for n, result in enumerate(results):
+        status = "ok" if not result.differences else f"DIFFERS: {result.differences}"
+        print(f"{n:>4}  {result.name:<32} {result.capturedTime:>12.3f} {result.wallTime:>12.3f}  {status}")
+    captured, replayed = sum(r.capturedTime for r in results), sum(r.wallTime for r in results)
+    print(f"{'':>4}  {'total':<32} {captured:>12.3f} {replayed:>12.3f}")
+    return 1 if any(result.differences for result in results) else 0
+
+
+def _createProfileArgparser():
+    import argparse
+
+    from snapred.backend.profiling.ProgressRecorder import StepResource
+
+    parser = argparse.ArgumentParser(
+        prog="snapred profile",
+        description="Rank the profiled workflow steps by their mean usage of each resource",
+    )
+    parser.add_argument(
+        "--resource",
+        choices=[str(resource) for resource in StepResource],
+        default=None,
+        help="rank by this resource only (default: rank by each resource)",
+    )
+    parser.add_argument("--top", type=int, default=10, help="list at most this many steps for each resource")
+    return parser
+
+
+def profile_start(args):
+    """Report the resource usage of the workflow steps, from the saved execution-timing data."""
+    from snapred.backend.profiling.ProgressRecorder import ProgressRecorder, StepResource
+
+    options = _createProfileArgparser().parse_args(args)
+    resources = [StepResource(options.resource)] if options.resource else list(StepResource)
+    for resource in resources:
+        print(f"{resource} ({resource.unit})")
+        ranking = ProgressRecorder.rankSteps(resource)[: options.top]
+        if not ranking:
+            print("  <no measurements>")
+        for n, (name, count, value) in enumerate(ranking):
+            print(f"{n + 1:>4}  {name:<80} {count:>6} {value:>14.6g}")
+        print()
+    return 0
+
+
 def workbench_start(options):
     """Start workbench with necessary preloaded snapred imports."""
     from workbench.app.start import start as workbench_start
@@ -99,6 +227,15 @@ def workbench_start(options):
 
 
 def main(args=None):
+    # `args` does not include the program name: by default, it is taken from `sys.argv`.
+    argv = list(sys.argv[1:] if args is None else args)
+    if argv and argv[0] == "worker":
+        return worker_start(argv[1:])
+    if argv and argv[0] == "replay":
+        return replay_start(argv[1:])
+    if argv and argv[0] == "profile":
+        return profile_start(argv[1:])
+
     parser = _createArgparser()
     options, _ = parser.parse_known_args(args)
 
@@ -144,4 +281,4 @@ def main(args=None):
 
 
 if __name__ == "__main__":
-    sys.exit(main(sys.argv))
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import time
 from typing import List
 
 from snapred.backend.api.HookManager import HookManager
@@ -8,6 +9,7 @@ from snapred.backend.error.ContinueWarning import ContinueWarning
 from snapred.backend.error.LiveDataState import LiveDataState
 from snapred.backend.error.RecoverableException import RecoverableException
 from snapred.backend.log.logger import snapredLogger
+from snapred.backend.profiling.Metrics import Metrics
 from snapred.backend.service.ServiceFactory import ServiceFactory
 from snapred.meta.decorators.Singleton import Singleton
 
@@ -36,6 +38,7 @@ class InterfaceController:
     def executeRequest(self, request: SNAPRequest) -> SNAPResponse:
         # execute the request
         # return the result
+        startTime = time.perf_counter()
         try:
             self.logger.debug(f"Request Received: {request.json()}")
             snapredLogger.clearWarnings()
@@ -71,6 +74,8 @@ class InterfaceController:
             snapredLogger.clearWarnings()
             self.hookManager.reset()
 
+        Metrics.requests.inc(path=request.path, code=response.code.name)
+        Metrics.requestDuration.observe(time.perf_counter() - startTime, path=request.path)
         self.logger.debug(response.json())
         return response
 
@@ -13,12 +13,13 @@ logger = snapredLogger.getLogger(__name__)
 KnownUnits = Literal[wng.Units.TOF, wng.Units.DSP, wng.Units.DIAG]
 known_units = list(get_args(KnownUnits))
 
-LiveDataArgs = NamedTuple(
-    "LiveDataArgs",
-    [
-        ("duration", datetime.timedelta),
-    ],
-)
+
+class LiveDataArgs(NamedTuple):
+    duration: datetime.timedelta
+
+    # When specified, only data after this time will be loaded: `duration` is then ignored.
+    startTime: Optional[datetime.datetime] = None
+
 
 GroceryTypes = Literal[
     "neutron",
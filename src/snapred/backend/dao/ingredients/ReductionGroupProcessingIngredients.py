@@ -7,6 +7,9 @@ class ReductionGroupProcessingIngredients(BaseModel):
     pixelGroup: PixelGroup
     preserveEvents: bool
 
+    # Incrementally-reduced live data is normalized by current only after accumulation.
+    normalizeByCurrent: bool = True
+
     model_config = ConfigDict(
         extra="forbid",
     )
@@ -51,8 +51,12 @@ class ReductionIngredients(BaseModel):
             return None
         return self.detectorPeaksMany[groupingIndex]
 
-    def groupProcessing(self, groupingIndex: int) -> ReductionGroupProcessingIngredients:
-        return ReductionGroupProcessingIngredients(pixelGroup=self.pixelGroups[groupingIndex], preserveEvents=False)
+    def groupProcessing(
+        self, groupingIndex: int, normalizeByCurrent: bool = True
+    ) -> ReductionGroupProcessingIngredients:
+        return ReductionGroupProcessingIngredients(
+            pixelGroup=self.pixelGroups[groupingIndex], preserveEvents=False, normalizeByCurrent=normalizeByCurrent
+        )
 
     def generateFocussedVanadium(self, groupingIndex: int) -> GenerateFocussedVanadiumIngredients:
         return GenerateFocussedVanadiumIngredients(
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceName
+
+
+class LiveDataAccumulation(BaseModel):
+    """
+    The state of an incremental live-data reduction, which is retained between live-data cycles.
+
+    A live-data session re-submits the same `ReductionRequest` for each cycle:
+    the accumulated data belongs to the request with this run number, lite-mode flag and timestamp.
+    """
+
+    runNumber: str
+    useLiteMode: bool
+    timestamp: float
+
+    # the latest pulse time of the events which have been accumulated (UTC)
+    endTime: Optional[datetime] = None
+
+    # the accumulators, and any other workspaces required by the next cycle
+    retainedWorkspaces: List[WorkspaceName] = []
+
+    model_config = ConfigDict(
+        # required in order to use 'WorkspaceName'
+        arbitrary_types_allowed=True,
+    )
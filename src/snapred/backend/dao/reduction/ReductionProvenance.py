@@ -0,0 +1,58 @@
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from snapred.backend.dao.indexing.Versioning import Version
+from snapred.backend.dao.ingredients import ArtificialNormalizationIngredients
+from snapred.meta.Config import Config
+
+
+@lru_cache(maxsize=128)
+def _fileDigest(path: str, mtime: int, size: int) -> str:  # noqa: ARG001
+    # `mtime` and `size` are only used as part of the cache key: a modified file will be re-hashed.
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ReductionProvenance(BaseModel):
+    """
+    The inputs that determine the output of a reduction.
+
+    Two reductions with equal provenance will produce the same reduced data,
+    so that the output of the earlier reduction may be re-used in place of the later one.
+    """
+
+    runNumber: str
+    useLiteMode: bool
+    state: str
+
+    # The versions used to load the calibration and normalization data,
+    #   and the versions as specified by the request.
+    calibrationVersion: Optional[Version] = None
+    normalizationVersion: Optional[Version] = None
+    requestVersions: tuple[Version, Version]
+
+    alternativeCalibrationFileDigest: Optional[str] = None
+    groupingDigests: Dict[str, str]
+    combinedMaskDigest: Optional[str] = None
+    artificialNormalizationIngredients: Optional[ArtificialNormalizationIngredients] = None
+
+    # values of the `Config` keys listed at "reduction.cache.configKeys"
+    config: Dict[str, Any]
+
+    snapredVersion: str = Field(default_factory=lambda: Config.snapredVersion())
+
+    def digest(self) -> str:
+        return hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def fileDigest(path: Path | str) -> str:
+        path = Path(path)
+        stat = path.stat()
+        return _fileDigest(str(path.resolve()), stat.st_mtime_ns, stat.st_size)
@@ -39,6 +39,9 @@ class ReductionRecord(BaseModel):
     alternativeCalibrationFilePath: Optional[Path] = None
     hooks: Dict[str, List[Hook]] | None = None
 
+    # digest of the `ReductionProvenance`: `None` when the reduction is not eligible for re-use
+    provenanceDigest: Optional[str] = None
+
     snapredVersion: str = Field(default_factory=lambda: Config.snapredVersion())
     snapwrapVersion: str | None = Field(default_factory=lambda: Config.snapwrapVersion())
 
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -11,6 +11,9 @@ class ReductionResponse(BaseModel):
     record: ReductionRecord
     unfocusedData: Optional[WorkspaceName] = None
 
+    # workspaces required by the next cycle of an incremental live-data reduction
+    retainedWorkspaces: List[WorkspaceName] = []
+
     # wallclock execution time: used by the live-data workflow cycle
     executionTime: timedelta
 
@@ -245,6 +245,10 @@ class DataFactoryService:
     def getReductionData(self, runId: str, useLiteMode: bool, timestamp: float) -> ReductionRecord:
         return self.lookupService.readReductionData(runId, useLiteMode, timestamp)
 
+    @validate_call
+    def findReductionRecord(self, runId: str, useLiteMode: bool, provenanceDigest: str) -> ReductionRecord | None:
+        return self.lookupService.findReductionRecord(runId, useLiteMode, provenanceDigest)
+
     @validate_call
     def getCompatibleReductionMasks(self, runId: str, useLiteMode: bool) -> List[WorkspaceName]:
         # Assemble a list of masks, both resident and otherwise, that are compatible with the current reduction
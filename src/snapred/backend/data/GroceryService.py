@@ -19,6 +19,7 @@ from snapred.backend.data.LocalDataService import LocalDataService
 from snapred.backend.error.LiveDataState import LiveDataState
 from snapred.backend.error.RunStatus import RunStatus
 from snapred.backend.log.logger import snapredLogger
+from snapred.backend.profiling.Metrics import Metrics
 from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
 from snapred.backend.recipe.FetchGroceriesRecipe import FetchGroceriesRecipe
 from snapred.backend.service.WorkspaceMetadataService import WorkspaceMetadataService
@@ -864,11 +865,13 @@ class GroceryService:
 
             # When not specified in the `liveDataArgs` or when `liveDataArgs.duration == timedelta(0)`,
             #   the default behavior will be to load the entire run.
-            startTime = (
-                (datetime.utcnow() - liveDataArgs.duration).isoformat()
-                if liveDataArgs is not None and liveDataArgs.duration != timedelta(0)
-                else RunMetadata.FROM_START_ISO8601
-            )
+            #   An explicit `liveDataArgs.startTime` is used to load only the data following a previous load.
+            if liveDataArgs is not None and liveDataArgs.startTime is not None:
+                startTime = liveDataArgs.startTime.isoformat()
+            elif liveDataArgs is not None and liveDataArgs.duration != timedelta(0):
+                startTime = (datetime.utcnow() - liveDataArgs.duration).isoformat()
+            else:
+                startTime = RunMetadata.FROM_START_ISO8601
 
             loaderArgs = {
                 "Facility": Config["liveData.facility.name"],
@@ -1545,6 +1548,9 @@ class GroceryService:
                 case _:
                     raise RuntimeError(f"unrecognized 'workspaceType': '{item.workspaceType}'")
 
+            Metrics.groceryCache.inc(
+                workspaceType=item.workspaceType, result="hit" if result.get("loader") == "cached" else "miss"
+            )
             if item.workspaceType in ["neutron", "normalization"] and result["loader"] in [
                 "LoadEventNexus",
                 "LoadNexusProcessed",
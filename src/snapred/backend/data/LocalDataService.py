@@ -7,11 +7,12 @@ import shutil
 import socket
 import stat
 import tempfile
+import time
 from datetime import datetime, timedelta, timezone
 from errno import ENOENT as NOT_FOUND
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import h5py
 import numpy as np
@@ -51,7 +52,7 @@ from snapred.meta.decorators.ConfigDefault import ConfigDefault, ConfigValue
 from snapred.meta.decorators.ExceptionHandler import ExceptionHandler
 from snapred.meta.decorators.Singleton import Singleton
 from snapred.meta.InternalConstants import ReservedRunNumber, ReservedStateId
-from snapred.meta.LockFile import LockFile
+from snapred.meta.LockFile import LockFile, LockManager, hostName
 from snapred.meta.mantid.WorkspaceNameGenerator import (
     ValueFormatter as wnvf,
 )
@@ -832,6 +833,28 @@ class LocalDataService:
             record = ReductionRecord.model_validate_json(f.read())
         return record
 
+    @validate_call
+    def findReductionRecord(self, runNumber: str, useLiteMode: bool, provenanceDigest: str) -> ReductionRecord | None:
+        """
+        Return the most recent reduction record with the specified provenance digest,
+        provided that its reduction data has also been written.
+        """
+        for recordTimestamp in sorted(self._reducedTimestamps(runNumber, useLiteMode), reverse=True):
+            filePath = self._constructReductionRecordFilePath(runNumber, useLiteMode, recordTimestamp)
+            if not filePath.exists():
+                continue
+            try:
+                with open(filePath, "r") as f:
+                    record = ReductionRecord.model_validate_json(f.read())
+            except ValueError as e:
+                logger.warning(f"unable to read reduction record at '{filePath}': {e}")
+                continue
+            if record.provenanceDigest != provenanceDigest:
+                continue
+            if self._constructReductionDataFilePath(runNumber, useLiteMode, record.timestamp).exists():
+                return record
+        return None
+
     def writeReductionRecord(self, record: ReductionRecord) -> ReductionRecord:
         """
         Persists a `ReductionRecord` to either a new timestamp folder, or overwrites a specific timestamp.
@@ -934,7 +957,7 @@ class LocalDataService:
     def readReductionData(self, runNumber: str, useLiteMode: bool, timestamp: float) -> ReductionRecord:
         """
         This method is complementary to `writeReductionData`:
-        -- it is provided primarily for diagnostic purposes, and is not yet connected to any workflow
+        -- it is used to re-load previously-reduced data, in place of repeating an identical reduction
         """
         filePath = self._constructReductionDataFilePath(runNumber, useLiteMode, timestamp)
         if not filePath.exists():
@@ -1703,8 +1726,11 @@ class LocalDataService:
         self._progressRecordsPath().mkdir(parents=True, exist_ok=True)
 
         saveFilePath = self._progressRecordsSaveFilePath()
-        with open(saveFilePath, "w") as data:
+        # Write atomically: the records may be read by another session at any time.
+        tempFilePath = saveFilePath.with_name("." + saveFilePath.name + ".tmp")
+        with open(tempFilePath, "w") as data:
             data.write(records)
+        os.replace(tempFilePath, saveFilePath)
 
         # limit the number of saved records files
         recordsFilePaths = self._progressRecordsFilePaths()
@@ -1714,3 +1740,69 @@ class LocalDataService:
             for path in recordsFilePaths:
                 if path not in filesToKeep:
                     path.unlink()
+
+    def _progressLogPath(self) -> Path:
+        return self._progressRecordsPath() / "log"
+
+    def _progressLogSegmentPath(self) -> Path:
+        # Each process appends to its own segment of the measurement log.
+        return self._progressLogPath() / f"{hostName()}_{os.getpid()}.jsonl"
+
+    def _progressLogSegmentPaths(self) -> List[Path]:
+        logPath = self._progressLogPath()
+        return sorted(logPath.glob("*.jsonl")) if logPath.exists() else []
+
+    def _progressLogSegmentIsClosed(self, path: Path) -> bool:
+        # A segment is closed when no process will append to it again.
+        host, pid = path.stem.rsplit("_", 1)
+        if host == hostName():
+            if int(pid) == os.getpid():
+                return False
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                # a live process belonging to another user
+                pass
+            return False
+        # The liveness of a process on another host can't be checked.
+        return time.time() - path.stat().st_mtime > Config["application.workflows_data.timing.log.stale_age"]
+
+    def appendProgressRecords(self, records: List[str]):
+        # Appends JSON-format measurement records, one per line, to this process's segment of the measurement log.
+        segmentPath = self._progressLogSegmentPath()
+        segmentPath.parent.mkdir(parents=True, exist_ok=True)
+        with open(segmentPath, "a") as log:
+            log.write("".join(record + "\n" for record in records))
+
+    def readProgressLog(self) -> List[str]:
+        # Returns the measurement records from every segment of the log:
+        #   including those from any other session which is still running.
+        records = []
+        for path in self._progressLogSegmentPaths():
+            try:
+                with open(path) as log:
+                    records.extend(line for line in log.read().splitlines() if line)
+            except FileNotFoundError:
+                # the segment was compacted by another session
+                pass
+        return records
+
+    def compactProgressRecords(self, compact: Callable[[str, List[str]], str], minimumCount: int = 0) -> bool:
+        # Merges the closed segments of the measurement log into the progress records,
+        #   using `compact(<records JSON>, <measurement records>) -> <records JSON>`.
+        # Returns `True` if the records were compacted:
+        #   the log is only compacted when its closed segments contain at least `minimumCount` records.
+        with LockManager(self._progressRecordsPath()):
+            segmentPaths = [path for path in self._progressLogSegmentPaths() if self._progressLogSegmentIsClosed(path)]
+            records = []
+            for path in segmentPaths:
+                with open(path) as log:
+                    records.extend(line for line in log.read().splitlines() if line)
+            if not segmentPaths or len(records) < minimumCount:
+                return False
+            self.writeProgressRecords(compact(self.readProgressRecords(), records))
+            for path in segmentPaths:
+                path.unlink(missing_ok=True)
+        return True
@@ -0,0 +1,396 @@
+import atexit
+import hashlib
+import math
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from mantid.api import AlgorithmManager, Workspace, mtd
+from pydantic import BaseModel
+
+from snapred import __version__ as snapredVersion
+from snapred.backend.log.logger import snapredLogger
+from snapred.meta.Callback import Callback
+from snapred.meta.Config import Config
+
+logger = snapredLogger.getLogger(__name__)
+
+
+class FileFingerprint(BaseModel):
+    # The identity of an input file at capture time.
+
+    path: str
+    size: int
+    mtime: float
+    # SHA-256 of the file: for a large file, only of its leading and trailing `fingerprintBytes`.
+    sha256: str
+
+    @classmethod
+    def of(cls, path: str, nBytes: int) -> "FileFingerprint":
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            if stat.st_size <= 2 * nBytes:
+                digest.update(f.read())
+            else:
+                digest.update(f.read(nBytes))
+                f.seek(-nBytes, os.SEEK_END)
+                digest.update(f.read(nBytes))
+        return cls(path=path, size=stat.st_size, mtime=stat.st_mtime, sha256=digest.hexdigest())
+
+
+class WorkspaceSummary(BaseModel):
+    # A summary of an output workspace, sufficient to detect a change in an algorithm's results.
+
+    id: str
+    # matrix workspaces
+    nHistograms: int | None = None
+    blocksize: int | None = None
+    ySum: float | None = None
+    eSum: float | None = None
+    # table workspaces
+    rowCount: int | None = None
+    columnCount: int | None = None
+    # workspace groups
+    members: List[str] = []
+
+    @classmethod
+    def of(cls, name: str) -> "WorkspaceSummary":
+        ws = mtd[name]
+        summary = cls(id=ws.id())
+        if ws.isGroup():
+            summary.members = list(ws.getNames())
+        elif hasattr(ws, "extractY"):
+            summary.nHistograms = ws.getNumberHistograms()
+            if ws.isRaggedWorkspace():
+                # `blocksize`, `extractY` and `extractE` throw for a ragged workspace: sum one histogram at a time.
+                summary.ySum = float(sum(np.nansum(ws.readY(i)) for i in range(summary.nHistograms)))
+                summary.eSum = float(sum(np.nansum(ws.readE(i)) for i in range(summary.nHistograms)))
+            else:
+                summary.blocksize = ws.blocksize()
+                summary.ySum = float(np.nansum(ws.extractY()))
+                summary.eSum = float(np.nansum(ws.extractE()))
+        elif hasattr(ws, "rowCount"):
+            summary.rowCount = ws.rowCount()
+            summary.columnCount = ws.columnCount()
+        return summary
+
+    def differences(self, other: "WorkspaceSummary", rtol: float) -> List[str]:
+        """
+        The ways in which another summary of the same workspace differs from this one.
+        """
+        differences = []
+        for field in ("id", "nHistograms", "blocksize", "rowCount", "columnCount", "members"):
+            if getattr(self, field) != getattr(other, field):
+                differences.append(f"{field}: {getattr(self, field)} != {getattr(other, field)}")
+        for field in ("ySum", "eSum"):
+            value, otherValue = getattr(self, field), getattr(other, field)
+            if value is None or otherValue is None:
+                continue
+            if not (math.isclose(value, otherValue, rel_tol=rtol) or (math.isnan(value) and math.isnan(otherValue))):
+                differences.append(f"{field}: {value} != {otherValue}")
+        return differences
+
+
+class ReplayStep(BaseModel):
+    # A single algorithm executed by `MantidSnapper`, with its resolved arguments.
+
+    name: str
+    message: str
+    properties: Dict[str, Any] = {}
+    # Properties whose values can't be serialized (e.g. a Python object passed by pointer):
+    #   their `properties` entries are only the `repr` of the value.
+    unsupported: List[str] = []
+    inputFiles: List[FileFingerprint] = []
+    outputs: Dict[str, WorkspaceSummary] = {}
+    # Elapsed time at capture, in seconds
+    wallTime: float
+
+
+class ReplayBundle(BaseModel):
+    """
+    The algorithm stream of a workflow, in execution order, as captured by `AlgorithmRecorder`.
+    """
+
+    snapredVersion: str
+    host: str
+    created: float
+    steps: List[ReplayStep] = []
+
+    @classmethod
+    def load(cls, path: Path) -> "ReplayBundle":
+        with open(path, "r") as f:
+            return cls.model_validate_json(f.read())
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.model_dump_json(indent=2))
+
+    def script(self) -> str:
+        """
+        The bundle as a Mantid Python script.
+        """
+        lines = ["from mantid.simpleapi import *", ""]
+        for step in self.steps:
+            lines.append(f"# {step.message}")
+            arguments = ", ".join(f"{prop}={val!r}" for prop, val in step.properties.items())
+            lines.append(f"{step.name}({arguments})")
+        return "\n".join(lines) + "\n"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _AlgorithmRecorder:
+    """
+    An opt-in capture of the algorithms executed by `MantidSnapper`, as a replayable `ReplayBundle`.
+
+    When enabled (`application.workflows_data.replay.enabled`), each algorithm is recorded after it completes,
+    with its arguments resolved to their actual values, a fingerprint of each input file, and a summary of each
+    output workspace.  Only the outermost algorithms are captured: any algorithm executed by another algorithm
+    is replayed when its parent is.
+    At application exit, the bundle is written to `application.workflows_data.replay.home`:
+    it can be re-executed, without the GUI or the service layer, by `snapred replay`.
+    """
+
+    def __init__(self):
+        self._steps: List[ReplayStep] = []
+        self._mutex = threading.Lock()
+        self._local = threading.local()
+        self._created = time.time()
+        self._enabled = Config["application.workflows_data.replay.enabled"]
+        if self._enabled:
+            atexit.register(self._unloadResident)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(self, enabled: bool = True):
+        self._enabled = enabled
+
+    @property
+    def recording(self) -> bool:
+        # Is an algorithm being recorded by the current thread?
+        return getattr(self._local, "recording", False)
+
+    @property
+    def steps(self) -> List[ReplayStep]:
+        with self._mutex:
+            return list(self._steps)
+
+    def clear(self):
+        with self._mutex:
+            self._steps.clear()
+            self._created = time.time()
+
+    def bundle(self) -> ReplayBundle:
+        return ReplayBundle(
+            snapredVersion=snapredVersion, host=socket.gethostname(), created=self._created, steps=self.steps
+        )
+
+    @classmethod
+    def _value(cls, val: Any) -> Any:
+        # The JSON-serializable value of an argument.
+        if isinstance(val, Callback):
+            val = val.get()
+        if val is None or isinstance(val, (str, bool, int, float)):
+            return val
+        if isinstance(val, np.generic):
+            return val.item()
+        if isinstance(val, np.ndarray):
+            return val.tolist()
+        if isinstance(val, (list, tuple)):
+            return [cls._value(v) for v in val]
+        if isinstance(val, Workspace):
+            return val.name()
+        raise _Unsupported()
+
+    @classmethod
+    def _properties(cls, kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        properties, unsupported = {}, []
+        for prop, val in kwargs.items():
+            try:
+                value = cls._value(val)
+            except _Unsupported:
+                value = repr(val.get() if isinstance(val, Callback) else val)
+                unsupported.append(prop)
+            if value is not None:
+                properties[prop] = value
+        return properties, unsupported
+
+    @staticmethod
+    def _inputFiles(properties: Dict[str, Any]) -> List[FileFingerprint]:
+        # Any argument which is the absolute path of an existing file is an input file.
+        nBytes = Config["application.workflows_data.replay.fingerprintBytes"]
+        fingerprints = []
+        for val in properties.values():
+            for path in val if isinstance(val, list) else (val,):
+                if isinstance(path, str) and os.path.isabs(path) and os.path.isfile(path):
+                    fingerprints.append(FileFingerprint.of(path, nBytes))
+        return fingerprints
+
+    def record(self, name: str, message: str, kwargs: Dict[str, Any], outputWorkspaces: List[str]):
+        """
+        A context manager to capture the execution of a single algorithm: when capture is disabled, it does nothing.
+        """
+        if not self._enabled:
+            return nullcontext()
+        return self._record(name, message, kwargs, outputWorkspaces)
+
+    @staticmethod
+    def _outputs(name: str, outputWorkspaces: List[str]) -> Dict[str, WorkspaceSummary]:
+        outputs = {}
+        for ws in outputWorkspaces:
+            try:
+                if mtd.doesExist(ws):
+                    outputs[ws] = WorkspaceSummary.of(ws)
+            except Exception as e:  # noqa: BLE001
+                # Capture must never fail the algorithm: the output is only omitted from its step.
+                logger.warning(f"Unable to summarize output workspace '{ws}' of '{name}' for replay: {e}")
+        return outputs
+
+    @contextmanager
+    def _record(self, name, message, kwargs, outputWorkspaces):
+        try:
+            properties, unsupported = self._properties(kwargs)
+            # Input files are fingerprinted before execution: an algorithm might overwrite its input.
+            inputFiles = self._inputFiles(properties)
+        except Exception as e:  # noqa: BLE001
+            # Capture must never fail the algorithm: the algorithm is executed, but not recorded.
+            logger.warning(f"Unable to capture '{name}' for replay: {e}")
+            yield
+            return
+        self._local.recording = True
+        try:
+            wallStart = time.perf_counter()
+            yield
+            wallTime = time.perf_counter() - wallStart
+        finally:
+            self._local.recording = False
+        step = ReplayStep(
+            name=name,
+            message=message,
+            properties=properties,
+            unsupported=unsupported,
+            inputFiles=inputFiles,
+            outputs=self._outputs(name, outputWorkspaces),
+            wallTime=wallTime,
+        )
+        with self._mutex:
+            self._steps.append(step)
+
+    def save(self, directory: Path) -> Path:
+        """
+        Write the bundle to the directory.
+        """
+        path = Path(directory) / f"replay_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{os.getpid()}.json"
+        self.bundle().save(path)
+        logger.info(f"Replay bundle written to '{path}'")
+        return path
+
+    def _unloadResident(self):
+        # Unload method to register with `atexit`.
+        try:
+            if self._steps:
+                self.save(Path(Config["application.workflows_data.replay.home"]))
+        except BaseException:  # noqa: BLE001
+            # This method is registered with `atexit`: it must not raise any exceptions.
+            pass
+
+
+AlgorithmRecorder = _AlgorithmRecorder()
+
+
+class ReplayResult(BaseModel):
+    # The replay of a single `ReplayStep`.
+
+    name: str
+    message: str
+    # Elapsed times, in seconds
+    capturedTime: float
+    wallTime: float
+    # Differences from the captured output workspaces
+    differences: Dict[str, List[str]] = {}
+
+
+class AlgorithmReplay:
+    """
+    Re-execute a `ReplayBundle`, timing each algorithm and comparing its outputs with those captured.
+    """
+
+    def __init__(self, bundle: ReplayBundle, compare: bool = True, rtol: float | None = None):
+        self.bundle = bundle
+        self.compare = compare
+        self.rtol = rtol if rtol is not None else Config["application.workflows_data.replay.rtol"]
+
+    def changedInputFiles(self) -> List[str]:
+        """
+        The input files which are missing, or which differ from their captured fingerprints.
+        """
+        nBytes = Config["application.workflows_data.replay.fingerprintBytes"]
+        changed = []
+        for fingerprint in {f.path: f for step in self.bundle.steps for f in step.inputFiles}.values():
+            if not os.path.isfile(fingerprint.path):
+                changed.append(f"{fingerprint.path}: missing")
+                continue
+            current = FileFingerprint.of(fingerprint.path, nBytes)
+            if (current.size, current.sha256) != (fingerprint.size, fingerprint.sha256):
+                changed.append(f"{fingerprint.path}: changed since capture")
+        return changed
+
+    @staticmethod
+    def _execute(step: ReplayStep):
+        algorithm = AlgorithmManager.create(step.name)
+        algorithm.setChild(True)
+        algorithm.setAlwaysStoreInADS(True)
+        algorithm.setRethrows(True)
+        for prop, val in step.properties.items():
+            algorithm.setProperty(prop, val)
+        if not algorithm.execute():
+            raise RuntimeError(f"{step.name} failed to execute")
+
+    def run(self) -> List[ReplayResult]:
+        unsupported = [
+            f"{n}: {step.name} {step.unsupported}" for n, step in enumerate(self.bundle.steps) if step.unsupported
+        ]
+        if unsupported:
+            raise ValueError(f"the bundle includes arguments which can't be replayed: {unsupported}")
+        for change in self.changedInputFiles():
+            logger.warning(f"Replay input file {change}")
+
+        results = []
+        for step in self.bundle.steps:
+            logger.info("%s - %s", step.name, step.message)
+            wallStart = time.perf_counter()
+            self._execute(step)
+            wallTime = time.perf_counter() - wallStart
+            differences = {}
+            if self.compare:
+                for ws, captured in step.outputs.items():
+                    diffs = (
+                        captured.differences(WorkspaceSummary.of(ws), self.rtol)
+                        if mtd.doesExist(ws)
+                        else ["not created"]
+                    )
+                    if diffs:
+                        differences[ws] = diffs
+            results.append(
+                ReplayResult(
+                    name=step.name,
+                    message=step.message,
+                    capturedTime=step.wallTime,
+                    wallTime=wallTime,
+                    differences=differences,
+                )
+            )
+        return results
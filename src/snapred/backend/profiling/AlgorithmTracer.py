@@ -0,0 +1,258 @@
+import atexit
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from mantid.api import mtd
+from pydantic import BaseModel
+
+from snapred.backend.log.logger import snapredLogger
+from snapred.meta.Config import Config
+
+logger = snapredLogger.getLogger(__name__)
+
+
+class AlgorithmTrace(BaseModel):
+    # The record of a single algorithm executed by `MantidSnapper`.
+
+    name: str
+    message: str
+
+    # The recipe (or algorithm) which queued the algorithm, and the service which called that recipe, if any.
+    parent: str | None = None
+    service: str | None = None
+
+    thread: str
+    threadId: int
+
+    # Start time: seconds since the epoch
+    start: float
+    # Elapsed times, in seconds:
+    #   CPU time is for the entire process, so that it includes any threads started by the algorithm itself.
+    wallTime: float
+    cpuTime: float
+
+    inputWorkspaces: List[str] = []
+    outputWorkspaces: List[str] = []
+
+    # Memory sizes, in bytes
+    outputMemory: int = 0
+    adsMemoryBefore: int = 0
+    adsMemoryAfter: int = 0
+
+    succeeded: bool = True
+
+
+class _AlgorithmTracer:
+    """
+    An opt-in execution trace of every algorithm run by `MantidSnapper`.
+
+    When enabled (`application.workflows_data.tracing.enabled`), each executed algorithm is recorded with
+    its wall and CPU times, its thread, the recipe and service which ran it, its input and output workspaces,
+    and the memory used by its outputs and by the ADS as a whole.
+    The trace can be exported as Chrome trace-event JSON (viewable in Perfetto or `chrome://tracing`), or as CSV:
+    at application exit, it is written to `application.workflows_data.tracing.home`.
+    """
+
+    # CSV columns, in order
+    _CSV_FIELDS = tuple(AlgorithmTrace.model_fields.keys())
+
+    def __init__(self):
+        self._traces: List[AlgorithmTrace] = []
+        self._mutex = threading.Lock()
+        self._enabled = Config["application.workflows_data.tracing.enabled"]
+        if self._enabled:
+            atexit.register(self._unloadResident)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(self, enabled: bool = True):
+        self._enabled = enabled
+
+    @property
+    def traces(self) -> List[AlgorithmTrace]:
+        with self._mutex:
+            return list(self._traces)
+
+    def clear(self):
+        with self._mutex:
+            self._traces.clear()
+
+    @staticmethod
+    def callerScope(depth: int = 1) -> Tuple[str | None, str | None]:
+        """
+        Find the innermost recipe (or algorithm) and service on the call stack, as `(<parent>, <service>)`.
+        """
+        parent, service = None, None
+        frame = sys._getframe(depth)
+        while frame is not None and service is None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith("snapred.backend."):
+                self_ = frame.f_locals.get("self")
+                name = type(self_).__name__ if self_ is not None else module.split(".")[-1]
+                if module.startswith("snapred.backend.service."):
+                    service = name
+                elif (
+                    parent is None
+                    and module.startswith("snapred.backend.recipe.")
+                    and not module.endswith(".MantidSnapper")
+                    and not module.endswith(".Utensils")
+                ):
+                    parent = name
+            frame = frame.f_back
+        return parent, service
+
+    @staticmethod
+    def _workspaceMemory(name: str) -> int:
+        try:
+            ws = mtd[name]
+            if ws.isGroup():
+                return sum(ws.getItem(n).getMemorySize() for n in range(ws.getNumberOfEntries()))
+            return ws.getMemorySize()
+        except (KeyError, RuntimeError, AttributeError):
+            return 0
+
+    @classmethod
+    def _adsMemory(cls) -> int:
+        # Group members are also in the ADS: don't count them twice.
+        memory = 0
+        for name in mtd.getObjectNames():
+            try:
+                ws = mtd[name]
+                if not ws.isGroup():
+                    memory += ws.getMemorySize()
+            except (KeyError, RuntimeError, AttributeError):
+                pass
+        return memory
+
+    def record(
+        self,
+        name: str,
+        message: str,
+        inputWorkspaces: List[str],
+        outputWorkspaces: List[str],
+        scope: Tuple[str | None, str | None] = (None, None),
+    ):
+        """
+        A context manager to record the execution of a single algorithm: when tracing is disabled, it does nothing.
+        """
+        if not self._enabled:
+            return nullcontext()
+        return self._record(name, message, inputWorkspaces, outputWorkspaces, scope)
+
+    @contextmanager
+    def _record(self, name, message, inputWorkspaces, outputWorkspaces, scope):
+        thread = threading.current_thread()
+        adsMemoryBefore = self._adsMemory()
+        start = time.time()
+        wallStart, cpuStart = time.perf_counter(), time.process_time()
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            wallTime, cpuTime = time.perf_counter() - wallStart, time.process_time() - cpuStart
+            trace = AlgorithmTrace(
+                name=name,
+                message=message,
+                parent=scope[0],
+                service=scope[1],
+                thread=thread.name,
+                threadId=thread.ident,
+                start=start,
+                wallTime=wallTime,
+                cpuTime=cpuTime,
+                inputWorkspaces=inputWorkspaces,
+                outputWorkspaces=outputWorkspaces,
+                outputMemory=sum(self._workspaceMemory(ws) for ws in outputWorkspaces) if succeeded else 0,
+                adsMemoryBefore=adsMemoryBefore,
+                adsMemoryAfter=self._adsMemory(),
+                succeeded=succeeded,
+            )
+            with self._mutex:
+                self._traces.append(trace)
+
+    def chromeTrace(self) -> Dict[str, Any]:
+        """
+        The trace, in Chrome trace-event format: each algorithm is a complete ("X") event on its thread,
+        and the ADS memory is a counter ("C") event.
+        """
+        pid = os.getpid()
+        traces = self.traces
+        events = []
+        threads = {}
+        for trace in traces:
+            threads[trace.threadId] = trace.thread
+            ts = trace.start * 1.0e6
+            events.append(
+                {
+                    "name": trace.name,
+                    "cat": "algorithm",
+                    "ph": "X",
+                    "ts": ts,
+                    "dur": trace.wallTime * 1.0e6,
+                    "pid": pid,
+                    "tid": trace.threadId,
+                    "args": trace.model_dump(exclude={"name", "thread", "threadId", "start", "wallTime"}),
+                }
+            )
+            events.append(
+                {
+                    "name": "ADS memory",
+                    "ph": "C",
+                    "ts": ts + trace.wallTime * 1.0e6,
+                    "pid": pid,
+                    "args": {"bytes": trace.adsMemoryAfter},
+                }
+            )
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def exportChromeTrace(self, path: Path):
+        with open(path, "w") as f:
+            json.dump(self.chromeTrace(), f)
+
+    def exportCSV(self, path: Path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=self._CSV_FIELDS)
+            writer.writeheader()
+            for trace in self.traces:
+                row = trace.model_dump()
+                row["inputWorkspaces"] = ";".join(trace.inputWorkspaces)
+                row["outputWorkspaces"] = ";".join(trace.outputWorkspaces)
+                writer.writerow(row)
+
+    def export(self, directory: Path) -> Tuple[Path, Path]:
+        """
+        Write the trace to the directory, as both Chrome trace-event JSON and CSV.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"trace_{datetime.now().strftime('%Y%m%dT%H%M%S')}_{os.getpid()}"
+        jsonPath, csvPath = directory / f"{stem}.json", directory / f"{stem}.csv"
+        self.exportChromeTrace(jsonPath)
+        self.exportCSV(csvPath)
+        logger.info(f"Algorithm trace written to '{jsonPath}' and '{csvPath}'")
+        return jsonPath, csvPath
+
+    def _unloadResident(self):
+        # Unload method to register with `atexit`.
+        try:
+            if self._traces:
+                self.export(Path(Config["application.workflows_data.tracing.home"]))
+        except BaseException:  # noqa: BLE001
+            # This method is registered with `atexit`: it must not raise any exceptions.
+            pass
+
+
+AlgorithmTracer = _AlgorithmTracer()
@@ -0,0 +1,351 @@
+import atexit
+import bisect
+import math
+import os
+import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from snapred.backend.log.logger import snapredLogger
+from snapred.meta.Config import Config
+
+logger = snapredLogger.getLogger(__name__)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+# Prometheus text format: read by a node-exporter textfile collector, and by scrapers without OpenMetrics support
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _formatValue(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def _escapeLabelValue(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatLabels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escapeLabelValue(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric(ABC):
+    # A metric family: its samples are keyed by their label values, in the order of `labelNames`.
+
+    TYPE = "unknown"
+
+    def __init__(self, registry: "_MetricsRegistry", name: str, description: str, labelNames: Tuple[str, ...] = ()):
+        self._registry = registry
+        self.name = name
+        self.description = description
+        self.labelNames = tuple(labelNames)
+        self._mutex = threading.Lock()
+
+    def _labelValues(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelNames):
+            raise ValueError(f"metric '{self.name}' requires the labels {self.labelNames}, not {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelNames)
+
+    def _labels(self, labelValues: Tuple[str, ...], **extra: str) -> Dict[str, str]:
+        return {**dict(zip(self.labelNames, labelValues)), **extra}
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        pass
+
+    def _familyName(self, openMetrics: bool) -> str:  # noqa: ARG002
+        return self.name
+
+    def exposition(self, openMetrics: bool = True) -> List[str]:
+        name = self._familyName(openMetrics)
+        return [f"# HELP {name} {self.description}", f"# TYPE {name} {self.TYPE}", *self._samples()]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        if not self._registry.enabled:
+            return
+        if amount < 0.0:
+            raise ValueError(f"counter '{self.name}' can only increase")
+        key = self._labelValues(labels)
+        with self._mutex:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._labelValues(labels), 0.0)
+
+    def _familyName(self, openMetrics: bool) -> str:
+        # In OpenMetrics, the family name excludes the "_total" suffix of the samples:
+        #   in Prometheus text format, samples whose names don't match a declared family are untyped.
+        return self.name if openMetrics else f"{self.name}_total"
+
+    def _samples(self) -> List[str]:
+        with self._mutex:
+            values = dict(self._values)
+        return [f"{self.name}_total{_formatLabels(self._labels(key))} {_formatValue(v)}" for key, v in values.items()]
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels: str):
+        if not self._registry.enabled:
+            return
+        key = self._labelValues(labels)
+        with self._mutex:
+            self._values[key] = value
+
+    def setFunction(self, function: Callable[[], float]):
+        # An unlabelled gauge whose value is computed only when the metrics are exported.
+        if self.labelNames:
+            raise ValueError(f"gauge '{self.name}' has labels: it can't be computed by a function")
+        self._function = function
+
+    def value(self, **labels: str) -> float | None:
+        if self._function is not None:
+            return float(self._function())
+        return self._values.get(self._labelValues(labels))
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_formatValue(self.value())}"]
+            except Exception as e:  # noqa: BLE001
+                # An export must not fail because a single gauge is unavailable.
+                logger.debug(f"Unable to compute the gauge '{self.name}': {e}")
+                return []
+        with self._mutex:
+            values = dict(self._values)
+        return [f"{self.name}{_formatLabels(self._labels(key))} {_formatValue(v)}" for key, v in values.items()]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, *args, buckets: List[float], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = sorted(float(b) for b in buckets if not math.isinf(b))
+        # per label values: (<bucket counts, with +Inf last>, <sum>)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        if not self._registry.enabled:
+            return
+        key = self._labelValues(labels)
+        with self._mutex:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        counts, _ = self._values.get(self._labelValues(labels), ([], 0.0))
+        return sum(counts)
+
+    def _samples(self) -> List[str]:
+        with self._mutex:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        samples = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + [math.inf], counts):
+                cumulative += count
+                labels = _formatLabels(self._labels(key, le=_formatValue(bound)))
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _formatLabels(self._labels(key))
+            samples.append(f"{self.name}_count{labels} {cumulative}")
+            samples.append(f"{self.name}_sum{labels} {_formatValue(total)}")
+        return samples
+
+
+class _MetricsRegistry:
+    """
+    Throughput and latency metrics, exported in OpenMetrics text format.
+
+    When enabled (`application.metrics.enabled`), the metrics are written to `application.metrics.textfile.path`
+    at regular intervals, and at application exit: this file may be read by a node-exporter textfile collector.
+    When `application.metrics.http.port` is set, they are also served at `http://<host>:<port>/metrics`.
+    No external service is required.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._mutex = threading.Lock()
+        self._enabled = Config["application.metrics.enabled"]
+        self._server: ThreadingHTTPServer | None = None
+        self._writer: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+        buckets = Config["application.metrics.buckets"]
+        self.requests = self.counter(
+            "snapred_requests", "SNAPRequests executed by the InterfaceController", ("path", "code")
+        )
+        self.requestDuration = self.histogram(
+            "snapred_request_duration_seconds", "Elapsed time of each SNAPRequest", ("path",), buckets
+        )
+        self.stepDuration = self.histogram(
+            "snapred_step_duration_seconds", "Elapsed time of each completed WallClockTime step", ("step",), buckets
+        )
+        self.reducedEvents = self.counter("snapred_reduced_events", "Events reduced by the ReductionService")
+        self.reductionEventRate = self.gauge(
+            "snapred_reduction_event_rate", "Events reduced per second by the most-recent reduction"
+        )
+        self.groceryCache = self.counter(
+            "snapred_grocery_cache_requests",
+            "GroceryService fetches, by workspace type, served from (hit) or not from (miss) the ADS",
+            ("workspaceType", "result"),
+        )
+        # Set by the `ProgressRecorder`, only when resource profiling is enabled.
+        self.adsMemory = self.gauge(
+            "snapred_ads_memory_bytes", "Memory used by the workspaces in the ADS, at the end of the last profiled step"
+        )
+        self.adsEvents = self.gauge(
+            "snapred_ads_events", "Events held by the event workspaces in the ADS, at the end of the last profiled step"
+        )
+        self.liveDataCycleDuration = self.histogram(
+            "snapred_live_data_cycle_seconds", "Elapsed time of each live-data reduction cycle", (), buckets
+        )
+
+        if self._enabled:
+            self.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def enable(self, enabled: bool = True):
+        self._enabled = enabled
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._mutex:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelNames != metric.labelNames:
+                    raise ValueError(f"metric '{metric.name}' is already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, description: str, labelNames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, name, description, labelNames))
+
+    def gauge(self, name: str, description: str, labelNames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self, name, description, labelNames))
+
+    def histogram(self, name: str, description: str, labelNames: Tuple[str, ...], buckets: List[float]) -> Histogram:
+        return self._register(Histogram(self, name, description, labelNames, buckets=buckets))
+
+    def exposition(self, openMetrics: bool = True) -> str:
+        """
+        The metrics, in OpenMetrics text format, or otherwise in Prometheus text format.
+        """
+        with self._mutex:
+            metrics = list(self._metrics.values())
+        lines = [line for metric in metrics for line in metric.exposition(openMetrics)]
+        if openMetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def writeTextfile(self, path: Path):
+        """
+        Write the metrics to a file, in Prometheus text format, as read by a node-exporter textfile collector:
+        the file is replaced atomically, so that a collector never reads a partial file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tempPath = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tempPath.write_text(self.exposition(openMetrics=False))
+        os.replace(tempPath, path)
+
+    def serve(self, host: str, port: int) -> ThreadingHTTPServer:
+        """
+        Serve the metrics at `http://<host>:<port>/metrics`: with `port == 0`, any free port is used.
+        The metrics are served in OpenMetrics text format to a scraper which accepts it,
+        and otherwise in Prometheus text format.
+        """
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/metrics/"):
+                    self.send_error(404)
+                    return
+                openMetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = registry.exposition(openMetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE if openMetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # noqa: A002, ARG002
+                # Scrapes are not logged.
+                pass
+
+        server = ThreadingHTTPServer((host, port), _Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="Metrics-http", daemon=True).start()
+        logger.info(f"Serving metrics at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def _writeTextfilePeriodically(self):
+        interval = Config["application.metrics.textfile.interval"]
+        while not self._stopped.wait(interval):
+            self._writeTextfile()
+
+    def _writeTextfile(self):
+        try:
+            self.writeTextfile(Path(Config["application.metrics.textfile.path"]))
+        except OSError as e:
+            logger.warning(f"Unable to write the metrics: {e}")
+
+    def start(self):
+        """
+        Start the exporters: the textfile writer, and the HTTP server if a port is configured.
+        """
+        self._stopped.clear()
+        if Config["application.metrics.textfile.interval"] > 0:
+            self._writer = threading.Thread(
+                target=self._writeTextfilePeriodically, name="Metrics-textfile", daemon=True
+            )
+            self._writer.start()
+        port = Config["application.metrics.http.port"]
+        if port > 0:
+            self._server = self.serve(Config["application.metrics.http.host"], port)
+        atexit.register(self._unloadResident)
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _unloadResident(self):
+        # Unload method to register with `atexit`.
+        try:
+            self.stop()
+            self._writeTextfile()
+        except BaseException:  # noqa: BLE001
+            # This method is registered with `atexit`: it must not raise any exceptions.
+            pass
+
+
+Metrics = _MetricsRegistry()
@@ -2,21 +2,26 @@ import atexit
 import functools
 import inspect
 import sys
+import time
 from datetime import datetime, timezone
 from enum import StrEnum
 from hashlib import sha256
-from threading import Timer
-from types import FrameType, FunctionType, MethodType
+from resource import RUSAGE_SELF, getrusage
+from threading import Thread, Timer
+from types import CodeType, FrameType, FunctionType, MethodType
 from typing import Any, Callable, ClassVar, Dict, List, Self, Tuple
 
 import numpy as np
-from pydantic import BaseModel, field_serializer, field_validator
+from mantid.api import mtd
+from pydantic import BaseModel, ValidationError, field_serializer, field_validator
 from scipy.interpolate import BSpline, make_splrep
 
 from snapred.backend.data.LocalDataService import LocalDataService
 from snapred.backend.log.logger import snapredLogger
+from snapred.backend.profiling.Metrics import Metrics
 from snapred.meta.Config import Config
 from snapred.meta.decorators.classproperty import classproperty
+from snapred.meta.LockFile import hostName
 
 logger = snapredLogger.getLogger(__name__)
 
@@ -165,6 +170,113 @@ class _Step(BaseModel):
         return sha.hexdigest()[0:16]
 
 
+class StepResource(StrEnum):
+    # The resources by which the profiled steps can be ranked.
+    WALL_TIME = "wallTime"
+    CPU_TIME = "cpuTime"
+    RSS_PEAK_DELTA = "rssPeakDelta"
+    ADS_MEMORY_PEAK = "adsMemoryPeak"
+    ADS_MEMORY_RETAINED = "adsMemoryRetained"
+    EVENT_COUNT = "eventCount"
+    MEMORY_PER_EVENT = "memoryPerEvent"
+
+    @property
+    def unit(self) -> str:
+        match self:
+            case StepResource.WALL_TIME | StepResource.CPU_TIME:
+                return "s"
+            case StepResource.EVENT_COUNT:
+                return "events"
+            case StepResource.MEMORY_PER_EVENT:
+                return "bytes/event"
+            case _:
+                return "bytes"
+
+
+class _Resources(BaseModel):
+    # Resource usage from a specific execution of a workflow step.
+
+    # CPU time in seconds: for the entire process, so that it includes any threads started by the step.
+    cpuTime: float
+
+    # The increase in the peak resident-set size of the process, in bytes
+    rssPeakDelta: int
+
+    # Memory used by the workspaces in the ADS, in bytes
+    adsMemoryBefore: int
+    adsMemoryAfter: int
+    adsMemoryPeak: int
+
+    # The peak number of events held by the event workspaces in the ADS
+    eventCount: int
+
+    def value(self, resource: StepResource) -> float | None:
+        match resource:
+            case StepResource.WALL_TIME:
+                return None
+            case StepResource.ADS_MEMORY_RETAINED:
+                return float(self.adsMemoryAfter - self.adsMemoryBefore)
+            case StepResource.MEMORY_PER_EVENT:
+                return float(self.adsMemoryPeak) / self.eventCount if self.eventCount > 0 else None
+            case _:
+                return float(getattr(self, resource))
+
+
+class _ResourceMonitor:
+    # Track the resource usage of an active step.
+    #   Peak ADS usage is sampled at the step's boundaries, and at those of its substeps.
+
+    def __init__(self):
+        self._cpuTime = time.process_time()
+        self._maxRSS = self.maxRSS()
+        self._adsMemory, eventCount = self.sampleADS()
+        self._adsMemoryPeak = self._adsMemory
+        self._eventCount = eventCount
+
+    @staticmethod
+    def maxRSS() -> int:
+        # The peak resident-set size of the process, in bytes: on Linux `ru_maxrss` is in kilobytes.
+        maxRSS = getrusage(RUSAGE_SELF).ru_maxrss
+        return maxRSS if sys.platform == "darwin" else maxRSS * 1024
+
+    @staticmethod
+    def sampleADS() -> Tuple[int, int]:
+        # The memory used by the workspaces in the ADS, and the number of events that they hold.
+        #   Group members are also in the ADS: don't count them twice.
+        memory, events = 0, 0
+        for name in mtd.getObjectNames():
+            try:
+                ws = mtd[name]
+                if ws.isGroup():
+                    continue
+                memory += ws.getMemorySize()
+                if hasattr(ws, "getNumberEvents"):
+                    events += ws.getNumberEvents()
+            except (KeyError, RuntimeError, AttributeError):
+                # e.g. a workspace deleted by another thread
+                pass
+        return memory, events
+
+    def sample(self, adsMemory: int, eventCount: int):
+        self._adsMemoryPeak = max(self._adsMemoryPeak, adsMemory)
+        self._eventCount = max(self._eventCount, eventCount)
+
+    def stop(self) -> _Resources:
+        adsMemory, eventCount = self.sampleADS()
+        self.sample(adsMemory, eventCount)
+        # The exported ADS gauges report this sample: the exporter threads must not read the ADS themselves.
+        Metrics.adsMemory.set(adsMemory)
+        Metrics.adsEvents.set(eventCount)
+        return _Resources(
+            cpuTime=time.process_time() - self._cpuTime,
+            rssPeakDelta=self.maxRSS() - self._maxRSS,
+            adsMemoryBefore=self._adsMemory,
+            adsMemoryAfter=adsMemory,
+            adsMemoryPeak=self._adsMemoryPeak,
+            eventCount=self._eventCount,
+        )
+
+
 class _Measurement(BaseModel):
     # Contains post-execution timing data from a specific workflow step.
 
@@ -179,6 +291,19 @@ class _Measurement(BaseModel):
     # In the case that this value is `None`, this `_Measurement` only includes timing data.
     N_ref: float | None
 
+    # The host where the measurement was made, and when (in seconds since the epoch):
+    #   these are `None` for measurements saved before they were recorded.
+    host: str | None = None
+    timestamp: float | None = None
+
+    # Resource usage: `None` when resource profiling is disabled.
+    resources: _Resources | None = None
+
+    def resource(self, resource: StepResource) -> float | None:
+        if resource == StepResource.WALL_TIME:
+            return self.dt
+        return self.resources.value(resource) if self.resources is not None else None
+
 
 class _Estimate(BaseModel):
     # A tuple summarizing the information used during the last call to `update`.
@@ -240,9 +365,15 @@ class _Estimate(BaseModel):
             raise RuntimeError("Usage error: `dt` called before `update`.")
         return float(self._spl(N))
 
-    def update(self, measurements: List[_Measurement], order: Callable[[float], float]):
+    def update(
+        self,
+        measurements: List[_Measurement],
+        order: Callable[[float], float],
+        hostFactors: Dict[str, float] | None = None,
+    ):
         # Update the spline model of the time dependence.
-        Ns, dts = self._prepareData(measurements, order)
+        #   The estimate is for a reference host: each measurement is first normalized by its host's speed factor.
+        Ns, dts = self._prepareData(measurements, order, hostFactors)
         self._update(Ns, dts, len(measurements))
 
     def _update(self, Ns: np.ndarray, dts: np.ndarray, dataCount: int):
@@ -264,12 +395,19 @@ class _Estimate(BaseModel):
             self.tck = (list(self._spl.tck[0]), list(self._spl.tck[1]), self._spl.tck[2])
 
     def _prepareData(
-        self, measurements: List[_Measurement], order: Callable[[float], float]
+        self,
+        measurements: List[_Measurement],
+        order: Callable[[float], float],
+        hostFactors: Dict[str, float] | None = None,
     ) -> Tuple[np.ndarray, np.ndarray]:
         # Sort and accumulate the measurement data.
 
+        hostFactors = hostFactors or {}
         ts = [
-            (order(measurement.N_ref) if measurement.N_ref is not None else None, measurement.dt)
+            (
+                order(measurement.N_ref) if measurement.N_ref is not None else None,
+                measurement.dt / hostFactors.get(measurement.host, 1.0),
+            )
             for measurement in measurements
         ]
 
@@ -332,6 +470,8 @@ class ProgressStep(BaseModel):
         self._dt: float | None = None
         self._loggingEnabled = False
         self._timer: Timer | None = None
+        self._resources: _ResourceMonitor | None = None
+        self._invocations = 0
 
     def setDetails(
         self,
@@ -344,7 +484,15 @@ class ProgressStep(BaseModel):
         self.details.setDetails(N_ref=N_ref, N_ref_args=N_ref_args, order=order)
         self._loggingEnabled = enableLogging
 
-    def start(self, isSubstep: bool):
+    def isSampled(self, sampleRate: float) -> bool:
+        # Count an invocation of the step: with a `sampleRate` of 1 / n, only every n-th invocation is recorded,
+        #   starting with the first.
+        self._invocations += 1
+        period = max(1, round(1.0 / sampleRate)) if sampleRate > 0.0 else 0
+        return period > 0 and (self._invocations - 1) % period == 0
+
+    def start(self, isSubstep: bool, hostFactor: float = 1.0):
+        # `hostFactor`: the speed of the current host, relative to the reference host of the estimate.
         self._isSubstep = isSubstep
         self._startTime = datetime.now(timezone.utc)
 
@@ -353,7 +501,10 @@ class ProgressStep(BaseModel):
         #   For example, it should not be recalculated prior to logging.
         self._N_ref = self.details.N_ref()
         if self._N_ref is not None:
-            self._dt = self.estimate.dt(self.details.order(self._N_ref))
+            self._dt = self.estimate.dt(self.details.order(self._N_ref)) * hostFactor
+
+        if Config["application.workflows_data.timing.resources.enabled"]:
+            self._resources = _ResourceMonitor()
 
     def stop(self):
         if not self.isActive:
@@ -362,16 +513,43 @@ class ProgressStep(BaseModel):
         self._startTime = None
         self._N_ref = None
         self._dt = None
+        self._resources = None
         if self._timer is not None:
             self._timer.cancel()
             self._timer = None
 
-    def recordMeasurement(self, dt_elapsed: float, dt_est: float, N_ref: float):
+    def sampleResources(self, adsMemory: int, eventCount: int):
+        # Update the peak ADS usage of an active step.
+        if self._resources is not None:
+            self._resources.sample(adsMemory, eventCount)
+
+    def resourceUsage(self) -> _Resources | None:
+        # The resource usage of an active step, up to now: `None` when resource profiling is disabled.
+        if not self.isActive:
+            raise RuntimeError(f"Usage error: attempt to read `resourceUsage` for unstarted step {self.name}.")
+        return self._resources.stop() if self._resources is not None else None
+
+    def recordMeasurement(
+        self,
+        dt_elapsed: float,
+        dt_est: float,
+        N_ref: float,
+        hostFactors: Dict[str, float] | None = None,
+        resources: _Resources | None = None,
+    ) -> _Measurement:
         # Record a measurement in the `measurements` list.
 
         # The possibility of active exceptions, or of an `N_ref` value of `None` should have been treated
         #   outside of this method.
-        self.measurements.append(_Measurement(dt=dt_elapsed, dt_est=dt_est, N_ref=N_ref))
+        measurement = _Measurement(
+            dt=dt_elapsed,
+            dt_est=dt_est,
+            N_ref=N_ref,
+            host=hostName(),
+            timestamp=time.time(),
+            resources=resources,
+        )
+        self.measurements.append(measurement)
 
         # Restrict the maximum length of the measurements list.
         max_measurements = Config["application.workflows_data.timing.max_measurements"]
@@ -384,7 +562,8 @@ class ProgressStep(BaseModel):
             # Enough data points are available to perform an update.
             if abs(dt_est - dt_elapsed) / dt_elapsed > Config["application.workflows_data.timing.update_threshold"]:
                 # The relative error from the current estimate is greater than the threshold.
-                self.estimate.update(self.measurements, self.details.order)
+                self.estimate.update(self.measurements, self.details.order, hostFactors)
+        return measurement
 
     @property
     def name(self) -> str:
@@ -445,6 +624,15 @@ class ProgressStep(BaseModel):
         return self._isSubstep
 
 
+class _LogEntry(BaseModel):
+    # A single measurement, as appended to the measurement log.
+
+    key: Tuple[str | None, ...]
+    N_ref_hash: str | None
+    order: ComputationalOrder | None
+    measurement: _Measurement
+
+
 class _ProgressRecorder(BaseModel):
     # Map from <step key> to progress steps.
     #   * `Dict[Tuple[str | None, ...], ProgressStep]` is the primary class,
@@ -459,6 +647,13 @@ class _ProgressRecorder(BaseModel):
     #       when it begins execution.
     steps: Dict[Tuple[str | None, ...], ProgressStep] | List[ProgressStep] = {}
 
+    # The speed of each host, relative to the reference host of the estimates:
+    #   a measurement from a host with a factor of 2.0 took twice as long as it would have on the reference host.
+    hostFactors: Dict[str, float] = {}
+
+    # The background compaction of the measurement log, if any.
+    _compaction: ClassVar[Thread | None] = None
+
     def __new__(cls, *_args, **_kwargs):
         # This is declared as a pass-through method, to be used during testing.
         return super().__new__(cls)
@@ -483,11 +678,20 @@ class _ProgressRecorder(BaseModel):
     def instance(cls) -> Self:
         # TODO: PROBLEM -- this bypasses `Config` reload!
         if cls.enabled:
+            dataService = LocalDataService()
+            recorder = cls.model_validate_json(dataService.readProgressRecords())
+
+            # Include the measurements which haven't yet been compacted into the records:
+            #   these may be from other sessions, which might still be running.
+            recorder._mergeLog(dataService.readProgressLog())
+
             if Config["application.workflows_data.timing.persistent_data"]:
-                # Automatically persist the progress data at application exit.
+                # Measurements are logged as they are recorded: at application exit,
+                #   wait for any compaction of the log to complete.
                 atexit.register(_ProgressRecorder._unloadResident)
+                cls._startCompaction()
 
-            return cls.model_validate_json(LocalDataService().readProgressRecords())
+            return recorder
 
         # When not enabled, we still need to return an "empty" instance.
         return cls()
@@ -496,12 +700,120 @@ class _ProgressRecorder(BaseModel):
     def _unloadResident(cls):
         # Unload method to register with `atexit`.
         try:
-            if cls.enabled:
-                LocalDataService().writeProgressRecords(cls.instance().model_dump_json(indent=2))
+            if cls.enabled and cls._compaction is not None:
+                # The records are replaced atomically: an abandoned compaction will be repeated by the next session.
+                cls._compaction.join(timeout=Config["application.workflows_data.timing.log.compaction_timeout"])
         except BaseException:  # noqa: BLE001
             # This method is registered with `atexit`: it must not raise any exceptions.
             pass
 
+    @classmethod
+    def _startCompaction(cls):
+        cls._compaction = Thread(target=cls._compactLog, name="ProgressRecorder-compaction", daemon=True)
+        cls._compaction.start()
+
+    @classmethod
+    def _compactLog(cls):
+        # Merge the log segments of any completed sessions into the saved records.
+        try:
+            LocalDataService().compactProgressRecords(
+                cls._compact, minimumCount=Config["application.workflows_data.timing.log.compaction_threshold"]
+            )
+        except Exception as e:  # noqa: BLE001
+            # Compaction is an optimization: the log remains valid until it succeeds.
+            logger.warning(f"Compaction of the execution-timing log failed: {e}")
+
+    @classmethod
+    def _compact(cls, records: str, log: List[str]) -> str:
+        recorder = cls.model_validate_json(records)
+        recorder._mergeLog(log)
+        return recorder.model_dump_json(indent=2)
+
+    def _appendToLog(self, step: ProgressStep, measurement: _Measurement):
+        entry = _LogEntry(
+            key=step.details.key, N_ref_hash=step.details.N_ref_hash, order=step.details.order, measurement=measurement
+        )
+        try:
+            LocalDataService().appendProgressRecords([entry.model_dump_json()])
+        except OSError as e:
+            logger.warning(f"Unable to save the execution-time measurement for step {step.name}: {e}")
+
+    def _mergeLog(self, log: List[str]):
+        # Merge the measurements from the log into the steps: any duplicate of an existing measurement is ignored.
+        merged: Dict[Tuple[str | None, ...], set] = {}
+        for record in log:
+            try:
+                entry = _LogEntry.model_validate_json(record)
+            except ValidationError:
+                # e.g. a record which is still being written by another session
+                logger.debug(f"Ignoring an unreadable execution-timing record: {record!r}")
+                continue
+            step = self.getStep(entry.key, create=True)
+            if step.details.N_ref_hash is None:
+                step.details.N_ref_hash = entry.N_ref_hash
+            if step.details.order is None:
+                step.details.order = entry.order
+            identities = merged.get(entry.key)
+            if identities is None:
+                identities = {(m.host, m.timestamp) for m in step.measurements if m.timestamp is not None}
+                merged[entry.key] = identities
+            identity = (entry.measurement.host, entry.measurement.timestamp)
+            if identity in identities:
+                continue
+            identities.add(identity)
+            step.measurements.append(entry.measurement)
+        if not merged:
+            return
+
+        maxMeasurements = Config["application.workflows_data.timing.max_measurements"]
+        for key in merged:
+            step = self.steps[key]
+            # Retain the most-recent measurements.
+            step.measurements.sort(key=lambda m: m.timestamp if m.timestamp is not None else 0.0)
+            step.measurements = step.measurements[-maxMeasurements:]
+        self._normalizeHosts()
+
+    @classmethod
+    def _isFittable(cls, step: ProgressStep) -> bool:
+        return (
+            step.details.order is not None
+            and len(step.measurements) >= Config["application.workflows_data.timing.update_minimum_count"]
+            and all(m.N_ref is not None for m in step.measurements)
+        )
+
+    def _normalizeHosts(self):
+        # Estimate the relative speed of each host from the residuals of its measurements,
+        #   then refit each estimate to the normalized measurements.
+        steps = [step for step in self.steps.values() if self._isFittable(step)]
+        for step in steps:
+            step.estimate.update(step.measurements, step.details.order, self.hostFactors)
+
+        logRatios: Dict[str, List[float]] = {}
+        for step in steps:
+            for m in step.measurements:
+                if m.host is None or m.dt <= 0.0:
+                    continue
+                dt_est = step.estimate.dt(step.details.order(m.N_ref)) * self.hostFactors.get(m.host, 1.0)
+                if dt_est > 0.0:
+                    logRatios.setdefault(m.host, []).append(np.log(m.dt / dt_est))
+        factors = dict(self.hostFactors)
+        for host, ratios in logRatios.items():
+            if len(ratios) >= Config["application.workflows_data.timing.host_normalization.minimum_count"]:
+                factors[host] = factors.get(host, 1.0) * float(np.exp(np.median(ratios)))
+        if factors == self.hostFactors:
+            return
+
+        # The reference host is the geometric mean of all of the hosts.
+        scale = float(np.exp(np.mean(np.log(list(factors.values())))))
+        self.hostFactors = {host: factor / scale for host, factor in factors.items()}
+        for step in steps:
+            step.estimate.update(step.measurements, step.details.order, self.hostFactors)
+
+    @property
+    def hostFactor(self) -> float:
+        # The speed factor of the current host.
+        return self.hostFactors.get(hostName(), 1.0)
+
     @classmethod
     def _getCallerFullyQualifiedName(cls, callerObjectOrStackFrame) -> Tuple[str | None, ...]:
         # Caller key based on its (<module>, <fully-qualified name>).
@@ -529,8 +841,7 @@ class _ProgressRecorder(BaseModel):
             module_name = caller.__module__
         else:
             frame = callerObjectOrStackFrame
-            module = inspect.getmodule(frame.f_code)
-            module_name = module.__name__ if module is not None else ""
+            module_name = cls._moduleName(frame.f_code)
 
             qualified_name = None
             if sys.version_info >= (3, 11, 0):
@@ -552,6 +863,13 @@ class _ProgressRecorder(BaseModel):
 
         return (module_name, qualified_name)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _moduleName(code: CodeType) -> str:
+        # `inspect.getmodule` may scan `sys.modules`: resolve each code object only once.
+        module = inspect.getmodule(code)
+        return module.__name__ if module is not None else ""
+
     @classmethod
     def isLoggingEnabledForStep(cls, key: Tuple[str, ...]) -> bool:
         # Determine whether or not to log a step, based on the qualified name of its scope.
@@ -610,21 +928,28 @@ class _ProgressRecorder(BaseModel):
         *,
         callerOrStackFrameOverride: MethodType | FunctionType | FrameType = None,
         stepName: str = None,
+        stepKey: Tuple[str | None, ...] = None,
         N_ref: Callable[..., float] = None,
         N_ref_args: Tuple[Tuple[Any, ...], Dict[str, Any]] = None,
         order: ComputationalOrder = None,
         enableLogging=False,
-    ) -> Tuple[str | None, ...]:
+        sampleRate: float = None,
+    ) -> Tuple[str | None, ...] | None:
         # Initialize the elapsed wall-clock time measurement for a processing step.
         # args:
         #   'stepName': [optional] if provided this is an additional suffix key added to
         #      the step key generated from the _local_ (e.g. <class instance>, <method>, <function>, or <module>) scope.
+        #   'stepKey': [optional] a step key precomputed by `getStepKey`:
+        #      when specified, `callerOrStackFrameOverride` and `stepName` are not used.
         #   'N_ref': an optional callable
         #   'N_ref_args': the args to be used when calling `N_ref` as `(args, kwargs)`
         #   'order': the computational order of the step.
         #     This will be used to _normalize_ the `N_ref` value prior to estimating the step.
+        #   'sampleRate': [optional] the fraction of invocations of the step to record:
+        #     by default, `Config["application.workflows_data.timing.sample_rate"]`.
         # returns:
-        #   the tuple of str keys used to uniquely identify the step
+        #   the tuple of str keys used to uniquely identify the step,
+        #   or `None` if this invocation is not recorded.
 
         # Usage notes:
         # -- Each call to `record` _must_ have a corresponding call to `stop`:
@@ -639,15 +964,24 @@ class _ProgressRecorder(BaseModel):
         if not _ProgressRecorder.enabled:
             return None
 
-        key = self.getStepKey(callerOrStackFrameOverride=callerOrStackFrameOverride, stepName=stepName)
+        key = (
+            stepKey
+            if stepKey is not None
+            else self.getStepKey(callerOrStackFrameOverride=callerOrStackFrameOverride, stepName=stepName)
+        )
         step = self.getStep(key, create=True)
+        if sampleRate is None:
+            sampleRate = Config["application.workflows_data.timing.sample_rate"]
+        if sampleRate < 1.0 and not step.isSampled(sampleRate):
+            # An unrecorded invocation: no corresponding call to `stop` is required.
+            return None
 
         # Logging is either enabled by explicit request,
         #   or is enabled depending on the specifics of the scope of the step's key.
         enableLogging |= ProgressRecorder.isLoggingEnabledForStep(key)
 
         step.setDetails(N_ref=N_ref, N_ref_args=N_ref_args, order=order, enableLogging=enableLogging)
-        step.start(isSubstep=len(self._activeSteps) > 0)
+        step.start(isSubstep=len(self._activeSteps) > 0, hostFactor=self.hostFactor)
 
         # Push to the active steps stack.
         self._activeSteps.append(step)
@@ -669,6 +1003,7 @@ class _ProgressRecorder(BaseModel):
         N_ref = step.N_ref
         dt = step.dt
         isSubstep = step.isSubstep
+        resources = step.resourceUsage()
 
         # all cached step properties are cleared beyond this point
         step.stop()
@@ -678,6 +1013,11 @@ class _ProgressRecorder(BaseModel):
             raise RuntimeError("Usage error: `_activeSteps` stack underflow.")
         self._activeSteps.pop()
 
+        # A substep's peak ADS usage is also a peak of each enclosing step.
+        if resources is not None:
+            for activeStep in self._activeSteps:
+                activeStep.sampleResources(resources.adsMemoryPeak, resources.eventCount)
+
         # Do not output anything to the log, or record the measurement,
         #   if any exception has been raised.
         if sys.exc_info()[0] is None:
@@ -686,10 +1026,26 @@ class _ProgressRecorder(BaseModel):
 
             stopTime = datetime.now(timezone.utc)
             elapsed = float((stopTime - startTime).total_seconds())
+            Metrics.stepDuration.observe(elapsed, step=step.name)
 
             # Do not record the measurement if `N_ref` could not be calculated.
             if N_ref is not None:
-                step.recordMeasurement(dt_elapsed=elapsed, dt_est=dt, N_ref=N_ref)
+                measurement = step.recordMeasurement(
+                    dt_elapsed=elapsed, dt_est=dt, N_ref=N_ref, hostFactors=self.hostFactors, resources=resources
+                )
+                if Config["application.workflows_data.timing.persistent_data"]:
+                    self._appendToLog(step, measurement)
+
+    def rankSteps(self, resource: StepResource) -> List[Tuple[str, int, float]]:
+        # Rank the steps by their mean usage of a resource:
+        #   returns `(<step name>, <measurement count>, <mean value>)`, in decreasing order of the mean value.
+        ranking = []
+        for step in self.steps.values():
+            values = [m.resource(resource) for m in step.measurements]
+            values = [value for value in values if value is not None]
+            if values:
+                ranking.append((step.name, len(values), float(np.mean(values))))
+        return sorted(ranking, key=lambda r: r[2], reverse=True)
 
     def logTimeRemaining(self, key: Tuple[str | None, ...]):
         # user-facing method to log the step time remaining
@@ -821,6 +1177,7 @@ class WallClockTime:
         N_ref_args: Tuple[Tuple[Any, ...], Dict[str, Any]] = ((), {}),
         order: ComputationalOrder = ComputationalOrder.O_0,
         enableLogging: bool = False,
+        sampleRate: float = None,
     ):
         # When used as a decorator:
         #   -- `callerOverride` is specified _only_ if the decoratee is a class:
@@ -838,7 +1195,9 @@ class WallClockTime:
         #      when specified: `N_ref` must be a `FunctionType`.
         # In either case:
         #   -- when `N_ref`, `N_ref_args`, and `order` are left as `None`:
-        #      at time of execution, a constant-time estimate will be used.
+        #      at time of execution, a constant-time estimate will be used;
+        #   -- `sampleRate` may optionally be specified for a high-frequency step:
+        #      only this fraction of its invocations will be recorded.
         # For discussion of these details, please see:
         #    `snapred.readthedocs.io/en/latest/developer/implementation_notes/profiling_and_progress_recording.html`.
 
@@ -853,6 +1212,7 @@ class WallClockTime:
         self.order = order
         self._stepKey = None
         self._enableLogging = enableLogging
+        self.sampleRate = sampleRate
 
     @classmethod
     def _progressRecorder(cls):
@@ -917,6 +1277,11 @@ class WallClockTime:
                 + "  only `FunctionType` or `type` can be decorated."
             )
 
+        # The step key is computed once, rather than at each call:
+        #   the decorated `FunctionType` or `type` should be used to generate the step key,
+        #   not the <class method> passed in via the `callerOverride`!
+        stepKey = self._progressRecorder().getStepKey(callerOrStackFrameOverride=decoratee, stepName=self.stepName)
+
         @functools.wraps(func)  # Retain metadata from the wrapped `func`.
         def _wrapper(*args, **kwargs):
             # This wrapper profiles the call to the wrapped function using `_ProgressRecorder.record`,
@@ -929,14 +1294,12 @@ class WallClockTime:
                 if self._stepKey is not None:
                     raise RuntimeError("Usage error: a `WallClockTime` decorated function is not re-entrant.")
                 self._stepKey = self._progressRecorder().record(
-                    stepName=self.stepName,
-                    # the decorated `FunctionType` or `type` should be used to generate the step key,
-                    #   not the <class method> passed in via the `callerOverride`!
-                    callerOrStackFrameOverride=decoratee,
+                    stepKey=stepKey,
                     N_ref=self.N_ref,
                     N_ref_args=(args, kwargs),
                     order=self.order,
                     enableLogging=self._enableLogging,
+                    sampleRate=self.sampleRate,
                 )
 
                 result = func(*args, **kwargs)
@@ -974,6 +1337,7 @@ class WallClockTime:
             N_ref_args=self.N_ref_args,
             order=self.order,
             enableLogging=self._enableLogging,
+            sampleRate=self.sampleRate,
         )
         return self._stepKey
 
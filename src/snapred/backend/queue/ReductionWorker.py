@@ -0,0 +1,117 @@
+import time
+import traceback
+from threading import Event, Thread
+from typing import Any, Callable, Dict
+
+from snapred.backend.dao.request import ReductionExportRequest, ReductionRequest
+from snapred.backend.error.ContinueWarning import ContinueWarning
+from snapred.backend.log.logger import snapredLogger
+from snapred.backend.queue.WorkQueue import Lease, WorkItem, WorkQueue
+from snapred.backend.service.ReductionService import ReductionService
+from snapred.meta.decorators.ConfigDefault import ConfigDefault, ConfigValue
+
+logger = snapredLogger.getLogger(__name__)
+
+
+class ReductionWorker:
+    """
+
+    Consumes `ReductionRequest` items from a shared `WorkQueue`, reducing each one with the `ReductionService`.
+
+    While an item is being processed, a background thread keeps its lease alive.
+    Any exception raised during processing is recorded on the item, which is then re-queued
+    until it has used up its maximum number of attempts.
+
+    """
+
+    @ConfigDefault
+    def __init__(
+        self,
+        queue: WorkQueue,
+        process: Callable[[WorkItem], Any] | None = None,
+        heartbeatInterval: float = ConfigValue("workQueue.heartbeatInterval"),
+        pollInterval: float = ConfigValue("workQueue.pollInterval"),
+    ):
+        # `process` is only overridden for testing: by default each item is reduced.
+        self.queue = queue
+        self.process = process if process is not None else self._reduce
+        self.heartbeatInterval = float(heartbeatInterval)
+        self.pollInterval = float(pollInterval)
+        self.workerId = WorkQueue.workerId()
+
+    def _reduce(self, item: WorkItem) -> Dict[str, Any]:
+        # Follows the same sequence as the reduction workflow.
+        service = ReductionService()
+        request = ReductionRequest.model_validate_json(item.payload)
+        if request.timestamp is None:
+            request.timestamp = service.getUniqueTimestamp()
+
+        service.validateReduction(request)
+        response = service.reduction(request)
+        record = response.record
+        if ContinueWarning.Type.NO_WRITE_PERMISSIONS not in request.continueFlags:
+            service.saveReduction(ReductionExportRequest(record=record))
+
+        # Retain only the cached workspaces (e.g. groupings and normalizations) for the next item.
+        service.groceryService.clearADS(exclude=[], clearCache=False)
+
+        return {
+            "runNumber": record.runNumber,
+            "timestamp": record.timestamp,
+            "workspaceNames": [str(ws) for ws in record.workspaceNames],
+            "executionTime": response.executionTime.total_seconds(),
+        }
+
+    def _keepAlive(self, lease: Lease, done: Event):
+        while not done.wait(self.heartbeatInterval):
+            if not self.queue.heartbeat(lease):
+                logger.warning(f"{self.workerId}: lost the lease on work item {lease.item.id}")
+                return
+
+    def processNext(self) -> bool:
+        """
+        Claim and process a single item.
+
+        :return: `False` if there was no pending item
+        :rtype: bool
+        """
+        self.queue.requeueExpired()
+        lease = self.queue.claim(self.workerId)
+        if lease is None:
+            return False
+
+        logger.info(f"{self.workerId}: processing work item {lease.item.id} (attempt {lease.item.attempts})")
+        done = Event()
+        heartbeat = Thread(target=self._keepAlive, args=(lease, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = self.process(lease.item)
+        except Exception as e:  # noqa: BLE001
+            done.set()
+            heartbeat.join()
+            logger.error(f"{self.workerId}: work item {lease.item.id} failed: {e}")
+            self.queue.fail(lease, "".join(traceback.format_exception(e)))
+            return True
+        done.set()
+        heartbeat.join()
+        self.queue.complete(lease, result)
+        logger.info(f"{self.workerId}: completed work item {lease.item.id}")
+        return True
+
+    def run(self, maxItems: int | None = None, exitWhenEmpty: bool = False) -> int:
+        """
+        Process items until `maxItems` have been processed, or, if `exitWhenEmpty` is set,
+        until the queue has no pending items.
+
+        :return: the number of items processed
+        :rtype: int
+        """
+        count = 0
+        while maxItems is None or count < maxItems:
+            if self.processNext():
+                count += 1
+                continue
+            if exitWhenEmpty:
+                break
+            time.sleep(self.pollInterval)
+        return count
@@ -0,0 +1,258 @@
+import os
+import time
+import uuid
+from enum import StrEnum
+from pathlib import Path
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from snapred.backend.log.logger import snapredLogger
+from snapred.meta.decorators.ConfigDefault import ConfigDefault, ConfigValue
+from snapred.meta.LockFile import hostName
+
+logger = snapredLogger.getLogger(__name__)
+
+
+class WorkItemStatus(StrEnum):
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class WorkItem(BaseModel):
+    """
+
+    A single unit of work held in a `WorkQueue`.
+
+    The `payload` is opaque to the queue: for the reduction worker it is the JSON of a `ReductionRequest`.
+
+    """
+
+    id: str
+    payload: str
+    submitted: float
+    attempts: int = 0
+    owner: str | None = None
+    claimed: float | None = None
+    finished: float | None = None
+    result: Any = None
+    error: str | None = None
+
+
+class Lease(BaseModel):
+    """
+
+    Proof of ownership of a claimed `WorkItem`.
+    A lease remains valid for as long as its claimed-item file exists:
+    an expired lease is re-queued by `WorkQueue.requeueExpired`, which removes that file.
+
+    """
+
+    item: WorkItem
+    path: Path
+
+
+class WorkQueue:
+    """
+
+    A file-backed work queue, shared between processes (and nodes) that mount the same filesystem.
+
+    Each item is a JSON file which moves between the 'pending', 'claimed', 'completed' and 'failed' subdirectories
+    of the queue root.  All state transitions are single `os.rename` calls, which are atomic on POSIX filesystems:
+    when several workers race to claim the same item, exactly one of the renames succeeds.
+
+    Implementation notes:
+
+    - A claimed item's filename includes a unique lease token.  Once an expired lease has been re-queued,
+      the original owner's heartbeat and completion calls fail, even if the same item has since been claimed again.
+    - Lease expiry uses the claimed file's modification time, which is refreshed by `heartbeat`.
+      Clock skew between nodes should be small compared to `workQueue.lease`.
+    - Delivery is at-least-once: a worker that stalls beyond its lease may finish an item that has also
+      been re-queued for another worker.
+
+    """
+
+    _SUFFIX = ".json"
+
+    @ConfigDefault
+    def __init__(
+        self,
+        root: Path | str = ConfigValue("workQueue.root"),
+        leaseDuration: float = ConfigValue("workQueue.lease"),
+        maxAttempts: int = ConfigValue("workQueue.maxAttempts"),
+    ):
+        self.root = Path(root)
+        self.leaseDuration = float(leaseDuration)
+        self.maxAttempts = int(maxAttempts)
+        for status in WorkItemStatus:
+            self._dir(status).mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, status: WorkItemStatus) -> Path:
+        return self.root / str(status)
+
+    def _write(self, path: Path, item: WorkItem):
+        # Write-then-rename, so that no reader ever sees a partially-written item.
+        tmpPath = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.tmp"
+        tmpPath.write_text(item.model_dump_json(indent=2))
+        os.replace(tmpPath, path)
+
+    @classmethod
+    def _itemId(cls, path: Path) -> str:
+        # Claimed-item filenames are "<item id>.<lease token>.json".
+        return path.name[: -len(cls._SUFFIX)].split(".")[0]
+
+    def _items(self, status: WorkItemStatus) -> List[Path]:
+        # Item ids begin with their submission time, so lexical order is FIFO order.
+        return sorted(p for p in self._dir(status).glob(f"*{self._SUFFIX}") if not p.name.startswith("."))
+
+    def submit(self, payload: str | BaseModel) -> WorkItem:
+        """
+        Add a new item to the end of the queue.
+
+        :param payload: the item's payload: a pydantic model will be serialized to JSON
+        :type payload: str | BaseModel
+        :return: the queued item
+        :rtype: WorkItem
+        """
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump_json()
+        item = WorkItem(id=f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}", payload=payload, submitted=time.time())
+        self._write(self._dir(WorkItemStatus.PENDING) / f"{item.id}{self._SUFFIX}", item)
+        return item
+
+    def claim(self, owner: str) -> Lease | None:
+        """
+        Claim the oldest pending item.
+
+        :param owner: an identifier for the claiming worker
+        :type owner: str
+        :return: the lease for the claimed item, or `None` if no item is pending
+        :rtype: Lease | None
+        """
+        for pendingPath in self._items(WorkItemStatus.PENDING):
+            itemId = self._itemId(pendingPath)
+            claimedPath = self._dir(WorkItemStatus.CLAIMED) / f"{itemId}.{uuid.uuid4().hex[:12]}{self._SUFFIX}"
+            try:
+                os.rename(pendingPath, claimedPath)
+            except FileNotFoundError:
+                # Another worker claimed this item first.
+                continue
+            # The renamed file keeps the pending item's modification time: refresh it immediately,
+            #   so that the new lease isn't mistaken for an expired one.
+            os.utime(claimedPath)
+            item = WorkItem.model_validate_json(claimedPath.read_text())
+            item.attempts += 1
+            item.owner = owner
+            item.claimed = time.time()
+            self._write(claimedPath, item)
+            return Lease(item=item, path=claimedPath)
+        return None
+
+    def heartbeat(self, lease: Lease) -> bool:
+        """
+        Extend a lease.
+
+        :return: `False` if the lease has already expired and the item has been re-queued
+        :rtype: bool
+        """
+        try:
+            os.utime(lease.path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _finish(self, lease: Lease, status: WorkItemStatus) -> bool:
+        # As in `requeueExpired`: take the item from its lease with a single rename, so that an expired lease
+        #   is never re-created.
+        stagingPath = self._dir(status) / f".{lease.path.name}.finished"
+        try:
+            os.rename(lease.path, stagingPath)
+        except FileNotFoundError:
+            logger.warning(f"lease on work item {lease.item.id} has expired: its result will not be recorded")
+            return False
+        lease.item.finished = time.time()
+        self._write(self._dir(status) / f"{lease.item.id}{self._SUFFIX}", lease.item)
+        stagingPath.unlink()
+        return True
+
+    def complete(self, lease: Lease, result: Any = None) -> bool:
+        """
+        Mark a claimed item as completed.
+
+        :return: `False` if the lease had expired before completion
+        :rtype: bool
+        """
+        lease.item.result = result
+        lease.item.error = None
+        return self._finish(lease, WorkItemStatus.COMPLETED)
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        """
+        Record a failed attempt: the item is re-queued, unless it has used up its `maxAttempts`.
+
+        :return: `False` if the lease had expired before the failure was recorded
+        :rtype: bool
+        """
+        lease.item.error = error
+        if lease.item.attempts < self.maxAttempts:
+            lease.item.owner = None
+            lease.item.claimed = None
+            return self._finish(lease, WorkItemStatus.PENDING)
+        return self._finish(lease, WorkItemStatus.FAILED)
+
+    def requeueExpired(self) -> List[str]:
+        """
+        Return any claimed items with expired leases to the pending queue.
+        An expired item which has used up its `maxAttempts` is moved to the failed items instead:
+        an item which kills its worker (e.g. out of memory) would otherwise be re-claimed forever.
+
+        :return: the ids of the re-queued items
+        :rtype: List[str]
+        """
+        requeued = []
+        now = time.time()
+        for claimedPath in self._items(WorkItemStatus.CLAIMED):
+            itemId = self._itemId(claimedPath)
+            try:
+                if now - claimedPath.stat().st_mtime <= self.leaseDuration:
+                    continue
+                item = WorkItem.model_validate_json(claimedPath.read_text())
+                status = WorkItemStatus.PENDING if item.attempts < self.maxAttempts else WorkItemStatus.FAILED
+                # Take ownership of the expired item with a single rename:
+                #   the hidden staging file is ignored by `_items`, until the updated item is written.
+                stagingPath = self._dir(status) / f".{claimedPath.name}.expired"
+                os.rename(claimedPath, stagingPath)
+            except FileNotFoundError:
+                # completed, or re-queued by another worker
+                continue
+            item.owner = None
+            item.claimed = None
+            if status == WorkItemStatus.FAILED:
+                item.error = f"lease expired after {item.attempts} attempts"
+                item.finished = time.time()
+            self._write(self._dir(status) / f"{itemId}{self._SUFFIX}", item)
+            stagingPath.unlink()
+            if status == WorkItemStatus.FAILED:
+                logger.error(f"lease on work item {itemId} expired: it has used up its {self.maxAttempts} attempts")
+                continue
+            logger.warning(f"lease on work item {itemId} expired: re-queued")
+            requeued.append(itemId)
+        return requeued
+
+    def items(self, status: WorkItemStatus) -> List[WorkItem]:
+        items = []
+        for path in self._items(status):
+            try:
+                items.append(WorkItem.model_validate_json(path.read_text()))
+            except FileNotFoundError:
+                continue
+        return items
+
+    def counts(self) -> Dict[str, int]:
+        return {str(status): len(self._items(status)) for status in WorkItemStatus}
+
+    @staticmethod
+    def workerId() -> str:
+        return f"{hostName()}_{os.getpid()}"
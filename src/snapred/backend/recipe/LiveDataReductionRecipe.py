@@ -0,0 +1,247 @@
+from typing import Any, Dict, List, Tuple
+
+from snapred.backend.dao.WorkspaceMetadata import ParticleNormalizationMethod, WorkspaceMetadata
+from snapred.backend.log.logger import snapredLogger
+from snapred.backend.recipe.ApplyNormalizationRecipe import ApplyNormalizationRecipe
+from snapred.backend.recipe.EffectiveInstrumentRecipe import EffectiveInstrumentRecipe
+from snapred.backend.recipe.GenerateFocussedVanadiumRecipe import GenerateFocussedVanadiumRecipe
+from snapred.backend.recipe.PreprocessReductionRecipe import PreprocessReductionRecipe
+from snapred.backend.recipe.Recipe import WorkspaceName
+from snapred.backend.recipe.ReductionGroupProcessingRecipe import ReductionGroupProcessingRecipe
+from snapred.backend.recipe.ReductionRecipe import ReductionRecipe
+from snapred.backend.recipe.WriteWorkspaceMetadata import WriteWorkspaceMetadata
+from snapred.meta.Config import Config
+from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceNameGenerator as wng
+
+_logger = snapredLogger.getLogger(__name__)
+
+
+class LiveDataReductionRecipe(ReductionRecipe):
+    """
+    Incremental reduction of live data.
+
+    The input workspace holds only the events that arrived since the previous live-data cycle.
+    For each grouping, these events are focused, and then added into a focused accumulator,
+    which is retained between cycles.  Normalization by current is applied to a copy of the accumulator,
+    so that each cycle's output is the same as would have been obtained by reducing all of the events.
+
+    The focused vanadium is also retained between cycles:
+    the normalization data is only processed during the first cycle.
+
+    In addition to the "outputs", the returned dictionary includes "retainedWorkspaces":
+    these workspaces must not be deleted between live-data cycles.
+    """
+
+    def logger(self):
+        return _logger
+
+    def _getAccumulatorWorkspaceName(self, groupingIndex: int) -> WorkspaceName:
+        return (
+            wng.reductionLiveDataAccumulator()
+            .group(self.ingredients.pixelGroups[groupingIndex].focusGroup.name.lower())
+            .runNumber(self.ingredients.runNumber)
+            .timestamp(self.ingredients.timestamp)
+            .build()
+        )
+
+    def _getFocussedVanadiumWorkspaceName(self, groupingIndex: int) -> WorkspaceName:
+        return (
+            wng.reductionLiveDataNormalization()
+            .group(self.ingredients.pixelGroups[groupingIndex].focusGroup.name.lower())
+            .runNumber(self.ingredients.runNumber)
+            .timestamp(self.ingredients.timestamp)
+            .build()
+        )
+
+    def _prepareFocussedVanadium(self, groupingIndexes: List[int]) -> Dict[int, WorkspaceName]:
+        # Generate any focused vanadium not retained from a previous cycle.
+        focussedVanadium = {
+            groupingIndex: self._getFocussedVanadiumWorkspaceName(groupingIndex) for groupingIndex in groupingIndexes
+        }
+        missing = [
+            groupingIndex
+            for groupingIndex, workspace in focussedVanadium.items()
+            if not self.mantidSnapper.mtd.doesExist(workspace)
+        ]
+        if not missing:
+            return focussedVanadium
+
+        self.mantidSnapper.ConvertUnitsIfRequired(
+            "Converting normalization data to d-spacing",
+            InputWorkspace=self.normalizationWs,
+            OutputWorkspace=self.normalizationWs,
+            Target="dSpacing",
+            EMode="Elastic",
+        )
+        self.mantidSnapper.executeQueue()
+
+        normalizationWsMasked = self.normalizationWs.builder.masked(True).build()
+        self._applyRecipe(
+            PreprocessReductionRecipe,
+            self.ingredients.preprocess(),
+            inputWorkspace=self.normalizationWs,
+            outputWorkspace=normalizationWsMasked,
+            **({"maskWorkspace": self.maskWs} if self.maskWs else {}),
+        )
+        for groupingIndex in missing:
+            self._applyRecipe(
+                ReductionGroupProcessingRecipe,
+                self.ingredients.groupProcessing(groupingIndex),
+                inputWorkspace=normalizationWsMasked,
+                outputWorkspace=focussedVanadium[groupingIndex],
+                groupingWorkspace=self.groupingWorkspaces[groupingIndex],
+            )
+            self._applyRecipe(
+                GenerateFocussedVanadiumRecipe,
+                self.ingredients.generateFocussedVanadium(groupingIndex),
+                inputWorkspace=focussedVanadium[groupingIndex],
+                outputWorkspace=focussedVanadium[groupingIndex],
+            )
+        self._deleteWorkspace(normalizationWsMasked)
+        return focussedVanadium
+
+    def _accumulate(self, groupingIndex: int, focusedChunk: WorkspaceName) -> WorkspaceName:
+        # Focus the new events, without normalization by current, and add them into the accumulator.
+        accumulator = self._getAccumulatorWorkspaceName(groupingIndex)
+        isFirstChunk = not self.mantidSnapper.mtd.doesExist(accumulator)
+        self._applyRecipe(
+            ReductionGroupProcessingRecipe,
+            self.ingredients.groupProcessing(groupingIndex, normalizeByCurrent=False),
+            inputWorkspace=self.sampleWs,
+            outputWorkspace=accumulator if isFirstChunk else focusedChunk,
+            groupingWorkspace=self.groupingWorkspaces[groupingIndex],
+        )
+        if not isFirstChunk:
+            self.mantidSnapper.Plus(
+                "Adding focused data to the live-data accumulator",
+                LHSWorkspace=accumulator,
+                RHSWorkspace=focusedChunk,
+                OutputWorkspace=accumulator,
+            )
+            self.mantidSnapper.executeQueue()
+        return accumulator
+
+    def _normalizeByCurrent(self, accumulator: WorkspaceName, outputWs: WorkspaceName):
+        self._cloneWorkspace(accumulator, outputWs)
+        self.mantidSnapper.NormalizeByCurrentButTheCorrectWay(
+            "Normalizing accumulated data by current",
+            InputWorkspace=outputWs,
+            OutputWorkspace=outputWs,
+        )
+        self.mantidSnapper.executeQueue()
+        WriteWorkspaceMetadata().cook(
+            WorkspaceMetadata(particleNormalizationMethod=ParticleNormalizationMethod.PROTON_CHARGE),
+            {"workspace": outputWs},
+        )
+
+    def execute(self):
+        data: Dict[str, Any] = {"result": False}
+
+        if bool(self.maskWs) and all(
+            (self._isGroupFullyMasked(groupingIndex) for groupingIndex in range(len(self.groupingWorkspaces)))
+        ):
+            raise RuntimeError(
+                "There are no unmasked pixels in any of the groupings.  Please check your mask workspace!"
+            )
+
+        groupingIndexes = []
+        for groupingIndex in range(len(self.groupingWorkspaces)):
+            if bool(self.maskWs) and self._isGroupFullyMasked(groupingIndex):
+                self.logger().warning(
+                    f"\nAll pixels within the '{self.ingredients.pixelGroups[groupingIndex].focusGroup.name}' "
+                    + "grouping are masked.\n"
+                    + "This grouping will be skipped!"
+                )
+                continue
+            groupingIndexes.append(groupingIndex)
+
+        try:
+            outputs, retainedWorkspaces = self._reduceChunk(groupingIndexes)
+        except Exception:
+            # Partially-updated accumulators cannot be used by the next cycle.
+            self._deleteRetainedWorkspaces(groupingIndexes)
+            raise
+
+        data["result"] = True
+        data["outputs"] = outputs
+        data["retainedWorkspaces"] = retainedWorkspaces
+        return data
+
+    def _deleteRetainedWorkspaces(self, groupingIndexes: List[int]):
+        for groupingIndex in groupingIndexes:
+            for workspace in (
+                self._getAccumulatorWorkspaceName(groupingIndex),
+                self._getFocussedVanadiumWorkspaceName(groupingIndex),
+            ):
+                if self.mantidSnapper.mtd.doesExist(workspace):
+                    self._deleteWorkspace(workspace)
+
+    def _reduceChunk(self, groupingIndexes: List[int]) -> Tuple[List[WorkspaceName], List[WorkspaceName]]:
+        outputs = []
+        retainedWorkspaces = []
+
+        self.mantidSnapper.ConvertUnitsIfRequired(
+            "Converting sample data to d-spacing",
+            InputWorkspace=self.sampleWs,
+            OutputWorkspace=self.sampleWs,
+            Target="dSpacing",
+            EMode="Elastic",
+        )
+        self.mantidSnapper.executeQueue()
+
+        self._applyRecipe(
+            PreprocessReductionRecipe,
+            self.ingredients.preprocess(),
+            inputWorkspace=self.sampleWs,
+            **({"maskWorkspace": self.maskWs} if self.maskWs else {}),
+        )
+
+        focussedVanadium = {}
+        if self.normalizationWs:
+            focussedVanadium = self._prepareFocussedVanadium(groupingIndexes)
+            retainedWorkspaces.extend(focussedVanadium.values())
+
+        for groupingIndex in groupingIndexes:
+            sampleClone, _ = self._generateWorkspaceNamesForGroup(groupingIndex)
+
+            accumulator = self._accumulate(groupingIndex, sampleClone)
+            retainedWorkspaces.append(accumulator)
+
+            self._normalizeByCurrent(accumulator, sampleClone)
+
+            normalizationWs = focussedVanadium.get(groupingIndex)
+            artificialNormalizationWs = None
+            if self.ingredients.artificialNormalizationIngredients:
+                # The artificial normalization depends on the sample data, so it's regenerated for each cycle.
+                artificialNormalizationWs = self._getNormalizationWorkspaceName(groupingIndex)
+                self._applyRecipe(
+                    GenerateFocussedVanadiumRecipe,
+                    self.ingredients.generateFocussedVanadium(groupingIndex),
+                    inputWorkspace=sampleClone,
+                    outputWorkspace=artificialNormalizationWs,
+                )
+                normalizationWs = artificialNormalizationWs
+
+            self._applyRecipe(
+                ApplyNormalizationRecipe,
+                self.ingredients.applyNormalization(groupingIndex),
+                inputWorkspace=sampleClone,
+                normalizationWorkspace=normalizationWs,
+            )
+
+            if Config["reduction.output.useEffectiveInstrument"]:
+                self._applyRecipe(
+                    EffectiveInstrumentRecipe,
+                    self.ingredients.effectiveInstrument(groupingIndex),
+                    inputWorkspace=sampleClone,
+                )
+
+            outputs.append(self._addOrReplaceToOutput(sampleClone))
+
+            if artificialNormalizationWs:
+                self._deleteWorkspace(artificialNormalizationWs)
+
+        if self.maskWs:
+            outputs.append(self.maskWs)
+
+        return outputs, retainedWorkspaces
@@ -0,0 +1,163 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from snapred.backend.log.logger import snapredLogger
+from snapred.meta.decorators.ConfigDefault import ConfigDefault, ConfigValue
+
+logger = snapredLogger.getLogger(__name__)
+
+
+class PipelineStep(NamedTuple):
+    """
+    A single step of a `Pipeline`.
+
+    `action` is called without arguments: any workspace that it reads or writes must be declared,
+    otherwise its ordering relative to the other steps is not guaranteed.
+    """
+
+    name: str
+    action: Callable[[], Any]
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+
+    @property
+    def workspaces(self) -> Set[str]:
+        return set(self.reads) | set(self.writes)
+
+
+class Pipeline:
+    """
+    A declarative sequence of recipe steps, executed as a dependency graph.
+
+    A step depends on each earlier step that writes a workspace it reads or writes,
+    or that reads a workspace it writes.  Steps without a dependency between them may run concurrently,
+    using at most `maxWorkers` threads.  With a single worker, the steps run in the order they were added.
+
+    A workspace written by any step is an intermediate: it is deleted as soon as every step which uses it
+    has completed, unless it has been declared using `keep`.  Workspaces which are read before they are written
+    (i.e. the inputs to the pipeline, including any which are modified in place) are never deleted.
+
+    If a step raises, no further steps are started, and the exception is re-raised once any running steps complete.
+    In that case, intermediate workspaces are not deleted.
+    """
+
+    @ConfigDefault
+    def __init__(
+        self,
+        deleteWorkspace: Callable[[str], None],
+        maxWorkers: int = ConfigValue("recipe.pipeline.maxWorkers"),
+    ):
+        self._deleteWorkspace = deleteWorkspace
+        self.maxWorkers = max(1, maxWorkers)
+        self._steps: List[PipelineStep] = []
+        self._kept: Set[str] = set()
+
+    def addStep(
+        self, name: str, action: Callable[[], Any], reads: Iterable[str] = (), writes: Iterable[str] = ()
+    ) -> "Pipeline":
+        if any(step.name == name for step in self._steps):
+            raise ValueError(f"a step named '{name}' has already been added to the pipeline")
+        self._steps.append(PipelineStep(name, action, tuple(reads), tuple(writes)))
+        return self
+
+    def keep(self, *workspaces: str) -> "Pipeline":
+        """
+        Declare workspaces, written by the pipeline, which must not be deleted: usually its outputs.
+        """
+        self._kept.update(workspaces)
+        return self
+
+    @property
+    def steps(self) -> List[PipelineStep]:
+        return list(self._steps)
+
+    def dependencies(self) -> Dict[str, Set[str]]:
+        """
+        For each step (by name), the names of the steps which must complete before it can start.
+        """
+        dependencies: Dict[str, Set[str]] = {}
+        for n, step in enumerate(self._steps):
+            dependencies[step.name] = {
+                previous.name
+                for previous in self._steps[:n]
+                if set(previous.writes) & step.workspaces or set(previous.reads) & set(step.writes)
+            }
+        return dependencies
+
+    def intermediates(self) -> Set[str]:
+        """
+        The workspaces created by the pipeline: those first used by a step which writes them without reading them.
+        """
+        intermediates, used = set(), set()
+        for step in self._steps:
+            intermediates.update(set(step.writes) - set(step.reads) - used)
+            used.update(step.workspaces)
+        return intermediates - self._kept
+
+    def execute(self) -> Dict[str, Any]:
+        """
+        Run all of the steps, and return each step's result, by step name.
+        """
+        # the number of incomplete steps using each intermediate workspace
+        intermediates = self.intermediates()
+        users: Dict[str, int] = {}
+        for step in self._steps:
+            for ws in step.workspaces & intermediates:
+                users[ws] = users.get(ws, 0) + 1
+
+        def _release(step: PipelineStep):
+            for ws in sorted(step.workspaces & intermediates):
+                users[ws] -= 1
+                if users[ws] == 0:
+                    logger.debug(f"Deleting intermediate workspace '{ws}' after step '{step.name}'")
+                    self._deleteWorkspace(ws)
+
+        if self.maxWorkers == 1:
+            results = {}
+            for step in self._steps:
+                results[step.name] = step.action()
+                _release(step)
+            return results
+        return self._executeConcurrently(_release)
+
+    def _executeConcurrently(self, release: Callable[[PipelineStep], None]) -> Dict[str, Any]:
+        steps = {step.name: step for step in self._steps}
+        waitingFor = self.dependencies()
+        dependents: Dict[str, List[str]] = {name: [] for name in steps}
+        for name, dependencies in waitingFor.items():
+            for dependency in dependencies:
+                dependents[dependency].append(name)
+
+        results: Dict[str, Any] = {}
+        failure: BaseException | None = None
+        with ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="Pipeline") as executor:
+            running: Dict[Future, str] = {}
+
+            def _submitReady():
+                # steps are started in the order they were added
+                for name in [name for name, dependencies in waitingFor.items() if not dependencies]:
+                    del waitingFor[name]
+                    running[executor.submit(steps[name].action)] = name
+
+            _submitReady()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except BaseException as e:  # noqa: BLE001
+                        if failure is None:
+                            logger.error(f"Pipeline step '{name}' failed: {e}")
+                            failure = e
+                        continue
+                    if failure is None:
+                        release(steps[name])
+                    for dependent in dependents[name]:
+                        waitingFor[dependent].discard(name)
+                if failure is None:
+                    _submitReady()
+
+        if failure is not None:
+            raise failure
+        return results
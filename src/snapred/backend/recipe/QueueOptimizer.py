@@ -0,0 +1,266 @@
+from numbers import Number
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from snapred.backend.log.logger import snapredLogger
+from snapred.meta.Callback import Callback
+from snapred.meta.Config import Config
+from snapred.meta.decorators.ConfigDefault import ConfigDefault, ConfigValue
+
+logger = snapredLogger.getLogger(__name__)
+
+# A `MantidSnapper` queue entry: (<algorithm name>, <message>, <kwargs>, <output properties>)
+QueueEntry = Tuple[str, str, Dict[str, Any], Dict[str, Any]]
+
+# An output `Callback` of a removed entry, which must be updated from the output of the entry which replaced it
+CallbackAlias = Tuple[Callback, Callback]
+
+
+class QueueOptimizer:
+    """
+    A peephole optimizer for `MantidSnapper` algorithm queues.
+
+    Recipes are written for clarity: this pass removes the redundant algorithms that result.
+    Each rule is applied, in the configured order, to the entire queue:
+
+    - "deadClone": remove a `CloneWorkspace` whose output is washed (by `WashDishes`) before it is used;
+    - "redundantConvertUnits": remove a `ConvertUnits` (or `ConvertUnitsIfRequired`) which is applied in place
+      to the output of the immediately-preceding conversion to the same target;
+    - "fuseScale": combine consecutive in-place `Scale` operations on the same workspace into one;
+    - "duplicateWash": remove workspaces from a `WashDishes` when they have already been deleted.
+
+    The rules are conservative: any argument which can't be resolved to a workspace name at optimization time,
+    such as an output `Callback` from earlier in the queue, is assumed to refer to every workspace.
+    When an algorithm is removed, its output callbacks are aliased to those of the algorithm that replaced it.
+    """
+
+    _WASH = "WashDishes"
+    _DELETE = ("WashDishes", "DeleteWorkspace", "DeleteWorkspaces")
+    _CONVERT_UNITS = ("ConvertUnits", "ConvertUnitsIfRequired")
+
+    @ConfigDefault
+    def __init__(self, rules: List[str] = ConfigValue("recipe.queue.optimization.rules")):
+        self._rules: List[Callable[[List[QueueEntry]], List[QueueEntry]]] = []
+        for rule in rules:
+            method = getattr(self, f"_{rule}", None)
+            if method is None:
+                raise ValueError(f"unknown queue-optimization rule '{rule}'")
+            self._rules.append(method)
+        self._aliases: List[CallbackAlias] = []
+
+    @staticmethod
+    def _washPreservesWorkspaces() -> bool:
+        # In CIS mode, `WashDishes` may leave its workspaces in place for inspection.
+        return Config["cis_mode.enabled"] and Config["cis_mode.preserveDiagnosticWorkspaces"]
+
+    def optimize(self, queue: List[QueueEntry]) -> Tuple[List[QueueEntry], List[CallbackAlias]]:
+        """
+        Rewrite the queue.
+
+        :return: the optimized queue, and the `(<source>, <alias>)` pairs of output callbacks:
+                 after the queue executes, each alias must be updated from its source.
+        """
+        self._aliases = []
+        for rule in self._rules:
+            queue = rule(queue)
+        return queue, self._aliases
+
+    ##
+    ## Argument inspection
+    ##
+
+    @staticmethod
+    def _name(value: Any) -> str | None:
+        # The workspace name of an argument, if it can be determined now.
+        if isinstance(value, Callback):
+            if not value._set:
+                return None
+            value = value.get()
+        return value if isinstance(value, str) else None
+
+    @classmethod
+    def _references(cls, entry: QueueEntry) -> Set[str] | None:
+        # All of the names an entry might refer to, or `None` if they can't be determined.
+        names = set()
+        for value in entry[2].values():
+            values = value if isinstance(value, (list, tuple)) else (value,)
+            for value_ in values:
+                if value_ is None or isinstance(value_, (Number, bool)):
+                    continue
+                name = cls._name(value_)
+                if name is None:
+                    return None
+                if name:
+                    names.add(name)
+        # Any output whose name is already known (e.g. from `LoadDiffCal`)
+        names.update(value for value in entry[3].values() if isinstance(value, str))
+        return names
+
+    @staticmethod
+    def _mayReference(references: Set[str] | None, name: str) -> bool:
+        # Some algorithms derive the names of additional workspaces from their arguments (e.g. `<name>_group`):
+        #   any name containing a reference is assumed to be referenced.
+        return references is None or any(reference in name for reference in references)
+
+    @classmethod
+    def _deleted(cls, entry: QueueEntry) -> List[str]:
+        # The workspaces deleted by an entry (ignoring any which can't be resolved to a name).
+        kwargs = entry[2]
+        values = []
+        if entry[0] in ("WashDishes", "DeleteWorkspace"):
+            values.append(kwargs.get("Workspace"))
+        if entry[0] in ("WashDishes", "DeleteWorkspaces"):
+            values.extend(kwargs.get("WorkspaceList") or [])
+        names = [cls._name(value) for value in values]
+        return [name for name in names if name]
+
+    def _remove(self, queue: List[QueueEntry], n: int, replacement: QueueEntry | None, reason: str):
+        # Remove the entry at index `n`: its outputs are aliased to the same-named outputs of the replacement,
+        #   and any references to them by later entries are redirected.
+        removed = queue[n]
+        logger.info(f"Queue optimization: removed {removed[0]} ('{removed[1]}'): {reason}")
+        if replacement is not None:
+            redirect = {}
+            for prop, alias in removed[3].items():
+                source = replacement[3].get(prop)
+                if isinstance(alias, Callback) and isinstance(source, Callback):
+                    self._aliases.append((source, alias))
+                    redirect[id(alias)] = source
+            if redirect:
+                for entry in queue[n + 1 :]:
+                    for key, value in entry[2].items():
+                        if id(value) in redirect:
+                            entry[2][key] = redirect[id(value)]
+        del queue[n]
+
+    ##
+    ## Rules
+    ##
+
+    def _deadClone(self, queue: List[QueueEntry]) -> List[QueueEntry]:
+        if self._washPreservesWorkspaces():
+            return queue
+        queue = list(queue)
+        n = 0
+        while n < len(queue):
+            entry = queue[n]
+            output = self._name(entry[2].get("OutputWorkspace")) if entry[0] == "CloneWorkspace" else None
+            dead = False
+            if output:
+                for later in queue[n + 1 :]:
+                    if later[0] == self._WASH and output in self._deleted(later):
+                        dead = True
+                        break
+                    if self._mayReference(self._references(later), output):
+                        break
+            if dead:
+                self._remove(queue, n, None, f"its output '{output}' is washed before it is used")
+            else:
+                n += 1
+        return queue
+
+    @staticmethod
+    def _otherArgs(entry: QueueEntry) -> Dict[str, Any]:
+        return {k: v for k, v in entry[2].items() if k not in ("InputWorkspace", "OutputWorkspace")}
+
+    @classmethod
+    def _sameArgs(cls, args: Dict[str, Any], otherArgs: Dict[str, Any]) -> bool:
+        if args.keys() != otherArgs.keys():
+            return False
+        for key, value in args.items():
+            other = otherArgs[key]
+            if isinstance(value, Callback) or isinstance(other, Callback):
+                if value is not other:
+                    return False
+            elif value != other:
+                return False
+        return True
+
+    def _isInPlaceSuccessor(self, entry: QueueEntry, successor: QueueEntry) -> bool:
+        # Does `successor` operate in place on the output of `entry`?
+        output = entry[2].get("OutputWorkspace")
+        outputName = self._name(output)
+        successorInput = successor[2].get("InputWorkspace")
+        successorOutput = self._name(successor[2].get("OutputWorkspace"))
+        if outputName is None or successorOutput != outputName:
+            return False
+        return self._name(successorInput) == outputName or any(
+            successorInput is callback_ for callback_ in entry[3].values()
+        )
+
+    def _redundantConvertUnits(self, queue: List[QueueEntry]) -> List[QueueEntry]:
+        queue = list(queue)
+        n = 1
+        while n < len(queue):
+            previous, entry = queue[n - 1], queue[n]
+            if (
+                previous[0] in self._CONVERT_UNITS
+                and entry[0] in self._CONVERT_UNITS
+                and self._isInPlaceSuccessor(previous, entry)
+                and previous[2].get("Target") is not None
+                and self._sameArgs(self._otherArgs(entry), self._otherArgs(previous))
+            ):
+                target = entry[2]["Target"]
+                self._remove(queue, n, previous, f"'{entry[2]['OutputWorkspace']}' is already in {target}")
+            else:
+                n += 1
+        return queue
+
+    def _fuseScale(self, queue: List[QueueEntry]) -> List[QueueEntry]:
+        queue = list(queue)
+        n = 1
+        while n < len(queue):
+            previous, entry = queue[n - 1], queue[n]
+            operation = entry[2].get("Operation", "Multiply")
+            factors = previous[2].get("Factor", 1.0), entry[2].get("Factor", 1.0)
+            if (
+                previous[0] == entry[0] == "Scale"
+                and self._isInPlaceSuccessor(previous, entry)
+                and previous[2].get("Operation", "Multiply") == operation
+                and all(isinstance(f, Number) for f in factors)
+            ):
+                factor = factors[0] * factors[1] if operation == "Multiply" else factors[0] + factors[1]
+                fused = (previous[0], previous[1], {**previous[2], "Factor": factor}, previous[3])
+                queue[n - 1] = fused
+                self._remove(queue, n, fused, f"fused with the preceding Scale: {operation} by {factor}")
+            else:
+                n += 1
+        return queue
+
+    def _duplicateWash(self, queue: List[QueueEntry]) -> List[QueueEntry]:
+        preserved = self._washPreservesWorkspaces()
+        deleted: Set[str] = set()
+        optimized = []
+        for entry in queue:
+            if entry[0] in self._DELETE:
+                if entry[0] == self._WASH:
+                    kwargs = dict(entry[2])
+                    duplicates = []
+                    if self._name(kwargs.get("Workspace")) in deleted:
+                        duplicates.append(kwargs["Workspace"])
+                        kwargs["Workspace"] = ""
+                    if kwargs.get("WorkspaceList"):
+                        workspaces = []
+                        for ws in kwargs["WorkspaceList"]:
+                            name = self._name(ws)
+                            if name in deleted or (name is not None and name in {self._name(w) for w in workspaces}):
+                                duplicates.append(ws)
+                            else:
+                                workspaces.append(ws)
+                        kwargs["WorkspaceList"] = workspaces
+                    if duplicates:
+                        if not kwargs.get("Workspace") and not kwargs.get("WorkspaceList"):
+                            logger.info(
+                                f"Queue optimization: removed WashDishes ('{entry[1]}'): {duplicates} already deleted"
+                            )
+                            continue
+                        logger.info(f"Queue optimization: WashDishes ('{entry[1]}'): {duplicates} already deleted")
+                        entry = (entry[0], entry[1], kwargs, entry[3])
+                    if preserved:
+                        optimized.append(entry)
+                        continue
+                deleted.update(self._deleted(entry))
+            else:
+                references = self._references(entry)
+                deleted = {name for name in deleted if not self._mayReference(references, name)}
+            optimized.append(entry)
+        return optimized
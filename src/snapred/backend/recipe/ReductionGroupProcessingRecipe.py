@@ -28,6 +28,7 @@ class ReductionGroupProcessingRecipe(Recipe[Ingredients]):
     def chopIngredients(self, ingredients):
         self.pixelGroup = ingredients.pixelGroup
         self.preserveEvents = ingredients.preserveEvents
+        self.normalizeByCurrent = ingredients.normalizeByCurrent
         logger.debug(f"dMin: {self.pixelGroup.dMin()}")
         logger.debug(f"dMax: {self.pixelGroup.dMax()}")
         logger.debug(f"dBin: {self.pixelGroup.dBin()}")
@@ -64,6 +65,9 @@ class ReductionGroupProcessingRecipe(Recipe[Ingredients]):
             PreserveEvents=self.preserveEvents,
         )
 
+        if not self.normalizeByCurrent:
+            return
+
         normalizeArgs = {
             "InputWorkspace": self.outputWS,
             "OutputWorkspace": self.outputWS,
@@ -86,6 +90,8 @@ class ReductionGroupProcessingRecipe(Recipe[Ingredients]):
         """
         try:
             self.mantidSnapper.executeQueue()
+            if not self.normalizeByCurrent:
+                return
 
             workspaceMetadata = WorkspaceMetadata(particleNormalizationMethod=ParticleNormalizationMethod.PROTON_CHARGE)
 
@@ -158,7 +158,7 @@ class ReductionRecipe(Recipe[Ingredients]):
                 OutputWorkspace=preOutputUnfocWs,
             )
 
-        self.mantidSnapper.ConvertUnits(
+        self.mantidSnapper.ConvertUnitsIfRequired(
             "Converting unfocused data to TOF",
             InputWorkspace=preOutputUnfocWs,
             OutputWorkspace=preOutputUnfocWs,
@@ -174,14 +174,8 @@ class ReductionRecipe(Recipe[Ingredients]):
             BinningMode="Logarithmic",
         )
 
-        self.mantidSnapper.ConvertUnits(
-            "Converting unfocused data to dSpacing",
-            InputWorkspace=preOutputUnfocWs,
-            OutputWorkspace=preOutputUnfocWs,
-            Target="dSpacing",
-        )
-
-        self.mantidSnapper.ConvertUnits(
+        # Convert directly from TOF: each conversion is a full pass over the events.
+        self.mantidSnapper.ConvertUnitsIfRequired(
             f"Converting unfocused data to {units}",
             InputWorkspace=preOutputUnfocWs,
             OutputWorkspace=preOutputUnfocWs,
@@ -297,7 +291,7 @@ class ReductionRecipe(Recipe[Ingredients]):
             raise RuntimeError(
                 "There are no unmasked pixels in any of the groupings.  Please check your mask workspace!"
             )
-        self.mantidSnapper.ConvertUnits(
+        self.mantidSnapper.ConvertUnitsIfRequired(
             "Converting sample data to d-spacing",
             InputWorkspace=self.sampleWs,
             OutputWorkspace=self.sampleWs,
@@ -306,7 +300,7 @@ class ReductionRecipe(Recipe[Ingredients]):
         )
 
         if self.normalizationWs:
-            self.mantidSnapper.ConvertUnits(
+            self.mantidSnapper.ConvertUnitsIfRequired(
                 "Converting normalization data to d-spacing",
                 InputWorkspace=self.normalizationWs,
                 OutputWorkspace=self.normalizationWs,
@@ -1,3 +1,9 @@
+import tempfile
+from itertools import chain
+from pathlib import Path
+
+import h5py
+import numpy as np
 from mantid.api import (
     AlgorithmFactory,
     ITableWorkspaceProperty,
@@ -8,8 +14,9 @@ from mantid.api import (
 from mantid.kernel import Direction, StringListValidator
 from mantid.simpleapi import (
     CalculateDIFC,
-    CreateEmptyTableWorkspace,
     DeleteWorkspace,
+    LoadDiffCal,
+    RenameWorkspace,
     mtd,
 )
 
@@ -54,32 +61,60 @@ class CalculateDiffCalTable(PythonAlgorithm):
             BinWidth=abs(self.getProperty("BinWidth").value),
         )
         tmpDifcWS = mtd[tmpDifc]
-        difcs = [float(x) for x in tmpDifcWS.extractY()]
+        difcs = tmpDifcWS.extractY()[:, 0]
 
-        # convert the calibration workspace into a calibration table
-        DIFCtable = CreateEmptyTableWorkspace(
-            OutputWorkspace=self.getPropertyValue("CalibrationTable"),
-        )
-        DIFCtable.addColumn(type="int", name="detid", plottype=6)
-        DIFCtable.addColumn(type="double", name="difc", plottype=6)
-        DIFCtable.addColumn(type="double", name="difa", plottype=6)
-        DIFCtable.addColumn(type="double", name="tzero", plottype=6)
+        # gather the detector IDs of all spectra into one column, repeating each spectrum's DIFC for its detectors
+        detidsBySpectrum = [tmpDifcWS.getSpectrum(wkspIndx).getDetectorIDs() for wkspIndx in range(len(difcs))]
+        counts = np.fromiter(map(len, detidsBySpectrum), dtype=int, count=len(detidsBySpectrum))
+        detids = np.fromiter(chain.from_iterable(detidsBySpectrum), dtype=int, count=counts.sum())
+        difcs = np.repeat(difcs, counts)
 
-        for wkspIndx, difc in enumerate(difcs):
-            detids = tmpDifcWS.getSpectrum(wkspIndx).getDetectorIDs()
-            for detid in detids:
-                DIFCtable.addRow(
-                    {
-                        "detid": int(detid),
-                        "difc": float(difc),
-                        "difa": 0.0,
-                        "tzero": 0.0,
-                    }
-                )
+        # convert the calibration workspace into a calibration table:
+        #   Mantid's Python table API can only fill a table a row at a time, so the columns are written
+        #   to a temporary diffcal file, from which `LoadDiffCal` fills the table natively.
+        nDetectors = len(detids)
+        tmpCal = mtd.unique_name(prefix="__tmp_")
+        with tempfile.TemporaryDirectory(prefix="CalculateDiffCalTable_") as tmpDir:
+            filePath = Path(tmpDir) / "difc.h5"
+            with h5py.File(filePath, "w") as f:
+                calibration = f.create_group("calibration")
+                calibration.create_dataset("detid", data=detids.astype(np.int32))
+                calibration.create_dataset("dasid", data=detids.astype(np.int32))
+                calibration.create_dataset("difc", data=difcs)
+                calibration.create_dataset("difa", data=np.zeros(nDetectors))
+                calibration.create_dataset("tzero", data=np.zeros(nDetectors))
+                calibration.create_dataset("group", data=np.ones(nDetectors, dtype=np.int32))
+                calibration.create_dataset("use", data=np.ones(nDetectors, dtype=np.int32))
+                calibration.create_dataset("offset", data=np.zeros(nDetectors))
+            LoadDiffCal(
+                Filename=str(filePath),
+                InputWorkspace=self.getPropertyValue("InputWorkspace"),
+                MakeCalWorkspace=True,
+                MakeGroupingWorkspace=False,
+                MakeMaskWorkspace=False,
+                WorkspaceName=tmpCal,
+            )
         DeleteWorkspace(
             Workspace=tmpDifc,
         )
+        outputName = self.getPropertyValue("CalibrationTable")
+        if outputName:
+            DIFCtable = RenameWorkspace(
+                InputWorkspace=tmpCal + "_cal",
+                OutputWorkspace=outputName,
+            )
+        else:
+            DIFCtable = mtd[tmpCal + "_cal"]
+        # NOTE `LoadDiffCal` adds a "tofmin" column, which is not part of a DIFC table
+        #   (and with which `ConvertDiffCal` has issues)
+        if "tofmin" in DIFCtable.getColumnNames():
+            DIFCtable.removeColumn("tofmin")
         self.setProperty("CalibrationTable", DIFCtable)
+        if not outputName:
+            # the output property holds the table: the temporary workspace isn't retained in the ADS
+            DeleteWorkspace(
+                Workspace=tmpCal + "_cal",
+            )
 
 
 AlgorithmFactory.subscribe(CalculateDiffCalTable)
@@ -1,5 +1,5 @@
 import json
-from typing import Dict
+from typing import Dict, List, Tuple
 
 import numpy as np
 from mantid.api import AlgorithmFactory, PythonAlgorithm, WorkspaceGroupProperty
@@ -47,6 +47,69 @@ class CalibrationMetricExtractionAlgorithm(PythonAlgorithm):
             errors["InputWorkspace"] = msg
         return errors
 
+    @staticmethod
+    def _concatenatedRows(readRow, nHistograms: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Concatenate the (possibly ragged) rows of a workspace:
+        #   returns the values, and the start index of each row, followed by the total length.
+        rows = [np.asarray(readRow(index), dtype=float) for index in range(nHistograms)]
+        starts = np.zeros(nHistograms + 1, dtype=int)
+        starts[1:] = np.cumsum([len(row) for row in rows], dtype=int)
+        return (np.concatenate(rows) if rows else np.empty(0)), starts
+
+    @staticmethod
+    def groupedStatistics(peakPos, parameters, nHistograms: int) -> Tuple[List[float], ...]:
+        """
+        Calculate the average and standard deviation of the strain and of the sigma of the fitted peaks,
+        for every histogram at once.
+
+        The rows of the `parameters` table for each histogram are identified by their "wsindex",
+        and are in the same order as that histogram's peaks in `peakPos`.
+        Peaks with a negative fitted position, and rows without a corresponding peak in `peakPos`, are excluded.
+        Returns lists of the strain averages, strain standard deviations, sigma averages and sigma standard deviations.
+        """
+        wsindex = np.asarray(parameters.column("wsindex"), dtype=int)
+        sig = np.asarray(parameters.column("Sigma"), dtype=float)
+
+        # group the rows by wsindex, retaining their order within each group,
+        #   so that each row's rank within its group is the index of its peak
+        order = np.argsort(wsindex, kind="stable")
+        wsindex, sig = wsindex[order], sig[order]
+        groupStarts = np.searchsorted(wsindex, wsindex, side="left")
+        peakIndex = np.arange(len(wsindex)) - groupStarts
+
+        # `peakPos` is ragged whenever the groups have different numbers of peaks:
+        #   its histograms are read one at a time, and concatenated
+        yValues, yStarts = CalibrationMetricExtractionAlgorithm._concatenatedRows(peakPos.readY, nHistograms)
+        xValues, xStarts = CalibrationMetricExtractionAlgorithm._concatenatedRows(peakPos.readX, nHistograms)
+        nPeaks = np.diff(yStarts)
+
+        inRange = (wsindex >= 0) & (wsindex < nHistograms)
+        wsindex, sig, peakIndex = wsindex[inRange], sig[inRange], peakIndex[inRange]
+        inRange = peakIndex < nPeaks[wsindex]
+        wsindex, sig, peakIndex = wsindex[inRange], sig[inRange], peakIndex[inRange]
+        pos = yValues[yStarts[wsindex] + peakIndex]
+        d_ref = xValues[xStarts[wsindex] + peakIndex]
+
+        fitted = pos >= 0
+        wsindex, sig, pos, d_ref = wsindex[fitted], sig[fitted], pos[fitted], d_ref[fitted]
+        strains = (d_ref - pos) / sig
+        sigmas = sig / pos
+
+        counts = np.bincount(wsindex, minlength=nHistograms)
+
+        def _averageAndStandardDeviation(values):
+            # a histogram without any fitted peaks has undefined statistics
+            with np.errstate(invalid="ignore", divide="ignore"):
+                average = np.bincount(wsindex, weights=values, minlength=nHistograms) / counts
+                variance = (
+                    np.bincount(wsindex, weights=(values - average[wsindex]) ** 2, minlength=nHistograms) / counts
+                )
+            return average.tolist(), np.sqrt(variance).tolist()
+
+        strainAverages, strainStandardDeviations = _averageAndStandardDeviation(strains)
+        sigmaAverages, sigmaStandardDeviations = _averageAndStandardDeviation(sigmas)
+        return strainAverages, strainStandardDeviations, sigmaAverages, sigmaStandardDeviations
+
     def PyExec(self):
         inputWorkspace = self.getProperty("InputWorkspace").value
         # inputWorkspace = self.mantidSnapper.mtd[inputWorkspace]
@@ -60,46 +123,23 @@ class CalibrationMetricExtractionAlgorithm(PythonAlgorithm):
         workspace = inputWorkspace.getItem(FitOutputEnum.Workspace.value)  # noqa: F841
         parameterError = inputWorkspace.getItem(FitOutputEnum.ParameterError.value)  # noqa: F841
 
-        peakMetrics = []
-        for index in range(peakPos.getNumberHistograms()):
-            params = [parameters.row(i) for i, wsindex in enumerate(parameters.column("wsindex")) if wsindex == index]
-
-            sigmaAverage = 0
-            sigmaStandardDeviation = 0
-            strainAverage = 0
-            strainStandardDeviation = 0
-            twoThetaAverage = 0
-
-            strains = []
-            sigmas = []
-            for rowIndex, row in enumerate(params):
-                sig = row["Sigma"]
-                pos = peakPos.readY(index)[rowIndex]
-                d_ref = peakPos.readX(index)[rowIndex]
-                if pos < 0:
-                    continue
-                strains.append((d_ref - pos) / sig)
-                sigmas.append(sig / pos)
-
-            strains = np.array(strains)
-
-            sigmas = np.array(sigmas)
-
-            sigmaAverage = np.average(sigmas)
-            strainAverage = np.average(strains)
+        nHistograms = peakPos.getNumberHistograms()
+        strainAverages, strainStandardDeviations, sigmaAverages, sigmaStandardDeviations = self.groupedStatistics(
+            peakPos, parameters, nHistograms
+        )
 
+        peakMetrics = []
+        for index in range(nHistograms):
             # Convert to degrees from radians (?)
             twoThetaAverage = pixelGroupingParameters[index].twoTheta * (180.0 / np.pi)
 
-            sigmaStandardDeviation = np.std(sigmas)
-            strainStandardDeviation = np.std(strains)
             # ( sigmaAverage, sigmaStandardDeviation, strainAverage, strainStandardDeviation, twoThetaAverage)
             peakMetrics.append(
                 CalibrationMetric(
-                    sigmaAverage=sigmaAverage,
-                    sigmaStandardDeviation=sigmaStandardDeviation,
-                    strainAverage=strainAverage,
-                    strainStandardDeviation=strainStandardDeviation,
+                    sigmaAverage=sigmaAverages[index],
+                    sigmaStandardDeviation=sigmaStandardDeviations[index],
+                    strainAverage=strainAverages[index],
+                    strainStandardDeviation=strainStandardDeviations[index],
                     twoThetaAverage=twoThetaAverage,
                 ).dict()
             )
@@ -0,0 +1,62 @@
+from mantid.api import AlgorithmFactory, MatrixWorkspaceProperty, PropertyMode, PythonAlgorithm
+from mantid.kernel import Direction, StringListValidator
+from mantid.simpleapi import CloneWorkspace, ConvertUnits, mtd
+
+
+class ConvertUnitsIfRequired(PythonAlgorithm):
+    """
+    Convert a workspace to the target units, but only if it isn't already in those units.
+    Each conversion is a full pass over the data, so repeated "just to be sure" conversions are expensive.
+
+    The workspace's units are taken from its X-axis, which is checked when this algorithm executes,
+    and not when it is queued: this allows it to follow any algorithm which changes the units.
+    When the input is already in the target units and the output is a different workspace,
+    the output is a clone of the input (and not an alias of it, as it would be from `ConvertUnits`).
+    """
+
+    def category(self):
+        return "SNAPRed Internal"
+
+    def PyInit(self):
+        # declare properties
+        self.declareProperty(
+            MatrixWorkspaceProperty("InputWorkspace", "", Direction.Input, PropertyMode.Mandatory),
+            doc="Name of the input workspace",
+        )
+        self.declareProperty(
+            MatrixWorkspaceProperty("OutputWorkspace", "", Direction.Output, PropertyMode.Mandatory),
+            doc="Name of the output workspace",
+        )
+        self.declareProperty("Target", defaultValue="", direction=Direction.Input, doc="The target unit ID")
+        self.declareProperty(
+            "EMode",
+            defaultValue="Elastic",
+            validator=StringListValidator(["Elastic", "Direct", "Indirect"]),
+            direction=Direction.Input,
+        )
+        self.setRethrows(True)
+
+    def PyExec(self):
+        inputWorkspace = self.getPropertyValue("InputWorkspace")
+        outputWorkspace = self.getPropertyValue("OutputWorkspace")
+        target = self.getPropertyValue("Target")
+
+        unit = mtd[inputWorkspace].getAxis(0).getUnit().unitID()
+        if unit != target:
+            self.log().debug(f"Converting '{inputWorkspace}' from {unit} to {target}")
+            ConvertUnits(
+                InputWorkspace=inputWorkspace,
+                OutputWorkspace=outputWorkspace,
+                Target=target,
+                EMode=self.getPropertyValue("EMode"),
+            )
+        elif outputWorkspace != inputWorkspace:
+            self.log().debug(f"'{inputWorkspace}' is already in {target}: cloning to '{outputWorkspace}'")
+            CloneWorkspace(InputWorkspace=inputWorkspace, OutputWorkspace=outputWorkspace)
+        else:
+            self.log().debug(f"'{inputWorkspace}' is already in {target}")
+        self.setProperty("OutputWorkspace", mtd[outputWorkspace])
+
+
+# Register algorithm with Mantid
+AlgorithmFactory.subscribe(ConvertUnitsIfRequired)
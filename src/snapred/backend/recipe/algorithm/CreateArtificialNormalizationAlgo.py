@@ -73,8 +73,13 @@ class CreateArtificialNormalizationAlgo(PythonAlgorithm):
         self.outputWorkspaceName = self.getPropertyValue("OutputWorkspace")
 
     def peakClip(self, data, winSize: int, decrese: bool, LLS: bool, smoothing: float):
-        # Clipping peaks from the data with optional smoothing and transformations
-        startData = np.copy(data)
+        """
+        Clip the peaks from the data, with optional smoothing and transformations.
+        The data may be a single spectrum, or a 2D array with one spectrum per row:
+        the spectra are then clipped together, in a single batch.
+        """
+        startData = np.array(data, dtype=float)
+        data = np.atleast_2d(startData)
         window = winSize
         if smoothing > 0:
             data = self.smooth(data, smoothing)
@@ -86,33 +91,73 @@ class CreateArtificialNormalizationAlgo(PythonAlgorithm):
         scan = list(range(window + 1, 0, -1)) if decrese else list(range(1, window + 1))
 
         for w in scan:
-            for i in range(len(temp)):
-                if i < w or i > (len(temp) - w - 1):
-                    continue
-                winArray = temp[i - w : i + w + 1].copy()
-                winArrayReversed = winArray[::-1]
-                average = (winArray + winArrayReversed) / 2
-                temp[i] = np.min(average[: int(len(average) / 2)])
+            self._clipPass(temp, w)
 
         if LLS:
             temp = self.InvLLSTransformation(temp)
 
-        index = np.where((startData - temp) == min(startData - temp))[0][0]
-        output = temp * (startData[index] / temp[index])
-        return output
+        # scale to the input at the point where the clipped data is furthest above it
+        rows = np.arange(temp.shape[0])
+        index = np.argmin(np.atleast_2d(startData) - temp, axis=-1)
+        output = temp * (np.atleast_2d(startData)[rows, index] / temp[rows, index])[:, np.newaxis]
+        return output.reshape(startData.shape)
+
+    def _clipPass(self, temp: np.ndarray, w: int):
+        """
+        A single clipping pass, for a window of half-width `w`, applied in place to each row of `temp`.
+
+        From left to right, each interior value is replaced by the smallest average of the pairs of values
+        placed symmetrically about it at distances 1 to `w`.  The values to its left have already been replaced,
+        so the pass is a recurrence: it is solved by fixed-point iteration over the whole spectrum,
+        which gives exactly the same values as the sequential calculation.
+        The influence of each earlier value is halved at every step, so the iteration converges
+        within approximately the number of bits of precision.
+        """
+        nBins = temp.shape[-1]
+        if nBins < 2 * w + 1:
+            return
+
+        # the values to the right of each bin are those from before this pass
+        previous = temp.copy()
+        # bins before `start` have reached their final values
+        start, stop = w, nBins - w
+        clipped = np.empty(temp[..., start:stop].shape)
+        pairSum = np.empty(clipped.shape)
+        while start < stop:
+            n = stop - start
+            # pairs in order of decreasing distance, as for the sequential calculation
+            np.add(temp[..., start - w : stop - w], previous[..., start + w : stop + w], out=clipped[..., :n])
+            for d in range(w - 1, 0, -1):
+                np.add(temp[..., start - d : stop - d], previous[..., start + d : stop + d], out=pairSum[..., :n])
+                np.minimum(clipped[..., :n], pairSum[..., :n], out=clipped[..., :n])
+            clipped[..., :n] /= 2
+
+            changed = np.flatnonzero((clipped[..., :n] != temp[..., start:stop]).any(axis=0))
+            if not len(changed):
+                break
+            temp[..., start:stop] = clipped[..., :n]
+            start += changed[0] + 1
 
     def smooth(self, data, order):
-        # Applies smoothing to the data
-        sm = np.zeros(len(data))
+        """
+        Apply triangular smoothing to the data: a single spectrum, or one spectrum per row of a 2D array.
+        The weighted sum is accumulated in the same order as a direct summation over each window,
+        so that the result does not depend on the batching.
+        """
+        data = np.asarray(data, dtype=float)
+        nBins = data.shape[-1]
+        halfWidth = int(order / 2)
         factor = order / 2 + 1
-        for i in range(len(data)):
-            temp = 0
-            ave = 0
-            for r in range(max(0, i - int(order / 2)), min(i + int(order / 2), len(data) - 1) + 1):
-                temp += (factor - abs(r - i)) * data[r]
-                ave += factor - abs(r - i)
-            sm[i] = temp / ave
-        return sm
+        sm = np.zeros(data.shape)
+        ave = np.zeros(nBins)
+        for r in range(-halfWidth, halfWidth + 1):
+            # the bins `i` for which `i + r` is within the data
+            lo, hi = max(0, -r), min(nBins, nBins - r)
+            if lo >= hi:
+                continue
+            sm[..., lo:hi] += (factor - abs(r)) * data[..., lo + r : hi + r]
+            ave[lo:hi] += factor - abs(r)
+        return sm / ave
 
     def LLSTransformation(self, input):  # noqa: A002
         # Applies LLS transformation to emphasize weaker peaks
@@ -133,7 +178,7 @@ class CreateArtificialNormalizationAlgo(PythonAlgorithm):
                 OutputWorkspace=self.outputWorkspaceName,
             )
 
-        self.mantidSnapper.ConvertUnits(
+        self.mantidSnapper.ConvertUnitsIfRequired(
             "Converting to dSpacing...",
             InputWorkspace=self.outputWorkspaceName,
             Target="dSpacing",
@@ -150,16 +195,22 @@ class CreateArtificialNormalizationAlgo(PythonAlgorithm):
 
         self.mantidSnapper.executeQueue()
 
-        for i in range(self.mantidSnapper.mtd[self.outputWorkspaceName].getNumberHistograms()):
-            dataY = self.mantidSnapper.mtd[self.outputWorkspaceName].readY(i)
+        outputWs = self.mantidSnapper.mtd[self.outputWorkspaceName]
+        if outputWs.isRaggedWorkspace():
+            spectra = [[i] for i in range(outputWs.getNumberHistograms())]
+        else:
+            # all of the spectra are clipped together, as a single batch
+            spectra = [list(range(outputWs.getNumberHistograms()))]
+        for indices in spectra:
             clippedData = self.peakClip(
-                data=dataY,
+                data=np.array([outputWs.readY(i) for i in indices]),
                 winSize=self.peakWindowClippingSize,
                 decrese=self.decreaseParameter,
                 LLS=self.LSS,
                 smoothing=self.smoothingParameter,
             )
-            self.mantidSnapper.mtd[self.outputWorkspaceName].setY(i, clippedData)
+            for i, dataY in zip(indices, clippedData):
+                outputWs.setY(i, dataY)
 
         # Set the output workspace property
         self.setProperty("OutputWorkspace", self.outputWorkspaceName)
@@ -1,14 +1,14 @@
+import json
+from typing import Tuple
+
 import numpy as np
 from mantid.api import AlgorithmFactory, PythonAlgorithm
 from mantid.kernel import Direction, PhysicalConstants
 
-from snapred.backend.dao.DetectorPeak import DetectorPeak
-from snapred.backend.dao.GroupPeakList import GroupPeakList
 from snapred.backend.dao.ingredients import PeakIngredients
 from snapred.backend.dao.Limit import LimitedValue
 from snapred.meta.Config import Config
 from snapred.meta.decorators.classproperty import classproperty
-from snapred.meta.redantic import list_to_raw
 
 
 class DetectorPeakPredictor(PythonAlgorithm):
@@ -80,51 +80,85 @@ class DetectorPeakPredictor(PythonAlgorithm):
 
         self.allGroupIDs = ingredients.pixelGroup.groupIDs
 
+    def predictWindows(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Predict the peak windows for every (group, crystal peak) pair at once.
+
+        Each per-group quantity is broadcast along the rows, and each per-peak quantity along the columns,
+        of a (group x peak) matrix.  Returns the matrices of the in-range mask, and of the peak centers,
+        the minima and the maxima of the windows.
+        """
+        nGroups, nPeaks = len(self.allGroupIDs), len(self.goodPeaks)
+        dSpacing = np.array([peak.dSpacing for peak in self.goodPeaks], dtype=float)
+        dMin = np.array([self.dMin[groupID] for groupID in self.allGroupIDs], dtype=float)
+        dMax = np.array([self.dMax[groupID] for groupID in self.allGroupIDs], dtype=float)
+        inRange = (dMin[:, np.newaxis] <= dSpacing) & (dSpacing <= dMax[:, np.newaxis])
+
+        # NOTE the scalar expressions are evaluated per peak or per group, exactly as for a single peak,
+        #   so that the predicted windows do not depend on the vectorization.
+        beta_T = np.array(
+            [
+                self.beta_0 + self.beta_1 / d**4 if used else np.nan
+                for d, used in zip(dSpacing.tolist(), inRange.any(axis=0))
+            ],
+            dtype=float,
+        )  # GSAS-I beta
+        betaFactor = np.array(
+            [self.BETA_D_COEFFICIENT * self.L * np.sin(self.tTheta[groupID] / 2) for groupID in self.allGroupIDs],
+            dtype=float,
+        )
+        fwhmFactor = np.array([self.FWHM * self.delDoD[groupID] for groupID in self.allGroupIDs], dtype=float)
+
+        beta_d = betaFactor[:, np.newaxis] * beta_T  # converted to d-space
+        fwhm = fwhmFactor[:, np.newaxis] * dSpacing
+        widthLeft = fwhm * self.FWHMMultiplierLeft
+        widthRight = fwhm * self.FWHMMultiplierRight + self.peakTailCoefficient / beta_d
+
+        centers = dSpacing
+        if self.purgeDuplicates:
+            centers = np.array([round(d, 5) for d in dSpacing.tolist()], dtype=float)
+        centers = np.broadcast_to(centers, (nGroups, nPeaks))
+        return inRange, centers, centers - widthLeft, centers + widthRight
+
     def PyExec(self) -> None:
         ingredients = PeakIngredients.model_validate_json(self.getProperty("Ingredients").value)
         self.chopIngredients(ingredients)
 
+        inRange, centers, minima, maxima = self.predictWindows()
+        valid = (minima <= centers) & (centers <= maxima)
+
+        # The output is serialized directly from the predicted windows:
+        #   no `DetectorPeak` is constructed, and each crystal peak is only serialized once.
+        crystalPeaks = [peak.dict() for peak in self.goodPeaks]
         allFocusGroupsPeaks = []
-        for groupID in self.allGroupIDs:
+        for row, groupID in enumerate(self.allGroupIDs):
             # select only good peaks within the d-spacing range
-            crystalPeakList = [
-                peak for peak in self.goodPeaks if self.dMin[groupID] <= peak.dSpacing <= self.dMax[groupID]
-            ]
-            dList = [peak.dSpacing for peak in crystalPeakList]
-
-            singleFocusGroupPeaks = []
-            for crystalPeak in crystalPeakList:
-                d = crystalPeak.dSpacing
-                # beta terms
-                beta_T = self.beta_0 + self.beta_1 / d**4  # GSAS-I beta
-                beta_d = (
-                    self.BETA_D_COEFFICIENT * self.L * np.sin(self.tTheta[groupID] / 2) * beta_T
-                )  # converted to d-space
-
-                fwhm = self.FWHM * self.delDoD[groupID] * d
-                widthLeft = fwhm * self.FWHMMultiplierLeft
-                widthRight = fwhm * self.FWHMMultiplierRight + self.peakTailCoefficient / beta_d
-
-                if self.purgeDuplicates:
-                    d = round(d, 5)
-
-                singleFocusGroupPeaks.append(
-                    DetectorPeak(
-                        position=LimitedValue(value=d, minimum=d - widthLeft, maximum=d + widthRight), peak=crystalPeak
-                    )
-                )
+            peakIndices = np.flatnonzero(inRange[row])
+            dList = [self.goodPeaks[i].dSpacing for i in peakIndices]
 
-            if self.purgeDuplicates:
-                singleFocusGroupPeaks = list({peak.position.value: peak for peak in singleFocusGroupPeaks}.values())
+            # any invalid window is rejected by the `LimitedValue` validation
+            for i in peakIndices[~valid[row, peakIndices]]:
+                LimitedValue[float](value=centers[row, i], minimum=minima[row, i], maximum=maxima[row, i])
 
+            if self.purgeDuplicates:
+                rowCenters = centers[row].tolist()
+                peakIndices = np.array(list({rowCenters[i]: i for i in peakIndices.tolist()}.values()), dtype=int)
+
+            singleFocusGroupPeaks = [
+                {"position": {"value": d, "minimum": minimum, "maximum": maximum}, "peak": crystalPeaks[i]}
+                for i, d, minimum, maximum in zip(
+                    peakIndices.tolist(),
+                    centers[row, peakIndices].tolist(),
+                    minima[row, peakIndices].tolist(),
+                    maxima[row, peakIndices].tolist(),
+                )
+            ]
             maxFwhm = self.FWHM * max(dList, default=0.0) * self.delDoD[groupID]
 
-            singleFocusGroupPeakList = GroupPeakList(peaks=singleFocusGroupPeaks, groupID=groupID, maxfwhm=maxFwhm)
             self.log().notice(f"Focus group {groupID} : {len(dList)} peaks out")
-            allFocusGroupsPeaks.append(singleFocusGroupPeakList)
+            allFocusGroupsPeaks.append({"peaks": singleFocusGroupPeaks, "groupID": groupID, "maxfwhm": maxFwhm})
 
-        self.setProperty("DetectorPeaks", list_to_raw(allFocusGroupsPeaks))
-        return allFocusGroupsPeaks
+        self.setProperty("DetectorPeaks", json.dumps(allFocusGroupsPeaks))
 
 
 AlgorithmFactory.subscribe(DetectorPeakPredictor)
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Sequence, Tuple
 
 import numpy as np
 from mantid.api import IEventWorkspace, MatrixWorkspaceProperty, PropertyMode, PythonAlgorithm
@@ -76,6 +76,28 @@ class DiffractionSpectrumWeightCalculator(PythonAlgorithm):
             errors["DetectorPeaks"] = msg
         return errors
 
+    @staticmethod
+    def calculateWeights(x: np.ndarray, nBins: int, windows: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """
+        The weights for a single spectrum: zero for each bin whose X-value (i.e. left bin edge)
+        is strictly inside any of the peak windows, and one otherwise.
+        """
+        weights = np.ones(nBins)
+        if not windows:
+            return weights
+        # the X-values are sorted, so the bins inside each window are a contiguous range
+        x = x[:nBins]
+        minima, maxima = np.array(windows, dtype=float).T
+        starts = np.searchsorted(x, minima, side="right")
+        stops = np.searchsorted(x, maxima, side="left")
+        nonEmpty = starts < stops
+        # mark the start and stop of each window, and count the windows which cover each bin
+        edges = np.zeros(nBins + 1, dtype=int)
+        np.add.at(edges, starts[nonEmpty], 1)
+        np.add.at(edges, stops[nonEmpty], -1)
+        weights[np.cumsum(edges[:-1]) > 0] = 0.0
+        return weights
+
     def PyExec(self):
         peak_ptr: PointerProperty = self.getProperty("DetectorPeaks").value
         predictedPeaksList = access_pointer(peak_ptr)
@@ -83,18 +105,20 @@ class DiffractionSpectrumWeightCalculator(PythonAlgorithm):
         self.unbagGroceries()
 
         weight_ws = mtd[self.weightWorkspaceName]
+        # when all spectra share the same binning, the bin edges are only read once
+        commonX = weight_ws.readX(0) if weight_ws.isCommonBins() else None
+        weightsByWindows = {}
         for index, groupID in enumerate(self.groupIDs):
-            # get spectrum X,Y
-            x = weight_ws.readX(index)
-            y = weight_ws.readY(index)
+            # get spectrum X
+            x = commonX if commonX is not None else weight_ws.readX(index)
+            nBins = len(weight_ws.readY(index))
 
-            # create and initialize a weights array
-            weights = np.ones(len(y))
-            # for each peak extent, set zeros to the weights array
-            for peak in self.predictedPeaks[groupID]:
-                mask_indices = np.where(np.logical_and(x > peak.position.minimum, x < peak.position.maximum))[0]
-                mask_indices = mask_indices[mask_indices < len(weights)]
-                weights[mask_indices] = 0.0
+            windows = tuple((peak.position.minimum, peak.position.maximum) for peak in self.predictedPeaks[groupID])
+            weights = weightsByWindows.get(windows) if commonX is not None else None
+            if weights is None:
+                weights = self.calculateWeights(x, nBins, windows)
+                if commonX is not None:
+                    weightsByWindows[windows] = weights
             weight_ws.setY(index, weights)
 
         if self.isEventWorkspace:
@@ -1,4 +1,4 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import numpy as np
 import pydantic
@@ -28,6 +28,10 @@ class FitMultiplePeaksAlgorithm(PythonAlgorithm):
     def NOYZE_2_MIN(cls):
         return Config["calibration.fitting.minSignal2Noise"]
 
+    @classproperty
+    def FIT_ALL_SPECTRA(cls):
+        return Config["calibration.fitting.fitAllSpectra"]
+
     def category(self):
         return "SNAPRed Data Processing"
 
@@ -47,6 +51,12 @@ class FitMultiplePeaksAlgorithm(PythonAlgorithm):
             "PeakFunction", "Gaussian", StringListValidator(allowed_peak_type_list), direction=Direction.Input
         )
         self.declareProperty("OutputWorkspaceGroup", defaultValue="__fitPeaksWSGroup", direction=Direction.Output)
+        self.declareProperty(
+            "FitAllSpectra",
+            defaultValue=self.FIT_ALL_SPECTRA,
+            direction=Direction.Input,
+            doc="Fit the peaks of all spectra with a single FitPeaks, instead of extracting and fitting each spectrum",
+        )
         self.setRethrows(True)
         self.mantidSnapper = MantidSnapper(self, __name__)
 
@@ -71,6 +81,144 @@ class FitMultiplePeaksAlgorithm(PythonAlgorithm):
             DeleteWorkspaces(list(mtd[self.outputWorkspaceName].getNames()))
         mtd.addOrReplace(self.outputWorkspaceName, self.outputWorkspace)
 
+    def peakTables(self, numHisto: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The peak centers, and the fit-window boundaries, for every spectrum of the input workspace, as arrays
+        with one row per spectrum.  `FitPeaks` requires the same number of peaks for every spectrum:
+        the rows for spectra with fewer peaks, and for any spectra without a group, are padded
+        with peaks beyond the end of the data, which cannot be fit.
+        """
+        inputWS = self.mantidSnapper.mtd[self.inputWorkspaceName]
+        maxPeaks = max(len(peaks) for peaks in self.reducedList.values())
+        xMax = max(inputWS.readX(index)[-1] for index in range(numHisto))
+        peakCenters = np.full((numHisto, maxPeaks), xMax + 2.0)
+        peakLimits = np.tile([xMax + 1.0, xMax + 3.0], (numHisto, maxPeaks))
+        for index, groupID in enumerate(self.groupIDs):
+            peaks = self.reducedList[groupID]
+            peakCenters[index, : len(peaks)] = [peak.position.value for peak in peaks]
+            peakLimits[index, : 2 * len(peaks)] = [
+                limit for peak in peaks for limit in (peak.position.minimum, peak.position.maximum)
+            ]
+        return peakCenters, peakLimits
+
+    @staticmethod
+    def cropLimits(peakCenters: np.ndarray, peakCounts: List[int]) -> Tuple[List[float], List[float]]:
+        """
+        For each row of the padded peak centers, the cropping limits which retain exactly its first `peakCount`
+        peaks: each limit is midway between a retained peak center and the adjacent peak center.
+        """
+        xMin, xMax = [], []
+        for centers, count in zip(peakCenters, peakCounts):
+            spacing = np.diff(centers[: count + 1]) if len(centers) > 1 else np.array([1.0])
+            xMin.append(float(centers[0] - 0.5 * abs(spacing[0])))
+            xMax.append(
+                float(
+                    0.5 * (centers[count - 1] + centers[count])
+                    if count < len(centers)
+                    else centers[count - 1] + 0.5 * abs(spacing[-1])
+                )
+            )
+        return xMin, xMax
+
+    def fitAllSpectra(self, peakFunction: str):
+        """
+        Fit the peaks of all of the grouped spectra with a single `FitPeaks`, with the peak centers
+        and fit windows for each spectrum passed as workspaces.  The padding peaks are then removed from the
+        diagnostic output, so that it matches the output from fitting the spectra one at a time.
+        """
+        numHisto = self.mantidSnapper.mtd[self.inputWorkspaceName].getNumberHistograms()
+        if self.mantidSnapper.mtd[self.inputWorkspaceName].spectrumInfo().detectorCount() == 0:
+            raise ValueError(f"Spectrum with NO DETECTORS encountered on {self.inputWorkspaceName}")
+        numGroups = len(self.groupIDs)
+        peakCounts = [len(self.reducedList[groupID]) for groupID in self.groupIDs]
+        peakCenters, peakLimits = self.peakTables(numHisto)
+
+        peakCentersName = mtd.unique_name(prefix="__tmp_fitcenters_")
+        peakLimitsName = mtd.unique_name(prefix="__tmp_fitwindows_")
+        self.mantidSnapper.CreateWorkspace(
+            "Creating peak centers workspace...",
+            OutputWorkspace=peakCentersName,
+            DataX=np.tile(np.arange(peakCenters.shape[1], dtype=float), numHisto),
+            DataY=peakCenters.flatten(),
+            NSpec=numHisto,
+        )
+        self.mantidSnapper.CreateWorkspace(
+            "Creating peak fit-windows workspace...",
+            OutputWorkspace=peakLimitsName,
+            DataX=np.tile(np.arange(peakLimits.shape[1], dtype=float), numHisto),
+            DataY=peakLimits.flatten(),
+            NSpec=numHisto,
+        )
+
+        outputNames = {
+            x: f"{'__' if x == FitOutputEnum.PeakPosition else ''}{self.outputWorkspaceName}{self.outputSuffix[x]}"
+            for x in FitOutputEnum
+        }
+        self.mantidSnapper.FitPeaks(
+            "Fit Peaks...",
+            # in common with PDCalibration
+            InputWorkspace=self.inputWorkspaceName,
+            StartWorkspaceIndex=0,
+            StopWorkspaceIndex=numGroups - 1,
+            PeakFunction=peakFunction,
+            PeakCentersWorkspace=peakCentersName,
+            FitPeakWindowWorkspace=peakLimitsName,
+            BackgroundType="Linear",
+            MinimumSignalToNoiseRatio=self.NOYZE_2_MIN,
+            ConstrainPeakPositions=True,
+            HighBackground=True,  # vanadium must use high background
+            # outputs -- in PDCalibration combined in workspace group
+            FittedPeaksWorkspace=outputNames[FitOutputEnum.Workspace],
+            OutputWorkspace=outputNames[FitOutputEnum.PeakPosition],
+            OutputPeakParametersWorkspace=outputNames[FitOutputEnum.Parameters],
+            OutputParameterFitErrorsWorkspace=outputNames[FitOutputEnum.ParameterError],
+        )
+        self.mantidSnapper.WashDishes(
+            "Deleting peak-table workspaces...",
+            WorkspaceList=[peakCentersName, peakLimitsName],
+        )
+        self.mantidSnapper.executeQueue()
+
+        # split the output by workspace index: retain only the grouped spectra, and only their own peaks
+        for x in (FitOutputEnum.Workspace, FitOutputEnum.PeakPosition):
+            self.mantidSnapper.ExtractSpectra(
+                "Extracting the grouped spectra...",
+                InputWorkspace=outputNames[x],
+                OutputWorkspace=outputNames[x],
+                StartWorkspaceIndex=0,
+                EndWorkspaceIndex=numGroups - 1,
+            )
+        # The X-values of the peak positions are the peak centers, and the padding peaks are beyond them.
+        #   The peak positions are point data: crop midway between the peak centers, rather than at a center,
+        #   so that the first and last real peaks are retained regardless of how a boundary point is treated.
+        xMin, xMax = self.cropLimits(peakCenters[:numGroups], peakCounts)
+        self.mantidSnapper.CropWorkspaceRagged(
+            "Removing the padding peaks...",
+            InputWorkspace=outputNames[FitOutputEnum.PeakPosition],
+            OutputWorkspace=outputNames[FitOutputEnum.PeakPosition],
+            XMin=xMin,
+            XMax=xMax,
+        )
+        for x in (FitOutputEnum.Parameters, FitOutputEnum.ParameterError):
+            table = self.mantidSnapper.mtd[outputNames[x]]
+            wsindex = np.asarray(table.column("wsindex"), dtype=int)
+            peakindex = np.asarray(table.column("peakindex"), dtype=int)
+            # any row for a spectrum without a group has no peaks of its own
+            peakCount = np.append(peakCounts, 0)[np.minimum(wsindex, numGroups)]
+            paddingRows = np.flatnonzero(peakindex >= peakCount)
+            if len(paddingRows) > 0:
+                self.mantidSnapper.DeleteTableRows(
+                    "Removing the padding peaks...",
+                    TableWorkspace=outputNames[x],
+                    Rows=paddingRows.tolist(),
+                )
+        self.mantidSnapper.GroupWorkspaces(
+            "Group diagnosis workspaces for output",
+            InputWorkspaces=list(outputNames.values()),
+            OutputWorkspace=self.outputWorkspaceName,
+        )
+        self.mantidSnapper.executeQueue()
+
     def PyExec(self):
         peakFunction = self.getPropertyValue("PeakFunction")
         reducedPeakList = pydantic.TypeAdapter(List[GroupPeakList]).validate_json(
@@ -85,6 +233,12 @@ class FitMultiplePeaksAlgorithm(PythonAlgorithm):
                 f"Number of histograms and number of GroupPeakLists do not match: {numHisto} vs {len(self.groupIDs)}"
             )
 
+        # without any peaks there is nothing to fit:  the per-spectrum path returns an empty group
+        if self.getProperty("FitAllSpectra").value and self.reducedList and all(self.reducedList.values()):
+            self.fitAllSpectra(peakFunction)
+            self.setProperty("OutputWorkspaceGroup", self.outputWorkspace.name())
+            return
+
         for index, groupID in enumerate(self.groupIDs):
             spectrumInfo = self.mantidSnapper.mtd[self.inputWorkspaceName].spectrumInfo()
             numHisto = self.mantidSnapper.mtd[self.inputWorkspaceName].getNumberHistograms()
@@ -1,18 +1,33 @@
-import time
+import functools
+import os
 from collections import namedtuple
-from threading import Lock
-from typing import Any, Dict
-
-from mantid.api import AlgorithmManager, IAlgorithm, IWorkspaceProperty, Progress, mtd
+from contextlib import ExitStack
+from numbers import Number
+from threading import Event, Lock
+from typing import Any, Dict, List, NamedTuple, Set, Tuple
+
+from mantid.api import (
+    AlgorithmFactory,
+    AlgorithmManager,
+    AlgorithmObserver,
+    IAlgorithm,
+    IWorkspaceProperty,
+    Progress,
+    mtd,
+)
 from mantid.kernel import Direction
 from mantid.kernel import ULongLongPropertyWithValue as PointerProperty
 
 from snapred.backend.error.AlgorithmException import AlgorithmException
 from snapred.backend.log.logger import snapredLogger
+from snapred.backend.profiling.AlgorithmReplay import AlgorithmRecorder
+from snapred.backend.profiling.AlgorithmTracer import AlgorithmTracer
+from snapred.backend.recipe.Pipeline import Pipeline
+from snapred.backend.recipe.QueueOptimizer import QueueOptimizer
 
 # must import to register with AlgorithmManager
 from snapred.meta.Callback import Callback, callback
-from snapred.meta.Config import Config, Resource
+from snapred.meta.Config import Config
 from snapred.meta.pointer import access_pointer, create_pointer
 
 logger = snapredLogger.getLogger(__name__)
@@ -50,6 +65,32 @@ class _CustomMtd:
         return mtd.getObjectNames()
 
 
+class PropertySchema(NamedTuple):
+    """
+    The declaration of a single algorithm property: everything that's required to enqueue an algorithm.
+    """
+
+    name: str
+    direction: Any
+    type: str
+    isPointer: bool
+    isWorkspace: bool
+
+
+class _CompletionObserver(AlgorithmObserver):
+    # Signal the completion of an algorithm, whether or not it succeeded.
+
+    def __init__(self):
+        super().__init__()
+        self.completed = Event()
+
+    def finishHandle(self):
+        self.completed.set()
+
+    def errorHandle(self, _message):
+        self.completed.set()
+
+
 class MantidSnapper:
     ##
     ## KNOWN NON-REENTRANT ALGORITHMS
@@ -64,9 +105,16 @@ class MantidSnapper:
     _nonConcurrentAlgorithms = "SaveNexus", "SaveNexusESS", "SaveDiffCal", "RenameWorkspace"
     _nonConcurrentAlgorithmMutex = Lock()
 
+    # Savers are only serialized when they write to the same file.
+    _fileSavingAlgorithms = "SaveNexus", "SaveNexusESS", "SaveDiffCal"
+    _fileMutexes: Dict[str, Lock] = {}
+    _fileMutexesMutex = Lock()
+
+    # Renames are serialized separately from the savers: this lock is only held during the rename.
+    _renameMutex = Lock()
+
     # Timeout sequencing
     _timeout = 60.0  # seconds
-    _checkInterval = 0.05  # 50 ms
 
     typeTranslationTable = {"string": str, "number": float, "dbl list": list, "boolean": bool}
     _mtd = _CustomMtd()
@@ -74,6 +122,10 @@ class MantidSnapper:
     _infoMutex = Lock()
     _workspacesInfo: Dict[str, Dict[str, Any]] = {}
 
+    # Property schemas, by algorithm name and version
+    _schemaMutex = Lock()
+    _propertySchemas: Dict[Tuple[str, int], Dict[str, PropertySchema]] = {}
+
     def __init__(self, parentAlgorithm, name):
         """
                                         :;:::::;:
@@ -107,10 +159,11 @@ class MantidSnapper:
         self._progressCounter = 0
         self._prog_reporter = None
         self._algorithmQueue = []
-        self._exportScript = ""
-        self._export = False
-        if self._export:
-            self._cleanOldExport()
+        # independent queued algorithms may run concurrently, using at most this many threads
+        self.maxWorkers = Config["recipe.queue.maxWorkers"]
+        self._progressMutex = Lock()
+        # while the queue is executed concurrently, `cleanup` is deferred until all running algorithms are complete
+        self._executingConcurrently = False
 
     def createOutputCallback(self, prop):
         callbackType = self.typeTranslationTable.get(prop.type, str)
@@ -122,15 +175,16 @@ class MantidSnapper:
             # inspect mantid algorithm for output properties
             # if there are any, add them to a list for return
             outputProperties = {}
-            mantidAlgorithm = self._createAlgorithm(key)
+            schema = self._propertySchema(key)
             # Get all `Output` properties.
-            for prop in mantidAlgorithm.getProperties():
-                if Direction.values[prop.direction] == Direction.Output:
+            for prop in schema.values():
+                if prop.direction == Direction.Output:
                     outputProperties[prop.name] = self.createOutputCallback(prop)
             # Get any `InOut` properties that are actually referenced in the kwargs.
-            for propName in set(kwargs.keys()).difference(mantidAlgorithm.getProperties()):
-                prop = mantidAlgorithm.getProperty(propName)
-                if Direction.values[prop.direction] == Direction.InOut:
+            # (Any unknown property will be reported when the algorithm is executed.)
+            for propName in kwargs:
+                prop = schema.get(propName)
+                if prop is not None and prop.direction == Direction.InOut:
                     outputProperties[prop.name] = self.createOutputCallback(prop)
 
             # TODO: Special cases are bad.
@@ -142,9 +196,6 @@ class MantidSnapper:
                 if kwargs.get("MakeCalWorkspace", True):
                     outputProperties["CalWorkspace"] = kwargs["WorkspaceName"] + "_cal"
 
-            # We're done with the instance for now, so remove it from managed algorithms.
-            self._removeAlgorithm(mantidAlgorithm)
-
             self._algorithmQueue.append((key, message, kwargs, outputProperties))
 
             if len(outputProperties) == 1:
@@ -162,8 +213,9 @@ class MantidSnapper:
     def reportAndIncrement(self, message):
         if not self._prog_reporter:
             return
-        self._prog_reporter.reportIncrement(self._progressCounter, message)
-        self._progressCounter += 1
+        with self._progressMutex:
+            self._prog_reporter.reportIncrement(self._progressCounter, message)
+            self._progressCounter += 1
 
     @classmethod
     def _createAlgorithm(cls, name):
@@ -174,6 +226,57 @@ class MantidSnapper:
 
         return alg
 
+    @classmethod
+    def _propertySchema(cls, name: str) -> Dict[str, PropertySchema]:
+        """
+        The property schema of the latest version of an algorithm, by property name.
+
+        An algorithm is only instantiated to read its schema the first time it is enqueued:
+        for a Python algorithm, this requires running its `PyInit`.
+        """
+        key = (name, AlgorithmFactory.highestVersion(name))
+        schema = cls._propertySchemas.get(key)
+        if schema is None:
+            with cls._schemaMutex:
+                schema = cls._propertySchemas.get(key)
+                if schema is None:
+                    algorithm = cls._createAlgorithm(name)
+                    try:
+                        schema = {
+                            prop.name: PropertySchema(
+                                name=prop.name,
+                                direction=Direction.values[prop.direction],
+                                type=prop.type,
+                                isPointer=isinstance(prop, PointerProperty),
+                                isWorkspace=isinstance(prop, IWorkspaceProperty),
+                            )
+                            for prop in algorithm.getProperties()
+                        }
+                    finally:
+                        # We're done with the instance, so remove it from managed algorithms.
+                        cls._removeAlgorithm(algorithm)
+                    cls._propertySchemas[key] = schema
+        return schema
+
+    @classmethod
+    def _workspaceArguments(cls, name: str, kwargs: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+        # The names of the input and output workspaces referenced by an algorithm's arguments.
+        inputs, outputs = [], []
+        schema = cls._propertySchema(name)
+        for propName, val in kwargs.items():
+            prop = schema.get(propName)
+            if prop is None or not prop.isWorkspace:
+                continue
+            if isinstance(val, Callback):
+                val = val.get()
+            if not isinstance(val, str) or not val:
+                continue
+            if prop.direction in (Direction.Input, Direction.InOut):
+                inputs.append(val)
+            if prop.direction in (Direction.Output, Direction.InOut):
+                outputs.append(val)
+        return inputs, outputs
+
     @classmethod
     def _removeAlgorithm(cls, alg: IAlgorithm):
         # Remove a Mantid-managed algorithm.
@@ -183,19 +286,41 @@ class MantidSnapper:
         AlgorithmManager.removeById(alg.getAlgorithmID())
 
     @classmethod
-    def _waitForAlgorithmCompletion(cls, name):
-        currentTimeout = 0
-        while len(AlgorithmManager.runningInstancesOf(name)) > 0:
-            if currentTimeout >= cls._timeout:
+    def _waitForAlgorithmCompletion(cls, name, algorithm):
+        if not algorithm.isRunning():
+            return
+        observer = _CompletionObserver()
+        observer.observeFinish(algorithm)
+        observer.observeError(algorithm)
+        try:
+            # The algorithm may have completed before the observer was attached.
+            if algorithm.isRunning() and not observer.completed.wait(cls._timeout):
                 raise TimeoutError(f"Timeout occurred while waiting for instance of {name} to cleanup")
-            currentTimeout += cls._checkInterval
-            time.sleep(cls._checkInterval)
+        finally:
+            observer.stopObserving(algorithm)
+
+    @classmethod
+    def _fileMutex(cls, filePath: str) -> Lock:
+        key = os.path.realpath(filePath)
+        with cls._fileMutexesMutex:
+            mutex = cls._fileMutexes.get(key)
+            if mutex is None:
+                mutex = cls._fileMutexes[key] = Lock()
+        return mutex
 
     @classmethod
-    def _obtainMutex(cls, name):
+    def _obtainMutex(cls, name, kwargs=None):
         mutex = cls._nonReentrantMutexes.get(name)
         if mutex is None and name in cls._nonConcurrentAlgorithms:
-            mutex = cls._nonConcurrentAlgorithmMutex
+            if name == "RenameWorkspace":
+                mutex = cls._renameMutex
+            elif name in cls._fileSavingAlgorithms and kwargs and kwargs.get("Filename"):
+                filePath = kwargs["Filename"]
+                if isinstance(filePath, Callback):
+                    filePath = filePath.get()
+                mutex = cls._fileMutex(str(filePath))
+            else:
+                mutex = cls._nonConcurrentAlgorithmMutex
         return mutex
 
     def executeAlgorithm(self, name, outputs, **kwargs):
@@ -204,7 +329,7 @@ class MantidSnapper:
         try:
             # Protect non-reentrant algorithms.
 
-            mutex = self._obtainMutex(name)
+            mutex = self._obtainMutex(name, kwargs)
             if mutex is not None:
                 mutex.acquire()
 
@@ -244,7 +369,8 @@ class MantidSnapper:
                     MantidSnapper._addWorkspaceInfo(algorithm.getProperty(prop).valueAsStr, name, prop)
         except (RuntimeError, TypeError) as e:
             logger.error(f"Algorithm {name} failed for the following arguments: \n {kwargs}")
-            self.cleanup()
+            if not self._executingConcurrently:
+                self.cleanup()
             raise AlgorithmException(name, str(e)) from e
         finally:
             try:
@@ -256,53 +382,174 @@ class MantidSnapper:
     @classmethod
     def _cleanupNonConcurrent(cls, name, algorithm):
         if name in cls._nonConcurrentAlgorithms or name in cls._nonReentrantAlgorithms:
-            cls._waitForAlgorithmCompletion(name)
+            cls._waitForAlgorithmCompletion(name, algorithm)
             cls._removeAlgorithm(algorithm)
 
     def executeQueue(self):
         if self.parentAlgorithm:
             self._prog_reporter = Progress(self.parentAlgorithm, start=0.0, end=1.0, nreports=self._endrange)
-        for algorithmTuple in self._algorithmQueue:
-            if self._export:
-                self._exportScript += "{}(".format(algorithmTuple[0])
-                for prop, val in algorithmTuple[2].items():
-                    self._exportScript += "{}={}, ".format(
-                        prop, val if not isinstance(val, str) else "'{}'".format(val)
-                    )
-                self._exportScript = self._exportScript[:-2]
-                self._exportScript += ")\n"
-
-            self.reportAndIncrement(algorithmTuple[1])
-
-            # TODO: in general, SNAPRed needs "headers-based" logging -- but for the moment,
-            #   at least put the algorithm name into the log message!
-            logger.info("%s - %s", *algorithmTuple[0:2])
+        aliases = []
+        if Config["recipe.queue.optimization.enabled"]:
+            self._algorithmQueue, aliases = QueueOptimizer().optimize(self._algorithmQueue)
+        tracing = AlgorithmTracer.enabled
+        scope = AlgorithmTracer.callerScope() if tracing else None
+        # An algorithm executed by a captured algorithm is not itself captured.
+        capturing = AlgorithmRecorder.enabled and not AlgorithmRecorder.recording
+        if self.maxWorkers > 1 and len(self._algorithmQueue) > 1:
+            pipeline = Pipeline(lambda _ws: None, maxWorkers=self.maxWorkers)
+            for n, (algorithmTuple, (reads, writes)) in enumerate(
+                zip(self._algorithmQueue, self._queueDependencies(self._algorithmQueue))
+            ):
+                pipeline.addStep(
+                    f"{n}: {algorithmTuple[0]}",
+                    functools.partial(self._executeQueued, algorithmTuple, tracing, capturing, scope),
+                    reads=reads,
+                    writes=writes,
+                )
+            self._executingConcurrently = True
+            try:
+                pipeline.execute()
+            except BaseException:
+                # `Pipeline.execute` only raises once every running algorithm is complete
+                self.cleanup()
+                raise
+            finally:
+                self._executingConcurrently = False
+        else:
+            for algorithmTuple in self._algorithmQueue:
+                self._executeQueued(algorithmTuple, tracing, capturing, scope)
+
+        # Outputs of any algorithms removed by the optimizer are taken from the algorithms that replaced them.
+        for source, alias in aliases:
+            if source._set:
+                alias.update(source.get())
+        self.cleanup()
+
+    def _executeQueued(self, algorithmTuple, tracing, capturing, scope):
+        self.reportAndIncrement(algorithmTuple[1])
+
+        # TODO: in general, SNAPRed needs "headers-based" logging -- but for the moment,
+        #   at least put the algorithm name into the log message!
+        logger.info("%s - %s", *algorithmTuple[0:2])
+        with ExitStack() as stack:
+            if tracing or capturing:
+                inputWorkspaces, outputWorkspaces = self._workspaceArguments(algorithmTuple[0], algorithmTuple[2])
+            if tracing:
+                stack.enter_context(
+                    AlgorithmTracer.record(*algorithmTuple[0:2], inputWorkspaces, outputWorkspaces, scope)
+                )
+            if capturing:
+                stack.enter_context(AlgorithmRecorder.record(*algorithmTuple[0:3], outputWorkspaces))
             self.executeAlgorithm(name=algorithmTuple[0], outputs=algorithmTuple[3], **algorithmTuple[2])
 
-        self.cleanup()
+    # Read and written by any algorithm with an argument which can't be resolved until the queue executes
+    _ANY_WORKSPACE = "*"
+
+    @classmethod
+    def _queueDependencies(cls, queue) -> List[Tuple[Set[str], Set[str]]]:
+        """
+        The workspaces read and written by each queued algorithm, as `(<reads>, <writes>)`.
+
+        Workspace properties are read or written according to their direction.  Any other string argument naming
+        a workspace used by the queue (e.g. the `WashDishes` arguments) is assumed to be written.
+        An output `Callback` is treated as a workspace written by the algorithm which produces it: where it is used as
+        an argument, it stands for both that algorithm's output and the name of the output workspace, and it is
+        read or written according to the direction of the property.
+        An algorithm with an argument which can't be resolved is a barrier: it depends on every earlier algorithm,
+        and every later algorithm depends on it.  Finally, a workspace whose name contains the name of another
+        workspace (e.g. `<name>_group`) may be derived from it: an algorithm using one is assumed to use both.
+        """
+
+        def _token(callback_: Callback) -> str:
+            return f"<callback {id(callback_)}>"
+
+        # The names used for each produced callback: its token, and the name of its output workspace, if known
+        produced = {}
+        for _name, _message, kwargs, outputs in queue:
+            for propName, val in outputs.items():
+                if isinstance(val, Callback):
+                    names = {_token(val)}
+                    workspaceName = kwargs.get(propName)
+                    if isinstance(workspaceName, str) and workspaceName:
+                        names.add(workspaceName)
+                    produced[id(val)] = names
+
+        # The names of the workspaces referenced by workspace properties
+        workspaceNames = set()
+        arguments = []
+        for name, _message, kwargs, _outputs in queue:
+            schema = cls._propertySchema(name)
+            entryArguments = []
+            for propName, val in kwargs.items():
+                prop = schema.get(propName)
+                for val_ in val if isinstance(val, (list, tuple)) else (val,):
+                    entryArguments.append((prop, val_))
+                    if prop is not None and prop.isWorkspace and isinstance(val_, str) and val_:
+                        workspaceNames.add(val_)
+            arguments.append(entryArguments)
+
+        dependencies = []
+        for (_name, _message, _kwargs, outputs), entryArguments in zip(queue, arguments):
+            reads, writes = {cls._ANY_WORKSPACE}, set()
+            for prop, val in entryArguments:
+                if isinstance(val, Callback):
+                    if id(val) in produced:
+                        names = produced[id(val)]
+                        if prop is not None and prop.isWorkspace:
+                            if prop.direction in (Direction.Input, Direction.InOut):
+                                reads.update(names)
+                            if prop.direction in (Direction.Output, Direction.InOut):
+                                writes.update(names)
+                        elif names & workspaceNames:
+                            # e.g. a `WashDishes` argument
+                            writes.update(names)
+                        else:
+                            reads.update(names)
+                        continue
+                    if not val._set:
+                        writes.add(cls._ANY_WORKSPACE)
+                        continue
+                    val = val.get()
+                if val is None or isinstance(val, (Number, bool)) or val == "":
+                    continue
+                if prop is not None and prop.isWorkspace:
+                    if not isinstance(val, str):
+                        # e.g. a workspace instance
+                        writes.add(cls._ANY_WORKSPACE)
+                        continue
+                    if prop.direction in (Direction.Input, Direction.InOut):
+                        reads.add(val)
+                    if prop.direction in (Direction.Output, Direction.InOut):
+                        writes.add(val)
+                elif isinstance(val, str) and val in workspaceNames:
+                    writes.add(val)
+            for val in outputs.values():
+                if isinstance(val, Callback):
+                    writes.add(_token(val))
+                elif isinstance(val, str):
+                    writes.add(val)
+                    workspaceNames.add(val)
+            dependencies.append((reads, writes))
+
+        # Include the names of any workspaces which might be derived from those used.
+        for reads, writes in dependencies:
+            for names in (reads, writes):
+                derived = {
+                    base for base in workspaceNames for name in names & workspaceNames if base != name and base in name
+                }
+                names.update(derived)
+        return dependencies
 
     @property
     def mtd(self):
         return self._mtd
 
-    def _cleanOldExport(self):
-        # exportPath = self._generateExportPath()
-        # if os.path.exists(exportPath):
-        #     os.remove(exportPath)
-        pass
-
-    def _generateExportPath(self):
-        return Resource.getPath("snapper_export.py")
-
     def cleanup(self):
-        if self._export:
-            exportPath = self._generateExportPath()
-            with open(exportPath, "a") as file:
-                file.write(self._exportScript)
-        if self.parentAlgorithm:
-            self._prog_reporter.report(self._endrange, "Done")
-        self._progressCounter = 0
-        self._algorithmQueue = []
+        with self._progressMutex:
+            if self.parentAlgorithm:
+                self._prog_reporter.report(self._endrange, "Done")
+            self._progressCounter = 0
+            self._algorithmQueue = []
 
     @classmethod
     def _addWorkspaceInfo(cls, workspaceName: str, algorithmName: str, propertyName: str):
@@ -1,4 +1,5 @@
 import math
+from typing import List, Tuple
 
 import numpy as np
 from mantid.api import (
@@ -75,6 +76,77 @@ class PixelGroupingParametersCalculation(PythonAlgorithm):
         self.resolutionWorkspaceName: str = "pgp_resolution"  # TODO use WNG
         self.partialResolutionWorkspaceName: str = self.resolutionWorkspaceName + "_partial"
 
+    def groupGeometry(
+        self, groupingWS, detectorTable, groupIDs
+    ) -> Tuple[List[int], List[float], List[float], List[float], List[float], List[float]]:
+        """
+        Calculate the pixel count, the solid-angle weighted mean L2, two-theta and azimuth,
+        and the minimum and maximum two-theta, of the unmasked, non-monitor pixels of each group.
+
+        The detector properties are read in bulk from `detectorTable`, the output of `PreprocessDetectorsToMD`
+        for `groupingWS` (with `GetMaskState`), and the statistics for all groups are then accumulated together.
+        Each statistic is returned as a list, in the order of `groupIDs`.
+        """
+        nGroups = len(groupIDs)
+
+        # `PreprocessDetectorsToMD` excludes monitors: its unused rows are NaN.
+        L2 = np.asarray(detectorTable.column("L2"), dtype=float)
+        rows = ~np.isnan(L2)
+        L2 = L2[rows]
+        tableDetIDs = np.asarray(detectorTable.column("DetectorID"), dtype=int)[rows]
+        twoTheta = np.asarray(detectorTable.column("TwoTheta"), dtype=float)[rows]
+        # The azimuth of the detector position about the beam (i.e. about the Z axis, with the sample at the origin).
+        #   Also entered as defect EWM#5073: the ambiguous azimuth of an on-axis pixel is zero,
+        #   which doesn't overly affect the mean value.
+        phi = np.asarray(detectorTable.column("Azimuthal"), dtype=float)[rows]
+        isMasked = np.asarray(detectorTable.column("detMask"), dtype=int)[rows] != 0
+
+        # map the pixels of every group to their table rows, with the index of its group for each pixel
+        detIDsOfGroups = [np.asarray(groupingWS.getDetectorIDsOfGroup(int(groupID)), dtype=int) for groupID in groupIDs]
+        groupIndices = np.repeat(np.arange(nGroups), [len(detIDs) for detIDs in detIDsOfGroups])
+        detIDs = np.concatenate([np.empty(0, dtype=int), *detIDsOfGroups])
+        detIDOrder = np.argsort(tableDetIDs, kind="stable")
+        positions = np.searchsorted(tableDetIDs, detIDs, sorter=detIDOrder)
+        inTable = positions < len(tableDetIDs)
+        detRows = np.zeros(len(detIDs), dtype=int)
+        detRows[inTable] = detIDOrder[positions[inTable]]
+        # any pixel which isn't in the table is a monitor
+        valid = inTable & (tableDetIDs[detRows] == detIDs if len(tableDetIDs) else False)
+        valid[valid] = ~isMasked[detRows[valid]]
+        detRows = detRows[valid]
+        groupIndices = groupIndices[valid]
+
+        twoTheta = twoTheta[detRows]
+        L2 = L2[detRows]
+        phi = phi[detRows]
+
+        solidAngleFactor = np.sin(twoTheta / 2.0)
+        pixelCount = np.bincount(groupIndices, minlength=nGroups)
+        normalizationFactor = np.bincount(groupIndices, weights=solidAngleFactor, minlength=nGroups)
+        groupMeanL2 = np.bincount(groupIndices, weights=L2 * solidAngleFactor, minlength=nGroups)
+        groupMean2Theta = np.bincount(groupIndices, weights=twoTheta * solidAngleFactor, minlength=nGroups)
+        groupMeanPhi = np.bincount(groupIndices, weights=phi * solidAngleFactor, minlength=nGroups)
+
+        normalized = normalizationFactor > np.finfo(float).eps
+        for groupMean in (groupMeanL2, groupMean2Theta, groupMeanPhi):
+            groupMean[normalized] /= normalizationFactor[normalized]
+            # special case: all on-axis pixels
+            groupMean[~normalized] = 0.0
+
+        groupMin2Theta = np.full(nGroups, 2.0 * np.pi)
+        np.minimum.at(groupMin2Theta, groupIndices, twoTheta)
+        groupMax2Theta = np.zeros(nGroups)
+        np.maximum.at(groupMax2Theta, groupIndices, twoTheta)
+
+        return (
+            pixelCount.tolist(),
+            groupMeanL2.tolist(),
+            groupMean2Theta.tolist(),
+            groupMeanPhi.tolist(),
+            groupMin2Theta.tolist(),
+            groupMax2Theta.tolist(),
+        )
+
     def PyExec(self):
         lowdSpacingCrop = Config["constants.CropFactors.lowdSpacingCrop"]
         highdSpacingCrop = Config["constants.CropFactors.highdSpacingCrop"]
@@ -141,64 +213,35 @@ class PixelGroupingParametersCalculation(PythonAlgorithm):
         groupingWS = self.mantidSnapper.mtd[tmpGroupingWSName]
         resolutionWS = self.mantidSnapper.mtd[self.resolutionWorkspaceName]
 
+        # Read the detector properties of all pixels in bulk.
+        detectorTableName = mtd.unique_hidden_name()
+        self.mantidSnapper.PreprocessDetectorsToMD(
+            "Reading the detector properties...",
+            InputWorkspace=tmpGroupingWSName,
+            OutputWorkspace=detectorTableName,
+            GetMaskState=True,
+        )
+        self.mantidSnapper.executeQueue()
+        detectorTable = self.mantidSnapper.mtd[detectorTableName]
+
         groupIDs = groupingWS.getGroupIDs()
-        detectorInfo = groupingWS.detectorInfo()
+        (
+            pixelCounts,
+            groupMeansL2,
+            groupMeans2Theta,
+            groupMeansPhi,
+            groupMins2Theta,
+            groupMaxs2Theta,
+        ) = self.groupGeometry(groupingWS, detectorTable, groupIDs)
         for groupIndex, groupID in enumerate(groupIDs):
-            detIDs = groupingWS.getDetectorIDsOfGroup(int(groupID))
-
-            groupMeanL2 = 0.0
-
-            groupMin2Theta = 2.0 * np.pi
-            groupMax2Theta = 0.0
-            groupMean2Theta = 0.0
-
-            groupMeanPhi = 0.0
-
-            pixelCount = 0
-            normalizationFactor = 0.0
-            for detID in detIDs:
-                detIndex = detectorInfo.indexOf(int(detID))
-                if detectorInfo.isMonitor(int(detIndex)) or detectorInfo.isMasked(int(detIndex)):
-                    continue
-
-                twoTheta = detectorInfo.twoTheta(int(detIndex))
-                solidAngleFactor = np.sin(twoTheta / 2.0)
-                groupMin2Theta = min(groupMin2Theta, twoTheta)
-                groupMax2Theta = max(groupMax2Theta, twoTheta)
-
-                twoTheta *= solidAngleFactor
-                groupMean2Theta += twoTheta
-
-                try:
-                    phi = detectorInfo.azimuthal(int(detIndex))
-                    phi *= solidAngleFactor
-                    groupMeanPhi += phi
-                except RuntimeError as e:
-                    # Also entered as defect EWM#5073:
-                    # `DetectorInfo.azimuthal()` has issues in calculating ambiguous azimuth values:
-                    #   * by convention, these values can be treated as zero, without overly affecting the mean value.
-                    if "Failed to create up axis orthogonal to the beam direction" not in str(e):
-                        raise
-                    logger.debug(e)
-
-                L2 = detectorInfo.l2(int(detIndex))
-                L2 *= solidAngleFactor
-                groupMeanL2 += L2
-
-                normalizationFactor += solidAngleFactor
-                pixelCount += 1
+            pixelCount = pixelCounts[groupIndex]
+            groupMeanL2 = groupMeansL2[groupIndex]
+            groupMean2Theta = groupMeans2Theta[groupIndex]
+            groupMeanPhi = groupMeansPhi[groupIndex]
+            groupMin2Theta = groupMins2Theta[groupIndex]
+            groupMax2Theta = groupMaxs2Theta[groupIndex]
 
             if pixelCount > 0:
-                if normalizationFactor > np.finfo(float).eps:
-                    groupMeanL2 /= normalizationFactor
-                    groupMean2Theta /= normalizationFactor
-                    groupMeanPhi /= normalizationFactor
-                else:
-                    # special case: all on-axis pixels
-                    groupMeanL2 = 0.0
-                    groupMean2Theta = 0.0
-                    groupMeanPhi = 0.0
-
                 dMin = (
                     (self.CONVERSION_FACTOR * (1.0 / (2.0 * math.sin(groupMax2Theta / 2.0))) * self.tofMin / self.L)
                     + Config["constants.CropFactors.lowdSpacingCrop"]
@@ -230,7 +273,7 @@ class PixelGroupingParametersCalculation(PythonAlgorithm):
         self.setProperty("OutputParameters", list_to_raw(allGroupingParams))
         self.mantidSnapper.WashDishes(
             "Cleaning up workspaces",
-            WorkspaceList=[self.resolutionWorkspaceName, tmpGroupingWSName],
+            WorkspaceList=[self.resolutionWorkspaceName, tmpGroupingWSName, detectorTableName],
         )
         self.mantidSnapper.executeQueue()
 
@@ -1,10 +1,11 @@
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import numpy as np
 import pydantic
 from mantid.api import AlgorithmFactory, PythonAlgorithm
 from mantid.kernel import Direction
 
+from snapred.backend.dao.DetectorPeak import DetectorPeak
 from snapred.backend.dao.GroupPeakList import GroupPeakList
 from snapred.backend.dao.ingredients import PeakIngredients
 from snapred.backend.log.logger import snapredLogger
@@ -77,16 +78,20 @@ class PurgeOverlappingPeaksAlgorithm(PythonAlgorithm):
         errors = {}
         return errors
 
+    @staticmethod
+    def intensities(detectorPeaks: List[DetectorPeak]) -> np.ndarray:
+        fSquared = np.fromiter((p.peak.fSquared for p in detectorPeaks), dtype=float, count=len(detectorPeaks))
+        multiplicity = np.fromiter((p.peak.multiplicity for p in detectorPeaks), dtype=float, count=len(detectorPeaks))
+        dSpacing = np.fromiter((p.peak.dSpacing for p in detectorPeaks), dtype=float, count=len(detectorPeaks))
+        return fSquared * multiplicity * dSpacing**4
+
     def filterPeaksOnIntensity(self, peakLists: List[GroupPeakList]) -> List[GroupPeakList]:
         for groupPeakList in peakLists:
             startingCount = len(groupPeakList.peaks)
             detectorPeaks = groupPeakList.peaks
             detectorPeaks.sort(key=lambda x: x.peak.dSpacing)
-            peaks = [detectorPeak.peak for detectorPeak in detectorPeaks]
-            A = self.calcA(peaks)
-            groupPeakList.peaks = [
-                detectorPeak for i, detectorPeak in enumerate(detectorPeaks) if A[i] >= self.thresholdA
-            ]
+            A = self.intensities(detectorPeaks)
+            groupPeakList.peaks = [detectorPeaks[i] for i in np.flatnonzero(A >= self.thresholdA)]
             self.log().notice(
                 (
                     f"Purged {startingCount - len(groupPeakList.peaks)} peaks from group {groupPeakList.groupID}"
@@ -100,11 +105,9 @@ class PurgeOverlappingPeaksAlgorithm(PythonAlgorithm):
             startingCount = len(groupPeakList.peaks)
             detectorPeaks = groupPeakList.peaks
             detectorPeaks.sort(key=lambda x: x.peak.dSpacing)
-            groupPeakList.peaks = [
-                detectorPeak
-                for detectorPeak in detectorPeaks
-                if detectorPeak.minimum > self.crystalDMin and detectorPeak.maximum < self.crystalDMax
-            ]
+            minima, maxima = self.windows(detectorPeaks)
+            inRange = (minima > self.crystalDMin) & (maxima < self.crystalDMax)
+            groupPeakList.peaks = [detectorPeaks[i] for i in np.flatnonzero(inRange)]
             self.log().notice(
                 (
                     f"Purged {startingCount - len(groupPeakList.peaks)} peaks from group {groupPeakList.groupID},"
@@ -113,6 +116,39 @@ class PurgeOverlappingPeaksAlgorithm(PythonAlgorithm):
             )
         return peakLists
 
+    @staticmethod
+    def windows(detectorPeaks: List[DetectorPeak]) -> Tuple[np.ndarray, np.ndarray]:
+        minima = np.fromiter((p.position.minimum for p in detectorPeaks), dtype=float, count=len(detectorPeaks))
+        maxima = np.fromiter((p.position.maximum for p in detectorPeaks), dtype=float, count=len(detectorPeaks))
+        return minima, maxima
+
+    def purgeOverlappingPeaks(self, detectorPeaks: List[DetectorPeak]) -> List[DetectorPeak]:
+        """
+        Sweep through the peaks in order of their centers, comparing each peak's window with that of the next peak.
+        When a peak which has not already been purged overlaps the next peak, both of them are purged.
+        """
+        # ensure peaks are unique
+        peaks = list({peak.position.value: peak for peak in detectorPeaks}.values())
+        nPks = len(peaks)
+        if nPks < 2:
+            return peaks
+        centers = np.fromiter((p.position.value for p in peaks), dtype=float, count=nPks)
+        order = np.argsort(centers, kind="stable")
+        minima, maxima = self.windows(peaks)
+        minima, maxima = minima[order], maxima[order]
+
+        overlapsNext = maxima[:-1] >= minima[1:]
+        # Within each run of consecutive overlaps, the peaks are purged in pairs:
+        #   the first peak of the run purges the second, but the second (already purged) does not purge the third,
+        #   so that the third purges the fourth, and so on.
+        index = np.arange(nPks - 1)
+        runStart = np.maximum.accumulate(np.where(overlapsNext, 0, index + 1))
+        purgesNext = overlapsNext & ((index - runStart) % 2 == 0)
+        purged = np.zeros(nPks, dtype=bool)
+        purged[:-1] |= purgesNext
+        purged[1:] |= purgesNext
+        return [peaks[i] for i in order[~purged]]
+
     def filterNoPeakGroups(self, peakLists: List[GroupPeakList]) -> List[GroupPeakList]:
         return [groupPeakList for groupPeakList in peakLists if len(groupPeakList.peaks) > 0]
 
@@ -124,28 +160,9 @@ class PurgeOverlappingPeaksAlgorithm(PythonAlgorithm):
         # build lists of non-overlapping peaks for each focus group. Combine them into the total list.
         outputPeaks = []
         for groupPeakList in predictedPeaks:
-            # ensure peaks are unique
-            uniquePeaks = {peak.position.value: peak for peak in groupPeakList.peaks}.values()
-
-            # do the overlap rejection logic on unique peaks
-            peakList = list(uniquePeaks)
-            nPks = len(peakList)
-            keep = [True for i in range(nPks)]
-            outputPeakList = []
-            for i in range(nPks - 1):
-                if keep[i]:
-                    if (peakList[i].position.maximum >= peakList[i + 1].position.minimum) and (
-                        peakList[i + 1].position.value != peakList[i].position.value
-                    ):
-                        keep[i] = False
-                        keep[i + 1] = False
-                    else:
-                        outputPeakList.append(peakList[i])
-            # and add last peak:
-            if nPks > 0 and keep[-1]:
-                outputPeakList.append(peakList[-1])
-
-            self.log().notice(f" {nPks} peaks in and {len(outputPeakList)} peaks out")
+            outputPeakList = self.purgeOverlappingPeaks(groupPeakList.peaks)
+
+            self.log().notice(f" {len(groupPeakList.peaks)} peaks in and {len(outputPeakList)} peaks out")
             outputGroupPeakList = GroupPeakList(
                 groupID=groupPeakList.groupID,
                 peaks=outputPeakList,
@@ -67,10 +67,10 @@ class RawVanadiumCorrectionAlgorithm(PythonAlgorithm):
             Outputworkspace=inputWS + "_beforeChop",
         )
 
-        self.mantidSnapper.ConvertUnits(
+        self.mantidSnapper.ConvertUnitsIfRequired(
             "Ensure workspace is in TOF units",
             InputWorkspace=inputWS,
-            Outputworkspace=outputWS,
+            OutputWorkspace=outputWS,
             Target="TOF",
         )
 
@@ -1,5 +1,6 @@
 from typing import Dict, List
 
+import numpy as np
 from mantid.api import (
     IEventWorkspace,
     IEventWorkspaceProperty,
@@ -12,13 +13,18 @@ from mantid.dataobjects import GroupingWorkspaceProperty
 from mantid.kernel import Direction, FloatBoundedValidator
 from mantid.kernel import ULongLongPropertyWithValue as PointerProperty
 from mantid.simpleapi import (
+    CloneWorkspace,
     ConvertToEventWorkspace,
     ConvertToMatrixWorkspace,
     ConvertUnits,
+    CreateWorkspace,
+    DeleteWorkspace,
     DeleteWorkspaces,
     GroupDetectors,
     GroupedDetectorIDs,
     MakeDirtyDish,
+    Minus,
+    RenameWorkspace,
     SmoothDataExcludingPeaksAlgo,
     mtd,
 )
@@ -97,6 +103,63 @@ class RemoveSmoothedBackground(PythonAlgorithm):
         self.focusWorkspace = self.getPropertyValue("GroupingWorkspace")
         self.isEventWs = isinstance(mtd[self.inputWorkspaceName], IEventWorkspace)
 
+    def scaledBackground(self, y: np.ndarray, focusWS, smoothWS) -> np.ndarray:
+        """
+        Each group's smoothed background, for each of its pixels, scaled by the ratio of
+        the pixel's mean value to the group's mean value.
+
+        The background is clipped at the pixel's data `y`, so that subtracting it leaves no negative values.
+        """
+        background = np.zeros_like(y)
+        for wkspindx, groupID in enumerate(self.groupIDs):
+            y_smooth = smoothWS.readY(wkspindx)
+            y_data = focusWS.readY(wkspindx)
+            scale_denom = y_data.sum() / len(y_data)
+
+            rows = np.asarray(self.groupDetectorIDs[groupID], dtype=int)
+            scale_num = y[rows].sum(axis=1) / y.shape[1]
+            background[rows] = (scale_num / scale_denom)[:, np.newaxis] * y_smooth
+        np.minimum(background, y, out=background)
+        return background
+
+    def subtractBackground(self, outputWorkspace: str, focusWS, smoothWS):
+        """
+        Subtract each group's smoothed background from each of its pixels, scaled by the ratio of
+        the pixel's mean value to the group's mean value, and clip the result at zero.
+
+        The pixels' data is read with a single `extractY`, and the scaled background of every pixel
+        is then subtracted with a single `Minus`.  The background has zero error, so the errors are unchanged.
+        """
+        outputWS = mtd[outputWorkspace]
+        background = self.scaledBackground(outputWS.extractY(), focusWS, smoothWS)
+
+        backgroundWSname = mtd.unique_name(prefix="bkgr_scaled_")
+        CreateWorkspace(
+            OutputWorkspace=backgroundWSname,
+            DataX=outputWS.extractX().ravel(),
+            DataY=background.ravel(),
+            DataE=np.zeros(background.size),
+            NSpec=background.shape[0],
+            UnitX=outputWS.getAxis(0).getUnit().unitID(),
+            Distribution=outputWS.isDistribution(),
+            ParentWorkspace=outputWorkspace,
+        )
+        Minus(
+            LHSWorkspace=outputWorkspace,
+            RHSWorkspace=backgroundWSname,
+            OutputWorkspace=outputWorkspace,
+        )
+        DeleteWorkspace(Workspace=backgroundWSname)
+
+    def _makeDirtyDishDSP(self, inputWorkspace: str, outputWorkspace: str):
+        # Record a d-spacing copy of the data for the CIS, without converting the data itself.
+        if MakeDirtyDish.cis_enabled and MakeDirtyDish.cis_preserve:
+            ConvertUnits(
+                InputWorkspace=inputWorkspace,
+                OutputWorkspace=outputWorkspace,
+                Target="dSpacing",
+            )
+
     def PyExec(self):
         """
         Extracts background from event data by masking the peak regions.
@@ -113,7 +176,7 @@ class RemoveSmoothedBackground(PythonAlgorithm):
         self.chopIngredients(predictedPeaksList)
         self.unbagGroceries()
 
-        tmpDSPws = mtd.unique_name(prefix="dsp_")
+        tmpTOFws = mtd.unique_name(prefix="tof_")
         diffocWSname = mtd.unique_name(prefix="diffoc_")
         backgroundWSname = mtd.unique_name(prefix="bkgr_")
 
@@ -122,24 +185,22 @@ class RemoveSmoothedBackground(PythonAlgorithm):
             InputWorkspace=self.inputWorkspaceName,
             OutputWorkspace=self.inputWorkspaceName + "_extractTOF_before",
         )
-        # Convert to d-spacing to match peak windows
-        ConvertUnits(
-            InputWorkspace=self.inputWorkspaceName,
-            OutputWorkspace=tmpDSPws,
-            Target="dSpacing",
-        )
-        # Creating copy of initial d-spacing data
-        MakeDirtyDish(
-            InputWorkspace=tmpDSPws,
-            OutputWorkspace=self.outputWorkspaceName + "_extractDSP_before",
-        )
+        self._makeDirtyDishDSP(self.inputWorkspaceName, self.outputWorkspaceName + "_extractDSP_before")
 
-        # find average spectra over focus groups
+        # The background is subtracted bin-by-bin, and converting the units of a histogram only changes its X-values:
+        #   so the subtraction is done in TOF, which avoids two full passes over the data.
         if self.isEventWs:
             ConvertToMatrixWorkspace(
-                InputWorkspace=tmpDSPws,
-                OutputWorkspace=tmpDSPws,
+                InputWorkspace=self.inputWorkspaceName,
+                OutputWorkspace=tmpTOFws,
             )
+        else:
+            CloneWorkspace(
+                InputWorkspace=self.inputWorkspaceName,
+                OutputWorkspace=tmpTOFws,
+            )
+
+        # find average spectra over focus groups
         GroupDetectors(
             InputWorkspace=self.inputWorkspaceName,
             CopyGroupingFromWorkspace=self.focusWorkspace,
@@ -161,30 +222,12 @@ class RemoveSmoothedBackground(PythonAlgorithm):
         )
 
         # Subtract off the scaled background estimation
-        focusWS = mtd[diffocWSname]
-        smoothWS = mtd[backgroundWSname]
-        outputWS = mtd[tmpDSPws]
-        for wkspindx, groupID in enumerate(self.groupIDs):
-            y_smooth = smoothWS.readY(wkspindx).copy()
-            y_data = focusWS.readY(wkspindx).copy()
-            scale_denom = sum(y_data) / len(y_data)
-            for detid in self.groupDetectorIDs[groupID]:
-                # subtract off the background and update the date in the workspace
-                y_new = outputWS.readY(detid).copy()
-                scale_num = sum(y_new) / len(y_new)
-
-                y_new = y_new - (scale_num / scale_denom) * y_smooth
-                y_new[y_new < 0] = 0
-                outputWS.setY(detid, y_new)
+        self.subtractBackground(tmpTOFws, mtd[diffocWSname], mtd[backgroundWSname])
 
-        MakeDirtyDish(
-            InputWorkspace=tmpDSPws,
-            OutputWorkspace=self.outputWorkspaceName + "_extractDSP_after",
-        )
-        ConvertUnits(
-            InputWorkspace=tmpDSPws,
+        self._makeDirtyDishDSP(tmpTOFws, self.outputWorkspaceName + "_extractDSP_after")
+        RenameWorkspace(
+            InputWorkspace=tmpTOFws,
             OutputWorkspace=self.outputWorkspaceName,
-            Target="TOF",
         )
         MakeDirtyDish(
             InputWorkspace=self.outputWorkspaceName,
@@ -197,6 +240,6 @@ class RemoveSmoothedBackground(PythonAlgorithm):
             )
 
         # Cleanup
-        DeleteWorkspaces(WorkspaceList=[diffocWSname, backgroundWSname, tmpDSPws])
+        DeleteWorkspaces(WorkspaceList=[diffocWSname, backgroundWSname])
 
         self.setPropertyValue("OutputWorkspace", self.outputWorkspaceName)
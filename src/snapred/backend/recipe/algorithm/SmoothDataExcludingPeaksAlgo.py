@@ -10,8 +10,10 @@ implement csaps
 create new workspace with csaps data
 """
 
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Sequence, Tuple
 
+import numpy as np
 from mantid.api import (
     IEventWorkspace,
     MatrixWorkspaceProperty,
@@ -31,6 +33,7 @@ from mantid.simpleapi import (
 from scipy.interpolate import make_smoothing_spline
 
 from snapred.backend.log.logger import snapredLogger
+from snapred.meta.Config import Config
 
 logger = snapredLogger.getLogger(__name__)
 
@@ -84,6 +87,15 @@ class SmoothDataExcludingPeaksAlgo(PythonAlgorithm):
         errors = {}
         return errors
 
+    def _midpointsAndY(self, workspace) -> Tuple[Sequence[np.ndarray], Sequence[np.ndarray]]:
+        # The bin midpoints and Y-values of every spectrum: as 2D arrays, unless the workspace is ragged.
+        if workspace.isRaggedWorkspace():
+            X = [workspace.readX(index) for index in range(workspace.getNumberHistograms())]
+            Y = [workspace.readY(index) for index in range(workspace.getNumberHistograms())]
+            return [(x[:-1] + x[1:]) / 2.0 for x in X], Y
+        X = workspace.extractX()
+        return (X[:, :-1] + X[:, 1:]) / 2.0, workspace.extractY()
+
     def PyExec(self):
         self.log().notice("Removing peaks and smoothing data")
         self.lam = self.getProperty("SmoothingParameter").value
@@ -119,30 +131,32 @@ class SmoothDataExcludingPeaksAlgo(PythonAlgorithm):
 
         numSpec = weightWorkspace.getNumberHistograms()
 
-        for index in range(numSpec):
-            # get the weights
-            weightX = weightWorkspace.readX(index)
-            weightY = weightWorkspace.readY(index)
-
-            # use the weight midpoint
-            weightXMidpoints = (weightX[:-1] + weightX[1:]) / 2
-            weightXMidpoints = weightXMidpoints[weightY != 0]
-
-            # get the data for background and remove peaks
-            y = inputWorkspace.readY(index).copy()
-            y = y[weightY != 0]
-            x = inputWorkspace.readX(index)
-            xMidpoints = (x[:-1] + x[1:]) / 2.0
+        # use the bin midpoints: these are calculated for all of the spectra at once
+        weightXMidpoints, weightY = self._midpointsAndY(weightWorkspace)
+        xMidpoints, inputY = self._midpointsAndY(inputWorkspace)
+        keep = [weightY[index] != 0 for index in range(numSpec)]
 
-            # throw an exception if y or weightXMidpoints are empty
-            if len(y) == 0 or len(weightXMidpoints) == 0:
-                raise ValueError("No data in the workspace, all data removed by peak removal.")
+        # throw an exception if y or weightXMidpoints are empty
+        if any(not mask.any() for mask in keep):
+            raise ValueError("No data in the workspace, all data removed by peak removal.")
 
+        def _fitSpectrum(index: int):
             # Generate spline with purged dataset
-            tck = make_smoothing_spline(weightXMidpoints, y, lam=self.lam)
+            tck = make_smoothing_spline(weightXMidpoints[index][keep[index]], inputY[index][keep[index]], lam=self.lam)
             # fill in the removed data using the spline function and original datapoints
-            smoothing_results = tck(xMidpoints, extrapolate=False)
+            smoothing_results = tck(xMidpoints[index], extrapolate=False)
             smoothing_results[smoothing_results < 0] = 0
+            return smoothing_results
+
+        # the spectra are independent, and the spline fits release the GIL
+        maxWorkers = min(numSpec, Config["constants.SmoothDataExcludingPeaks.maxWorkers"])
+        if maxWorkers > 1:
+            with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+                results = list(executor.map(_fitSpectrum, range(numSpec)))
+        else:
+            results = [_fitSpectrum(index) for index in range(numSpec)]
+
+        for index, smoothing_results in enumerate(results):
             outputWorkspace.setY(index, smoothing_results)
 
         # cleanup
@@ -1,5 +1,7 @@
+import hashlib
 import json
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -9,6 +11,8 @@ from snapred.backend.dao.ingredients import (
     GroceryListItem,
     ReductionIngredients,
 )
+from snapred.backend.dao.reduction.LiveDataAccumulation import LiveDataAccumulation
+from snapred.backend.dao.reduction.ReductionProvenance import ReductionProvenance
 from snapred.backend.dao.reduction.ReductionRecord import ReductionRecord
 from snapred.backend.dao.request import (
     CreateArtificialNormalizationRequest,
@@ -23,18 +27,22 @@ from snapred.backend.dao.WorkspaceMetadata import DiffcalStateMetadata, Normaliz
 from snapred.backend.data.DataExportService import DataExportService
 from snapred.backend.data.DataFactoryService import DataFactoryService
 from snapred.backend.data.GroceryService import GroceryService
+from snapred.backend.data.util.PV_logs_util import datetimeFromLogTime
 from snapred.backend.error.ContinueWarning import ContinueWarning
 from snapred.backend.error.RecoverableException import RecoverableException
 from snapred.backend.error.StateValidationException import StateValidationException
 from snapred.backend.log.logger import snapredLogger
+from snapred.backend.profiling.Metrics import Metrics
 from snapred.backend.profiling.ProgressRecorder import ComputationalOrder, WallClockTime
 from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
 from snapred.backend.recipe.GenericRecipe import ArtificialNormalizationRecipe, ConvertUnitsRecipe
+from snapred.backend.recipe.LiveDataReductionRecipe import LiveDataReductionRecipe
 from snapred.backend.recipe.ReductionGroupProcessingRecipe import ReductionGroupProcessingRecipe
 from snapred.backend.recipe.ReductionRecipe import ReductionRecipe
 from snapred.backend.service.Service import Register, Service
 from snapred.backend.service.SousChef import SousChef
 from snapred.meta.builder.GroceryListBuilder import GroceryListBuilder
+from snapred.meta.Config import Config
 from snapred.meta.decorators.FromString import FromString
 from snapred.meta.decorators.Singleton import Singleton
 from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceName
@@ -68,6 +76,9 @@ class ReductionService(Service):
         self.sousChef = SousChef()
         self.mantidSnapper = MantidSnapper(None, __name__)
 
+        # the state of an incremental live-data reduction
+        self._liveDataAccumulation: LiveDataAccumulation | None = None
+
     @staticmethod
     def name():
         return "reduction"
@@ -237,8 +248,24 @@ class ReductionService(Service):
             groupingResults = self.fetchReductionGroupings(request)
             request.focusGroups = groupingResults["focusGroups"]
 
+            # If an identical reduction has already been saved, re-load its output instead of repeating it.
+            provenanceDigest = None
+            groceryKwargs = {}
+            if self._isReductionCacheable(request):
+                combinedMask = self.prepCombinedMask(request)
+                provenanceDigest = self._reductionProvenance(request, combinedMask).digest()
+                record = self._loadCachedReduction(request, provenanceDigest)
+                if record is not None:
+                    return ReductionResponse(record=record, executionTime=datetime.utcnow() - startTime)
+                groceryKwargs["combinedPixelMask"] = combinedMask
+
+            # In incremental live-data mode, load only the events since the previous cycle.
+            isIncremental = self._isIncrementalLiveData(request)
+            if isIncremental:
+                groceryKwargs["liveDataStartTime"] = self._liveDataStartTime(request)
+
             # Fetch groceries first: `prepReductionIngredients` will need the combined mask.
-            groceries = self.fetchReductionGroceries(request)
+            groceries = self.fetchReductionGroceries(request, **groceryKwargs)
 
             ingredients = self.prepReductionIngredients(request, groceries.get("combinedPixelMask"))
 
@@ -263,16 +290,166 @@ class ReductionService(Service):
             N_ref_args=((self, request), {}),
             order=ComputationalOrder.O_N,
         ):
-            data = ReductionRecipe().cook(ingredients, groceries)
+            # The input workspace may be modified by the recipe: count its events first.
+            reduceStart = time.perf_counter()
+            eventCount = self._eventCount(groceries["inputWorkspace"]) if Metrics.enabled else 0
+
+            if not isIncremental:
+                data = ReductionRecipe().cook(ingredients, groceries)
+            else:
+                # The input workspace is modified by the recipe: retain its end time first.
+                endTime = self._pulseTimeMax(groceries["inputWorkspace"])
+                try:
+                    data = LiveDataReductionRecipe().cook(ingredients, groceries)
+                except Exception:
+                    # The accumulators may be incomplete: the next cycle must restart from the beginning of the run.
+                    self._liveDataAccumulation = None
+                    raise
+                self._updateLiveDataAccumulation(endTime, data["retainedWorkspaces"])
             record = self._createReductionRecord(request, ingredients, data["outputs"])
+            if provenanceDigest is not None:
+                record.provenanceDigest = provenanceDigest
 
             # Execution wallclock time is required by the live-data workflow loop.
             executionTime = datetime.utcnow() - startTime
+            self._recordReductionMetrics(request, eventCount, time.perf_counter() - reduceStart, executionTime)
 
             return ReductionResponse(
-                record=record, unfocusedData=data.get("unfocusedWS", None), executionTime=executionTime
+                record=record,
+                unfocusedData=data.get("unfocusedWS", None),
+                executionTime=executionTime,
+                retainedWorkspaces=data.get("retainedWorkspaces", []),
             )
 
+    def _isReductionCacheable(self, request: ReductionRequest) -> bool:
+        # Only reductions whose complete output is saved, and which do not run arbitrary hooks, may be re-used.
+        return (
+            Config["reduction.cache.enabled"]
+            and not request.liveDataMode
+            and not request.keepUnfocused
+            and not request.hooks
+        )
+
+    def _isIncrementalLiveData(self, request: ReductionRequest) -> bool:
+        # Only a reduction from the start of the run can be accumulated.
+        # Unfocused data is not accumulated, and beam-monitor normalization factors are not additive.
+        return (
+            bool(request.liveDataMode)
+            and Config["liveData.incremental"]
+            and (request.liveDataDuration is None or request.liveDataDuration == timedelta(0))
+            and not request.keepUnfocused
+            and not Config["mantid.workspace.normalizeByBeamMonitor"]
+        )
+
+    def _liveDataStartTime(self, request: ReductionRequest) -> datetime | None:
+        # Return the start time for the next live-data chunk,
+        #   or `None` if the complete run needs to be loaded, in which case the accumulation is restarted.
+        accumulation = self._liveDataAccumulation
+        if (
+            accumulation is not None
+            and (accumulation.runNumber, accumulation.useLiteMode, accumulation.timestamp)
+            == (request.runNumber, request.useLiteMode, request.timestamp)
+            and accumulation.endTime is not None
+            and all(self.mantidSnapper.mtd.doesExist(ws) for ws in accumulation.retainedWorkspaces)
+        ):
+            # Pulse times are shared by all of the events from a pulse: start after the last loaded pulse.
+            return accumulation.endTime + timedelta(microseconds=1)
+
+        if accumulation is not None:
+            # Any partial accumulation must not be added to.
+            for ws in accumulation.retainedWorkspaces:
+                if self.mantidSnapper.mtd.doesExist(ws):
+                    self.groceryService.deleteWorkspaceUnconditional(ws)
+        self._liveDataAccumulation = LiveDataAccumulation(
+            runNumber=request.runNumber, useLiteMode=request.useLiteMode, timestamp=request.timestamp
+        )
+        return None
+
+    def _eventCount(self, workspace: WorkspaceName) -> int:
+        ws = self.mantidSnapper.mtd[workspace]
+        return ws.getNumberEvents() if hasattr(ws, "getNumberEvents") else 0
+
+    def _recordReductionMetrics(
+        self, request: ReductionRequest, eventCount: int, reduceTime: float, executionTime: timedelta
+    ):
+        if not Metrics.enabled:
+            return
+        Metrics.reducedEvents.inc(eventCount)
+        if reduceTime > 0.0:
+            Metrics.reductionEventRate.set(eventCount / reduceTime)
+        if request.liveDataMode:
+            Metrics.liveDataCycleDuration.observe(executionTime.total_seconds())
+
+    def _pulseTimeMax(self, workspace: WorkspaceName) -> datetime | None:
+        ws = self.mantidSnapper.mtd[workspace]
+        if ws.getNumberEvents() == 0:
+            return None
+        # naive UTC: the same as the live-data `StartTime`
+        return datetimeFromLogTime(ws.getPulseTimeMax().to_datetime64()).replace(tzinfo=None)
+
+    def _updateLiveDataAccumulation(self, endTime: datetime | None, retainedWorkspaces: List[WorkspaceName]):
+        accumulation = self._liveDataAccumulation
+        if endTime is not None:
+            accumulation.endTime = endTime
+        accumulation.retainedWorkspaces = list(retainedWorkspaces)
+
+    def _reductionProvenance(self, request: ReductionRequest, combinedMask: WorkspaceName) -> ReductionProvenance:
+        state = request.alternativeState
+        if state is None:
+            # If no alternativeState state is provided, use the sample's state.
+            state, _ = self.dataFactoryService.constructStateId(request.runNumber)
+
+        # These are the versions used by `fetchReductionGroceries`.
+        calVersion = self.dataFactoryService.getLatestApplicableCalibrationVersion(
+            request.runNumber, request.useLiteMode, state
+        )
+        normVersion = None
+        if ContinueWarning.Type.MISSING_NORMALIZATION not in request.continueFlags:
+            normVersion = self.dataFactoryService.getLatestApplicableNormalizationVersion(
+                request.runNumber, request.useLiteMode, state
+            )
+
+        combinedMaskDigest = None
+        if bool(combinedMask):
+            mask = self.mantidSnapper.mtd[combinedMask]
+            combinedMaskDigest = hashlib.sha256(mask.extractY().tobytes()).hexdigest()
+
+        return ReductionProvenance(
+            runNumber=request.runNumber,
+            useLiteMode=request.useLiteMode,
+            state=state,
+            calibrationVersion=calVersion,
+            normalizationVersion=normVersion,
+            requestVersions=tuple(request.versions),
+            alternativeCalibrationFileDigest=(
+                ReductionProvenance.fileDigest(request.alternativeCalibrationFilePath)
+                if request.alternativeCalibrationFilePath is not None
+                else None
+            ),
+            groupingDigests={fg.name: ReductionProvenance.fileDigest(fg.definition) for fg in request.focusGroups},
+            combinedMaskDigest=combinedMaskDigest,
+            artificialNormalizationIngredients=request.artificialNormalizationIngredients,
+            config={key: Config[key] for key in Config["reduction.cache.configKeys"]},
+        )
+
+    def _loadCachedReduction(self, request: ReductionRequest, provenanceDigest: str) -> ReductionRecord | None:
+        # Load the saved output of a previous reduction with the same provenance:
+        #   return `None` if there isn't one, or if it cannot be loaded.
+        try:
+            record = self.dataFactoryService.findReductionRecord(
+                request.runNumber, request.useLiteMode, provenanceDigest
+            )
+            if record is None:
+                return None
+            record = self.dataFactoryService.getReductionData(record.runNumber, record.useLiteMode, record.timestamp)
+        except RuntimeError as e:
+            # For example, some of the saved workspaces are still in the ADS,
+            #   or, in live-data mode, there is no IPTS directory.
+            logger.info(f"previous reduction output for run '{request.runNumber}' will not be re-used: {e}")
+            return None
+        logger.info(f"re-using the reduction of run '{request.runNumber}' saved at timestamp {record.timestamp}")
+        return record
+
     def _createReductionRecord(
         self, request: ReductionRequest, ingredients: ReductionIngredients, workspaceNames: List[WorkspaceName]
     ) -> ReductionRecord:
@@ -491,7 +668,12 @@ class ReductionService(Service):
 
     @FromString
     @Register("groceries")
-    def fetchReductionGroceries(self, request: ReductionRequest) -> Dict[str, Any]:
+    def fetchReductionGroceries(
+        self,
+        request: ReductionRequest,
+        combinedPixelMask: Optional[WorkspaceName] = None,
+        liveDataStartTime: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
         """
         Fetch the required groceries, including
 
@@ -502,6 +684,10 @@ class ReductionService(Service):
 
         :param request: a reduction request
         :type request: ReductionRequest
+        :param combinedPixelMask: an already-prepared combined pixel mask, otherwise it will be prepared here
+        :type combinedPixelMask: Optional[WorkspaceName]
+        :param liveDataStartTime: in live-data mode, load only the data after this time
+        :type liveDataStartTime: Optional[datetime]
         :return: A grocery dictionary with keys
 
             - "inputworkspace"
@@ -536,7 +722,8 @@ class ReductionService(Service):
             )
 
         # Fetch pixel masks -- if nothing is masked, nullify
-        combinedPixelMask = self.prepCombinedMask(request)
+        if combinedPixelMask is None:
+            combinedPixelMask = self.prepCombinedMask(request)
         if not self.groceryService.checkPixelMask(combinedPixelMask):
             combinedPixelMask = None
 
@@ -554,7 +741,7 @@ class ReductionService(Service):
         if not request.liveDataMode:
             self.groceryClerk.add()
         else:
-            self.groceryClerk.liveData(duration=request.liveDataDuration).add()
+            self.groceryClerk.liveData(duration=request.liveDataDuration, startTime=liveDataStartTime).add()
 
         # Build item for normalization workspace
         if normVersion is not None:  # WARNING: version may be _zero_!
@@ -616,6 +803,18 @@ class ReductionService(Service):
 
     @Register("save")
     def saveReduction(self, request: ReductionExportRequest):
+        record = request.record
+        if record.provenanceDigest is not None:
+            # A re-loaded reduction does not need to be saved again.
+            try:
+                saved = self.dataFactoryService.getReductionRecord(
+                    record.runNumber, record.useLiteMode, record.timestamp
+                )
+                if saved.provenanceDigest == record.provenanceDigest:
+                    logger.info(f"reduction of run '{record.runNumber}' has already been saved")
+                    return
+            except RuntimeError:
+                pass
         self.dataExportService.exportReductionRecord(request.record)
         self.dataExportService.exportReductionData(request.record)
 
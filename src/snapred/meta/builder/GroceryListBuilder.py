@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from snapred.backend.dao.indexing.Versioning import Version
 from snapred.backend.dao.ingredients.GroceryListItem import GroceryListItem, LiveDataArgs
@@ -114,8 +114,10 @@ class GroceryListBuilder:
         self._tokens["useLiteMode"] = useLiteMode
         return self
 
-    def liveData(self, duration: datetime.timedelta) -> GroceryListBuilder:
-        self._tokens["liveDataArgs"] = LiveDataArgs(duration=duration)
+    def liveData(
+        self, duration: datetime.timedelta, startTime: Optional[datetime.datetime] = None
+    ) -> GroceryListBuilder:
+        self._tokens["liveDataArgs"] = LiveDataArgs(duration=duration, startTime=startTime)
         return self
 
     def unit(self, unit_: str) -> GroceryListBuilder:
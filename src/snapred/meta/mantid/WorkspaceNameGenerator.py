@@ -48,6 +48,9 @@ class WorkspaceType(StrEnum):
     REDUCTION_PIXEL_MASK = "reductionPixelMask"
     # MaskWorkspace_<number tag>
     REDUCTION_USER_PIXEL_MASK = "userPixelMask"
+    # <live tag>_<group>_<runNumber>_<timestamp>
+    REDUCTION_LIVE_DATA_ACCUMULATOR = "reductionLiveDataAccumulator"
+    REDUCTION_LIVE_DATA_NORMALIZATION = "reductionLiveDataNormalization"
 
 
 class NameBuilder:
@@ -585,6 +588,24 @@ class _WorkspaceNameGenerator:
             timestamp=None,
         )
 
+    def reductionLiveDataAccumulator(self):
+        return NameBuilder(
+            WorkspaceType.REDUCTION_LIVE_DATA_ACCUMULATOR,
+            self._reductionLiveDataAccumulatorTemplate,
+            self._reductionLiveDataAccumulatorTemplateKeys,
+            self._delimiter,
+            timestamp=None,
+        )
+
+    def reductionLiveDataNormalization(self):
+        return NameBuilder(
+            WorkspaceType.REDUCTION_LIVE_DATA_NORMALIZATION,
+            self._reductionLiveDataNormalizationTemplate,
+            self._reductionLiveDataNormalizationTemplateKeys,
+            self._delimiter,
+            timestamp=None,
+        )
+
     def reductionPixelMask(self):
         return NameBuilder(
             WorkspaceType.REDUCTION_PIXEL_MASK,
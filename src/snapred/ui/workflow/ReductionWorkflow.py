@@ -308,7 +308,7 @@ class ReductionWorkflow(WorkflowImplementer):
             if response.code == ResponseCode.OK:
                 # Finalize the reduction.
                 record, unfocusedData = response.data.record, response.data.unfocusedData
-                self._finalizeReduction(record, unfocusedData)
+                self._finalizeReduction(record, unfocusedData, response.data.retainedWorkspaces)
 
             # after each cycle, clean workspaces except groupings, calibrations, normalizations, and outputs
             self._keeps.update(self.outputs)
@@ -517,7 +517,9 @@ class ReductionWorkflow(WorkflowImplementer):
                 request_ = self._createReductionRequest(runNumber)
                 response = self.request(path="reduction/", payload=request_)
                 if response.code == ResponseCode.OK:
-                    self._finalizeReduction(response.data.record, response.data.unfocusedData)
+                    self._finalizeReduction(
+                        response.data.record, response.data.unfocusedData, response.data.retainedWorkspaces
+                    )
 
                 # after each run, clean workspaces except groupings, calibrations, normalizations, and outputs
                 self._keeps.update(self.outputs)
@@ -609,7 +611,7 @@ class ReductionWorkflow(WorkflowImplementer):
 
         if response.code == ResponseCode.OK:
             record, unfocusedData = response.data.record, response.data.unfocusedData
-            self._finalizeReduction(record, unfocusedData)
+            self._finalizeReduction(record, unfocusedData, response.data.retainedWorkspaces)
 
         # In addition to clean up, this next `_clearWorkspaces` step symmetrizes the requests / responses queue between
         #   the <has normalization> and <artificial normalization> cases.  So, if you need to remove it,
@@ -621,7 +623,7 @@ class ReductionWorkflow(WorkflowImplementer):
 
         return self.responses[-1]
 
-    def _finalizeReduction(self, record, unfocusedData):
+    def _finalizeReduction(self, record, unfocusedData, retainedWorkspaces=()):
         """Handles post-reduction tasks, including saving and workspace management."""
 
         self.setStatus(ReductionStatus.FINALIZING)
@@ -643,6 +645,10 @@ class ReductionWorkflow(WorkflowImplementer):
             # Note that the run number is deliberately not deleted from the run numbers list.
             # Almost certainly it should be moved to a "completed run numbers" list.
 
+        # Workspaces used by the next live-data cycle (e.g. the live-data accumulators):
+        #   these are retained between cycles, but not after the workflow is complete.
+        self._keeps.update(retainedWorkspaces)
+
     @property
     def widget(self):
         return self.workflow.presenter.widget
@@ -92,6 +92,25 @@ with mock.patch.dict(
         assert response.message is not None
         assert response.data is None
 
+    @mock.patch("snapred.backend.api.InterfaceController.Metrics")
+    def test_executeRequest_metrics(mockMetrics):
+        """Test that executeRequest records the request count and duration"""
+        interfaceController = mockedSuccessfulInterfaceController()
+        reductionRequest = mock.Mock()
+        reductionRequest.path = "Test Service"
+        interfaceController.executeRequest(reductionRequest)
+        reductionRequest.path = "Non-existent Test Service"
+        interfaceController.executeRequest(reductionRequest)
+
+        assert mockMetrics.requests.inc.call_args_list == [
+            mock.call(path="Test Service", code="OK"),
+            mock.call(path="Non-existent Test Service", code="ERROR"),
+        ]
+        assert mockMetrics.requestDuration.observe.call_count == 2
+        duration = mockMetrics.requestDuration.observe.call_args_list[0]
+        assert duration.args[0] >= 0.0
+        assert duration.kwargs == {"path": "Test Service"}
+
     @mock.patch.object(RequestScheduler, "handle")
     def test_executeBatchRequests_successful(mockRequestScheduler):
         """Test executeBatchRequest with good requests"""
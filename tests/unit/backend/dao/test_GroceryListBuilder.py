@@ -1,7 +1,7 @@
 # ruff: noqa: E722, PT011, PT012
 # Add test-related imports last.
 import unittest
-from datetime import timedelta
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
@@ -74,6 +74,12 @@ class TestGroceryListBuilder(unittest.TestCase):
         item = GroceryListBuilder().neutron(self.runNumber).native().liveData(duration=duration).build()
         assert item.liveDataArgs == LiveDataArgs(duration=duration)
 
+    def test_nexus_liveData_startTime(self):
+        duration = timedelta(seconds=0)
+        startTime = datetime(2024, 1, 1, 12, 0, 0)
+        item = GroceryListBuilder().neutron(self.runNumber).native().liveData(duration, startTime=startTime).build()
+        assert item.liveDataArgs == LiveDataArgs(duration=duration, startTime=startTime)
+
     def test_nexus_propname(self):
         propertyName = "inputWorkspace"
         item = GroceryListBuilder().neutron(self.runNumber).native().name(propertyName).build()
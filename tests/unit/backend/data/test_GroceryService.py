@@ -3964,6 +3964,38 @@ class TestGroceryService(unittest.TestCase):
             data = self.instance._fetchLiveData(item)
             assert data["result"] is True
 
+    def test_fetchLiveData_startTime(self):
+        """_fetchLiveData loads only the data after an explicit start time."""
+        runNumber = self.runNumber
+        workspaceName = self.instance._createNeutronWorkspaceName(runNumber, False)
+        startTime = datetime.datetime(2024, 1, 1, 12, 0, 0, 1000)
+        item = GroceryListItem(
+            workspaceType="neutron",
+            runNumber=runNumber,
+            useLiteMode=False,
+            loader="",
+            liveDataArgs=LiveDataArgs(duration=datetime.timedelta(seconds=0), startTime=startTime),
+        )
+
+        with (
+            mock.patch.object(self.instance, "grocer") as mockGrocer,
+            mock.patch.object(self.instance.dataService, "hasLiveDataConnection", return_value=True),
+            mock.patch.object(self.instance, "mantidSnapper") as mockSnapper,
+            mock.patch.dict(self.instance._loadedRuns, clear=True),
+        ):
+            mockGrocer.executeRecipe.return_value = {
+                "result": True,
+                "loader": "LoadLiveDataInterval",
+                "workspace": workspaceName,
+                "runStatus": RunStatus.RUNNING,
+            }
+            mockSnapper.mtd.__getitem__.return_value = mock.Mock(getRun=mock.Mock(return_value=self.mockRun(runNumber)))
+
+            data = self.instance._fetchLiveData(item)
+            assert data["result"] is True
+            loaderArgs = json.loads(mockGrocer.executeRecipe.call_args.kwargs["loaderArgs"])
+            assert loaderArgs["StartTime"] == startTime.isoformat()
+
     def test_fetchLiveData_runStatus_paused_with_live_data_args_raises_LiveDataState(self):
         """_fetchLiveData raises LiveDataState (RUN_PAUSE) when runStatus is PAUSED and liveDataArgs is set."""
         runNumber = self.runNumber
@@ -2356,6 +2356,42 @@ def test_readWriteReductionRecord():
     assert actualRecord.dict() == testRecord.dict()
 
 
+def test_findReductionRecord():
+    inputRecordFilePath = Path(Resource.getPath("inputs/reduction/ReductionRecord_20240614T130420.json"))
+    with open(inputRecordFilePath, "r") as f:
+        testRecord = ReductionRecord.model_validate_json(f.read())
+    runNumber, useLiteMode = testRecord.runNumber, testRecord.useLiteMode
+
+    # three records: two with the same provenance, one with different provenance
+    timestamps = [testRecord.timestamp, testRecord.timestamp + 10.0, testRecord.timestamp + 20.0]
+    digests = ["apple", "apple", "banana"]
+    records = []
+    for timestamp, digest in zip(timestamps, digests):
+        dict_ = testRecord.model_dump()
+        dict_.update(timestamp=timestamp, provenanceDigest=digest)
+        records.append(ReductionRecord.model_validate(dict_))
+
+    localDataService = LocalDataService()
+    with reduction_root_redirect(localDataService, stateId=ENDURING_STATE_ID):
+        for record in records:
+            localDataService.writeReductionRecord(record)
+
+        # a record without its reduction data is not returned
+        assert localDataService.findReductionRecord(runNumber, useLiteMode, "apple") is None
+
+        for record in records:
+            localDataService._constructReductionDataFilePath(runNumber, useLiteMode, record.timestamp).touch()
+
+        # the most recent matching record is returned
+        actual = localDataService.findReductionRecord(runNumber, useLiteMode, "apple")
+        assert actual.timestamp == pytest.approx(timestamps[1])
+        assert actual.provenanceDigest == "apple"
+        assert localDataService.findReductionRecord(runNumber, useLiteMode, "banana").timestamp == pytest.approx(
+            timestamps[2]
+        )
+        assert localDataService.findReductionRecord(runNumber, useLiteMode, "cherry") is None
+
+
 @pytest.fixture
 def readSyntheticReductionRecord():
     # Read a `ReductionRecord` from the specified file path:
@@ -4288,3 +4324,86 @@ class TestProgressRecordingMethods:
             latestFiles = filePaths[-Config["application.workflows_data.timing.max_files"] :]
             for path in latestFiles:
                 assert path.exists()
+
+    def test_writeProgressRecords_atomic(self):
+        # the records file is replaced atomically: no partially-written file is ever visible
+        with (
+            tempfile.TemporaryDirectory(prefix=Resource.getPath("outputs/")) as tempDir,
+            Config_override("user.application.data.home", str(tempDir)),
+            mock.patch.object(inspect.getmodule(LocalDataService).os, "replace", wraps=os.replace) as mockReplace,
+        ):
+            self.instance.writeProgressRecords('{"steps": []}')
+            ((tempPath, savePath), _) = mockReplace.call_args
+            assert tempPath.name.startswith(".")
+            assert not tempPath.exists()
+            assert self.instance._progressRecordsFilePaths() == [savePath]
+
+    def test_progressLog(self):
+        with (
+            tempfile.TemporaryDirectory(prefix=Resource.getPath("outputs/")) as tempDir,
+            Config_override("user.application.data.home", str(tempDir)),
+        ):
+            assert self.instance.readProgressLog() == []
+
+            self.instance.appendProgressRecords(["one", "two"])
+            self.instance.appendProgressRecords(["three"])
+            segmentPath = self.instance._progressLogSegmentPath()
+            assert segmentPath.parent == self.instance._progressRecordsPath() / "log"
+            assert segmentPath.read_text() == "one\ntwo\nthree\n"
+
+            # another session's segment is also read
+            (segmentPath.parent / "otherhost_1234.jsonl").write_text("four\n")
+            assert sorted(self.instance.readProgressLog()) == ["four", "one", "three", "two"]
+
+    def test_progressLogSegmentIsClosed(self):
+        logPath = Path("/log")
+        host = socket.gethostname().split(".")[0]
+        # this process's own segment is open
+        assert not self.instance._progressLogSegmentIsClosed(logPath / f"{host}_{os.getpid()}.jsonl")
+        with mock.patch.object(inspect.getmodule(LocalDataService).os, "kill") as mockKill:
+            # the segment of a live process on this host is open
+            assert not self.instance._progressLogSegmentIsClosed(logPath / f"{host}_1.jsonl")
+            mockKill.assert_called_once_with(1, 0)
+            # ... including a process belonging to another user
+            mockKill.side_effect = PermissionError()
+            assert not self.instance._progressLogSegmentIsClosed(logPath / f"{host}_1.jsonl")
+            # the segment of a process that has exited is closed
+            mockKill.side_effect = ProcessLookupError()
+            assert self.instance._progressLogSegmentIsClosed(logPath / f"{host}_1.jsonl")
+
+        # a segment from another host is closed when it hasn't been written for long enough
+        with tempfile.TemporaryDirectory(prefix=Resource.getPath("outputs/")) as tempDir:
+            segmentPath = Path(tempDir) / "other_host_1.jsonl"
+            segmentPath.touch()
+            with Config_override("application.workflows_data.timing.log.stale_age", 3600):
+                assert not self.instance._progressLogSegmentIsClosed(segmentPath)
+            os.utime(segmentPath, (time.time() - 7200, time.time() - 7200))
+            with Config_override("application.workflows_data.timing.log.stale_age", 3600):
+                assert self.instance._progressLogSegmentIsClosed(segmentPath)
+
+    def test_compactProgressRecords(self):
+        with (
+            tempfile.TemporaryDirectory(prefix=Resource.getPath("outputs/")) as tempDir,
+            Config_override("user.application.data.home", str(tempDir)),
+            Config_override("lockfile.root", str(Path(tempDir) / "locks")),
+        ):
+            self.instance.appendProgressRecords(["open"])
+            logPath = self.instance._progressLogSegmentPath().parent
+            closedPath = logPath / "otherhost_1.jsonl"
+            closedPath.write_text("one\ntwo\n")
+            compact = mock.Mock(return_value='{"steps": [], "compacted": true}')
+
+            with mock.patch.object(
+                LocalDataService, "_progressLogSegmentIsClosed", side_effect=lambda path: path == closedPath
+            ):
+                # too few records
+                assert not self.instance.compactProgressRecords(compact, minimumCount=3)
+                compact.assert_not_called()
+                assert closedPath.exists()
+
+                assert self.instance.compactProgressRecords(compact, minimumCount=2)
+            compact.assert_called_once_with('{"steps": []}', ["one", "two"])
+            assert self.instance.readProgressRecords() == '{"steps": [], "compacted": true}'
+            # only the closed segment is removed
+            assert not closedPath.exists()
+            assert self.instance.readProgressLog() == ["open"]
@@ -0,0 +1,215 @@
+import hashlib
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from snapred.backend.profiling.AlgorithmReplay import (
+    AlgorithmReplay,
+    FileFingerprint,
+    ReplayBundle,
+    ReplayStep,
+    WorkspaceSummary,
+    _AlgorithmRecorder,
+)
+from snapred.meta.Callback import callback
+
+PatchRoot: str = "snapred.backend.profiling.AlgorithmReplay.{0}"
+
+
+class TestAlgorithmReplay:
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.recorder = _AlgorithmRecorder()
+        self.recorder.enable()
+
+        # a mock ADS: "ws" is a matrix workspace, and "table" is a table workspace
+        self.ySum = 6.0
+        self.workspaces = {
+            "ws": self._matrixWorkspace(),
+            "table": mock.Mock(spec=["id", "isGroup", "rowCount", "columnCount"]),
+        }
+        self.workspaces["table"].id.return_value = "TableWorkspace"
+        self.workspaces["table"].isGroup.return_value = False
+        self.workspaces["table"].rowCount.return_value = 3
+        self.workspaces["table"].columnCount.return_value = 2
+
+        self.mockMtd = mock.MagicMock()
+        self.mockMtd.__getitem__.side_effect = lambda name: self.workspaces[name]
+        self.mockMtd.doesExist.side_effect = lambda name: name in self.workspaces
+        with (
+            tempfile.TemporaryDirectory(prefix=Path(__file__).name) as tmpDir,
+            mock.patch(PatchRoot.format("mtd"), self.mockMtd),
+        ):
+            self.tmpDir = Path(tmpDir)
+            self.inputFile = self.tmpDir / "input.nxs"
+            self.inputFile.write_bytes(b"0123456789")
+            yield
+
+    def _matrixWorkspace(self):
+        ws = mock.Mock(
+            spec=["id", "isGroup", "isRaggedWorkspace", "getNumberHistograms", "blocksize", "extractY", "extractE"]
+        )
+        ws.id.return_value = "Workspace2D"
+        ws.isGroup.return_value = False
+        ws.isRaggedWorkspace.return_value = False
+        ws.getNumberHistograms.return_value = 2
+        ws.blocksize.return_value = 2
+        ws.extractY.side_effect = lambda: np.array([[1.0, 2.0], [np.nan, self.ySum - 3.0]])
+        ws.extractE.return_value = np.ones((2, 2))
+        return ws
+
+    def _record(self, succeeded=True, **kwargs):
+        with self.recorder.record("Algo", "a message", kwargs, ["ws", "table"]):
+            assert self.recorder.recording
+            if not succeeded:
+                raise RuntimeError("failed")
+        assert not self.recorder.recording
+
+    def test_record(self):
+        output = callback(str)
+        output.update("resolved")
+        self._record(
+            Filename=str(self.inputFile),
+            InputWorkspace=output,
+            Params=np.array([1.0, 2.0]),
+            Factor=np.float64(2.0),
+            Optional=None,
+            Ingredients=object(),
+        )
+        (step,) = self.recorder.steps
+        assert step.name == "Algo"
+        assert step.message == "a message"
+        assert step.properties["InputWorkspace"] == "resolved"
+        assert step.properties["Params"] == [1.0, 2.0]
+        assert step.properties["Factor"] == 2.0
+        assert "Optional" not in step.properties
+        assert step.unsupported == ["Ingredients"]
+        assert step.properties["Ingredients"].startswith("<object")
+        (fingerprint,) = step.inputFiles
+        assert fingerprint.path == str(self.inputFile)
+        assert fingerprint.sha256 == hashlib.sha256(b"0123456789").hexdigest()
+        assert step.outputs["ws"].ySum == 6.0
+        assert step.outputs["table"].rowCount == 3
+        assert step.wallTime >= 0.0
+
+    def test_record_failure(self):
+        with pytest.raises(RuntimeError, match="failed"):
+            self._record(succeeded=False)
+        assert self.recorder.steps == []
+        assert not self.recorder.recording
+
+    def test_record_disabled(self):
+        self.recorder.enable(False)
+        with self.recorder.record("Algo", "a message", {}, ["ws"]):
+            pass
+        assert self.recorder.steps == []
+
+    def test_fingerprint_sampled(self):
+        # only the leading and trailing bytes of a large file are hashed
+        fingerprint = FileFingerprint.of(str(self.inputFile), 4)
+        assert fingerprint.size == 10
+        assert fingerprint.sha256 == hashlib.sha256(b"0123" + b"6789").hexdigest()
+
+    def test_workspaceSummary_differences(self):
+        summary = WorkspaceSummary.of("ws")
+        assert summary.differences(WorkspaceSummary.of("ws"), 1.0e-6) == []
+        self.ySum = 6.1
+        assert summary.differences(WorkspaceSummary.of("ws"), 1.0e-6) == ["ySum: 6.0 != 6.1"]
+        assert summary.differences(WorkspaceSummary.of("ws"), 0.1) == []
+        assert summary.differences(WorkspaceSummary.of("table"), 1.0e-6)[0] == "id: Workspace2D != TableWorkspace"
+
+    def test_workspaceSummary_ragged(self):
+        ws = mock.Mock(
+            spec=["id", "isGroup", "isRaggedWorkspace", "getNumberHistograms", "blocksize", "extractY", "extractE"]
+            + ["readY", "readE"]
+        )
+        ws.id.return_value = "Workspace2D"
+        ws.isGroup.return_value = False
+        ws.isRaggedWorkspace.return_value = True
+        # as for Mantid: these throw for a ragged workspace
+        for method in (ws.blocksize, ws.extractY, ws.extractE):
+            method.side_effect = RuntimeError("ragged workspace")
+        ws.getNumberHistograms.return_value = 2
+        ws.readY.side_effect = lambda i: [np.array([1.0, 2.0, 3.0]), np.array([np.nan, 4.0])][i]
+        ws.readE.side_effect = lambda i: np.ones(3 - i)
+        self.workspaces["ragged"] = ws
+        summary = WorkspaceSummary.of("ragged")
+        assert (summary.nHistograms, summary.blocksize, summary.ySum, summary.eSum) == (2, None, 10.0, 5.0)
+
+    def test_record_summaryFailure(self):
+        # capture must never fail the algorithm
+        self.workspaces["ws"].extractY.side_effect = RuntimeError("unable to extract")
+        with mock.patch(PatchRoot.format("logger")) as mockLogger:
+            self._record(InputWorkspace="ws")
+        (step,) = self.recorder.steps
+        assert list(step.outputs) == ["table"]
+        mockLogger.warning.assert_called_once()
+
+    def test_record_captureFailure(self):
+        executed = False
+        with (
+            mock.patch.object(_AlgorithmRecorder, "_inputFiles", side_effect=OSError("permission denied")),
+            mock.patch(PatchRoot.format("logger")) as mockLogger,
+        ):
+            with self.recorder.record("Algo", "a message", {}, ["ws"]):
+                executed = True
+        assert executed
+        assert self.recorder.steps == []
+        mockLogger.warning.assert_called_once()
+
+    def test_bundle(self):
+        self._record(InputWorkspace="ws", Factor=2.0)
+        path = self.recorder.save(self.tmpDir / "replay")
+        bundle = ReplayBundle.load(path)
+        assert bundle == self.recorder.bundle()
+        assert bundle.script().splitlines() == [
+            "from mantid.simpleapi import *",
+            "",
+            "# a message",
+            "Algo(InputWorkspace='ws', Factor=2.0)",
+        ]
+
+    def _bundle(self, **kwargs):
+        step = ReplayStep(
+            name="Algo",
+            message="a message",
+            properties={"Filename": str(self.inputFile), "Factor": 2.0},
+            inputFiles=[FileFingerprint.of(str(self.inputFile), 1024)],
+            outputs={"ws": WorkspaceSummary.of("ws")},
+            wallTime=1.0,
+            **kwargs,
+        )
+        return ReplayBundle(snapredVersion="1.0", host="host", created=0.0, steps=[step, step])
+
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_replay(self, mockAlgorithmManager):
+        algorithm = mockAlgorithmManager.create.return_value
+        results = AlgorithmReplay(self._bundle()).run()
+        assert algorithm.execute.call_count == 2
+        algorithm.setProperty.assert_any_call("Factor", 2.0)
+        assert [(result.capturedTime, result.differences) for result in results] == [(1.0, {}), (1.0, {})]
+
+        # the replayed output differs from the captured output
+        bundle = self._bundle()
+        self.ySum = 7.0
+        results = AlgorithmReplay(bundle).run()
+        assert results[0].differences == {"ws": ["ySum: 6.0 != 7.0"]}
+        assert AlgorithmReplay(bundle, rtol=0.5).run()[0].differences == {}
+        assert AlgorithmReplay(bundle, compare=False).run()[0].differences == {}
+
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_replay_unsupported(self, mockAlgorithmManager):
+        with pytest.raises(ValueError, match="can't be replayed"):
+            AlgorithmReplay(self._bundle(unsupported=["Ingredients"])).run()
+        mockAlgorithmManager.create.assert_not_called()
+
+    def test_changedInputFiles(self):
+        replay = AlgorithmReplay(self._bundle())
+        assert replay.changedInputFiles() == []
+        self.inputFile.write_bytes(b"9876543210")
+        assert replay.changedInputFiles() == [f"{self.inputFile}: changed since capture"]
+        self.inputFile.unlink()
+        assert replay.changedInputFiles() == [f"{self.inputFile}: missing"]
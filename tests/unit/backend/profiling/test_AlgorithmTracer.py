@@ -0,0 +1,107 @@
+import csv
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from snapred.backend.profiling.AlgorithmTracer import _AlgorithmTracer
+
+PatchRoot: str = "snapred.backend.profiling.AlgorithmTracer.{0}"
+
+
+class TestAlgorithmTracer:
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.tracer = _AlgorithmTracer()
+        self.tracer.enable()
+
+        # a mock ADS: "ws1" is 100 bytes, "ws2" is 200 bytes, and "group" contains both of them
+        sizes = {"ws1": 100, "ws2": 200}
+        workspaces = {}
+        for name, size in sizes.items():
+            ws = mock.Mock()
+            ws.isGroup.return_value = False
+            ws.getMemorySize.return_value = size
+            workspaces[name] = ws
+        group = mock.Mock()
+        group.isGroup.return_value = True
+        group.getNumberOfEntries.return_value = 2
+        group.getItem.side_effect = lambda n: list(workspaces.values())[n]
+        workspaces["group"] = group
+        self.workspaces = workspaces
+
+        self.mockMtd = mock.MagicMock()
+        self.mockMtd.getObjectNames.side_effect = lambda: list(self.workspaces.keys())
+        self.mockMtd.__getitem__.side_effect = lambda name: self.workspaces[name]
+        with mock.patch(PatchRoot.format("mtd"), self.mockMtd):
+            yield
+
+    def _record(self, name="Algo", succeeded=True):
+        with self.tracer.record(name, "a message", ["ws1"], ["ws2", "group"], ("Recipe", "Service")):
+            if not succeeded:
+                raise RuntimeError("failed")
+
+    def test_record(self):
+        self._record()
+        (trace,) = self.tracer.traces
+        assert trace.name == "Algo"
+        assert trace.message == "a message"
+        assert (trace.parent, trace.service) == ("Recipe", "Service")
+        assert trace.inputWorkspaces == ["ws1"]
+        assert trace.outputWorkspaces == ["ws2", "group"]
+        assert trace.outputMemory == 200 + 300
+        # group members are not counted twice
+        assert trace.adsMemoryBefore == trace.adsMemoryAfter == 300
+        assert trace.wallTime >= 0.0
+        assert trace.succeeded
+
+    def test_record_failure(self):
+        with pytest.raises(RuntimeError, match="failed"):
+            self._record(succeeded=False)
+        (trace,) = self.tracer.traces
+        assert not trace.succeeded
+        assert trace.outputMemory == 0
+
+    def test_record_disabled(self):
+        self.tracer.enable(False)
+        self._record()
+        assert self.tracer.traces == []
+        self.mockMtd.getObjectNames.assert_not_called()
+
+    def test_callerScope(self):
+        # functions defined in a recipe module and in a service module
+        recipeModule = {"__name__": "snapred.backend.recipe.SomeRecipe", "_AlgorithmTracer": _AlgorithmTracer}
+        exec("def cook():\n    return _AlgorithmTracer.callerScope()", recipeModule)
+        serviceModule = {"__name__": "snapred.backend.service.SomeService", "cook": recipeModule["cook"]}
+        exec("def serve():\n    return cook()", serviceModule)
+
+        assert serviceModule["serve"]() == ("SomeRecipe", "SomeService")
+        assert recipeModule["cook"]() == ("SomeRecipe", None)
+        assert _AlgorithmTracer.callerScope() == (None, None)
+
+    def test_chromeTrace(self):
+        self._record("Algo1")
+        self._record("Algo2")
+        events = self.tracer.chromeTrace()["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        assert [e["name"] for e in complete] == ["Algo1", "Algo2"]
+        assert complete[0]["args"]["parent"] == "Recipe"
+        assert complete[0]["ts"] <= complete[1]["ts"]
+        assert [e["args"]["bytes"] for e in events if e["ph"] == "C"] == [300, 300]
+        (threadName,) = [e for e in events if e["ph"] == "M"]
+        assert threadName["tid"] == complete[0]["tid"]
+
+    def test_export(self):
+        self._record("Algo1")
+        self._record("Algo2")
+        with tempfile.TemporaryDirectory(prefix=Path(__file__).name) as tmpDir:
+            jsonPath, csvPath = self.tracer.export(Path(tmpDir) / "tracing")
+            with open(jsonPath) as f:
+                assert json.load(f) == json.loads(json.dumps(self.tracer.chromeTrace()))
+            with open(csvPath, newline="") as f:
+                rows = list(csv.DictReader(f))
+        assert [row["name"] for row in rows] == ["Algo1", "Algo2"]
+        assert rows[0]["outputWorkspaces"] == "ws2;group"
+        assert rows[0]["service"] == "Service"
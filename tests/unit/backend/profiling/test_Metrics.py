@@ -0,0 +1,148 @@
+import tempfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from util.Config_helpers import Config_override
+
+from snapred.backend.profiling.Metrics import CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, _Metric, _MetricsRegistry
+
+
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def _setup(self):
+        self.registry = _MetricsRegistry()
+        self.registry.enable()
+        yield
+        self.registry.stop()
+
+    def _samples(self, name):
+        return [line for line in self.registry.exposition().splitlines() if line.startswith(name)]
+
+    def test_counter(self):
+        counter = self.registry.counter("test_requests", "requests", ("path", "code"))
+        counter.inc(path="reduction", code="OK")
+        counter.inc(2.0, path="reduction", code="OK")
+        counter.inc(path='a "quoted"\npath', code="ERROR")
+        assert counter.value(path="reduction", code="OK") == 3.0
+        assert self._samples("test_requests") == [
+            'test_requests_total{path="reduction",code="OK"} 3.0',
+            'test_requests_total{path="a \\"quoted\\"\\npath",code="ERROR"} 1.0',
+        ]
+
+        with pytest.raises(ValueError, match="requires the labels"):
+            counter.inc(path="reduction")
+        with pytest.raises(ValueError, match="can only increase"):
+            counter.inc(-1.0, path="reduction", code="OK")
+
+    def test_histogram(self):
+        histogram = self.registry.histogram("test_duration_seconds", "duration", ("step",), [1.0, 10.0])
+        for value in (0.5, 1.0, 5.0, 20.0):
+            histogram.observe(value, step="reduce")
+        assert histogram.count(step="reduce") == 4
+        assert self._samples("test_duration_seconds") == [
+            'test_duration_seconds_bucket{step="reduce",le="1.0"} 2',
+            'test_duration_seconds_bucket{step="reduce",le="10.0"} 3',
+            'test_duration_seconds_bucket{step="reduce",le="+Inf"} 4',
+            'test_duration_seconds_count{step="reduce"} 4',
+            'test_duration_seconds_sum{step="reduce"} 26.5',
+        ]
+
+    def test_gauge(self):
+        gauge = self.registry.gauge("test_rate", "rate")
+        gauge.set(2.5)
+        assert self._samples("test_rate") == ["test_rate 2.5"]
+
+        computed = self.registry.gauge("test_memory_bytes", "memory")
+        computed.setFunction(lambda: 1024)
+        assert self._samples("test_memory_bytes") == ["test_memory_bytes 1024.0"]
+        # an unavailable gauge is omitted
+        computed.setFunction(mock.Mock(side_effect=RuntimeError("no ADS")))
+        assert self._samples("test_memory_bytes") == []
+
+        labelled = self.registry.gauge("test_labelled", "labelled", ("host",))
+        with pytest.raises(ValueError, match="can't be computed by a function"):
+            labelled.setFunction(lambda: 1.0)
+
+    def test_register(self):
+        counter = self.registry.counter("test_requests", "requests", ("path",))
+        assert self.registry.counter("test_requests", "requests", ("path",)) is counter
+        with pytest.raises(ValueError, match="already registered"):
+            self.registry.gauge("test_requests", "requests", ("path",))
+
+    def test_disabled(self):
+        self.registry.enable(False)
+        counter = self.registry.counter("test_requests", "requests", ("path",))
+        # nothing is recorded, and the labels aren't checked
+        counter.inc()
+        assert self._samples("test_requests_total") == []
+
+    def test_exposition(self):
+        exposition = self.registry.exposition()
+        assert exposition.endswith("# EOF\n")
+        lines = exposition.splitlines()
+        assert "# TYPE snapred_requests counter" in lines
+        assert "# TYPE snapred_request_duration_seconds histogram" in lines
+        assert "# TYPE snapred_ads_memory_bytes gauge" in lines
+
+    def test_exposition_prometheus(self):
+        # in Prometheus text format, a counter family is declared with the name of its samples
+        self.registry.counter("test_requests", "requests").inc()
+        exposition = self.registry.exposition(openMetrics=False)
+        lines = exposition.splitlines()
+        assert lines[lines.index("# TYPE test_requests_total counter") + 1] == "test_requests_total 1.0"
+        assert "# HELP test_requests_total requests" in lines
+        assert "# TYPE snapred_request_duration_seconds histogram" in lines
+        assert "# EOF" not in lines
+
+    def test_metric_abstract(self):
+        with pytest.raises(TypeError, match="abstract"):
+            _Metric(self.registry, "test_metric", "metric")
+
+    def test_writeTextfile(self):
+        self.registry.counter("test_requests", "requests").inc()
+        with tempfile.TemporaryDirectory(prefix=Path(__file__).name) as tmpDir:
+            path = Path(tmpDir) / "metrics" / "snapred.prom"
+            self.registry.writeTextfile(path)
+            assert path.read_text() == self.registry.exposition(openMetrics=False)
+            # only the metrics file remains
+            assert [p.name for p in path.parent.iterdir()] == ["snapred.prom"]
+
+    def test_serve(self):
+        self.registry.counter("test_requests", "requests").inc()
+        server = self.registry.serve("127.0.0.1", 0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            request = urllib.request.Request(f"{url}/metrics", headers={"Accept": "application/openmetrics-text"})
+            with urllib.request.urlopen(request) as response:
+                assert response.headers["Content-Type"] == CONTENT_TYPE
+                assert response.read().decode("utf-8") == self.registry.exposition()
+            # a scraper without OpenMetrics support
+            with urllib.request.urlopen(f"{url}/metrics") as response:
+                assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+                assert response.read().decode("utf-8") == self.registry.exposition(openMetrics=False)
+            with pytest.raises(urllib.error.HTTPError, match="404"):
+                urllib.request.urlopen(f"{url}/other")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_start(self):
+        with tempfile.TemporaryDirectory(prefix=Path(__file__).name) as tmpDir:
+            path = Path(tmpDir) / "snapred.prom"
+            with (
+                Config_override("application.metrics.textfile.path", str(path)),
+                Config_override("application.metrics.textfile.interval", 0),
+                Config_override("application.metrics.http.port", 0),
+                mock.patch("snapred.backend.profiling.Metrics.atexit") as mockAtexit,
+            ):
+                self.registry.start()
+                assert self.registry._writer is None
+                assert self.registry._server is None
+                mockAtexit.register.assert_called_once_with(self.registry._unloadResident)
+
+                # at exit, the metrics are written
+                self.registry._unloadResident()
+                assert path.read_text() == self.registry.exposition(openMetrics=False)
@@ -20,12 +20,16 @@ from snapred.backend.profiling.ProgressRecorder import (
     # The `ProgressRecorder` singleton:
     ProgressRecorder,
     ProgressStep,
+    StepResource,
     # The decorator / context manager:
     WallClockTime,
     _Estimate,
+    _LogEntry,
     _Measurement,
     # The corresponding class:
     _ProgressRecorder,
+    _ResourceMonitor,
+    _Resources,
     _Step,
 )
 from snapred.meta.Config import Config, Resource
@@ -315,7 +319,7 @@ class Test_Estimate:
         ):
             mock_prepareData.return_value = (Ns, dts)
             instance.update(measurements, ComputationalOrder.O_N_2)
-            mock_prepareData.assert_called_once_with(measurements, ComputationalOrder.O_N_2)
+            mock_prepareData.assert_called_once_with(measurements, ComputationalOrder.O_N_2, None)
             mock_update.assert_called_once_with(Ns, dts, len(measurements))
 
     def test__update(self):
@@ -454,6 +458,94 @@ class Test_Estimate:
         )
 
 
+class Test_Resources:
+    def _resources(self, **kwargs) -> _Resources:
+        values = dict(
+            cpuTime=2.0,
+            rssPeakDelta=1024,
+            adsMemoryBefore=100,
+            adsMemoryAfter=300,
+            adsMemoryPeak=1000,
+            eventCount=50,
+        )
+        values.update(kwargs)
+        return _Resources(**values)
+
+    def test_value(self):
+        resources = self._resources()
+        assert resources.value(StepResource.CPU_TIME) == 2.0
+        assert resources.value(StepResource.RSS_PEAK_DELTA) == 1024.0
+        assert resources.value(StepResource.ADS_MEMORY_PEAK) == 1000.0
+        assert resources.value(StepResource.ADS_MEMORY_RETAINED) == 200.0
+        assert resources.value(StepResource.EVENT_COUNT) == 50.0
+        assert resources.value(StepResource.MEMORY_PER_EVENT) == 20.0
+        assert self._resources(eventCount=0).value(StepResource.MEMORY_PER_EVENT) is None
+
+    def test_measurement_resource(self):
+        measurement = _Measurement(dt=3.0, dt_est=None, N_ref=1.0)
+        assert measurement.resource(StepResource.WALL_TIME) == 3.0
+        assert measurement.resource(StepResource.CPU_TIME) is None
+        measurement.resources = self._resources()
+        assert measurement.resource(StepResource.WALL_TIME) == 3.0
+        assert measurement.resource(StepResource.CPU_TIME) == 2.0
+
+    def test_unit(self):
+        assert StepResource.CPU_TIME.unit == "s"
+        assert StepResource.ADS_MEMORY_PEAK.unit == "bytes"
+        assert StepResource.MEMORY_PER_EVENT.unit == "bytes/event"
+
+
+class Test_ResourceMonitor:
+    @pytest.fixture(autouse=True)
+    def _setUpTest(self):
+        self.adsMemory = 100
+        events = mock.Mock(spec=["isGroup", "getMemorySize", "getNumberEvents"])
+        events.isGroup.return_value = False
+        events.getMemorySize.side_effect = lambda: self.adsMemory
+        events.getNumberEvents.return_value = 5
+        histogram = mock.Mock(spec=["isGroup", "getMemorySize"])
+        histogram.isGroup.return_value = False
+        histogram.getMemorySize.return_value = 200
+        group = mock.Mock(spec=["isGroup", "getMemorySize"])
+        group.isGroup.return_value = True
+        group.getMemorySize.return_value = 300
+        workspaces = {"events": events, "histogram": histogram, "group": group}
+
+        mockMtd = mock.MagicMock()
+        # "deleted" is removed from the ADS while it is being sampled
+        mockMtd.getObjectNames.return_value = ["events", "histogram", "group", "deleted"]
+        mockMtd.__getitem__.side_effect = lambda name: workspaces[name]
+        with mock.patch.object(inspect.getmodule(ProgressRecorder), "mtd", mockMtd):
+            yield
+
+    def test_sampleADS(self):
+        # group members are not counted twice
+        assert _ResourceMonitor.sampleADS() == (300, 5)
+
+    def test_maxRSS(self):
+        with mock.patch.object(inspect.getmodule(ProgressRecorder), "getrusage") as mockGetrusage:
+            mockGetrusage.return_value.ru_maxrss = 2
+            assert _ResourceMonitor.maxRSS() == (2 if sys.platform == "darwin" else 2048)
+
+    def test_stop(self):
+        with (
+            mock.patch.object(_ResourceMonitor, "maxRSS", side_effect=[1000, 5000]),
+            mock.patch.object(inspect.getmodule(ProgressRecorder).time, "process_time", side_effect=[1.0, 3.5]),
+            mock.patch.object(inspect.getmodule(ProgressRecorder), "Metrics") as mockMetrics,
+        ):
+            monitor = _ResourceMonitor()
+            monitor.sample(2000, 7)
+            monitor.sample(1000, 6)
+            self.adsMemory = 400
+            resources = monitor.stop()
+        assert resources == _Resources(
+            cpuTime=2.5, rssPeakDelta=4000, adsMemoryBefore=300, adsMemoryAfter=600, adsMemoryPeak=2000, eventCount=7
+        )
+        # the exported ADS gauges report the last sample
+        mockMetrics.adsMemory.set.assert_called_once_with(600)
+        mockMetrics.adsEvents.set.assert_called_once_with(5)
+
+
 class TestProgressStep:
     @pytest.fixture(autouse=True)
     def _setUpTest(self):
@@ -526,10 +618,10 @@ class TestProgressStep:
             self.s.details.order = mock_order
             mock_datetime.now = mock.Mock(return_value=_now)
             mock_N_ref.return_value = mock.sentinel.N_ref
-            mock_dt.return_value = mock.sentinel.dt
+            mock_dt.return_value = 2.0
 
             assert not self.s._loggingEnabled
-            self.s.start(isSubstep=False)
+            self.s.start(isSubstep=False, hostFactor=1.5)
 
             # verify that the utc-timezone is used
             mock_datetime.now.assert_called_once_with(timezone.utc)
@@ -542,7 +634,7 @@ class TestProgressStep:
 
             # verify that the timing properties have been initialized correctly
             assert self.s._N_ref == mock.sentinel.N_ref
-            assert self.s._dt == mock.sentinel.dt
+            assert self.s._dt == 2.0 * 1.5
             mock_order.assert_called_once_with(mock.sentinel.N_ref)
             mock_dt.assert_called_once_with(mock.sentinel.N)
 
@@ -561,7 +653,7 @@ class TestProgressStep:
             self.s.details.order = mock_order
             mock_datetime.now = mock.Mock(return_value=_now)
             mock_N_ref.return_value = mock.sentinel.N_ref
-            mock_dt.return_value = mock.sentinel.dt
+            mock_dt.return_value = 2.0
 
             assert not self.s._loggingEnabled
             self.s.start(isSubstep=True)
@@ -577,7 +669,7 @@ class TestProgressStep:
 
             # verify that the timing properties have been initialized correctly
             assert self.s._N_ref == mock.sentinel.N_ref
-            assert self.s._dt == mock.sentinel.dt
+            assert self.s._dt == 2.0
             mock_order.assert_called_once_with(mock.sentinel.N_ref)
             mock_dt.assert_called_once_with(mock.sentinel.N)
 
@@ -627,6 +719,35 @@ class TestProgressStep:
         with pytest.raises(RuntimeError, match="Usage error: attempt to `stop` unstarted step.*"):
             self.s.stop()
 
+    def test_isSampled(self):
+        assert all(self.s.isSampled(1.0) for _ in range(4))
+        step = ProgressStep(details=_Step(self.key))
+        assert [step.isSampled(0.25) for _ in range(6)] == [True, False, False, False, True, False]
+        step = ProgressStep(details=_Step(self.key))
+        assert [step.isSampled(0.3) for _ in range(4)] == [True, False, False, True]
+        assert not any(self.s.isSampled(0.0) for _ in range(4))
+
+    def test_resourceUsage(self):
+        with (
+            Config_override("application.workflows_data.timing.resources.enabled", True),
+            mock.patch.object(inspect.getmodule(ProgressRecorder), "_ResourceMonitor") as mockMonitor,
+        ):
+            self.s.start(isSubstep=False)
+            self.s.sampleResources(1000, 10)
+            mockMonitor.return_value.sample.assert_called_once_with(1000, 10)
+            assert self.s.resourceUsage() == mockMonitor.return_value.stop.return_value
+            self.s.stop()
+            assert self.s._resources is None
+
+        # disabled
+        self.s.start(isSubstep=False)
+        self.s.sampleResources(1000, 10)
+        assert self.s.resourceUsage() is None
+        self.s.stop()
+
+        with pytest.raises(RuntimeError, match="Usage error: attempt to read `resourceUsage` for unstarted step.*"):
+            self.s.resourceUsage()
+
     def test_recordMeasurement(self):
         # records the measurement
         with (
@@ -663,7 +784,7 @@ class TestProgressStep:
             _step.details.N_ref.assert_not_called()
             _step.details.order.assert_not_called()
             _step.estimate.dt.assert_not_called()
-            _step.estimate.update.assert_called_once_with(_step.measurements, _step.details.order)
+            _step.estimate.update.assert_called_once_with(_step.measurements, _step.details.order, None)
 
         # only updates the estimate when the current estimate is bad
         with (
@@ -864,33 +985,40 @@ class Test_ProgressRecorder:
         # `_ProgressRecorder.instance()` uses `lru_cache`:
         #   for each of these subtests, we need to re-initialize it.
 
-        # enabled => load persistent data
+        # enabled => load persistent data, merge the measurement log, and start its compaction
         with (
             Config_override("application.workflows_data.timing.enabled", True),
             Config_override("application.workflows_data.timing.persistent_data", True),
             mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
             mock.patch.object(_ProgressRecorder, "model_validate_json") as mockModelValidate,
+            mock.patch.object(_ProgressRecorder, "_startCompaction") as mock_startCompaction,
             mock.patch.object(inspect.getmodule(_ProgressRecorder), "atexit") as mock_atexit,
         ):
             _ProgressRecorder.instance.cache_clear()
             mockLocalDataService.return_value.readProgressRecords.return_value = mock.sentinel.json_data
-            mockModelValidate.return_value = mock.sentinel.instance1
+            mockLocalDataService.return_value.readProgressLog.return_value = mock.sentinel.log
+            instance1 = mock.Mock()
+            mockModelValidate.return_value = instance1
             actual = _ProgressRecorder.instance()
-            assert actual == mock.sentinel.instance1
+            assert actual == instance1
             mockModelValidate.assert_called_once_with(mock.sentinel.json_data)
             mockLocalDataService.return_value.readProgressRecords.assert_called_once()
+            instance1._mergeLog.assert_called_once_with(mock.sentinel.log)
             mock_atexit.register.assert_called_once_with(_ProgressRecorder._unloadResident)
+            mock_startCompaction.assert_called_once()
 
             # call it again => returns the cached value
             mockLocalDataService.reset_mock()
             mockModelValidate.reset_mock()
             mock_atexit.reset_mock()
+            mock_startCompaction.reset_mock()
             mockModelValidate.return_value = mock.sentinel.instance2
             actual = _ProgressRecorder.instance()
-            assert actual == mock.sentinel.instance1
+            assert actual == instance1
             mockModelValidate.assert_not_called()
             mockLocalDataService.return_value.readProgressRecords.assert_not_called()
             mock_atexit.register.assert_not_called()
+            mock_startCompaction.assert_not_called()
 
         # enabled (not 'persistent_data') => load persistent data, but don't register to unload it
         with (
@@ -898,16 +1026,20 @@ class Test_ProgressRecorder:
             Config_override("application.workflows_data.timing.persistent_data", False),
             mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
             mock.patch.object(_ProgressRecorder, "model_validate_json") as mockModelValidate,
+            mock.patch.object(_ProgressRecorder, "_startCompaction") as mock_startCompaction,
             mock.patch.object(inspect.getmodule(_ProgressRecorder), "atexit") as mock_atexit,
         ):
             _ProgressRecorder.instance.cache_clear()
             mockLocalDataService.return_value.readProgressRecords.return_value = mock.sentinel.json_data
-            mockModelValidate.return_value = mock.sentinel.instance1
+            instance1 = mock.Mock()
+            mockModelValidate.return_value = instance1
             actual = _ProgressRecorder.instance()
-            assert actual == mock.sentinel.instance1
+            assert actual == instance1
             mockModelValidate.assert_called_once_with(mock.sentinel.json_data)
             mockLocalDataService.return_value.readProgressRecords.assert_called_once()
+            instance1._mergeLog.assert_called_once()
             mock_atexit.register.assert_not_called()
+            mock_startCompaction.assert_not_called()
 
         # disabled => do not load persistent data
         with (
@@ -941,45 +1073,185 @@ class Test_ProgressRecorder:
             mock_new.assert_not_called()
 
     def test__unloadResident(self):
-        # `_ProgressRecorder.instance()` uses `lru_cache`:
-        #   for each of these subtests, we need to re-initialize it.
-
-        # enabled: saves persistent data
+        # enabled: waits for any in-progress compaction
+        mockCompaction = mock.Mock(spec=threading.Thread)
         with (
             Config_override("application.workflows_data.timing.enabled", True),
-            mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
-            mock.patch.object(_ProgressRecorder, "instance") as mockInstance,
+            Config_override("application.workflows_data.timing.log.compaction_timeout", 5),
+            mock.patch.object(_ProgressRecorder, "_compaction", mockCompaction),
         ):
-            _ProgressRecorder.instance.cache_clear()
-            mockInstance.return_value.model_dump_json.return_value = mock.sentinel.json_data
             _ProgressRecorder._unloadResident()
-            mockInstance.assert_called_once()
-            mockLocalDataService.return_value.writeProgressRecords.assert_called_once_with(mock.sentinel.json_data)
+            mockCompaction.join.assert_called_once_with(timeout=5)
 
-        # disabled: does not save any data
+        # disabled: does nothing
+        mockCompaction.reset_mock()
         with (
             Config_override("application.workflows_data.timing.enabled", False),
-            mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
-            mock.patch.object(_ProgressRecorder, "instance") as mockInstance,
+            mock.patch.object(_ProgressRecorder, "_compaction", mockCompaction),
         ):
-            _ProgressRecorder.instance.cache_clear()
-            mockInstance.return_value.model_dump_json.return_value = mock.sentinel.json_data
             _ProgressRecorder._unloadResident()
-            mockInstance.return_value.model_dump_json.assert_not_called()
-            mockLocalDataService.return_value.writeProgressRecords.assert_not_called()
+            mockCompaction.join.assert_not_called()
 
         # enabled: exceptions raised at exit do not propagate
+        mockCompaction.join.side_effect = RuntimeError("any exception")
         with (
             Config_override("application.workflows_data.timing.enabled", True),
-            mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
-            mock.patch.object(_ProgressRecorder, "instance") as mockInstance,
+            mock.patch.object(_ProgressRecorder, "_compaction", mockCompaction),
         ):
-            mockLocalDataService.return_value.writeProgressRecords.side_effect = RuntimeError("any exception")
-            _ProgressRecorder.instance.cache_clear()
-            mockInstance.return_value.model_dump_json.return_value = mock.sentinel.json_data
             _ProgressRecorder._unloadResident()
-            mockInstance.assert_called_once()
-            mockLocalDataService.return_value.writeProgressRecords.assert_called_once_with(mock.sentinel.json_data)
+            mockCompaction.join.assert_called_once()
+
+    def _logEntry(self, key, dt, N_ref, host, timestamp) -> str:
+        return _LogEntry(
+            key=key,
+            N_ref_hash=None,
+            order=ComputationalOrder.O_N,
+            measurement=_Measurement(dt=dt, dt_est=None, N_ref=N_ref, host=host, timestamp=timestamp),
+        ).model_dump_json()
+
+    def test__mergeLog(self):
+        key = ("module", "Service.method", None)
+        recorder = _ProgressRecorder()
+        log = [self._logEntry(key, 2.0 * N, N, "host1", float(N)) for N in range(1, 6)]
+        # an incomplete record, written by another session, is ignored
+        log.append('{"key": ["module", "Serv')
+        with (
+            Config_override("application.workflows_data.timing.max_measurements", 4),
+            Config_override("application.workflows_data.timing.update_minimum_count", 3),
+        ):
+            recorder._mergeLog(log)
+            step = recorder.getStep(key)
+            assert step.details.order == ComputationalOrder.O_N
+            # only the most-recent measurements are retained
+            assert [m.timestamp for m in step.measurements] == [2.0, 3.0, 4.0, 5.0]
+            # the estimate is fitted to the merged measurements
+            assert step.estimate.count == (5, 4)
+            assert step.estimate.dt(3.5) == pytest.approx(7.0)
+
+            # duplicate measurements are ignored
+            recorder._mergeLog(log)
+            assert len(step.measurements) == 4
+
+    def test__normalizeHosts(self):
+        # "slow" takes twice as long as "fast" for the same steps
+        keys = [("module", "Service.method", None), ("module", "Service.other", None)]
+        log = []
+        timestamp = 0.0
+        for key in keys:
+            for N in range(1, 6):
+                for host, factor in (("fast", 1.0), ("slow", 2.0)):
+                    timestamp += 1.0
+                    log.append(self._logEntry(key, factor * 3.0 * N, N, host, timestamp))
+        recorder = _ProgressRecorder()
+        with (
+            Config_override("application.workflows_data.timing.update_minimum_count", 3),
+            Config_override("application.workflows_data.timing.host_normalization.minimum_count", 5),
+        ):
+            recorder._mergeLog(log)
+        assert recorder.hostFactors["slow"] / recorder.hostFactors["fast"] == pytest.approx(2.0, rel=0.05)
+        assert recorder.hostFactors["slow"] * recorder.hostFactors["fast"] == pytest.approx(1.0)
+        with mock.patch.object(inspect.getmodule(_ProgressRecorder), "hostName", return_value="slow"):
+            assert recorder.hostFactor == recorder.hostFactors["slow"]
+        with mock.patch.object(inspect.getmodule(_ProgressRecorder), "hostName", return_value="unknown"):
+            assert recorder.hostFactor == 1.0
+
+    def test__compact(self):
+        key = ("module", "Service.method", None)
+        records = _ProgressRecorder().model_dump_json()
+        compacted = _ProgressRecorder._compact(records, [self._logEntry(key, 1.0, 1.0, "host1", 1.0)])
+        assert len(_ProgressRecorder.model_validate_json(compacted).getStep(key).measurements) == 1
+
+    def test__compactLog(self):
+        with (
+            Config_override("application.workflows_data.timing.log.compaction_threshold", 7),
+            mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
+        ):
+            _ProgressRecorder._compactLog()
+            mockLocalDataService.return_value.compactProgressRecords.assert_called_once_with(
+                _ProgressRecorder._compact, minimumCount=7
+            )
+
+            # failures are only logged
+            mockLocalDataService.return_value.compactProgressRecords.side_effect = RuntimeError("lock timeout")
+            with mock.patch.object(inspect.getmodule(_ProgressRecorder), "logger") as mockLogger:
+                _ProgressRecorder._compactLog()
+                mockLogger.warning.assert_called_once()
+
+    def test_stop_appendToLog(self):
+        key = ("module", "Service.method", None)
+        recorder = _ProgressRecorder()
+        step = recorder.getStep(key, create=True)
+        step.setDetails(N_ref=lambda: 4.0, order=ComputationalOrder.O_N)
+        with (
+            Config_override("application.workflows_data.timing.enabled", True),
+            Config_override("application.workflows_data.timing.persistent_data", True),
+            mock.patch.object(_ProgressRecorder, "getStepKey", return_value=key),
+            mock.patch.object(inspect.getmodule(_ProgressRecorder), "LocalDataService") as mockLocalDataService,
+        ):
+            recorder.record()
+            recorder.stop(key)
+        ((records,), _) = mockLocalDataService.return_value.appendProgressRecords.call_args
+        entry = _LogEntry.model_validate_json(records[0])
+        assert entry.key == key
+        assert entry.measurement == step.measurements[-1]
+        assert entry.measurement.host is not None
+
+    def test_stop_metrics(self):
+        key = ("module", "Service.method", None)
+        recorder = _ProgressRecorder()
+        step = recorder.getStep(key, create=True)
+        step.setDetails(N_ref=lambda: 4.0, order=ComputationalOrder.O_N)
+        with (
+            Config_override("application.workflows_data.timing.enabled", True),
+            mock.patch.object(_ProgressRecorder, "getStepKey", return_value=key),
+            mock.patch.object(inspect.getmodule(_ProgressRecorder), "Metrics") as mockMetrics,
+        ):
+            recorder.record()
+            recorder.stop(key)
+        mockMetrics.stepDuration.observe.assert_called_once_with(step.measurements[-1].dt, step=step.name)
+
+    def test_stop_resources(self):
+        outer, inner = ("module", "Service.method", None), ("module", "Service.method", "inner")
+        recorder = _ProgressRecorder()
+        for key in (outer, inner):
+            recorder.getStep(key, create=True).setDetails(N_ref=lambda: 4.0, order=ComputationalOrder.O_N)
+        with (
+            Config_override("application.workflows_data.timing.enabled", True),
+            Config_override("application.workflows_data.timing.resources.enabled", True),
+            mock.patch.object(_ProgressRecorder, "getStepKey", side_effect=[outer, inner]),
+            mock.patch.object(_ResourceMonitor, "sampleADS", side_effect=[(100, 10), (150, 20), (400, 50), (200, 20)]),
+        ):
+            recorder.record()
+            recorder.record(stepName="inner")
+            recorder.stop(inner)
+            recorder.stop(outer)
+
+        resources = recorder.getStep(inner).measurements[-1].resources
+        assert (resources.adsMemoryBefore, resources.adsMemoryAfter, resources.adsMemoryPeak) == (150, 400, 400)
+        # the substep's peak is also the peak of the enclosing step
+        resources = recorder.getStep(outer).measurements[-1].resources
+        assert (resources.adsMemoryBefore, resources.adsMemoryAfter, resources.adsMemoryPeak) == (100, 200, 400)
+        assert resources.eventCount == 50
+        assert resources.cpuTime >= 0.0
+
+    def test_rankSteps(self):
+        recorder = _ProgressRecorder()
+        resources = dict(rssPeakDelta=0, adsMemoryBefore=0, adsMemoryAfter=0, adsMemoryPeak=0, eventCount=0)
+        fast = recorder.getStep(("module", "Service.fast", None), create=True)
+        fast.measurements = [
+            _Measurement(dt=1.0, dt_est=None, N_ref=1.0, resources=_Resources(cpuTime=4.0, **resources)),
+            _Measurement(dt=3.0, dt_est=None, N_ref=1.0, resources=_Resources(cpuTime=6.0, **resources)),
+        ]
+        slow = recorder.getStep(("module", "Service.slow", None), create=True)
+        # a measurement saved without resource usage
+        slow.measurements = [_Measurement(dt=10.0, dt_est=None, N_ref=1.0)]
+
+        assert recorder.rankSteps(StepResource.WALL_TIME) == [
+            ("module.Service.slow", 1, 10.0),
+            ("module.Service.fast", 2, 2.0),
+        ]
+        assert recorder.rankSteps(StepResource.CPU_TIME) == [("module.Service.fast", 2, 5.0)]
+        assert recorder.rankSteps(StepResource.MEMORY_PER_EVENT) == []
 
     def test__getCallerFullyQualifiedName(self):
         # function in local scope
@@ -1073,6 +1345,35 @@ class Test_ProgressRecorder:
             actual = _ProgressRecorder._getCallerFullyQualifiedName(inspect.currentframe().f_back)
             assert actual == expected
 
+    def test__getCallerFullyQualifiedName_cached(self):
+        # each code object's module is resolved only once
+        _ProgressRecorder._moduleName.cache_clear()
+        with mock.patch.object(inspect, "getmodule", wraps=inspect.getmodule) as mockGetmodule:
+            for _ in range(3):
+                actual = _ProgressRecorder._getCallerFullyQualifiedName(inspect.currentframe())
+                assert actual[0] == __name__
+            mockGetmodule.assert_called_once_with(inspect.currentframe().f_code)
+
+    def test_record_sampled(self):
+        key = ("module", "Service.method", None)
+        recorder = _ProgressRecorder()
+        with (
+            Config_override("application.workflows_data.timing.enabled", True),
+            Config_override("application.workflows_data.timing.sample_rate", 0.5),
+        ):
+            keys = []
+            for _ in range(4):
+                keys.append(recorder.record(stepKey=key, N_ref=lambda: 4.0, order=ComputationalOrder.O_N))
+                if keys[-1] is not None:
+                    recorder.stop(keys[-1])
+            assert keys == [key, None, key, None]
+            assert len(recorder.getStep(key).measurements) == 2
+
+            # an explicit `sampleRate` overrides the default
+            assert recorder.record(stepKey=key, N_ref=lambda: 4.0, order=ComputationalOrder.O_N, sampleRate=1.0) == key
+            recorder.stop(key)
+            assert len(recorder.getStep(key).measurements) == 3
+
     def test_isLoggingEnabledForStep(self):
         test_qualname_roots = ["joe", "sam", "sally"]
         _ProgressRecorder._loggable_qualname_roots.cache_clear()
@@ -1631,7 +1932,7 @@ class Test_ProgressRecorder:
             step0.setDetails.assert_called_once_with(
                 N_ref=N_ref, N_ref_args=N_ref_args, order=order, enableLogging=True
             )
-            step0.start.assert_called_once_with(isSubstep=False)
+            step0.start.assert_called_once_with(isSubstep=False, hostFactor=1.0)
             mock_chainLogTimeRemaining.assert_called_once_with(step0)
 
         # enabled (substep): gets (or creates) the step, sets its details, calls step start,
@@ -1665,7 +1966,7 @@ class Test_ProgressRecorder:
             step0.setDetails.assert_called_once_with(
                 N_ref=N_ref, N_ref_args=N_ref_args, order=order, enableLogging=True
             )
-            step0.start.assert_called_once_with(isSubstep=True)
+            step0.start.assert_called_once_with(isSubstep=True, hostFactor=1.0)
             mock_chainLogTimeRemaining.assert_called_once_with(step0)
 
         # disabled: returns None
@@ -1754,7 +2055,13 @@ class Test_ProgressRecorder:
             mock_isSubstep.assert_called_once()
             step0.details.N_ref.assert_not_called()
             step0.details.order.assert_not_called()
-            step0.recordMeasurement.assert_called_once_with(dt_elapsed=_elapsed, dt_est=_elapsed, N_ref=N_ref)
+            step0.recordMeasurement.assert_called_once_with(
+                dt_elapsed=_elapsed,
+                dt_est=_elapsed,
+                N_ref=N_ref,
+                hostFactors={},
+                resources=step0.resourceUsage.return_value,
+            )
             step0.estimate.dt.assert_not_called()
 
         # enabled: substep stack exception
@@ -2100,16 +2407,28 @@ class TestWallClockTime:
                 decorated(*_args, **_kwargs)
 
                 decoratee.assert_called_once_with(*_args, **_kwargs)
+                # the step key is computed when the function is decorated
+                mockProgressRecorder.getStepKey.assert_called_once_with(
+                    callerOrStackFrameOverride=decoratee, stepName=mock.sentinel.stepName
+                )
                 mockProgressRecorder.record.assert_called_once_with(
-                    stepName=mock.sentinel.stepName,
-                    callerOrStackFrameOverride=decoratee,
+                    stepKey=mockProgressRecorder.getStepKey.return_value,
                     N_ref=mock.sentinel.N_ref,
                     N_ref_args=(_args, _kwargs),
                     order=mock.sentinel.order,
                     enableLogging=False,
+                    sampleRate=None,
                 )
                 mockProgressRecorder.stop.assert_called_once_with(key)
 
+                # an unrecorded invocation isn't stopped
+                mockProgressRecorder.reset_mock()
+                mockProgressRecorder.record.return_value = None
+                decorated(*_args, **_kwargs)
+                mockProgressRecorder.getStepKey.assert_not_called()
+                mockProgressRecorder.record.assert_called_once()
+                mockProgressRecorder.stop.assert_not_called()
+
             ## verify that a method of a class is profiled correctly
             key = mock.sentinel.key
             mockProgressRecorder.reset_mock()
@@ -2137,14 +2456,17 @@ class TestWallClockTime:
                 instance.method_two(*_args, **_kwargs)
 
                 mock_method.assert_called_once_with(instance, *_args, **_kwargs)
+                # step key is generated from the <class>, not from the <class method>
+                mockProgressRecorder.getStepKey.assert_called_once_with(
+                    callerOrStackFrameOverride=decoratee, stepName=mock.sentinel.stepName
+                )
                 mockProgressRecorder.record.assert_called_once_with(
-                    stepName=mock.sentinel.stepName,
-                    # step key is generated from the <class>, not from the <class method>
-                    callerOrStackFrameOverride=decoratee,
+                    stepKey=mockProgressRecorder.getStepKey.return_value,
                     N_ref=mock.sentinel.N_ref,
                     N_ref_args=((instance, *_args), _kwargs),
                     order=mock.sentinel.order,
                     enableLogging=False,
+                    sampleRate=None,
                 )
                 mockProgressRecorder.stop.assert_called_once_with(key)
 
@@ -2237,6 +2559,7 @@ class TestWallClockTime:
                 N_ref_args=_N_ref_args,
                 order=_order,
                 enableLogging=False,
+                sampleRate=None,
             )
             mockProgressRecorder.stop.assert_called_once_with(key)
 
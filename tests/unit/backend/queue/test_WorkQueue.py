@@ -0,0 +1,260 @@
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+import pytest
+
+from snapred.backend.queue.ReductionWorker import ReductionWorker
+from snapred.backend.queue.WorkQueue import WorkItem, WorkItemStatus, WorkQueue
+
+
+def _echo(item: WorkItem):
+    # A stand-in for reduction: record which process handled the item.
+    return {"payload": item.payload, "pid": os.getpid()}
+
+
+def _runWorker(queueRoot: str) -> int:
+    queue = WorkQueue(root=queueRoot, leaseDuration=10.0, maxAttempts=3)
+    return ReductionWorker(queue, process=_echo, heartbeatInterval=0.1, pollInterval=0.01).run(exitWhenEmpty=True)
+
+
+class TestWorkQueue:
+    @pytest.fixture(autouse=True)
+    def _setup_queue(self):
+        self.tempDir = TemporaryDirectory()
+        self.queue = WorkQueue(root=self.tempDir.name, leaseDuration=10.0, maxAttempts=2)
+        yield
+        self.tempDir.cleanup()
+
+    def test_init_createsDirectories(self):
+        for status in WorkItemStatus:
+            assert (Path(self.tempDir.name) / str(status)).is_dir()
+
+    def test_submit_claim_FIFO(self):
+        first = self.queue.submit("first")
+        second = self.queue.submit("second")
+        assert self.queue.counts()[WorkItemStatus.PENDING] == 2
+
+        lease = self.queue.claim("worker")
+        assert lease.item.id == first.id
+        assert lease.item.attempts == 1
+        assert lease.item.owner == "worker"
+        assert lease.path.exists()
+
+        assert self.queue.claim("worker").item.id == second.id
+        assert self.queue.claim("worker") is None
+
+    def test_submit_model(self):
+        payload = WorkItem(id="inner", payload="x", submitted=0.0)
+        self.queue.submit(payload)
+        lease = self.queue.claim("worker")
+        assert WorkItem.model_validate_json(lease.item.payload) == payload
+
+    def test_complete(self):
+        self.queue.submit("payload")
+        lease = self.queue.claim("worker")
+        assert self.queue.complete(lease, {"answer": 42})
+        assert not lease.path.exists()
+        (completed,) = self.queue.items(WorkItemStatus.COMPLETED)
+        assert completed.result == {"answer": 42}
+        assert completed.finished is not None
+
+    def test_fail_requeuesUntilMaxAttempts(self):
+        self.queue.submit("payload")
+        lease = self.queue.claim("worker")
+        assert self.queue.fail(lease, "first error")
+        (pending,) = self.queue.items(WorkItemStatus.PENDING)
+        assert pending.error == "first error"
+        assert pending.owner is None
+
+        lease = self.queue.claim("worker")
+        assert lease.item.attempts == 2
+        assert self.queue.fail(lease, "second error")
+        assert self.queue.counts()[WorkItemStatus.PENDING] == 0
+        (failed,) = self.queue.items(WorkItemStatus.FAILED)
+        assert failed.error == "second error"
+
+    def test_requeueExpired(self):
+        item = self.queue.submit("payload")
+        lease = self.queue.claim("worker")
+        assert self.queue.requeueExpired() == []
+
+        # age the lease
+        expired = time.time() - 2.0 * self.queue.leaseDuration
+        os.utime(lease.path, (expired, expired))
+        assert self.queue.requeueExpired() == [item.id]
+        assert self.queue.counts()[WorkItemStatus.PENDING] == 1
+
+        # the original owner has lost its lease, even after the item is claimed again
+        newLease = self.queue.claim("other")
+        assert newLease.item.attempts == 2
+        assert not self.queue.heartbeat(lease)
+        assert not self.queue.complete(lease, "stale")
+        # the expired lease isn't re-created
+        assert self.queue.counts()[WorkItemStatus.CLAIMED] == 1
+        assert self.queue.heartbeat(newLease)
+        assert self.queue.complete(newLease, "fresh")
+        (completed,) = self.queue.items(WorkItemStatus.COMPLETED)
+        assert completed.result == "fresh"
+
+    def test_requeueExpired_maxAttempts(self):
+        # an item which kills its worker (e.g. out of memory) is not re-claimed forever
+        item = self.queue.submit("payload")
+        for attempt in range(self.queue.maxAttempts):
+            lease = self.queue.claim(f"worker{attempt}")
+            assert lease.item.attempts == attempt + 1
+            expired = time.time() - 2.0 * self.queue.leaseDuration
+            os.utime(lease.path, (expired, expired))
+            requeued = self.queue.requeueExpired()
+        assert requeued == []
+        assert self.queue.counts() == {"pending": 0, "claimed": 0, "completed": 0, "failed": 1}
+        (failed,) = self.queue.items(WorkItemStatus.FAILED)
+        assert failed.id == item.id
+        assert failed.owner is None
+        assert "lease expired" in failed.error
+        assert not list((Path(self.tempDir.name) / "failed").glob(".*"))
+
+    def test_claim_requeueExpired_race(self):
+        # an item which has been pending for longer than a lease is claimed,
+        #   while another worker is re-queueing expired items
+        item = self.queue.submit("payload")
+        (pendingPath,) = self.queue._items(WorkItemStatus.PENDING)
+        submitted = time.time() - 2.0 * self.queue.leaseDuration
+        os.utime(pendingPath, (submitted, submitted))
+
+        requeued = []
+        validate = WorkItem.model_validate_json
+
+        def _interleaved(data):
+            if not requeued:
+                requeued.append(self.queue.requeueExpired())
+            return validate(data)
+
+        with mock.patch.object(WorkItem, "model_validate_json", side_effect=_interleaved):
+            lease = self.queue.claim("worker")
+        # the new lease wasn't mistaken for an expired one
+        assert requeued == [[]]
+        assert self.queue.counts() == {"pending": 0, "claimed": 1, "completed": 0, "failed": 0}
+        assert self.queue.complete(lease, "done")
+        (completed,) = self.queue.items(WorkItemStatus.COMPLETED)
+        assert completed.id == item.id
+        assert self.queue.counts() == {"pending": 0, "claimed": 0, "completed": 1, "failed": 0}
+        assert not list((Path(self.tempDir.name) / "completed").glob(".*"))
+
+    def test_heartbeat_extendsLease(self):
+        self.queue.submit("payload")
+        lease = self.queue.claim("worker")
+        expired = time.time() - 2.0 * self.queue.leaseDuration
+        os.utime(lease.path, (expired, expired))
+        assert self.queue.heartbeat(lease)
+        assert self.queue.requeueExpired() == []
+
+    def test_claim_race(self):
+        # the item is claimed by another worker between listing and rename
+        self.queue.submit("payload")
+        pendingPath = self.queue._items(WorkItemStatus.PENDING)[0]
+        with mock.patch.object(self.queue, "_items", return_value=[pendingPath, pendingPath]):
+            assert self.queue.claim("worker") is not None
+            assert self.queue.claim("worker") is None
+
+    def test_ignoresTemporaryFiles(self):
+        (Path(self.tempDir.name) / "pending" / ".partial.json.1234.tmp").write_text("{")
+        (Path(self.tempDir.name) / "pending" / ".partial.json").write_text("{")
+        assert self.queue.counts()[WorkItemStatus.PENDING] == 0
+
+
+class TestReductionWorker:
+    @pytest.fixture(autouse=True)
+    def _setup_queue(self):
+        self.tempDir = TemporaryDirectory()
+        self.queue = WorkQueue(root=self.tempDir.name, leaseDuration=10.0, maxAttempts=2)
+        yield
+        self.tempDir.cleanup()
+
+    def test_run_exitWhenEmpty(self):
+        for n in range(3):
+            self.queue.submit(str(n))
+        worker = ReductionWorker(self.queue, process=_echo, heartbeatInterval=0.1, pollInterval=0.01)
+        assert worker.run(exitWhenEmpty=True) == 3
+        assert [item.result["payload"] for item in self.queue.items(WorkItemStatus.COMPLETED)] == ["0", "1", "2"]
+
+    def test_run_maxItems(self):
+        for n in range(3):
+            self.queue.submit(str(n))
+        worker = ReductionWorker(self.queue, process=_echo, heartbeatInterval=0.1, pollInterval=0.01)
+        assert worker.run(maxItems=2) == 2
+        assert self.queue.counts()[WorkItemStatus.PENDING] == 1
+
+    def test_processNext_failure(self):
+        self.queue.submit("payload")
+        worker = ReductionWorker(
+            self.queue, process=mock.Mock(side_effect=RuntimeError("boom")), heartbeatInterval=0.1, pollInterval=0.01
+        )
+        assert worker.run(exitWhenEmpty=True) == 2
+        (failed,) = self.queue.items(WorkItemStatus.FAILED)
+        assert failed.attempts == 2
+        assert "boom" in failed.error
+
+    def test_processNext_heartbeat(self):
+        self.queue.submit("payload")
+        heartbeats = []
+
+        def slow(item):
+            time.sleep(0.35)
+            return item.payload
+
+        worker = ReductionWorker(self.queue, process=slow, heartbeatInterval=0.1, pollInterval=0.01)
+        with mock.patch.object(self.queue, "heartbeat", side_effect=lambda lease: heartbeats.append(lease) or True):
+            assert worker.processNext()
+        assert len(heartbeats) >= 2
+
+    def test_reduce(self):
+        request = {"runNumber": "12345", "useLiteMode": True}
+        item = WorkItem(id="item", payload=json.dumps(request), submitted=0.0)
+        with (
+            mock.patch("snapred.backend.queue.ReductionWorker.ReductionService") as mockService,
+            mock.patch("snapred.backend.queue.ReductionWorker.ReductionExportRequest") as mockExportRequest,
+        ):
+            service = mockService.return_value
+            service.getUniqueTimestamp.return_value = 1.0
+            record = service.reduction.return_value.record
+            record.runNumber = "12345"
+            record.timestamp = 1.0
+            record.workspaceNames = ["reduced"]
+            service.reduction.return_value.executionTime.total_seconds.return_value = 2.0
+
+            worker = ReductionWorker(self.queue)
+            result = worker.process(item)
+
+            reductionRequest = service.reduction.call_args[0][0]
+            assert reductionRequest.runNumber == "12345"
+            assert reductionRequest.timestamp == 1.0
+            service.validateReduction.assert_called_once_with(reductionRequest)
+            mockExportRequest.assert_called_once_with(record=record)
+            service.saveReduction.assert_called_once_with(mockExportRequest.return_value)
+            service.groceryService.clearADS.assert_called_once_with(exclude=[], clearCache=False)
+            assert result == {
+                "runNumber": "12345",
+                "timestamp": 1.0,
+                "workspaceNames": ["reduced"],
+                "executionTime": 2.0,
+            }
+
+    def test_multipleWorkerProcesses(self):
+        nItems = 20
+        for n in range(nItems):
+            self.queue.submit(str(n))
+
+        with multiprocessing.Pool(processes=3) as pool:
+            counts = pool.map(_runWorker, [self.tempDir.name] * 3)
+
+        # every item is processed exactly once
+        assert sum(counts) == nItems
+        completed = self.queue.items(WorkItemStatus.COMPLETED)
+        assert sorted(int(item.result["payload"]) for item in completed) == list(range(nItems))
+        assert all(item.attempts == 1 for item in completed)
+        assert self.queue.counts()[WorkItemStatus.CLAIMED] == 0
@@ -1,11 +1,16 @@
+import inspect
 import unittest
+from unittest import mock
 
+from mantid.api import AlgorithmManager
 from mantid.simpleapi import (
+    CalculateDIFC,
     CalculateDiffCalTable,
     DeleteWorkspace,
     mtd,
 )
 
+from snapred.backend.recipe.algorithm.CalculateDiffCalTable import CalculateDiffCalTable as ThisAlgo
 from snapred.meta.Config import Resource
 
 
@@ -64,3 +69,62 @@ class TestCalculateDiffCalTable(unittest.TestCase):
             assert row == i
         for difc in difcTable.column("difc"):
             print(f"{difc},")
+
+    def test_difc_table_matches_difc(self):
+        difcTableWS = mtd.unique_name(prefix="_test_make_difc_table")
+        difcWS = mtd.unique_name(prefix="_test_difc")
+
+        CalculateDiffCalTable(
+            InputWorkspace=self.fakeRawData,
+            CalibrationTable=difcTableWS,
+            OffsetMode="Signed",
+            BinWidth=abs(self.dBin),
+        )
+        CalculateDIFC(
+            InputWorkspace=self.fakeRawData,
+            OutputWorkspace=difcWS,
+            OffsetMode="Signed",
+            BinWidth=abs(self.dBin),
+        )
+
+        # each detector has a row, with the DIFC of its spectrum
+        difcTable = mtd[difcTableWS]
+        assert difcTable.getColumnNames() == ["detid", "difc", "difa", "tzero"]
+        expectedDetids = []
+        expectedDifcs = []
+        for wkspIndx in range(mtd[difcWS].getNumberHistograms()):
+            for detid in mtd[difcWS].getSpectrum(wkspIndx).getDetectorIDs():
+                expectedDetids.append(detid)
+                expectedDifcs.append(mtd[difcWS].readY(wkspIndx)[0])
+        assert difcTable.column("detid") == expectedDetids
+        assert difcTable.column("difc") == expectedDifcs
+        assert difcTable.column("difa") == [0.0] * len(expectedDetids)
+        assert difcTable.column("tzero") == [0.0] * len(expectedDetids)
+        # no temporary workspaces remain
+        assert not [name for name in mtd.getObjectNames() if name.startswith("__tmp_")]
+
+    def test_difc_table_unnamed(self):
+        # without an output name, the table is only held by the output property
+        tmpNames = []
+
+        def _uniqueName(*args, **kwargs):
+            name = mtd.unique_name(*args, **kwargs)
+            tmpNames.append(name)
+            return name
+
+        with mock.patch.object(inspect.getmodule(ThisAlgo), "mtd") as mockMtd:
+            mockMtd.unique_name.side_effect = _uniqueName
+            mockMtd.__getitem__.side_effect = mtd.__getitem__
+            algo = AlgorithmManager.create("CalculateDiffCalTable")
+            algo.initialize()
+            algo.setProperty("InputWorkspace", self.fakeRawData)
+            algo.setProperty("OffsetMode", "Signed")
+            algo.setProperty("BinWidth", abs(self.dBin))
+            algo.execute()
+
+        difcTable = algo.getProperty("CalibrationTable").value
+        assert difcTable.getColumnNames() == ["detid", "difc", "difa", "tzero"]
+        assert tmpNames
+        for name in tmpNames:
+            assert not mtd.doesExist(name)
+            assert not mtd.doesExist(name + "_cal")
@@ -152,3 +152,39 @@ class TestCalibrationMetricExtractionAlgorithm(unittest.TestCase):
         with pytest.raises(RuntimeError) as e:
             algorithm.execute()
         assert "InputWorkspace" in str(e.value)
+
+    def test_groupedStatistics(self):
+        rng = np.random.default_rng(seed=1357)
+        # the groups have different numbers of peaks: the peak-positions workspace is ragged
+        nPeaks = [6, 3, 5, 2]
+        nHistograms = len(nPeaks)
+        d_ref = [np.linspace(1.0, 2.0, n) for n in nPeaks]
+        pos = [d + rng.normal(0.0, 0.01, len(d)) for d in d_ref]
+        # some peaks were not fitted, including all of the peaks of the last histogram
+        pos[0][2] = -1.0
+        pos[3][:] = -1.0
+        # the rows for the histograms are interleaved
+        wsindex = np.array(
+            [index for peak in range(max(nPeaks)) for index in range(nHistograms) if peak < nPeaks[index]]
+        )
+        sigma = rng.uniform(0.01, 0.02, len(wsindex))
+        peakPos = MagicMock(
+            readY=MagicMock(side_effect=lambda index: pos[index]),
+            readX=MagicMock(side_effect=lambda index: d_ref[index]),
+            extractY=MagicMock(side_effect=RuntimeError("ragged workspace")),
+            extractX=MagicMock(side_effect=RuntimeError("ragged workspace")),
+        )
+        parameters = MagicMock(column=lambda name: {"wsindex": list(wsindex), "Sigma": list(sigma)}[name])
+
+        actual = Algo.groupedStatistics(peakPos, parameters, nHistograms)
+
+        for index in range(nHistograms - 1):
+            sig = sigma[wsindex == index]
+            fitted = pos[index] >= 0
+            strains = (d_ref[index][fitted] - pos[index][fitted]) / sig[fitted]
+            sigmas = sig[fitted] / pos[index][fitted]
+            assert actual[0][index] == pytest.approx(np.average(strains))
+            assert actual[1][index] == pytest.approx(np.std(strains))
+            assert actual[2][index] == pytest.approx(np.average(sigmas))
+            assert actual[3][index] == pytest.approx(np.std(sigmas))
+        assert all(np.isnan(statistic[nHistograms - 1]) for statistic in actual)
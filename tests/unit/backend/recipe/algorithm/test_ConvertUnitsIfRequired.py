@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+
+from mantid.simpleapi import ConvertUnits, ConvertUnitsIfRequired, CreateSampleWorkspace, mtd
+
+ThisAlgorithm = "snapred.backend.recipe.algorithm.ConvertUnitsIfRequired.{0}"
+
+
+class TestConvertUnitsIfRequired(unittest.TestCase):
+    def setUp(self):
+        self.inputWs = mtd.unique_name(prefix="tof_")
+        CreateSampleWorkspace(
+            OutputWorkspace=self.inputWs,
+            Function="One Peak",
+            NumBanks=1,
+            BankPixelWidth=2,
+            XUnit="TOF",
+            XMin=1000,
+            XMax=10000,
+            BinWidth=100,
+        )
+
+    def tearDown(self) -> None:
+        mtd.clear()
+        return super().tearDown()
+
+    def test_convert(self):
+        outputWs = mtd.unique_name(prefix="dsp_")
+        ConvertUnitsIfRequired(InputWorkspace=self.inputWs, OutputWorkspace=outputWs, Target="dSpacing")
+
+        expectedWs = mtd.unique_name(prefix="expected_")
+        ConvertUnits(InputWorkspace=self.inputWs, OutputWorkspace=expectedWs, Target="dSpacing")
+        assert mtd[outputWs].getAxis(0).getUnit().unitID() == "dSpacing"
+        assert (mtd[outputWs].readX(0) == mtd[expectedWs].readX(0)).all()
+        # the input is unchanged
+        assert mtd[self.inputWs].getAxis(0).getUnit().unitID() == "TOF"
+
+    def test_inPlace_alreadyConverted(self):
+        with mock.patch(ThisAlgorithm.format("ConvertUnits")) as mockConvertUnits:
+            ConvertUnitsIfRequired(InputWorkspace=self.inputWs, OutputWorkspace=self.inputWs, Target="TOF")
+            mockConvertUnits.assert_not_called()
+        assert mtd[self.inputWs].getAxis(0).getUnit().unitID() == "TOF"
+
+    def test_outOfPlace_alreadyConverted(self):
+        outputWs = mtd.unique_name(prefix="tof_")
+        with mock.patch(ThisAlgorithm.format("ConvertUnits")) as mockConvertUnits:
+            ConvertUnitsIfRequired(InputWorkspace=self.inputWs, OutputWorkspace=outputWs, Target="TOF")
+            mockConvertUnits.assert_not_called()
+
+        # the output is a distinct copy of the input
+        assert mtd[outputWs].getAxis(0).getUnit().unitID() == "TOF"
+        assert (mtd[outputWs].readY(0) == mtd[self.inputWs].readY(0)).all()
+        mtd[outputWs].setY(0, mtd[outputWs].readY(0) * 2.0)
+        assert not (mtd[outputWs].readY(0) == mtd[self.inputWs].readY(0)).all()
@@ -101,3 +101,65 @@ class TestCreateArtificialNormalizationAlgo(unittest.TestCase):
             dataY = output_ws.readY(i)
             self.assertFalse(np.isnan(dataY).any(), f"Histogram {i} contains NaN values")  # noqa: PT009
             self.assertFalse(np.isinf(dataY).any(), f"Histogram {i} contains infinite values")  # noqa: PT009
+
+    @staticmethod
+    def _sequentialPeakClip(data, winSize, decrese, LLS, smoothing):
+        # the direct calculation: one bin at a time
+        startData = np.copy(data)
+        if smoothing > 0:
+            order = smoothing
+            sm = np.zeros(len(data))
+            factor = order / 2 + 1
+            for i in range(len(data)):
+                temp = 0
+                ave = 0
+                for r in range(max(0, i - int(order / 2)), min(i + int(order / 2), len(data) - 1) + 1):
+                    temp += (factor - abs(r - i)) * data[r]
+                    ave += factor - abs(r - i)
+                sm[i] = temp / ave
+            data = sm
+        if LLS:
+            data = np.log(np.log((data + 1) ** 0.5 + 1) + 1)
+        temp = data.copy()
+        scan = list(range(winSize + 1, 0, -1)) if decrese else list(range(1, winSize + 1))
+        for w in scan:
+            for i in range(w, len(temp) - w):
+                winArray = temp[i - w : i + w + 1].copy()
+                average = (winArray + winArray[::-1]) / 2
+                temp[i] = np.min(average[:w])
+        if LLS:
+            temp = (np.exp(np.exp(temp) - 1) - 1) ** 2 - 1
+        index = np.argmin(startData - temp)
+        return temp * (startData[index] / temp[index])
+
+    def test_peakClip_matchesSequential(self):
+        algo = Algo()
+        inputWs = mtd[self.fakeRawData]
+        for i in range(inputWs.getNumberHistograms()):
+            dataY = inputWs.readY(i).copy()
+            for winSize, decrese, LLS, smoothing in [
+                (10, True, True, 5.0),
+                (3, False, False, 0.5),
+                (5, True, False, 0.0),
+            ]:
+                expected = self._sequentialPeakClip(dataY, winSize, decrese, LLS, smoothing)
+                actual = algo.peakClip(dataY, winSize, decrese, LLS, smoothing)
+                # the vectorized calculation reproduces the direct calculation exactly
+                assert np.array_equal(actual, expected)
+
+    def test_peakClip_batch(self):
+        algo = Algo()
+        inputWs = mtd[self.fakeRawData]
+        spectra = np.array([inputWs.readY(i) for i in range(inputWs.getNumberHistograms())])
+        batch = algo.peakClip(spectra, 10, True, True, 5.0)
+        assert batch.shape == spectra.shape
+        for dataY, clipped in zip(spectra, batch):
+            assert np.array_equal(clipped, algo.peakClip(dataY, 10, True, True, 5.0))
+
+    def test_peakClip_shortSpectrum(self):
+        # a spectrum shorter than the clipping window is only smoothed and rescaled
+        algo = Algo()
+        dataY = np.array([1.0, 5.0, 2.0])
+        assert np.array_equal(
+            algo.peakClip(dataY, 10, True, True, 5.0), self._sequentialPeakClip(dataY, 10, True, True, 5.0)
+        )
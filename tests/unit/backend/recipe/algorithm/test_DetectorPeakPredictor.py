@@ -2,6 +2,7 @@ import socket
 import unittest.mock as mock
 from typing import List
 
+import numpy as np
 import pydantic
 import pytest
 from util.dao import DAOFactory
@@ -112,3 +113,31 @@ with mock.patch.dict(
         with pytest.raises(RuntimeError) as excinfo:
             peakPredictorAlgo.execute()
         assert "Ingredients" in str(excinfo.value)
+
+    def test_predictWindows():
+        """
+        Test that the (group x peak) windows match those calculated for each pair individually.
+        """
+        ingredients = DAOFactory.good_peak_ingredients.copy()
+        algo = DetectorPeakPredictor()
+        algo.initialize()
+        algo.chopIngredients(ingredients)
+        inRange, centers, minima, maxima = algo.predictWindows()
+
+        assert inRange.shape == (len(algo.allGroupIDs), len(algo.goodPeaks))
+        assert inRange.any()
+        for row, groupID in enumerate(algo.allGroupIDs):
+            for i, crystalPeak in enumerate(algo.goodPeaks):
+                d = crystalPeak.dSpacing
+                assert inRange[row, i] == (algo.dMin[groupID] <= d <= algo.dMax[groupID])
+                if not inRange[row, i]:
+                    continue
+                beta_T = algo.beta_0 + algo.beta_1 / d**4
+                beta_d = algo.BETA_D_COEFFICIENT * algo.L * np.sin(algo.tTheta[groupID] / 2) * beta_T
+                fwhm = algo.FWHM * algo.delDoD[groupID] * d
+                widthLeft = fwhm * algo.FWHMMultiplierLeft
+                widthRight = fwhm * algo.FWHMMultiplierRight + algo.peakTailCoefficient / beta_d
+                d = round(d, 5)
+                assert centers[row, i] == d
+                assert minima[row, i] == d - widthLeft
+                assert maxima[row, i] == d + widthRight
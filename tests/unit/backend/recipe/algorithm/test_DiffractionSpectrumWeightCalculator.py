@@ -2,6 +2,7 @@ import socket
 import unittest.mock as mock
 from typing import List
 
+import numpy as np
 import pytest
 from mantid.testing import assert_almost_equal
 from util.diffraction_calibration_synthetic_data import SyntheticData
@@ -303,3 +304,24 @@ with mock.patch.dict(
             CheckInstrument=False,
             rtol=1.0e-10,
         )
+
+    def test_calculateWeights():
+        """
+        Test that the weights match those from masking each peak window in turn,
+        including overlapping windows, windows at either end, and windows which contain no bins.
+        """
+        rng = np.random.default_rng(seed=1234)
+        x = np.sort(rng.uniform(0.5, 5.0, size=1001))
+        nBins = len(x) - 1
+        windows = [(lo, lo + width) for lo, width in zip(rng.uniform(0.0, 5.5, 40), rng.uniform(0.0, 0.2, 40))]
+        windows += [(0.0, x[3]), (x[nBins - 2], 6.0), (x[10], x[11]), (x[20], x[20])]
+
+        expected = np.ones(nBins)
+        for lo, hi in windows:
+            mask_indices = np.where(np.logical_and(x > lo, x < hi))[0]
+            expected[mask_indices[mask_indices < nBins]] = 0.0
+
+        weights = DiffractionSpectrumWeightCalculator.calculateWeights(x, nBins, windows)
+        assert np.array_equal(weights, expected)
+        # no peaks: no masking
+        assert np.array_equal(DiffractionSpectrumWeightCalculator.calculateWeights(x, nBins, ()), np.ones(nBins))
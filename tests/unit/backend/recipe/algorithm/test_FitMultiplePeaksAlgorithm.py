@@ -2,10 +2,12 @@ import os
 import unittest.mock as mock
 from typing import List
 
+import numpy as np
 import pydantic
+import pytest
 
 from snapred.backend.dao.request.FarmFreshIngredients import FarmFreshIngredients
-from snapred.meta.mantid.FitPeaksOutput import FIT_PEAK_DIAG_SUFFIX
+from snapred.meta.mantid.FitPeaksOutput import FIT_PEAK_DIAG_SUFFIX, FitOutputEnum
 
 with mock.patch.dict(
     "sys.modules",
@@ -14,10 +16,23 @@ with mock.patch.dict(
         "snapred.backend.log.logger": mock.Mock(),
     },
 ):
-    from mantid.simpleapi import CreateSingleValuedWorkspace, CreateWorkspace, LoadInstrument, LoadNexusProcessed, mtd
+    from mantid.simpleapi import (
+        CreateSampleWorkspace,
+        CreateSingleValuedWorkspace,
+        CreateWorkspace,
+        LoadInstrument,
+        LoadNexusProcessed,
+        mtd,
+    )
     from util.SculleryBoy import SculleryBoy
 
+    from snapred.backend.dao import CrystallographicPeak, DetectorPeak
+    from snapred.backend.dao.calibration.CalibrationMetric import CalibrationMetric
     from snapred.backend.dao.GroupPeakList import GroupPeakList
+    from snapred.backend.dao.state import PixelGroup, PixelGroupingParameters
+    from snapred.backend.recipe.algorithm.CalibrationMetricExtractionAlgorithm import (
+        CalibrationMetricExtractionAlgorithm,
+    )
     from snapred.backend.recipe.algorithm.FitMultiplePeaksAlgorithm import (
         FitMultiplePeaksAlgorithm,  # noqa: E402
     )
@@ -67,3 +82,160 @@ with mock.patch.dict(
         assert wsGroup == expected
         assert not mtd.doesExist("fitPeaksWSGroup_fitted_1")
         assert not mtd.doesExist("fitPeaksWSGroup_fitparam_1")
+
+    def test_execute_fitAllSpectra():
+        wsName = "testWS"
+        CreateWorkspace(
+            OutputWorkspace=wsName,
+            DataX=[1] * 6,
+            DataY=[1] * 6,
+            NSpec=6,
+        )
+        LoadInstrument(wsName, InstrumentName="SNAP", RewriteSpectraMap=True)
+        mockFarmFresh = mock.Mock(spec_set=FarmFreshIngredients)
+        peaks = SculleryBoy().prepDetectorPeaks(mockFarmFresh)
+        fmpAlgo = FitMultiplePeaksAlgorithm()
+        fmpAlgo.initialize()
+        fmpAlgo.setPropertyValue("InputWorkspace", wsName)
+        fmpAlgo.setProperty("DetectorPeaks", list_to_raw(peaks))
+        fmpAlgo.setProperty("FitAllSpectra", True)
+        fmpAlgo.execute()
+        wsGroupName = fmpAlgo.getProperty("OutputWorkspaceGroup").value
+        wsGroup = list(mtd[wsGroupName].getNames())
+        expected = [
+            f"{'__' if suffix == '_dspacing' else ''}{wsGroupName}{suffix}" for suffix in FIT_PEAK_DIAG_SUFFIX.values()
+        ]
+        assert wsGroup == expected
+
+    def test_execute_fitAllSpectra_noPeaks():
+        wsName = "testWS"
+        CreateWorkspace(
+            OutputWorkspace=wsName,
+            DataX=[1] * 6,
+            DataY=[1] * 6,
+            NSpec=6,
+        )
+        LoadInstrument(wsName, InstrumentName="SNAP", RewriteSpectraMap=True)
+        fmpAlgo = FitMultiplePeaksAlgorithm()
+        fmpAlgo.initialize()
+        fmpAlgo.setPropertyValue("InputWorkspace", wsName)
+        fmpAlgo.setProperty("DetectorPeaks", list_to_raw([]))
+        fmpAlgo.setProperty("FitAllSpectra", True)
+        with mock.patch.object(FitMultiplePeaksAlgorithm, "fitAllSpectra") as mockFitAllSpectra:
+            fmpAlgo.execute()
+        mockFitAllSpectra.assert_not_called()
+        wsGroupName = fmpAlgo.getProperty("OutputWorkspaceGroup").value
+        assert mtd[wsGroupName].size() == 0
+
+    def test_peakTables():
+        """Test that the peak tables for a single FitPeaks are padded to the same number of peaks"""
+        xtalPeak = CrystallographicPeak(hkl=(0, 0, 0), dSpacing=1.0, fSquared=1.0, multiplicity=1)
+        peaks = [
+            DetectorPeak(position={"value": d, "minimum": d - 0.05, "maximum": d + 0.05}, peak=xtalPeak)
+            for d in (0.5, 1.0, 1.5, 2.0)
+        ]
+        groupPeakLists = [
+            GroupPeakList(peaks=peaks, groupID=3),
+            GroupPeakList(peaks=peaks[:2], groupID=5),
+        ]
+        fmpAlgo = FitMultiplePeaksAlgorithm()
+        fmpAlgo.chopIngredients(groupPeakLists)
+        fmpAlgo.inputWorkspaceName = "testWS"
+        fmpAlgo.mantidSnapper = mock.Mock(mtd={"testWS": mock.Mock(readX=lambda index: [0.0, 1.0, 2.0 + index])})
+
+        # the third spectrum has no group
+        peakCenters, peakLimits = fmpAlgo.peakTables(3)
+
+        nPeaks = len(groupPeakLists[0].peaks)
+        assert peakCenters.shape == (3, nPeaks)
+        assert peakLimits.shape == (3, 2 * nPeaks)
+        for index, groupPeakList in enumerate(groupPeakLists):
+            count = len(groupPeakList.peaks)
+            assert list(peakCenters[index, :count]) == [peak.position.value for peak in groupPeakList.peaks]
+            assert list(peakLimits[index, 0 : 2 * count : 2]) == [peak.position.minimum for peak in groupPeakList.peaks]
+            assert list(peakLimits[index, 1 : 2 * count : 2]) == [peak.position.maximum for peak in groupPeakList.peaks]
+        # the padding peaks are beyond the end of the data
+        assert (peakCenters[1, 2:] > 4.0).all()
+        assert (peakCenters[2] > 4.0).all()
+        assert (peakLimits[1, 4:] > 4.0).all()
+        assert (peakLimits[2, 0::2] < peakCenters[2]).all()
+        assert (peakLimits[2, 1::2] > peakCenters[2]).all()
+
+    def test_cropLimits():
+        """Test that the cropping limits retain exactly the real peaks, without cutting at a peak center"""
+        padding = 10.0
+        peakCenters = np.array([[1.0, 1.5, 2.0], [1.0, 1.5, padding], [1.0, padding, padding]])
+        xMin, xMax = FitMultiplePeaksAlgorithm.cropLimits(peakCenters, [3, 2, 1])
+        for centers, count, low, high in zip(peakCenters, [3, 2, 1], xMin, xMax):
+            retained = centers[(centers > low) & (centers < high)]
+            assert list(retained) == list(centers[:count])
+
+    def test_fitAllSpectra_calibrationMetrics():
+        """Test that the ragged output of a single FitPeaks is accepted by CalibrationMetricExtractionAlgorithm"""
+        wsName = mtd.unique_name(prefix="_test_fitAllSpectra_")
+        centers = (1.0, 1.5, 2.0)
+        CreateSampleWorkspace(
+            OutputWorkspace=wsName,
+            Function="User Defined",
+            UserDefinedFunction=";".join(f"name=Gaussian,Height=100,PeakCentre={d},Sigma=0.01" for d in centers),
+            Xmin=0.5,
+            Xmax=2.5,
+            BinWidth=0.001,
+            XUnit="dSpacing",
+            NumBanks=2,
+            BankPixelWidth=1,
+        )
+        xtalPeak = CrystallographicPeak(hkl=(0, 0, 0), dSpacing=1.0, fSquared=1.0, multiplicity=1)
+
+        def detectorPeaks(ds):
+            return [
+                DetectorPeak(position={"value": d, "minimum": d - 0.05, "maximum": d + 0.05}, peak=xtalPeak) for d in ds
+            ]
+
+        # the groups have different numbers of peaks: the peak positions are ragged
+        groupPeakLists = [
+            GroupPeakList(peaks=detectorPeaks(centers), groupID=1),
+            GroupPeakList(peaks=detectorPeaks(centers[:2]), groupID=2),
+        ]
+        fmpAlgo = FitMultiplePeaksAlgorithm()
+        fmpAlgo.initialize()
+        fmpAlgo.setPropertyValue("InputWorkspace", wsName)
+        fmpAlgo.setProperty("DetectorPeaks", list_to_raw(groupPeakLists))
+        fmpAlgo.setProperty("FitAllSpectra", True)
+        fmpAlgo.execute()
+        wsGroupName = fmpAlgo.getProperty("OutputWorkspaceGroup").value
+
+        # the last real peak of each group is retained
+        peakPos = mtd[f"__{wsGroupName}{FIT_PEAK_DIAG_SUFFIX[FitOutputEnum.PeakPosition]}"]
+        assert list(peakPos.readX(0)) == pytest.approx(list(centers))
+        assert list(peakPos.readX(1)) == pytest.approx(list(centers[:2]))
+
+        pixelGroup = PixelGroup(
+            pixelGroupingParameters=[
+                PixelGroupingParameters(
+                    groupID=groupID,
+                    isMasked=False,
+                    L2=10.0,
+                    twoTheta=twoTheta * (np.pi / 180.0),
+                    azimuth=0.0,
+                    dResolution={"minimum": 0.1, "maximum": 0.2},
+                    dRelativeResolution=0.1,
+                )
+                for groupID, twoTheta in ((1, 30.0), (2, 40.0))
+            ],
+            focusGroup={"name": "something", "definition": "path/to/wherever"},
+            timeOfFlight={"minimum": 1.0, "maximum": 10.0, "binWidth": 1, "binningMode": 1},
+        )
+        metricAlgo = CalibrationMetricExtractionAlgorithm()
+        metricAlgo.initialize()
+        metricAlgo.setProperty("InputWorkspace", wsGroupName)
+        metricAlgo.setProperty("PixelGroup", pixelGroup.json())
+        metricAlgo.execute()
+        metrics = pydantic.TypeAdapter(List[CalibrationMetric]).validate_json(
+            metricAlgo.getProperty("OutputMetrics").value
+        )
+        assert len(metrics) == 2
+        for metric in metrics:
+            # the peaks are fitted at their expected positions
+            assert abs(metric.strainAverage) < 1.0
+            assert metric.sigmaAverage == pytest.approx(0.01 / 1.5, rel=0.5)
@@ -1,10 +1,16 @@
+import tempfile
+import threading
 import unittest
+from pathlib import Path
 from unittest import mock
 
 import pytest
 from mantid.kernel import Direction
+from util.Config_helpers import Config_override
 
-from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper
+from snapred.backend.error.AlgorithmException import AlgorithmException
+from snapred.backend.recipe.algorithm.MantidSnapper import MantidSnapper, PropertySchema, _CompletionObserver
+from snapred.backend.recipe.Pipeline import Pipeline
 from snapred.meta.Callback import callback
 
 PatchRoot: str = "snapred.backend.recipe.algorithm.MantidSnapper.{0}"
@@ -19,6 +25,14 @@ class TestMantidSnapper(unittest.TestCase):
         self.fakeFunction = mock.Mock()
         self.fakeFunction.getProperties.return_value = [self.fakeOutput]
         self.fakeFunction.getProperty.return_value = self.fakeOutput
+        self.fakeFunction.isRunning.return_value = False
+
+        # property schemas are cached by algorithm name and version
+        self.mockAlgorithmFactory = mock.patch(PatchRoot.format("AlgorithmFactory")).start()
+        self.mockAlgorithmFactory.highestVersion.return_value = 1
+        self.addCleanup(mock.patch.stopall)
+        MantidSnapper._propertySchemas.clear()
+        self.addCleanup(MantidSnapper._propertySchemas.clear)
 
     @mock.patch(PatchRoot.format("AlgorithmManager"))
     def test_snapper_fake_algo(self, mock_AlgorithmManager):
@@ -39,7 +53,10 @@ class TestMantidSnapper(unittest.TestCase):
 
     @mock.patch(PatchRoot.format("AlgorithmManager"))
     def test_timeout(self, mockAlgorithmManager):
-        mockAlgorithmManager.runningInstancesOf = mock.Mock(return_value=["theAlgoThatNeverEnds"])
+        # the algorithm that never ends
+        self.fakeFunction.isRunning.return_value = True
+        mockObserver = mock.patch(PatchRoot.format("_CompletionObserver")).start()
+        mockObserver.return_value.completed.wait.return_value = False
         mockAlgorithmManager.create.return_value = self.fakeFunction
 
         with (
@@ -59,7 +76,10 @@ class TestMantidSnapper(unittest.TestCase):
     @mock.patch(PatchRoot.format("AlgorithmManager"))
     def test_timeout_nonReentrant_mutex_released(self, mockAlgorithmManager):
         """Verify non-reentrant mutex is released even when _waitForAlgorithmCompletion raises TimeoutError."""
-        mockAlgorithmManager.runningInstancesOf = mock.Mock(return_value=["theAlgoThatNeverEnds"])
+        # the algorithm that never ends
+        self.fakeFunction.isRunning.return_value = True
+        mockObserver = mock.patch(PatchRoot.format("_CompletionObserver")).start()
+        mockObserver.return_value.completed.wait.return_value = False
         mockAlgorithmManager.create.return_value = self.fakeFunction
 
         fakeMutex = mock.Mock()
@@ -80,7 +100,10 @@ class TestMantidSnapper(unittest.TestCase):
 
     @mock.patch(PatchRoot.format("AlgorithmManager"))
     def test_timeout_concurrent(self, mockAlgorithmManager):
-        mockAlgorithmManager.runningInstancesOf = mock.Mock(return_value=["theAlgoThatNeverEnds"])
+        # the algorithm that never ends
+        self.fakeFunction.isRunning.return_value = True
+        mockObserver = mock.patch(PatchRoot.format("_CompletionObserver")).start()
+        mockObserver.return_value.completed.wait.return_value = False
         mockAlgorithmManager.create.return_value = self.fakeFunction
 
         with (
@@ -118,3 +141,304 @@ class TestMantidSnapper(unittest.TestCase):
             mantidSnapper.executeQueue()
             assert MantidSnapper._nonReentrantMutexes["fakeFunction"].acquire.called
             assert MantidSnapper._nonReentrantMutexes["fakeFunction"].release.called
+
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_propertySchema_cached(self, mockAlgorithmManager):
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+        fakeInOut = mock.Mock()
+        fakeInOut.name = "fakeInOut"
+        fakeInOut.direction = Direction.InOut
+        fakeInput = mock.Mock()
+        fakeInput.name = "fakeInput"
+        fakeInput.direction = Direction.Input
+        self.fakeFunction.getProperties.return_value = [fakeInput, fakeInOut, self.fakeOutput]
+
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        outputs = mantidSnapper.fakeFunction("test", fakeInput="input")
+        assert not isinstance(outputs, tuple)
+        outputs = mantidSnapper.fakeFunction("test", fakeInput="input", fakeInOut="inOut")
+        assert set(outputs._fields) == {"fakeInOut", "fakeOutput"}
+        MantidSnapper(parentAlgorithm=None, name="").fakeFunction("test")
+
+        # the algorithm is instantiated only once to read its schema, and the instance is removed
+        mockAlgorithmManager.create.assert_called_once_with("fakeFunction")
+        mockAlgorithmManager.removeById.assert_called_once()
+
+        # a new version of the algorithm is inspected again
+        self.mockAlgorithmFactory.highestVersion.return_value = 2
+        mantidSnapper.fakeFunction("test")
+        assert mockAlgorithmManager.create.call_count == 2
+
+        # only executing an algorithm creates a new instance
+        mantidSnapper.executeQueue()
+        assert mockAlgorithmManager.create.call_count == 2 + 3
+
+    def test_workspaceArguments(self):
+        MantidSnapper._propertySchemas[("fakeFunction", 1)] = {
+            "InputWorkspace": PropertySchema("InputWorkspace", Direction.Input, "MatrixWorkspace", False, True),
+            "InOutWorkspace": PropertySchema("InOutWorkspace", Direction.InOut, "MatrixWorkspace", False, True),
+            "OutputWorkspace": PropertySchema("OutputWorkspace", Direction.Output, "MatrixWorkspace", False, True),
+            "OptionalWorkspace": PropertySchema("OptionalWorkspace", Direction.Output, "MatrixWorkspace", False, True),
+            "Target": PropertySchema("Target", Direction.Input, "string", False, False),
+        }
+        outputCallback = callback(str)
+        outputCallback.update("output")
+        inputs, outputs = MantidSnapper._workspaceArguments(
+            "fakeFunction",
+            {
+                "InputWorkspace": "input",
+                "InOutWorkspace": "inOut",
+                "OutputWorkspace": outputCallback,
+                "OptionalWorkspace": "",
+                "Target": "dSpacing",
+            },
+        )
+        assert inputs == ["input", "inOut"]
+        assert outputs == ["inOut", "output"]
+
+    @mock.patch(PatchRoot.format("AlgorithmTracer"))
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_executeQueue_tracing(self, mockAlgorithmManager, mockAlgorithmTracer):
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+        mockAlgorithmTracer.callerScope.return_value = ("Recipe", "Service")
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        mantidSnapper.fakeFunction("test", fakeOutput="output")
+        with mock.patch.object(MantidSnapper, "_workspaceArguments", return_value=(["input"], ["output"])):
+            mockAlgorithmTracer.enabled = False
+            mantidSnapper.executeQueue()
+            mockAlgorithmTracer.record.assert_not_called()
+
+            mockAlgorithmTracer.enabled = True
+            mantidSnapper.fakeFunction("test", fakeOutput="output")
+            mantidSnapper.executeQueue()
+        mockAlgorithmTracer.record.assert_called_once_with(
+            "fakeFunction", "test", ["input"], ["output"], ("Recipe", "Service")
+        )
+        mockAlgorithmTracer.record.return_value.__enter__.assert_called_once()
+
+    @mock.patch(PatchRoot.format("AlgorithmRecorder"))
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_executeQueue_capture(self, mockAlgorithmManager, mockAlgorithmRecorder):
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        with mock.patch.object(MantidSnapper, "_workspaceArguments", return_value=(["input"], ["output"])):
+            mockAlgorithmRecorder.enabled = False
+            mantidSnapper.fakeFunction("test", fakeOutput="output")
+            mantidSnapper.executeQueue()
+            mockAlgorithmRecorder.record.assert_not_called()
+
+            # an algorithm executed by a captured algorithm is not captured
+            mockAlgorithmRecorder.enabled = True
+            mockAlgorithmRecorder.recording = True
+            mantidSnapper.fakeFunction("test", fakeOutput="output")
+            mantidSnapper.executeQueue()
+            mockAlgorithmRecorder.record.assert_not_called()
+
+            mockAlgorithmRecorder.recording = False
+            mantidSnapper.fakeFunction("test", fakeOutput="output")
+            mantidSnapper.executeQueue()
+        mockAlgorithmRecorder.record.assert_called_once_with(
+            "fakeFunction", "test", {"fakeOutput": "output"}, ["output"]
+        )
+        mockAlgorithmRecorder.record.return_value.__enter__.assert_called_once()
+
+    @mock.patch(PatchRoot.format("QueueOptimizer"))
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_executeQueue_optimized(self, mockAlgorithmManager, mockQueueOptimizer):
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+        self.fakeFunction.getProperty.return_value = mock.Mock(value="output")
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        output = mantidSnapper.fakeFunction("test", fakeOutput="output")
+        removed = mantidSnapper.fakeFunction("removed", fakeOutput="output")
+        queue = list(mantidSnapper._algorithmQueue)
+        mockQueueOptimizer.return_value.optimize.return_value = (queue[:1], [(output, removed)])
+
+        mantidSnapper.executeQueue()
+        mockQueueOptimizer.return_value.optimize.assert_called_once_with(queue)
+        assert self.fakeFunction.execute.call_count == 1
+        # the removed algorithm's output is taken from the algorithm that replaced it
+        assert removed.get() == output.get() == "output"
+
+        with Config_override("recipe.queue.optimization.enabled", False):
+            mantidSnapper.fakeFunction("test", fakeOutput="output")
+            mantidSnapper.fakeFunction("test", fakeOutput="output")
+            mantidSnapper.executeQueue()
+        mockQueueOptimizer.return_value.optimize.assert_called_once()
+        assert self.fakeFunction.execute.call_count == 3
+
+    def _workspaceSchema(self):
+        MantidSnapper._propertySchemas[("fakeFunction", 1)] = {
+            "InputWorkspace": PropertySchema("InputWorkspace", Direction.Input, "MatrixWorkspace", False, True),
+            "OutputWorkspace": PropertySchema("OutputWorkspace", Direction.Output, "MatrixWorkspace", False, True),
+            "InOutWorkspace": PropertySchema("InOutWorkspace", Direction.InOut, "MatrixWorkspace", False, True),
+            "Target": PropertySchema("Target", Direction.Input, "string", False, False),
+        }
+        MantidSnapper._propertySchemas[("WashDishes", 1)] = {
+            "Workspace": PropertySchema("Workspace", Direction.Input, "string", False, False),
+            "WorkspaceList": PropertySchema("WorkspaceList", Direction.Input, "str list", False, False),
+        }
+
+    def test_queueDependencies(self):
+        self._workspaceSchema()
+        produced = callback(str)
+        unresolved = callback(str)
+        queue = [
+            ("fakeFunction", "", {"InputWorkspace": "a", "OutputWorkspace": "b", "Target": "c"}, {"out": produced}),
+            ("fakeFunction", "", {"InputWorkspace": produced, "InOutWorkspace": "b_group"}, {}),
+            ("WashDishes", "", {"Workspace": "b", "WorkspaceList": ["a", "notAWorkspace"]}, {}),
+            ("fakeFunction", "", {"InputWorkspace": unresolved, "OutputWorkspace": "d"}, {}),
+        ]
+        token = f"<callback {id(produced)}>"
+        assert MantidSnapper._queueDependencies(queue) == [
+            ({"*", "a"}, {"b", token}),
+            # "b_group" may be derived from "b"
+            ({"*", token, "b_group", "b"}, {"b_group", "b"}),
+            ({"*"}, {"a", "b"}),
+            # an unresolved argument is a barrier
+            ({"*"}, {"*", "d"}),
+        ]
+
+    def test_queueDependencies_inPlace(self):
+        self._workspaceSchema()
+        loaded = callback(str)
+        converted = callback(str)
+        queue = [
+            ("fakeFunction", "load", {"OutputWorkspace": "ws"}, {"OutputWorkspace": loaded}),
+            (
+                "fakeFunction",
+                "convert in place",
+                {"InputWorkspace": loaded, "OutputWorkspace": loaded},
+                {"OutputWorkspace": converted},
+            ),
+            ("fakeFunction", "save", {"InputWorkspace": loaded}, {}),
+            ("WashDishes", "wash", {"Workspace": "ws"}, {}),
+        ]
+        token = f"<callback {id(loaded)}>"
+        dependencies = MantidSnapper._queueDependencies(queue)
+        # a produced callback stands for both its producer's output and the name of the workspace
+        assert dependencies[1] == ({"*", token, "ws"}, {token, "ws", f"<callback {id(converted)}>"})
+        assert dependencies[2] == ({"*", token, "ws"}, set())
+
+        pipeline = Pipeline(lambda _ws: None, maxWorkers=2)
+        for n, (reads, writes) in enumerate(dependencies):
+            pipeline.addStep(str(n), lambda: None, reads=reads, writes=writes)
+        assert pipeline.dependencies() == {"0": set(), "1": {"0"}, "2": {"0", "1"}, "3": {"0", "1", "2"}}
+
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_executeQueue_concurrent(self, mockAlgorithmManager):
+        self._workspaceSchema()
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        mantidSnapper.maxWorkers = 2
+
+        # independent algorithms run concurrently: neither can complete unless both are running
+        barrier = threading.Barrier(2, timeout=10.0)
+        executed = []
+
+        def _execute(name, outputs, **kwargs):  # noqa: ARG001
+            if kwargs["OutputWorkspace"] in ("a", "b"):
+                barrier.wait()
+            executed.append(kwargs["OutputWorkspace"])
+
+        mantidSnapper.fakeFunction("a", InputWorkspace="input", OutputWorkspace="a")
+        mantidSnapper.fakeFunction("b", InputWorkspace="input", OutputWorkspace="b")
+        mantidSnapper.fakeFunction("c", InputWorkspace="a", InOutWorkspace="b", OutputWorkspace="c")
+        with mock.patch.object(mantidSnapper, "executeAlgorithm", side_effect=_execute):
+            mantidSnapper.executeQueue()
+        assert sorted(executed[:2]) == ["a", "b"]
+        assert executed[2] == "c"
+        assert mantidSnapper._algorithmQueue == []
+
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_executeQueue_concurrent_failure(self, mockAlgorithmManager):
+        self._workspaceSchema()
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+        mantidSnapper = MantidSnapper(parentAlgorithm=None, name="")
+        mantidSnapper.maxWorkers = 2
+
+        # both independent algorithms fail while running concurrently
+        barrier = threading.Barrier(2, timeout=10.0)
+
+        def _createAlgorithm(name):  # noqa: ARG001
+            algorithm = mock.Mock()
+            algorithm.execute.side_effect = lambda: barrier.wait() and False
+            return algorithm
+
+        cleanupThreads = []
+        mantidSnapper.fakeFunction("a", InputWorkspace="input", OutputWorkspace="a")
+        mantidSnapper.fakeFunction("b", InputWorkspace="input", OutputWorkspace="b")
+        with (
+            mock.patch.object(MantidSnapper, "_createAlgorithm", side_effect=_createAlgorithm),
+            mock.patch.object(
+                mantidSnapper, "cleanup", side_effect=lambda: cleanupThreads.append(threading.current_thread())
+            ),
+            pytest.raises(AlgorithmException),
+        ):
+            mantidSnapper.executeQueue()
+        # cleanup is deferred until every running algorithm is complete
+        assert cleanupThreads == [threading.current_thread()]
+        assert not mantidSnapper._executingConcurrently
+
+    @mock.patch(PatchRoot.format("_CompletionObserver"))
+    def test_waitForAlgorithmCompletion(self, mockObserver):
+        algorithm = mock.Mock()
+        algorithm.isRunning.return_value = False
+        MantidSnapper._waitForAlgorithmCompletion("fakeFunction", algorithm)
+        mockObserver.assert_not_called()
+
+        # completion is signalled by the observer
+        algorithm.isRunning.return_value = True
+        mockObserver.return_value.completed.wait.return_value = True
+        MantidSnapper._waitForAlgorithmCompletion("fakeFunction", algorithm)
+        mockObserver.return_value.observeFinish.assert_called_once_with(algorithm)
+        mockObserver.return_value.observeError.assert_called_once_with(algorithm)
+        mockObserver.return_value.completed.wait.assert_called_once_with(MantidSnapper._timeout)
+        mockObserver.return_value.stopObserving.assert_called_once_with(algorithm)
+
+        # the algorithm completed before the observer was attached
+        mockObserver.reset_mock()
+        algorithm.isRunning.side_effect = [True, False]
+        MantidSnapper._waitForAlgorithmCompletion("fakeFunction", algorithm)
+        mockObserver.return_value.completed.wait.assert_not_called()
+
+    def test_completionObserver(self):
+        observer = _CompletionObserver()
+        assert not observer.completed.is_set()
+        observer.finishHandle()
+        assert observer.completed.is_set()
+        observer = _CompletionObserver()
+        observer.errorHandle("failed")
+        assert observer.completed.is_set()
+
+    def test_obtainMutex_savers(self):
+        with tempfile.TemporaryDirectory(prefix=Path(__file__).name) as tmpDir:
+            fileA, fileB = str(Path(tmpDir) / "a.nxs"), str(Path(tmpDir) / "b.nxs")
+            mutexA = MantidSnapper._obtainMutex("SaveNexus", {"Filename": fileA})
+            # the lock is per file, for all savers
+            assert MantidSnapper._obtainMutex("SaveNexusESS", {"Filename": fileA}) is mutexA
+            assert MantidSnapper._obtainMutex("SaveDiffCal", {"Filename": str(Path(tmpDir) / "." / "a.nxs")}) is mutexA
+            assert MantidSnapper._obtainMutex("SaveNexus", {"Filename": fileB}) is not mutexA
+            assert MantidSnapper._obtainMutex("SaveNexus", {}) is MantidSnapper._nonConcurrentAlgorithmMutex
+
+        assert MantidSnapper._obtainMutex("RenameWorkspace", {"InputWorkspace": "a"}) is MantidSnapper._renameMutex
+        assert MantidSnapper._obtainMutex("LoadLiveData") is MantidSnapper._liveDataLock
+        assert MantidSnapper._obtainMutex("Rebin") is None
+
+    @mock.patch(PatchRoot.format("AlgorithmManager"))
+    def test_savers_concurrent(self, mockAlgorithmManager):
+        # savers writing to different files can run at the same time
+        barrier = threading.Barrier(2, timeout=10.0)
+        self.fakeFunction.execute.side_effect = lambda: barrier.wait() is not None
+        mockAlgorithmManager.create.return_value = self.fakeFunction
+
+        def _save(filename):
+            MantidSnapper(parentAlgorithm=None, name="").executeAlgorithm("SaveNexus", {}, Filename=filename)
+
+        with tempfile.TemporaryDirectory(prefix=Path(__file__).name) as tmpDir:
+            threads = [threading.Thread(target=_save, args=(str(Path(tmpDir) / f"{n}.nxs"),)) for n in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert self.fakeFunction.execute.call_count == 2
+        assert not barrier.broken
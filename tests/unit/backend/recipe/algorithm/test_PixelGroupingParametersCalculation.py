@@ -6,7 +6,9 @@ import socket
 import unittest
 from pathlib import Path
 from typing import Dict, List
+from unittest import mock
 
+import numpy as np
 import pydantic
 import pytest
 from mantid.simpleapi import (
@@ -334,6 +336,52 @@ class PixelGroupCalculation(unittest.TestCase):
         assert algo.delL == algo.L * algo.delLOverL
         assert algo.deltaTheta == self.localInstrumentState.deltaTheta
 
+    def test_groupGeometry(self):
+        # a fake detector table, including a monitor, masked pixels, and a fully-masked group
+        rng = np.random.default_rng(seed=2468)
+        nDetectors = 50
+        detIDs = np.arange(nDetectors) + 100
+        twoTheta = rng.uniform(0.1, np.pi, nDetectors)
+        L2 = rng.uniform(0.5, 1.5, nDetectors)
+        phi = rng.uniform(-np.pi, np.pi, nDetectors)
+        isMonitor = np.zeros(nDetectors, dtype=bool)
+        isMonitor[0] = True
+        isMasked = rng.uniform(size=nDetectors) < 0.2
+        groups = {1: detIDs[:20], 2: detIDs[20:45], 3: detIDs[45:]}
+        isMasked[45:] = True
+
+        # `PreprocessDetectorsToMD` excludes monitors, leaving its unused rows at the end of the table
+        rows = rng.permutation(np.flatnonzero(~isMonitor))
+        unused = np.full(isMonitor.sum(), np.nan)
+        columns = {
+            "DetectorID": np.concatenate([detIDs[rows], np.zeros(len(unused), dtype=int)]).tolist(),
+            "L2": np.concatenate([L2[rows], unused]).tolist(),
+            "TwoTheta": np.concatenate([twoTheta[rows], unused]).tolist(),
+            "Azimuthal": np.concatenate([phi[rows], unused]).tolist(),
+            "detMask": np.concatenate([isMasked[rows].astype(int), np.zeros(len(unused), dtype=int)]).tolist(),
+        }
+        detectorTable = mock.Mock(column=lambda name: columns[name])
+        groupingWS = mock.Mock(
+            getDetectorIDsOfGroup=lambda groupID: groups[groupID],
+        )
+
+        actual = ThisAlgo().groupGeometry(groupingWS, detectorTable, list(groups.keys()))
+
+        for groupIndex, groupDetIDs in enumerate(groups.values()):
+            indices = [i for i in groupDetIDs - 100 if not (isMonitor[i] or isMasked[i])]
+            weights = np.sin(twoTheta[indices] / 2.0)
+            assert actual[0][groupIndex] == len(indices)
+            if not indices:
+                assert actual[1][groupIndex] == actual[2][groupIndex] == actual[3][groupIndex] == 0.0
+                assert actual[4][groupIndex] == 2.0 * np.pi
+                assert actual[5][groupIndex] == 0.0
+                continue
+            assert actual[1][groupIndex] == pytest.approx(np.sum(L2[indices] * weights) / np.sum(weights))
+            assert actual[2][groupIndex] == pytest.approx(np.sum(twoTheta[indices] * weights) / np.sum(weights))
+            assert actual[3][groupIndex] == pytest.approx(np.sum(phi[indices] * weights) / np.sum(weights))
+            assert actual[4][groupIndex] == np.min(twoTheta[indices])
+            assert actual[5][groupIndex] == np.max(twoTheta[indices])
+
     def run_test(self, instrumentState, groupingWorkspace, maskWorkspace, referenceParametersFile):
         pixelGroupingParams_calc = self.createPixelGroupingParameters(instrumentState, groupingWorkspace, maskWorkspace)
         self.compareToReference(pixelGroupingParams_calc, referenceParametersFile)
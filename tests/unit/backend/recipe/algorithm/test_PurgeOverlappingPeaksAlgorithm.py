@@ -1,9 +1,10 @@
 import unittest.mock as mock
 
+import numpy as np
 from util.dao import DAOFactory
 from util.diffraction_calibration_synthetic_data import SyntheticData
 
-from snapred.backend.dao import GroupPeakList
+from snapred.backend.dao import CrystallographicPeak, DetectorPeak, GroupPeakList
 
 with mock.patch.dict(
     "sys.modules",
@@ -43,3 +44,40 @@ with mock.patch.dict(
 
         expected_pos_json = json.loads(Resource.read("/outputs/purge_peaks/peaks.json"))
         assert expected_pos_json == actual_pos_json
+
+    def _adjacentPurge(peakList):
+        # the original pairwise purge, over peaks in order
+        nPks = len(peakList)
+        keep = [True for i in range(nPks)]
+        outputPeakList = []
+        for i in range(nPks - 1):
+            if keep[i]:
+                if peakList[i].position.maximum >= peakList[i + 1].position.minimum:
+                    keep[i] = False
+                    keep[i + 1] = False
+                else:
+                    outputPeakList.append(peakList[i])
+        if nPks > 0 and keep[-1]:
+            outputPeakList.append(peakList[-1])
+        return outputPeakList
+
+    def test_purgeOverlappingPeaks():
+        xtalPeak = CrystallographicPeak(hkl=(0, 0, 0), dSpacing=1.0, fSquared=1.0, multiplicity=1)
+        rng = np.random.default_rng(seed=5678)
+        centers = np.sort(rng.uniform(0.5, 5.0, size=500))
+        # include runs of several consecutive overlapping peaks
+        widths = rng.uniform(0.0, 0.02, size=500)
+        peaks = [
+            DetectorPeak(position={"value": d, "minimum": d - w, "maximum": d + w}, peak=xtalPeak)
+            for d, w in zip(centers, widths)
+        ]
+        expected = _adjacentPurge(peaks)
+        assert 0 < len(expected) < len(peaks)
+
+        purgeAlgo = PurgeOverlappingPeaksAlgorithm()
+        assert purgeAlgo.purgeOverlappingPeaks(peaks) == expected
+        # the result does not depend on the input order
+        assert purgeAlgo.purgeOverlappingPeaks(peaks[::-1]) == expected
+        # duplicate peaks are removed
+        assert purgeAlgo.purgeOverlappingPeaks(peaks[:1] * 3) == peaks[:1]
+        assert purgeAlgo.purgeOverlappingPeaks([]) == []
@@ -1,7 +1,9 @@
 import unittest
 
+import numpy as np
 from mantid.simpleapi import (
     ConvertToEventWorkspace,
+    CreateWorkspace,
     Rebin,
     mtd,
 )
@@ -153,3 +155,59 @@ class TestRemoveSmoothedBackground(unittest.TestCase):
         )
         utensils.mantidSnapper.executeQueue()
         assert "output_test_ws" in mtd
+
+    def test_scaledBackground(self):
+        class _Spectra:
+            # the Y-values of a workspace, by workspace index
+            def __init__(self, Y):
+                self.Y = Y
+
+            def readY(self, index):
+                return self.Y[index]
+
+        rng = np.random.default_rng(12345)
+        nBins = 50
+        groupDetectorIDs = {2: [0, 1, 2, 3, 4], 7: [5, 6, 7]}
+        pixels = rng.uniform(0.0, 10.0, (8, nBins))
+        focused = rng.uniform(1.0, 10.0, (2, nBins))
+        smoothed = rng.uniform(0.0, 10.0, (2, nBins))
+
+        # the direct calculation: one pixel at a time
+        expected = pixels.copy()
+        for wkspindx, detids in enumerate(groupDetectorIDs.values()):
+            scale_denom = sum(focused[wkspindx]) / nBins
+            for detid in detids:
+                y_new = expected[detid] - (sum(expected[detid]) / nBins / scale_denom) * smoothed[wkspindx]
+                y_new[y_new < 0] = 0
+                expected[detid] = y_new
+        assert (expected == 0).any()
+
+        algo = Algo()
+        algo.groupDetectorIDs = groupDetectorIDs
+        algo.groupIDs = list(groupDetectorIDs.keys())
+        background = algo.scaledBackground(pixels, _Spectra(focused), _Spectra(smoothed))
+        np.testing.assert_allclose(pixels - background, expected, rtol=1.0e-12, atol=1.0e-12)
+        # the background is clipped: no result is negative
+        assert (pixels - background >= 0.0).all()
+
+    def test_subtractBackground(self):
+        # the subtraction, in a workspace: the errors are unchanged
+        CreateWorkspace(
+            OutputWorkspace="data",
+            DataX=np.tile(np.arange(4.0), 2),
+            DataY=[4.0, 4.0, 4.0, 1.0, 1.0, 1.0],
+            DataE=[2.0, 2.0, 2.0, 1.0, 1.0, 1.0],
+            NSpec=2,
+            UnitX="TOF",
+        )
+        CreateWorkspace(OutputWorkspace="focused", DataX=np.arange(4.0), DataY=[2.0, 2.0, 2.0], NSpec=1, UnitX="TOF")
+        CreateWorkspace(OutputWorkspace="smoothed", DataX=np.arange(4.0), DataY=[1.0, 3.0, 1.0], NSpec=1, UnitX="TOF")
+
+        algo = Algo()
+        algo.groupDetectorIDs = {2: [0, 1]}
+        algo.groupIDs = [2]
+        algo.subtractBackground("data", mtd["focused"], mtd["smoothed"])
+        np.testing.assert_allclose(mtd["data"].extractY(), [[2.0, 0.0, 2.0], [0.5, 0.0, 0.5]])
+        np.testing.assert_allclose(mtd["data"].extractE(), [[2.0, 2.0, 2.0], [1.0, 1.0, 1.0]])
+        # the scaled background has been deleted
+        assert not [name for name in mtd.getObjectNames() if name.startswith("bkgr_")]
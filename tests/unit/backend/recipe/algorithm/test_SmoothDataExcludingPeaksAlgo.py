@@ -1,12 +1,14 @@
 import unittest
 from unittest import mock
 
+import numpy as np
 from mantid.simpleapi import (
     CreateWorkspace,
     DeleteWorkspace,
     LoadNexusProcessed,
     mtd,
 )
+from util.Config_helpers import Config_override
 from util.SculleryBoy import SculleryBoy
 
 from snapred.backend.dao.request import FarmFreshIngredients
@@ -86,3 +88,28 @@ class TestSmoothDataAlgo(unittest.TestCase):
         smoothDataAlgo.setProperty("DetectorPeaks", create_pointer(peaks))
         smoothDataAlgo.setProperty("SmoothingParameter", 0.9)
         assert smoothDataAlgo.execute()
+
+    def test_SmoothDataExcludingPeaksAlgo_concurrent(self):
+        # the spectra fitted concurrently are the same as those fitted one at a time
+        testWorkspaceFile = "inputs/strip_peaks/DSP_58882_cal_CC_Column_spectra.nxs"
+        test_ws_name = "test_ws"
+        LoadNexusProcessed(
+            Filename=Resource.getPath(testWorkspaceFile),
+            OutputWorkspace=test_ws_name,
+        )
+        peaks = SculleryBoy().prepDetectorPeaks(mock.Mock(spec_set=FarmFreshIngredients))
+
+        outputs = []
+        for maxWorkers in (1, 4):
+            outputWs = f"_output_{maxWorkers}"
+            smoothDataAlgo = Algo()
+            smoothDataAlgo.initialize()
+            smoothDataAlgo.setPropertyValue("InputWorkspace", test_ws_name)
+            smoothDataAlgo.setPropertyValue("OutputWorkspace", outputWs)
+            smoothDataAlgo.setProperty("DetectorPeaks", create_pointer(peaks))
+            smoothDataAlgo.setProperty("SmoothingParameter", 0.9)
+            with Config_override("constants.SmoothDataExcludingPeaks.maxWorkers", maxWorkers):
+                assert smoothDataAlgo.execute()
+            outputs.append(mtd[outputWs].extractY())
+        assert mtd[test_ws_name].getNumberHistograms() > 1
+        assert np.array_equal(outputs[0], outputs[1])
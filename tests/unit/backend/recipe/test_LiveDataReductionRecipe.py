@@ -0,0 +1,188 @@
+import time
+from unittest import TestCase, mock
+
+import pytest
+from util.Config_helpers import Config_override
+
+from snapred.backend.dao.ingredients import ReductionIngredients
+from snapred.backend.dao.state import FocusGroup, PixelGroup
+from snapred.backend.recipe.LiveDataReductionRecipe import (
+    ApplyNormalizationRecipe,
+    GenerateFocussedVanadiumRecipe,
+    LiveDataReductionRecipe,
+    PreprocessReductionRecipe,
+    ReductionGroupProcessingRecipe,
+)
+from snapred.meta.mantid.WorkspaceNameGenerator import WorkspaceNameGenerator as wng
+
+ModulePatch = "snapred.backend.recipe.LiveDataReductionRecipe.{0}"
+
+
+class LiveDataReductionRecipeTest(TestCase):
+    def setUp(self):
+        # the workspaces which "exist" in the ADS
+        self.resident = set()
+
+        self.recipe = LiveDataReductionRecipe(utensils=mock.Mock())
+        self.recipe.mantidSnapper = mock.Mock()
+        self.recipe.mantidSnapper.mtd.doesExist.side_effect = lambda ws: ws in self.resident
+
+        self.recipe.ingredients = mock.Mock(
+            spec=ReductionIngredients,
+            runNumber="12345",
+            useLiteMode=True,
+            timestamp=time.time(),
+            pixelGroups=[
+                mock.Mock(spec=PixelGroup, focusGroup=FocusGroup(name="Column", definition="column")),
+                mock.Mock(spec=PixelGroup, focusGroup=FocusGroup(name="Bank", definition="bank")),
+            ],
+            artificialNormalizationIngredients=None,
+            isDiagnostic=False,
+        )
+        self.recipe.sampleWs = "sample"
+        self.recipe.maskWs = ""
+        self.recipe.normalizationWs = wng.rawVanadium().runNumber("12345").build()
+        self.recipe.groupingWorkspaces = ["column", "bank"]
+
+        self.recipe._applyRecipe = mock.Mock(side_effect=self._applyRecipe)
+        self.recipe._cloneWorkspace = mock.Mock()
+        self.recipe._deleteWorkspace = mock.Mock(side_effect=lambda ws: self.resident.discard(ws))
+
+    def _applyRecipe(self, recipe, ingredients, **groceries):  # noqa: ARG002
+        if "outputWorkspace" in groceries:
+            self.resident.add(groceries["outputWorkspace"])
+
+    def _execute(self):
+        with mock.patch(ModulePatch.format("WriteWorkspaceMetadata")):
+            return self.recipe.execute()
+
+    def _names(self, groupingIndex):
+        name = self.recipe.ingredients.pixelGroups[groupingIndex].focusGroup.name.lower()
+        output, _ = self.recipe._generateWorkspaceNamesForGroup(groupingIndex)
+        return (
+            self.recipe._getAccumulatorWorkspaceName(groupingIndex),
+            self.recipe._getFocussedVanadiumWorkspaceName(groupingIndex),
+            output,
+            name,
+        )
+
+    def test_workspaceNames(self):
+        accumulator, vanadium, _, name = self._names(0)
+        assert accumulator == (
+            wng.reductionLiveDataAccumulator()
+            .group(name)
+            .runNumber("12345")
+            .timestamp(self.recipe.ingredients.timestamp)
+            .build()
+        )
+        assert vanadium == (
+            wng.reductionLiveDataNormalization()
+            .group(name)
+            .runNumber("12345")
+            .timestamp(self.recipe.ingredients.timestamp)
+            .build()
+        )
+
+    def test_execute_firstChunk(self):
+        result = self._execute()
+
+        ingredients = self.recipe.ingredients
+        self.recipe._applyRecipe.assert_any_call(
+            PreprocessReductionRecipe, ingredients.preprocess(), inputWorkspace=self.recipe.sampleWs
+        )
+        for groupingIndex in (0, 1):
+            accumulator, vanadium, output, _ = self._names(groupingIndex)
+            # the chunk is focused directly into the accumulator, without normalization by current
+            self.recipe._applyRecipe.assert_any_call(
+                ReductionGroupProcessingRecipe,
+                ingredients.groupProcessing(groupingIndex, normalizeByCurrent=False),
+                inputWorkspace=self.recipe.sampleWs,
+                outputWorkspace=accumulator,
+                groupingWorkspace=self.recipe.groupingWorkspaces[groupingIndex],
+            )
+            self.recipe._applyRecipe.assert_any_call(
+                GenerateFocussedVanadiumRecipe,
+                ingredients.generateFocussedVanadium(groupingIndex),
+                inputWorkspace=vanadium,
+                outputWorkspace=vanadium,
+            )
+            self.recipe._cloneWorkspace.assert_any_call(accumulator, output)
+            self.recipe._applyRecipe.assert_any_call(
+                ApplyNormalizationRecipe,
+                ingredients.applyNormalization(groupingIndex),
+                inputWorkspace=output,
+                normalizationWorkspace=vanadium,
+            )
+        self.recipe.mantidSnapper.Plus.assert_not_called()
+        assert self.recipe.mantidSnapper.NormalizeByCurrentButTheCorrectWay.call_count == 2
+
+        assert result["result"]
+        assert result["outputs"] == [self._names(n)[2].builder.hidden(False).build() for n in (0, 1)]
+        assert set(result["retainedWorkspaces"]) == {self._names(n)[m] for n in (0, 1) for m in (0, 1)}
+
+    def test_execute_nextChunk(self):
+        for groupingIndex in (0, 1):
+            accumulator, vanadium, _, _ = self._names(groupingIndex)
+            self.resident.update((accumulator, vanadium))
+
+        result = self._execute()
+
+        # the normalization data is not processed again
+        for call in self.recipe._applyRecipe.call_args_list:
+            assert call.args[0] != GenerateFocussedVanadiumRecipe
+            assert call.kwargs["inputWorkspace"] != self.recipe.normalizationWs
+
+        for groupingIndex in (0, 1):
+            accumulator, vanadium, output, _ = self._names(groupingIndex)
+            self.recipe._applyRecipe.assert_any_call(
+                ReductionGroupProcessingRecipe,
+                self.recipe.ingredients.groupProcessing(groupingIndex, normalizeByCurrent=False),
+                inputWorkspace=self.recipe.sampleWs,
+                outputWorkspace=output,
+                groupingWorkspace=self.recipe.groupingWorkspaces[groupingIndex],
+            )
+            self.recipe.mantidSnapper.Plus.assert_any_call(
+                mock.ANY, LHSWorkspace=accumulator, RHSWorkspace=output, OutputWorkspace=accumulator
+            )
+            self.recipe._applyRecipe.assert_any_call(
+                ApplyNormalizationRecipe,
+                self.recipe.ingredients.applyNormalization(groupingIndex),
+                inputWorkspace=output,
+                normalizationWorkspace=vanadium,
+            )
+        assert result["result"]
+        assert len(result["retainedWorkspaces"]) == 4
+
+    def test_execute_artificialNormalization(self):
+        self.recipe.normalizationWs = ""
+        self.recipe.ingredients.artificialNormalizationIngredients = mock.Mock()
+
+        with Config_override("reduction.output.useEffectiveInstrument", False):
+            result = self._execute()
+
+        for groupingIndex in (0, 1):
+            accumulator, _, output, _ = self._names(groupingIndex)
+            normalization = self.recipe._getNormalizationWorkspaceName(groupingIndex)
+            # the artificial normalization is regenerated from the accumulated data
+            self.recipe._applyRecipe.assert_any_call(
+                GenerateFocussedVanadiumRecipe,
+                self.recipe.ingredients.generateFocussedVanadium(groupingIndex),
+                inputWorkspace=output,
+                outputWorkspace=normalization,
+            )
+            self.recipe._deleteWorkspace.assert_any_call(normalization)
+        assert result["retainedWorkspaces"] == [self._names(n)[0] for n in (0, 1)]
+
+    def test_execute_failure(self):
+        # an incomplete accumulation is deleted
+        def _applyRecipe(recipe, ingredients, **groceries):
+            if recipe == ApplyNormalizationRecipe:
+                raise RuntimeError("boom")
+            self._applyRecipe(recipe, ingredients, **groceries)
+
+        self.recipe._applyRecipe.side_effect = _applyRecipe
+        with pytest.raises(RuntimeError, match="boom"):
+            self._execute()
+        accumulator, vanadium, _, _ = self._names(0)
+        self.recipe._deleteWorkspace.assert_any_call(accumulator)
+        assert not {accumulator, vanadium} & self.resident
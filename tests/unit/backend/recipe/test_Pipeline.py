@@ -0,0 +1,160 @@
+import threading
+from unittest import TestCase, mock
+
+import pytest
+from util.Config_helpers import Config_override
+
+from snapred.backend.recipe.Pipeline import Pipeline
+
+
+class TestPipeline(TestCase):
+    def setUp(self):
+        self.events = []
+        self.deleteWorkspace = mock.Mock(side_effect=lambda ws: self.events.append(f"delete {ws}"))
+
+    def _step(self, name, result=None):
+        def action():
+            self.events.append(name)
+            return result
+
+        return action
+
+    def test_dependencies(self):
+        pipeline = (
+            Pipeline(self.deleteWorkspace)
+            .addStep("a", self._step("a"), reads=["input"], writes=["x"])
+            .addStep("b", self._step("b"), reads=["input"], writes=["y"])
+            .addStep("c", self._step("c"), reads=["x", "y"], writes=["z"])
+            .addStep("d", self._step("d"), reads=["x"])
+            # write-after-read
+            .addStep("e", self._step("e"), writes=["y"])
+        )
+        assert pipeline.dependencies() == {
+            "a": set(),
+            "b": set(),
+            "c": {"a", "b"},
+            "d": {"a"},
+            "e": {"b", "c"},
+        }
+
+    def test_duplicateStepName(self):
+        pipeline = Pipeline(self.deleteWorkspace).addStep("a", self._step("a"))
+        with pytest.raises(ValueError, match="already been added"):
+            pipeline.addStep("a", self._step("a"))
+
+    def test_execute_sequential(self):
+        pipeline = (
+            Pipeline(self.deleteWorkspace, maxWorkers=1)
+            .addStep("a", self._step("a", 1), reads=["input"], writes=["x"])
+            .addStep("b", self._step("b", 2), reads=["x"], writes=["y"])
+            .addStep("c", self._step("c", 3), reads=["x", "y"], writes=["output"])
+            .keep("output")
+        )
+        results = pipeline.execute()
+
+        assert results == {"a": 1, "b": 2, "c": 3}
+        # each intermediate is deleted after its last consumer; inputs and kept workspaces are not deleted
+        assert self.events == ["a", "b", "c", "delete x", "delete y"]
+
+    def test_execute_inPlace(self):
+        # a workspace modified in place is deleted only after its final use
+        pipeline = (
+            Pipeline(self.deleteWorkspace, maxWorkers=1)
+            .addStep("a", self._step("a"), reads=["input"], writes=["x"])
+            .addStep("b", self._step("b"), reads=["x"], writes=["x"])
+            .addStep("c", self._step("c"), reads=["x"], writes=["output"])
+            .addStep("d", self._step("d"), reads=["output"])
+            .keep("output")
+        )
+        pipeline.execute()
+        assert self.events == ["a", "b", "c", "delete x", "d"]
+
+    def test_intermediates_inputModifiedInPlace(self):
+        # an input which is modified in place is not an intermediate, even after it has been written
+        pipeline = (
+            Pipeline(self.deleteWorkspace, maxWorkers=1)
+            .addStep("a", self._step("a"), reads=["input"], writes=["input"])
+            .addStep("b", self._step("b"), reads=["other"])
+            .addStep("c", self._step("c"), reads=["input"], writes=["x", "other"])
+            .addStep("d", self._step("d"), reads=["x"], writes=["output"])
+            .keep("output")
+        )
+        assert pipeline.intermediates() == {"x"}
+        pipeline.execute()
+        assert self.events == ["a", "b", "c", "d", "delete x"]
+
+    def test_execute_configDefault(self):
+        with Config_override("recipe.pipeline.maxWorkers", 3):
+            assert Pipeline(self.deleteWorkspace).maxWorkers == 3
+
+    def test_execute_concurrent(self):
+        # independent steps run concurrently: neither step can complete unless both are running
+        barrier = threading.Barrier(2, timeout=10.0)
+
+        def _independent(name):
+            def action():
+                barrier.wait()
+                return name
+
+            return action
+
+        pipeline = (
+            Pipeline(self.deleteWorkspace, maxWorkers=2)
+            .addStep("a", _independent("a"), reads=["input"], writes=["x"])
+            .addStep("b", _independent("b"), reads=["input"], writes=["y"])
+            .addStep("c", self._step("c", "c"), reads=["x", "y"], writes=["output"])
+            .keep("output")
+        )
+        results = pipeline.execute()
+
+        assert results == {"a": "a", "b": "b", "c": "c"}
+        assert self.events[0] == "c"
+        assert sorted(self.events[1:]) == ["delete x", "delete y"]
+
+    def test_execute_concurrent_ordering(self):
+        # dependent steps never overlap
+        running = set()
+        overlaps = []
+
+        def _dependent(name, dependency):
+            def action():
+                if dependency in running:
+                    overlaps.append((dependency, name))
+                running.add(name)
+                self.events.append(name)
+                running.discard(name)
+
+            return action
+
+        pipeline = (
+            Pipeline(self.deleteWorkspace, maxWorkers=4)
+            .addStep("a", _dependent("a", None), writes=["x"])
+            .addStep("b", _dependent("b", "a"), reads=["x"], writes=["x"])
+            .addStep("c", _dependent("c", "b"), reads=["x"], writes=["output"])
+            .keep("output")
+        )
+        pipeline.execute()
+
+        assert not overlaps
+        assert self.events == ["a", "b", "c", "delete x"]
+
+    def test_execute_failure(self):
+        for maxWorkers in (1, 2):
+            self.events.clear()
+            self.deleteWorkspace.reset_mock()
+
+            def _fail():
+                raise RuntimeError("boom")
+
+            pipeline = (
+                Pipeline(self.deleteWorkspace, maxWorkers=maxWorkers)
+                .addStep("a", self._step("a"), reads=["input"], writes=["x"])
+                .addStep("b", _fail, reads=["x"], writes=["y"])
+                .addStep("c", self._step("c"), reads=["y"], writes=["output"])
+            )
+            with pytest.raises(RuntimeError, match="boom"):
+                pipeline.execute()
+
+            # the dependent step is not started, and the intermediates are retained
+            assert "c" not in self.events
+            self.deleteWorkspace.assert_not_called()
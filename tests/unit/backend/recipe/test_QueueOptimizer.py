@@ -0,0 +1,177 @@
+from unittest import TestCase
+
+import pytest
+from util.Config_helpers import Config_override
+
+from snapred.backend.recipe.QueueOptimizer import QueueOptimizer
+from snapred.meta.Callback import callback
+
+
+class TestQueueOptimizer(TestCase):
+    def _entry(self, name, **kwargs):
+        outputs = {"OutputWorkspace": callback(str)} if "OutputWorkspace" in kwargs else {}
+        return (name, f"{name} message", kwargs, outputs)
+
+    def _optimize(self, queue, rules):
+        return QueueOptimizer(rules=rules).optimize(queue)
+
+    def test_unknownRule(self):
+        with pytest.raises(ValueError, match="unknown queue-optimization rule 'noSuchRule'"):
+            QueueOptimizer(rules=["noSuchRule"])
+
+    def test_configDefault(self):
+        with Config_override("recipe.queue.optimization.rules", ["fuseScale"]):
+            assert [rule.__func__ for rule in QueueOptimizer()._rules] == [QueueOptimizer._fuseScale]
+
+    def test_deadClone(self):
+        queue = [
+            self._entry("CloneWorkspace", InputWorkspace="a", OutputWorkspace="b"),
+            self._entry("Rebin", InputWorkspace="a", OutputWorkspace="c", Params="1,1,10"),
+            self._entry("WashDishes", WorkspaceList=["b", "d"]),
+        ]
+        optimized, aliases = self._optimize(queue, ["deadClone"])
+        assert optimized == queue[1:]
+        assert aliases == []
+
+    def test_deadClone_used(self):
+        queue = [
+            self._entry("CloneWorkspace", InputWorkspace="a", OutputWorkspace="b"),
+            self._entry("Rebin", InputWorkspace="b", OutputWorkspace="c", Params="1,1,10"),
+            self._entry("WashDishes", Workspace="b"),
+        ]
+        assert self._optimize(queue, ["deadClone"])[0] == queue
+
+        # a workspace name derived from an argument is assumed to be used
+        queue = [
+            self._entry("CloneWorkspace", InputWorkspace="a", OutputWorkspace="b_group"),
+            self._entry("SomeAlgorithm", Prefix="b"),
+            self._entry("WashDishes", Workspace="b_group"),
+        ]
+        assert self._optimize(queue, ["deadClone"])[0] == queue
+
+    def test_deadClone_unresolvedReference(self):
+        # an output callback from earlier in the queue might be the clone
+        queue = [
+            self._entry("CloneWorkspace", InputWorkspace="a", OutputWorkspace="b"),
+            self._entry("Rebin", InputWorkspace=callback(str), OutputWorkspace="c", Params="1,1,10"),
+            self._entry("WashDishes", Workspace="b"),
+        ]
+        assert self._optimize(queue, ["deadClone"])[0] == queue
+
+    def test_deadClone_deleteWorkspace(self):
+        # `DeleteWorkspace` fails for a workspace that doesn't exist: the clone is required
+        queue = [
+            self._entry("CloneWorkspace", InputWorkspace="a", OutputWorkspace="b"),
+            self._entry("DeleteWorkspace", Workspace="b"),
+        ]
+        assert self._optimize(queue, ["deadClone"])[0] == queue
+
+    def test_deadClone_cisMode(self):
+        queue = [
+            self._entry("CloneWorkspace", InputWorkspace="a", OutputWorkspace="b"),
+            self._entry("WashDishes", Workspace="b"),
+        ]
+        with (
+            Config_override("cis_mode.enabled", True),
+            Config_override("cis_mode.preserveDiagnosticWorkspaces", True),
+        ):
+            assert self._optimize(queue, ["deadClone"])[0] == queue
+
+    def test_redundantConvertUnits(self):
+        first = self._entry("ConvertUnits", InputWorkspace="tof", OutputWorkspace="dsp", Target="dSpacing")
+        second = self._entry("ConvertUnitsIfRequired", InputWorkspace="dsp", OutputWorkspace="dsp", Target="dSpacing")
+        # a later algorithm using the removed algorithm's output
+        later = self._entry("Rebin", InputWorkspace=second[3]["OutputWorkspace"], OutputWorkspace="c")
+        optimized, aliases = self._optimize([first, second, later], ["redundantConvertUnits"])
+
+        assert [entry[0] for entry in optimized] == ["ConvertUnits", "Rebin"]
+        assert aliases == [(first[3]["OutputWorkspace"], second[3]["OutputWorkspace"])]
+        assert later[2]["InputWorkspace"] is first[3]["OutputWorkspace"]
+
+    def test_redundantConvertUnits_callbackInput(self):
+        first = self._entry("ConvertUnits", InputWorkspace="tof", OutputWorkspace="dsp", Target="dSpacing")
+        second = self._entry(
+            "ConvertUnits", InputWorkspace=first[3]["OutputWorkspace"], OutputWorkspace="dsp", Target="dSpacing"
+        )
+        optimized, _ = self._optimize([first, second], ["redundantConvertUnits"])
+        assert optimized == [first]
+
+    def test_redundantConvertUnits_kept(self):
+        first = self._entry("ConvertUnits", InputWorkspace="tof", OutputWorkspace="dsp", Target="dSpacing")
+        for second in (
+            # a different target
+            self._entry("ConvertUnits", InputWorkspace="dsp", OutputWorkspace="dsp", Target="MomentumTransfer"),
+            # not in place
+            self._entry("ConvertUnits", InputWorkspace="dsp", OutputWorkspace="other", Target="dSpacing"),
+            # a different input
+            self._entry("ConvertUnits", InputWorkspace="other", OutputWorkspace="dsp", Target="dSpacing"),
+            # different arguments
+            self._entry("ConvertUnits", InputWorkspace="dsp", OutputWorkspace="dsp", Target="dSpacing", EMode="Direct"),
+        ):
+            queue = [first, second]
+            assert self._optimize(queue, ["redundantConvertUnits"])[0] == queue
+
+        # not consecutive
+        queue = [
+            first,
+            self._entry("Scale", InputWorkspace="dsp", OutputWorkspace="dsp", Factor=2.0),
+            self._entry("ConvertUnits", InputWorkspace="dsp", OutputWorkspace="dsp", Target="dSpacing"),
+        ]
+        assert self._optimize(queue, ["redundantConvertUnits"])[0] == queue
+
+    def test_fuseScale(self):
+        queue = [
+            self._entry("Scale", InputWorkspace="a", OutputWorkspace="b", Factor=2.0),
+            self._entry("Scale", InputWorkspace="b", OutputWorkspace="b", Factor=3.0),
+            self._entry("Scale", InputWorkspace="b", OutputWorkspace="b", Factor=0.5, Operation="Multiply"),
+            self._entry("Scale", InputWorkspace="b", OutputWorkspace="b", Factor=1.0, Operation="Add"),
+            self._entry("Scale", InputWorkspace="b", OutputWorkspace="b", Factor=2.0, Operation="Add"),
+        ]
+        optimized, aliases = self._optimize(queue, ["fuseScale"])
+        assert [(entry[2]["InputWorkspace"], entry[2]["Factor"]) for entry in optimized] == [("a", 3.0), ("b", 3.0)]
+        assert len(aliases) == 3
+        assert all(source is optimized[0][3]["OutputWorkspace"] for source, _ in aliases[:2])
+
+    def test_duplicateWash(self):
+        queue = [
+            self._entry("WashDishes", WorkspaceList=["a", "b", "b"]),
+            self._entry("Rebin", InputWorkspace="c", OutputWorkspace="b"),
+            self._entry("WashDishes", Workspace="a", WorkspaceList=["b", "c"]),
+            self._entry("WashDishes", Workspace="c"),
+        ]
+        optimized, _ = self._optimize(queue, ["duplicateWash"])
+        assert [entry[2] for entry in optimized] == [
+            {"WorkspaceList": ["a", "b"]},
+            queue[1][2],
+            # "b" is re-created
+            {"Workspace": "", "WorkspaceList": ["b", "c"]},
+        ]
+
+    def test_duplicateWash_unresolvedReference(self):
+        queue = [
+            self._entry("WashDishes", Workspace="a"),
+            self._entry("Rebin", InputWorkspace=callback(str), OutputWorkspace="b"),
+            self._entry("WashDishes", Workspace="a"),
+        ]
+        assert self._optimize(queue, ["duplicateWash"])[0] == queue
+
+    def test_duplicateWash_deleteWorkspace(self):
+        # deletions by `DeleteWorkspace` are tracked, but `DeleteWorkspace` itself is never removed
+        queue = [
+            self._entry("DeleteWorkspace", Workspace="a"),
+            self._entry("WashDishes", Workspace="a"),
+            self._entry("DeleteWorkspace", Workspace="a"),
+        ]
+        assert self._optimize(queue, ["duplicateWash"])[0] == [queue[0], queue[2]]
+
+    def test_duplicateWash_cisMode(self):
+        # a preserved workspace might still be deleted later
+        queue = [
+            self._entry("WashDishes", Workspace="a"),
+            self._entry("DeleteWorkspace", Workspace="a"),
+        ]
+        with (
+            Config_override("cis_mode.enabled", True),
+            Config_override("cis_mode.preserveDiagnosticWorkspaces", True),
+        ):
+            assert self._optimize(queue, ["duplicateWash"])[0] == queue
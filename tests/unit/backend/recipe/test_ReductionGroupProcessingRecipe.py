@@ -90,6 +90,30 @@ class ReductionGroupProcessingRecipeTest(unittest.TestCase):
         assert mockSnapper.FocusSpectraAlgorithm.called
         assert mockSnapper.NormalizeByCurrentButTheCorrectWay.called
 
+    def test_cook_noNormalizeByCurrent(self):
+        untensils = Utensils()
+        mockSnapper = unittest.mock.Mock()
+
+        untensils.mantidSnapper = mockSnapper
+        recipe = ReductionGroupProcessingRecipe(utensils=untensils)
+        recipe._validateIngredients = unittest.mock.Mock(return_value=True)
+        recipe._validateWSUnits = unittest.mock.Mock()
+        groceries = {
+            "inputWorkspace": "input",
+            "outputWorkspace": "output",
+            "groupingWorkspace": "groupingWS",
+        }
+        ingredients = self.mockIngredients()
+        ingredients.normalizeByCurrent = False
+        with mock.patch(ModulePatch.format("WriteWorkspaceMetadata")) as mockMetadataRecipe:
+            output = recipe.cook(ingredients, groceries)
+            assert not mockMetadataRecipe.called
+
+        assert output == groceries["outputWorkspace"]
+        assert mockSnapper.executeQueue.called
+        assert mockSnapper.FocusSpectraAlgorithm.called
+        assert not mockSnapper.NormalizeByCurrentButTheCorrectWay.called
+
     def test_cater(self):
         untensils = Utensils()
         mockSnapper = unittest.mock.Mock()
@@ -156,7 +156,7 @@ class ReductionRecipeTest(TestCase):
         outputWs = (
             wng.run().runNumber("555").lite(True).unit(wng.Units.DSP).group(wng.Groups.UNFOC).hidden(True).build()
         )
-        recipe.mantidSnapper.ConvertUnits.assert_has_calls(
+        recipe.mantidSnapper.ConvertUnitsIfRequired.assert_has_calls(
             [
                 mock.call(
                     "Converting unfocused data to TOF",
@@ -164,12 +164,6 @@ class ReductionRecipeTest(TestCase):
                     OutputWorkspace=outputWs,
                     Target="TOF",
                 ),
-                mock.call(
-                    "Converting unfocused data to dSpacing",
-                    InputWorkspace=outputWs,
-                    OutputWorkspace=outputWs,
-                    Target="dSpacing",
-                ),
                 mock.call(
                     f"Converting unfocused data to {units}",
                     InputWorkspace=outputWs,
@@ -178,6 +172,9 @@ class ReductionRecipeTest(TestCase):
                 ),
             ]
         )
+        # there are no intermediate conversions
+        assert recipe.mantidSnapper.ConvertUnitsIfRequired.call_count == 2
+        recipe.mantidSnapper.ConvertUnits.assert_not_called()
         recipe.mantidSnapper.executeQueue.assert_called()
         recipe.mantidSnapper.reset_mock()
 
@@ -186,7 +183,7 @@ class ReductionRecipeTest(TestCase):
         outputWs = (
             wng.run().runNumber("555").lite(True).unit(wng.Units.QSP).group(wng.Groups.UNFOC).hidden(True).build()
         )
-        recipe.mantidSnapper.ConvertUnits.assert_has_calls(
+        recipe.mantidSnapper.ConvertUnitsIfRequired.assert_has_calls(
             [
                 mock.call(
                     "Converting unfocused data to TOF",
@@ -194,12 +191,6 @@ class ReductionRecipeTest(TestCase):
                     OutputWorkspace=outputWs,
                     Target="TOF",
                 ),
-                mock.call(
-                    "Converting unfocused data to dSpacing",
-                    InputWorkspace=outputWs,
-                    OutputWorkspace=outputWs,
-                    Target="dSpacing",
-                ),
                 mock.call(
                     f"Converting unfocused data to {units}",
                     InputWorkspace=outputWs,
@@ -216,7 +207,7 @@ class ReductionRecipeTest(TestCase):
         outputWs = (
             wng.run().runNumber("555").lite(True).unit(wng.Units.LAM).group(wng.Groups.UNFOC).hidden(True).build()
         )
-        recipe.mantidSnapper.ConvertUnits.assert_has_calls(
+        recipe.mantidSnapper.ConvertUnitsIfRequired.assert_has_calls(
             [
                 mock.call(
                     "Converting unfocused data to TOF",
@@ -224,12 +215,6 @@ class ReductionRecipeTest(TestCase):
                     OutputWorkspace=outputWs,
                     Target="TOF",
                 ),
-                mock.call(
-                    "Converting unfocused data to dSpacing",
-                    InputWorkspace=outputWs,
-                    OutputWorkspace=outputWs,
-                    Target="dSpacing",
-                ),
                 mock.call(
                     f"Converting unfocused data to {units}",
                     InputWorkspace=outputWs,
@@ -246,7 +231,7 @@ class ReductionRecipeTest(TestCase):
         outputWs = (
             wng.run().runNumber("555").lite(True).unit(wng.Units.TOF).group(wng.Groups.UNFOC).hidden(True).build()
         )
-        recipe.mantidSnapper.ConvertUnits.assert_has_calls(
+        recipe.mantidSnapper.ConvertUnitsIfRequired.assert_has_calls(
             [
                 mock.call(
                     "Converting unfocused data to TOF",
@@ -254,12 +239,6 @@ class ReductionRecipeTest(TestCase):
                     OutputWorkspace=outputWs,
                     Target="TOF",
                 ),
-                mock.call(
-                    "Converting unfocused data to dSpacing",
-                    InputWorkspace=outputWs,
-                    OutputWorkspace=outputWs,
-                    Target="dSpacing",
-                ),
                 mock.call(
                     f"Converting unfocused data to {units}",
                     InputWorkspace=outputWs,
@@ -301,7 +280,7 @@ class ReductionRecipeTest(TestCase):
             "Applying pixel mask to unfocused data", MaskWorkspace=maskWs, OutputWorkspace=preOutputWs
         )
 
-        recipe.mantidSnapper.ConvertUnits.assert_has_calls(
+        recipe.mantidSnapper.ConvertUnitsIfRequired.assert_has_calls(
             [
                 mock.call(
                     "Converting unfocused data to TOF",
@@ -309,12 +288,6 @@ class ReductionRecipeTest(TestCase):
                     OutputWorkspace=preOutputWs,
                     Target="TOF",
                 ),
-                mock.call(
-                    "Converting unfocused data to dSpacing",
-                    InputWorkspace=preOutputWs,
-                    OutputWorkspace=preOutputWs,
-                    Target="dSpacing",
-                ),
                 mock.call(
                     f"Converting unfocused data to {units}",
                     InputWorkspace=preOutputWs,
@@ -10,6 +10,7 @@ import unittest
 import unittest.mock as mock
 from datetime import datetime, timedelta
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import List
 
 import numpy as np
@@ -450,6 +451,7 @@ class TestReductionService(unittest.TestCase):
             record=self.instance._createReductionRecord.return_value,
             unfocusedData=mockReductionRecipe.return_value.cook.return_value["unfocusedWS"],
             executionTime=executionTime,
+            retainedWorkspaces=[],
         )
 
     @mock.patch(thisService + "ReductionResponse")
@@ -587,6 +589,146 @@ class TestReductionService(unittest.TestCase):
         ):
             self.instance.validateReduction(mockRequest)
 
+    def test_isReductionCacheable(self):
+        request = self.request.model_copy(update={"keepUnfocused": False})
+        assert self.instance._isReductionCacheable(request)
+        assert not self.instance._isReductionCacheable(request.model_copy(update={"keepUnfocused": True}))
+        assert not self.instance._isReductionCacheable(request.model_copy(update={"liveDataMode": True}))
+        assert not self.instance._isReductionCacheable(request.model_copy(update={"hooks": {"hook": [mock.Mock()]}}))
+        with Config_override("reduction.cache.enabled", False):
+            assert not self.instance._isReductionCacheable(request)
+
+    def test_reduction_cached(self):
+        request_ = self.request.model_copy(update={"keepUnfocused": False})
+        record = ReductionRecord.model_construct(runNumber=request_.runNumber, timestamp=1.0, provenanceDigest="digest")
+        with (
+            self.progressRecorderMock,
+            mock.patch.object(self.instance, "fetchReductionGroupings") as mockFetchGroupings,
+            mock.patch.object(self.instance, "prepCombinedMask") as mockPrepCombinedMask,
+            mock.patch.object(self.instance, "_reductionProvenance") as mockProvenance,
+            mock.patch.object(self.instance, "_loadCachedReduction", return_value=record) as mockLoadCached,
+            mock.patch.object(self.instance, "fetchReductionGroceries") as mockFetchGroceries,
+            mock.patch(thisService + "ReductionRecipe") as mockReductionRecipe,
+        ):
+            mockFetchGroupings.return_value = {"focusGroups": [], "groupingWorkspaces": []}
+            mockProvenance.return_value.digest.return_value = "digest"
+
+            response = self.instance.reduction(request_)
+
+            mockProvenance.assert_called_once_with(request_, mockPrepCombinedMask.return_value)
+            mockLoadCached.assert_called_once_with(request_, "digest")
+            assert response.record == record
+            assert response.unfocusedData is None
+            mockFetchGroceries.assert_not_called()
+            mockReductionRecipe.assert_not_called()
+
+    @mock.patch(thisService + "ReductionResponse")
+    @mock.patch(thisService + "ReductionRecipe")
+    def test_reduction_notCached(self, mockReductionRecipe, mockReductionResponse):  # noqa: ARG002
+        request_ = self.request.model_copy(update={"keepUnfocused": False})
+        mockReductionRecipe.return_value.cook.return_value = {"outputs": ["one"]}
+        with (
+            self.progressRecorderMock,
+            mock.patch.object(self.instance, "fetchReductionGroupings") as mockFetchGroupings,
+            mock.patch.object(self.instance, "prepCombinedMask") as mockPrepCombinedMask,
+            mock.patch.object(self.instance, "_reductionProvenance") as mockProvenance,
+            mock.patch.object(self.instance, "_loadCachedReduction", return_value=None),
+            mock.patch.object(self.instance, "fetchReductionGroceries") as mockFetchGroceries,
+            mock.patch.object(self.instance, "prepReductionIngredients"),
+            mock.patch.object(self.instance, "_createReductionRecord") as mockCreateRecord,
+            mock.patch.object(self.instance.groceryService, "getSNAPRedWorkspaceMetadata") as mockGetMetadata,
+        ):
+            mockFetchGroupings.return_value = {"focusGroups": [], "groupingWorkspaces": []}
+            mockProvenance.return_value.digest.return_value = "digest"
+            mockGetMetadata.return_value = WorkspaceMetadata(
+                diffcalState=DiffcalStateMetadata.EXISTS,
+                normalizationState=NormalizationStateMetadata.EXISTS,
+            )
+
+            self.instance.reduction(request_)
+
+            # the combined mask is only prepared once
+            mockPrepCombinedMask.assert_called_once_with(request_)
+            mockFetchGroceries.assert_called_once_with(request_, combinedPixelMask=mockPrepCombinedMask.return_value)
+            mockReductionRecipe.return_value.cook.assert_called_once()
+            assert mockCreateRecord.return_value.provenanceDigest == "digest"
+
+    def test_reductionProvenance(self):
+        request_ = self.request.model_copy(update={"keepUnfocused": False, "artificialNormalizationIngredients": None})
+        with (
+            TemporaryDirectory() as tmpDir,
+            mock.patch.object(self.instance, "dataFactoryService") as mockDataFactoryService,
+            mock.patch.object(self.instance, "mantidSnapper") as mockSnapper,
+        ):
+            groupingPath = Path(tmpDir) / "grouping.xml"
+            groupingPath.write_text("apple")
+            request_.focusGroups = [FocusGroup(name="apple", definition=str(groupingPath))]
+            mockDataFactoryService.constructStateId.return_value = ("state", None)
+            mockDataFactoryService.getLatestApplicableCalibrationVersion.return_value = 1
+            mockDataFactoryService.getLatestApplicableNormalizationVersion.return_value = 2
+            mockSnapper.mtd.__getitem__.return_value.extractY.return_value = np.zeros((4, 1))
+
+            provenance = self.instance._reductionProvenance(request_, "mask")
+            assert provenance.runNumber == request_.runNumber
+            assert provenance.state == "state"
+            assert provenance.calibrationVersion == 1
+            assert provenance.normalizationVersion == 2
+            assert set(provenance.groupingDigests.keys()) == {"apple"}
+            assert provenance.combinedMaskDigest is not None
+            digest = provenance.digest()
+            assert self.instance._reductionProvenance(request_, "mask").digest() == digest
+
+            # the digest depends on the combined mask
+            mockSnapper.mtd.__getitem__.return_value.extractY.return_value = np.array([[0.0], [1.0], [0.0], [0.0]])
+            assert self.instance._reductionProvenance(request_, "mask").digest() != digest
+
+            # ... on the grouping definitions
+            mockSnapper.mtd.__getitem__.return_value.extractY.return_value = np.zeros((4, 1))
+            groupingPath.write_text("banana, a longer grouping definition")
+            assert self.instance._reductionProvenance(request_, "mask").digest() != digest
+            groupingPath.write_text("apple")
+
+            # ... and on the versions
+            mockDataFactoryService.getLatestApplicableNormalizationVersion.return_value = 3
+            assert self.instance._reductionProvenance(request_, "mask").digest() != digest
+            digest = self.instance._reductionProvenance(request_, "mask").digest()
+
+            # ... and on the result-affecting constants, but not on the performance-only constants
+            with Config_override("constants.SmoothDataExcludingPeaks.maxWorkers", 1):
+                assert self.instance._reductionProvenance(request_, "mask").digest() == digest
+            with Config_override("constants.CropFactors.lowdSpacingCrop", 0.5):
+                assert self.instance._reductionProvenance(request_, "mask").digest() != digest
+
+            # no normalization will be used
+            request_.continueFlags = ContinueWarning.Type.MISSING_NORMALIZATION
+            assert self.instance._reductionProvenance(request_, "mask").normalizationVersion is None
+
+            # there is no combined mask
+            assert self.instance._reductionProvenance(request_, "").combinedMaskDigest is None
+
+    def test_loadCachedReduction(self):
+        record = ReductionRecord.model_construct(runNumber="123", useLiteMode=False, timestamp=1.0)
+        with mock.patch.object(self.instance, "dataFactoryService") as mockDataFactoryService:
+            mockDataFactoryService.findReductionRecord.return_value = record
+            actual = self.instance._loadCachedReduction(self.request, "digest")
+            mockDataFactoryService.findReductionRecord.assert_called_once_with(
+                self.request.runNumber, self.request.useLiteMode, "digest"
+            )
+            mockDataFactoryService.getReductionData.assert_called_once_with("123", False, 1.0)
+            assert actual == mockDataFactoryService.getReductionData.return_value
+
+    def test_loadCachedReduction_none(self):
+        with mock.patch.object(self.instance, "dataFactoryService") as mockDataFactoryService:
+            mockDataFactoryService.findReductionRecord.return_value = None
+            assert self.instance._loadCachedReduction(self.request, "digest") is None
+            mockDataFactoryService.getReductionData.assert_not_called()
+
+    def test_loadCachedReduction_error(self):
+        # e.g. some of the output workspaces are still in the ADS
+        with mock.patch.object(self.instance, "dataFactoryService") as mockDataFactoryService:
+            mockDataFactoryService.getReductionData.side_effect = RuntimeError("already exists in the ADS")
+            assert self.instance._loadCachedReduction(self.request, "digest") is None
+
     def test_markWorkspaceMetadata(self):
         request = mock.Mock(
             continueFlags=ContinueWarning.Type.UNSET, alternativeState=None, alternativeCalibrationFilePath=None
@@ -642,6 +784,113 @@ class TestReductionService(unittest.TestCase):
         self.instance._markWorkspaceMetadata(request, wsName)
         self.instance.groceryService.writeWorkspaceMetadataAsTags.assert_called_once_with(wsName, metadata)
 
+    def test_isIncrementalLiveData(self):
+        request = self.request.model_copy(update={"keepUnfocused": False, "liveDataMode": True})
+        assert self.instance._isIncrementalLiveData(request)
+        assert self.instance._isIncrementalLiveData(request.model_copy(update={"liveDataDuration": timedelta(0)}))
+        assert not self.instance._isIncrementalLiveData(request.model_copy(update={"liveDataMode": False}))
+        assert not self.instance._isIncrementalLiveData(request.model_copy(update={"keepUnfocused": True}))
+        assert not self.instance._isIncrementalLiveData(
+            request.model_copy(update={"liveDataDuration": timedelta(seconds=10)})
+        )
+        with Config_override("liveData.incremental", False):
+            assert not self.instance._isIncrementalLiveData(request)
+        with Config_override("mantid.workspace.normalizeByBeamMonitor", True):
+            assert not self.instance._isIncrementalLiveData(request)
+
+    def test_liveDataStartTime(self):
+        request = self.request.model_copy(update={"keepUnfocused": False, "liveDataMode": True})
+        resident = {"accumulator", "vanadium"}
+        self.instance._liveDataAccumulation = None
+        with (
+            mock.patch.object(self.instance, "mantidSnapper") as mockSnapper,
+            mock.patch.object(self.instance.groceryService, "deleteWorkspaceUnconditional") as mockDelete,
+        ):
+            mockSnapper.mtd.doesExist.side_effect = lambda ws: ws in resident
+
+            # the first cycle loads the complete run
+            assert self.instance._liveDataStartTime(request) is None
+            accumulation = self.instance._liveDataAccumulation
+            assert (accumulation.runNumber, accumulation.timestamp) == (request.runNumber, request.timestamp)
+
+            endTime = datetime(2024, 1, 1, 12, 0, 0)
+            self.instance._updateLiveDataAccumulation(endTime, ["accumulator", "vanadium"])
+
+            # the next cycle starts after the last loaded pulse
+            assert self.instance._liveDataStartTime(request) == endTime + timedelta(microseconds=1)
+
+            # a new request restarts the accumulation
+            newRequest = request.model_copy(update={"timestamp": request.timestamp + 1.0})
+            assert self.instance._liveDataStartTime(newRequest) is None
+            mockDelete.assert_has_calls([mock.call("accumulator"), mock.call("vanadium")])
+            assert self.instance._liveDataAccumulation.timestamp == newRequest.timestamp
+            assert self.instance._liveDataAccumulation.retainedWorkspaces == []
+
+            # missing accumulators also restart the accumulation
+            self.instance._updateLiveDataAccumulation(endTime, ["accumulator", "missing"])
+            mockDelete.reset_mock()
+            assert self.instance._liveDataStartTime(newRequest) is None
+            mockDelete.assert_called_once_with("accumulator")
+
+            # an empty chunk does not change the end time
+            self.instance._updateLiveDataAccumulation(endTime, ["vanadium"])
+            self.instance._updateLiveDataAccumulation(None, ["vanadium"])
+            assert self.instance._liveDataStartTime(newRequest) == endTime + timedelta(microseconds=1)
+        self.instance._liveDataAccumulation = None
+
+    def test_pulseTimeMax(self):
+        with mock.patch.object(self.instance, "mantidSnapper") as mockSnapper:
+            ws = mockSnapper.mtd.__getitem__.return_value
+            ws.getNumberEvents.return_value = 10
+            ws.getPulseTimeMax.return_value.to_datetime64.return_value = np.datetime64("2024-01-01T12:00:00.123456789")
+            assert self.instance._pulseTimeMax("input") == datetime(2024, 1, 1, 12, 0, 0, 123456)
+
+            ws.getNumberEvents.return_value = 0
+            assert self.instance._pulseTimeMax("input") is None
+
+    @mock.patch(thisService + "ReductionRecipe")
+    @mock.patch(thisService + "LiveDataReductionRecipe")
+    def test_reduction_incrementalLiveData(self, mockLiveDataRecipe, mockReductionRecipe):
+        request_ = self.request.model_copy(update={"keepUnfocused": False, "liveDataMode": True})
+        mockLiveDataRecipe.return_value.cook.return_value = {
+            "outputs": ["one"],
+            "retainedWorkspaces": ["accumulator"],
+        }
+        startTime = datetime(2024, 1, 1, 12, 0, 0)
+        endTime = datetime(2024, 1, 1, 12, 0, 5)
+        with (
+            self.progressRecorderMock,
+            mock.patch.object(self.instance, "fetchReductionGroupings") as mockFetchGroupings,
+            mock.patch.object(self.instance, "_liveDataStartTime", return_value=startTime),
+            mock.patch.object(self.instance, "_pulseTimeMax", return_value=endTime),
+            mock.patch.object(self.instance, "_updateLiveDataAccumulation") as mockUpdate,
+            mock.patch.object(self.instance, "fetchReductionGroceries") as mockFetchGroceries,
+            mock.patch.object(self.instance, "prepReductionIngredients"),
+            mock.patch.object(self.instance, "_createReductionRecord") as mockCreateRecord,
+            mock.patch.object(self.instance.groceryService, "getSNAPRedWorkspaceMetadata") as mockGetMetadata,
+        ):
+            mockFetchGroupings.return_value = {"focusGroups": [], "groupingWorkspaces": []}
+            mockFetchGroceries.return_value = {"inputWorkspace": "input"}
+            mockGetMetadata.return_value = WorkspaceMetadata(
+                diffcalState=DiffcalStateMetadata.EXISTS,
+                normalizationState=NormalizationStateMetadata.EXISTS,
+            )
+            mockCreateRecord.return_value = ReductionRecord.model_construct(runNumber=request_.runNumber)
+
+            response = self.instance.reduction(request_)
+
+            mockFetchGroceries.assert_called_once_with(request_, liveDataStartTime=startTime)
+            mockReductionRecipe.assert_not_called()
+            mockUpdate.assert_called_once_with(endTime, ["accumulator"])
+            assert response.retainedWorkspaces == ["accumulator"]
+
+            # a failed cycle restarts the accumulation
+            self.instance._liveDataAccumulation = mock.sentinel.accumulation
+            mockLiveDataRecipe.return_value.cook.side_effect = RuntimeError("boom")
+            with pytest.raises(RuntimeError, match="boom"):
+                self.instance.reduction(request_)
+            assert self.instance._liveDataAccumulation is None
+
     def test_saveReduction(self):
         with (
             mock.patch.object(self.instance.dataExportService, "exportReductionRecord") as mockExportRecord,
@@ -662,6 +911,29 @@ class TestReductionService(unittest.TestCase):
                 mockExportRecord.assert_called_once_with(record)
                 mockExportData.assert_called_once_with(record)
 
+    def test_saveReduction_alreadySaved(self):
+        # a re-loaded reduction is not saved again
+        record = ReductionRecord.model_construct(
+            runNumber="123456", useLiteMode=True, timestamp=1.0, provenanceDigest="digest"
+        )
+        request = ReductionExportRequest(record=record)
+        with (
+            mock.patch.object(self.instance.dataExportService, "exportReductionRecord") as mockExportRecord,
+            mock.patch.object(self.instance.dataExportService, "exportReductionData") as mockExportData,
+            mock.patch.object(self.instance.dataFactoryService, "getReductionRecord") as mockGetRecord,
+        ):
+            mockGetRecord.return_value = record
+            self.instance.saveReduction(request)
+            mockGetRecord.assert_called_once_with("123456", True, 1.0)
+            mockExportRecord.assert_not_called()
+            mockExportData.assert_not_called()
+
+            # no record has been saved at this timestamp
+            mockGetRecord.side_effect = RuntimeError("does not exist")
+            self.instance.saveReduction(request)
+            mockExportRecord.assert_called_once_with(record)
+            mockExportData.assert_called_once_with(record)
+
     def test_loadReduction(self):
         ## this makes codecov happy
         with pytest.raises(NotImplementedError):
@@ -63,3 +63,55 @@ def test_preloadImports_exception_handling(capsys):  # noqa: ARG001
             mock.call("Warning: Failed to register SNAPRed with Mantid: Test exception"),
         ]
         mock_print.assert_has_calls(expected_calls)
+
+
+def test_replay(tmp_path, capsys):
+    from snapred.backend.profiling.AlgorithmReplay import ReplayBundle, ReplayResult, ReplayStep
+
+    bundlePath = tmp_path / "bundle.json"
+    step = ReplayStep(name="Algo", message="a message", properties={"Factor": 2.0}, wallTime=1.0)
+    ReplayBundle(snapredVersion="1.0", host="host", created=0.0, steps=[step]).save(bundlePath)
+
+    scriptPath = tmp_path / "script.py"
+    assert main(["replay", str(bundlePath), "--script", str(scriptPath)]) == 0
+    assert "Algo(Factor=2.0)" in scriptPath.read_text()
+
+    with mock.patch("snapred.backend.profiling.AlgorithmReplay.AlgorithmReplay") as mockReplay:
+        result = ReplayResult(name="Algo", message="a message", capturedTime=1.0, wallTime=0.5)
+        mockReplay.return_value.run.return_value = [result]
+        assert main(["replay", str(bundlePath), "--no-compare"]) == 0
+        assert mockReplay.call_args.kwargs == {"compare": False, "rtol": None}
+        assert "Algo" in capsys.readouterr().out
+
+        result.differences = {"ws": ["ySum: 6.0 != 7.0"]}
+        assert main(["replay", str(bundlePath)]) == 1
+
+
+def test_profile(capsys):
+    ranking = [("ReductionService.reduction", 3, 120.0), ("ReductionService.reduction.reduce-data", 3, 90.0)]
+    with mock.patch("snapred.backend.profiling.ProgressRecorder.ProgressRecorder") as mockRecorder:
+        mockRecorder.rankSteps.return_value = ranking
+        assert main(["profile", "--resource", "cpuTime", "--top", "1"]) == 0
+        mockRecorder.rankSteps.assert_called_once_with("cpuTime")
+        output = capsys.readouterr().out
+        assert "cpuTime (s)" in output
+        assert "ReductionService.reduction " in output
+        assert "reduce-data" not in output
+
+        mockRecorder.rankSteps.return_value = []
+        assert main(["profile"]) == 0
+        assert capsys.readouterr().out.count("<no measurements>") == mockRecorder.rankSteps.call_count - 1
+
+
+def test_subcommand_programName():
+    # the program name is only removed from `sys.argv`: explicit `args` are used as given
+    with (
+        mock.patch("snapred.__main__.worker_start", return_value=0) as mockStart,
+        mock.patch("snapred.__main__.sys.argv", ["/usr/bin/snapred", "worker", "--status"]),
+    ):
+        assert main() == 0
+        mockStart.assert_called_once_with(["--status"])
+
+        mockStart.reset_mock()
+        assert main(["worker", "--exit-when-empty"]) == 0
+        mockStart.assert_called_once_with(["--exit-when-empty"])
@@ -145,6 +145,17 @@ def testReductionPixelMaskName():
     )
 
 
+def testReductionLiveDataNames():
+    assert (  # "live_accumulator,{group},{runNumber},{timestamp}"
+        f"_live_accumulator_column_{fRunNumber}_{fTimestamp}"
+        == wng.reductionLiveDataAccumulator().group("column").runNumber(runNumber).timestamp(timestamp).build()
+    )
+    assert (  # "live_normalization,{group},{runNumber},{timestamp}"
+        f"_live_normalization_column_{fRunNumber}_{fTimestamp}"
+        == wng.reductionLiveDataNormalization().group("column").runNumber(runNumber).timestamp(timestamp).build()
+    )
+
+
 def testUserPixelMaskName():
     numberTag = 1
     # <number tag> is only included when > 1